@@ -4,6 +4,7 @@ import re
 import time
 import json
 import logging
+import threading
 from pathlib import Path
 
 from PyQt5.QtWidgets import QMessageBox, QDialog, QVBoxLayout, QTableWidget, QHeaderView, QTableWidgetItem, QHBoxLayout, \
@@ -19,18 +20,35 @@ from views.fleet_view import FleetView
 from views.settings_view import SettingsView
 from models.equipment_model import EquipmentModel
 from models.hull_model import HullModel
+from models.library_store import LibraryStore, KIND_EQUIPMENT, KIND_HULL, KIND_DESIGN, KIND_FLEET
+from models.search_index import SearchIndex, KIND_MOD_VARIANT
+from models.design_stats import DesignStatEngine
+from models.design_batch import DesignBatchEvaluator, local_design_entry, mod_variant_entries
+from models.loadout_optimizer import LoadoutOptimizer
+from models.navy_design_exporter import NavyDesignExporter, ModuleSlotResolver
+from models.naval_oob_writer import NavalOOBWriter
+from models.fleet_stats import DesignStatTable
+from models.ship_name_index import load_ship_name_lists
 from views.nation_details_view import NationDetailsView
-from utils.path_utils import get_data_dir
+from utils.file_watcher import FileWatcherService, CHANGE_REMOVED
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
+# 全体検索の対象とするライブラリの種別
+SEARCHABLE_KINDS = (KIND_EQUIPMENT, KIND_HULL, KIND_DESIGN)
+# 検索索引の作成時に1回で読み込む索引列の件数
+SEARCH_INDEX_BATCH_SIZE = 2000
+
 
 class AppController(QObject):
     """アプリケーション全体のコントローラークラス"""
 
     # シグナル定義
     mod_changed = pyqtSignal(str)  # MODが変更されたときに発射（MODパスを送信）
+    library_record_changed = pyqtSignal(str, str, str)  # 外部でデータが変更されたとき（種別, ID, 変更の種類）
+    mod_file_changed = pyqtSignal(str, str, str)  # MODのファイルが変更されたとき（カテゴリ, パス, 変更の種類）
+    search_index_ready = pyqtSignal()  # 検索索引（MODの設計バリアントを含む）の作成が終わったとき（作成したスレッドから発射）
 
     def __init__(self, app_settings):
         super().__init__()  # QObjectの初期化
@@ -39,11 +57,19 @@ class AppController(QObject):
         self.main_window = None
         self.nation_details_view = None
 
+        # ライブラリのデータベース（初回は既存のJSONディレクトリから移行）
+        self.library_store = LibraryStore(self.app_settings.library_db_file)
+        self.library_store.migrate_json_directory(KIND_DESIGN, self.app_settings.design_dir)
+        self.library_store.migrate_json_directory(KIND_FLEET, self.app_settings.fleet_dir)
+
         # 装備モデルの初期化（データディレクトリをapp_settingsから取得）
-        self.equipment_model = EquipmentModel(data_dir=self.app_settings.equipment_dir)
+        record_cache_size = self.app_settings.get_setting("record_cache_size") or 2048
+        self.equipment_model = EquipmentModel(data_dir=self.app_settings.equipment_dir, store=self.library_store,
+                                              cache_size=record_cache_size)
 
         # 船体モデルの初期化
-        self.hull_model = HullModel(data_dir=os.path.join(self.app_settings.data_dir, "hulls"))
+        self.hull_model = HullModel(data_dir=os.path.join(self.app_settings.data_dir, "hulls"),
+                                    store=self.library_store, cache_size=record_cache_size)
 
         # 初回起動時の処理
         if self.app_settings.get_setting("first_run"):
@@ -53,6 +79,308 @@ class AppController(QObject):
         self.current_mod = self.app_settings.get_current_mod()
         print(f"AppController初期化: current_mod = {self.current_mod}")
 
+        # ファイル監視（外部での変更をキャッシュ・索引に差分で反映）
+        self.file_watcher = FileWatcherService(self)
+        self.file_watcher.file_changed.connect(self.on_watched_file_changed)
+        self.watch_library_directories()
+        self.mod_changed.connect(self.watch_mod_directories)
+        if self.current_mod and self.current_mod.get("path"):
+            self.watch_mod_directories(self.current_mod["path"])
+
+        # 設計の性能計算（一括評価で使用）
+        self.design_stat_engine = DesignStatEngine()
+
+        # 編成の集計用の設計の性能表。設計・船体・装備・MODの設計バリアントが変更されると作り直す
+        self._design_stat_table = None
+        self.design_stat_table_version = 0
+        self.library_store.add_change_listener(self._on_design_stat_source_changed)
+        self.mod_changed.connect(self._invalidate_design_stat_table)
+        self.mod_file_changed.connect(self._on_mod_file_changed_for_design_stats)
+
+        # 現在のMODの艦名リスト（common/units/names_ships）。MODの変更・ファイルの変更で読み直す
+        self._ship_name_lists = None
+        self.mod_changed.connect(self._invalidate_ship_name_lists)
+        self.mod_file_changed.connect(self._on_mod_file_changed_for_ship_names)
+
+        # 装備カテゴリー -> スロットの候補（ID・名前・種別）。装備が保存・削除されると作り直す
+        self._equipment_candidates = {}
+        self.equipment_candidates_version = 0
+        self.library_store.add_change_listener(self._on_equipment_store_changed)
+
+        # 全体検索の索引（バックグラウンドで作成し、以降は保存・削除のたびに差分で更新）
+        self.search_index = SearchIndex()
+        self._search_index_built = False
+        self._search_lock = threading.Lock()
+        self._search_pending_changes = None
+        self._mod_variants_indexed = False
+        # MODの設計バリアントの登録（NAVY_Designs.txtの解析はバックグラウンドで行う）
+        self._mod_variant_thread = None
+        self._mod_variant_generation = 0
+        self.library_store.add_change_listener(self._on_library_store_changed)
+        self.mod_changed.connect(self._invalidate_mod_variant_index)
+        self.mod_file_changed.connect(self._on_mod_file_changed_for_search)
+        self._search_build_thread = threading.Thread(target=self.build_search_index, name="SearchIndexBuild",
+                                                     daemon=True)
+        self._search_build_thread.start()
+
+    # ファイル監視
+
+    def watch_library_directories(self):
+        """アプリのデータディレクトリを監視対象に追加"""
+        self.file_watcher.add_root(KIND_EQUIPMENT, self.equipment_model.data_dir, recursive=True, suffixes=('.json',))
+        self.file_watcher.add_root(KIND_HULL, self.hull_model.data_dir, recursive=False, suffixes=('.json',))
+        self.file_watcher.add_root(KIND_DESIGN, self.app_settings.design_dir, recursive=False, suffixes=('.json',))
+        self.file_watcher.add_root(KIND_FLEET, self.app_settings.fleet_dir, recursive=False, suffixes=('.json',))
+
+    def watch_mod_directories(self, mod_path):
+        """現在のMODの history / common / map フォルダを監視対象にする"""
+        for folder in ("history", "common", "map"):
+            category = f"mod:{folder}"
+            self.file_watcher.remove_category(category)
+            if mod_path:
+                self.file_watcher.add_root(category, os.path.join(mod_path, folder), recursive=True)
+
+    def on_watched_file_changed(self, category, file_path, change):
+        """監視中のファイルの変更をデータベース・キャッシュに反映し、通知する"""
+        try:
+            if category.startswith("mod:"):
+                self.mod_file_changed.emit(category, file_path, change)
+                return
+
+            if change == CHANGE_REMOVED:
+                record_ids = self.library_store.remove_path(category, file_path)
+            else:
+                # アプリ自身の保存（更新時刻が記録済み）は何もしない
+                record_id = self.library_store.sync_file(category, file_path,
+                                                         id_from_filename=(category == KIND_HULL))
+                record_ids = [record_id] if record_id else []
+
+            if category == KIND_EQUIPMENT:
+                self.equipment_model.handle_file_change(file_path, change)
+            elif category == KIND_HULL:
+                self.hull_model.handle_file_change(file_path, change)
+
+            for record_id in record_ids:
+                logger.info(f"外部での変更を反映しました: {category}/{record_id} ({change})")
+                self.library_record_changed.emit(category, record_id, change)
+
+        except Exception as e:
+            logger.error(f"ファイル変更の反映中にエラーが発生しました: {file_path} - {e}")
+
+    # 全体検索
+
+    def _add_search_document(self, kind, record):
+        """索引列（ID・種別・国家・年・名前）から検索索引にレコードを追加"""
+        self.search_index.add(
+            kind, record['id'], record.get('name') or record['id'],
+            detail={'type': record.get('type') or '', 'country': record.get('country') or '',
+                    'year': record.get('year')}
+        )
+
+    def build_search_index(self):
+        """
+        ライブラリ全体の検索索引を作成する（データ本体は読まず索引列のみを使用）
+
+        索引列はID順に SEARCH_INDEX_BATCH_SIZE 件ずつの短い読み取りで取得し、書き込みのトランザクションは
+        使わない（作成中も保存をブロックしない）。作成の開始後の変更は変更通知を溜めておき、
+        作成後に順に反映する（追加・削除は何度反映しても同じ結果になるため、読み取りと重なってもよい）。
+        """
+        start_time = time.time()
+        with self._search_lock:
+            self._search_index_built = False
+            self._search_pending_changes = []
+            self.search_index.clear()
+            self._mod_variants_indexed = False
+
+        for kind in SEARCHABLE_KINDS:
+            after_id = None
+            while True:
+                records = self.library_store.list_index_rows(kind, after_id=after_id, limit=SEARCH_INDEX_BATCH_SIZE)
+                if not records:
+                    break
+                for record in records:
+                    self._add_search_document(kind, record)
+                after_id = records[-1]['id']
+
+        with self._search_lock:
+            for change in self._search_pending_changes:
+                self._apply_search_change(*change)
+            self._search_pending_changes = None
+            self._search_index_built = True
+        logger.info(f"検索索引を作成しました: {len(self.search_index)}件 ({time.time() - start_time:.2f}秒)")
+        self.search_index_ready.emit()
+
+    def _start_search_index_build(self):
+        """検索索引の作成をバックグラウンドで開始する（作成中の場合は何もしない）"""
+        if self._search_build_thread.is_alive():
+            return
+        self._search_build_thread = threading.Thread(target=self.build_search_index, name="SearchIndexBuild",
+                                                     daemon=True)
+        self._search_build_thread.start()
+
+    def is_search_index_building(self):
+        """検索索引（MODの設計バリアントを含む）を作成中の場合True"""
+        return (self._search_build_thread.is_alive() or
+                (self._mod_variant_thread is not None and self._mod_variant_thread.is_alive()))
+
+    def _on_library_store_changed(self, kind, record_id, summary):
+        """ストアの変更を検索索引に反映（保存元のスレッドから呼ばれる）"""
+        if kind not in SEARCHABLE_KINDS:
+            return
+        with self._search_lock:
+            if self._search_pending_changes is not None:
+                # 索引の作成中は、作成後に反映する
+                self._search_pending_changes.append((kind, record_id, summary))
+            elif self._search_index_built:
+                self._apply_search_change(kind, record_id, summary)
+
+    def _apply_search_change(self, kind, record_id, summary):
+        if record_id is None:
+            self.search_index.remove_kind(kind)
+        elif summary is None:
+            self.search_index.remove(kind, record_id)
+        else:
+            self._add_search_document(kind, summary)
+
+    def _invalidate_mod_variant_index(self, *args):
+        with self._search_lock:
+            self._mod_variants_indexed = False
+            self._mod_variant_generation += 1
+
+    def _on_mod_file_changed_for_search(self, category, file_path, change):
+        if os.path.basename(file_path) == "NAVY_Designs.txt":
+            self._invalidate_mod_variant_index()
+
+    def load_mod_design_variants(self):
+        """
+        現在のMODのNAVY_Designs.txtの設計バリアントを読み込む
+
+        Returns:
+            tuple: (国家タグ別の設計バリアント, ファイルのパス)、MODが未選択・ファイルがない場合は ({}, None)
+        """
+        current_mod = self.get_current_mod()
+        if not current_mod or not current_mod.get("path"):
+            return {}, None
+        designs_path = os.path.join(current_mod["path"], "common", "scripted_effects", "NAVY_Designs.txt")
+        if not os.path.exists(designs_path):
+            return {}, None
+
+        from parser.EffectParser import EffectParser
+        with open(designs_path, 'r', encoding='utf-8') as f:
+            return EffectParser(f.read(), filename=designs_path).parse_designs(), designs_path
+
+    def export_designs_to_mod(self, countries=None, file_path=None):
+        """
+        ローカルの設計を現在のMODのNAVY_Designs.txtに create_equipment_variant として書き出す
+
+        装備は現在のMODの船体定義（module_slots）とモジュール定義から、書き出す modules のキーを決める。
+
+        Args:
+            countries (list, optional): 書き出す国家タグ（省略時は設計のある全国家）
+            file_path (str, optional): 書き出し先（省略時は現在のMODの common/scripted_effects/NAVY_Designs.txt）
+
+        Returns:
+            ExportResult or None: 書き出し結果（MODが未選択・失敗時はNone）
+        """
+        try:
+            current_mod = self.get_current_mod()
+            if not current_mod or not current_mod.get("path"):
+                print("MODが選択されていないため設計を書き出せません。")
+                return None
+            if file_path is None:
+                file_path = os.path.join(current_mod["path"], "common", "scripted_effects", "NAVY_Designs.txt")
+
+            wanted = {country.strip().upper() for country in countries if country.strip()} if countries else None
+            designs_by_country = {}
+            for design in self.library_store.query(
+                    KIND_DESIGN, fields=['id', 'design_name', 'localized_name', 'name', 'country', 'hull_id',
+                                         'main_slots', 'internal_slots']):
+                country = (design.get('country') or '').strip().upper()
+                if country and (wanted is None or country in wanted):
+                    designs_by_country.setdefault(country, []).append(design)
+
+            slot_resolver = ModuleSlotResolver.from_mod(current_mod["path"])
+            result = NavyDesignExporter(file_path, slot_resolver).export(designs_by_country)
+            logger.info(f"設計の書き出し: {result.variant_count}件, 更新 {len(result.changed)}か国, "
+                        f"変更なし {len(result.unchanged)}か国 ({result.elapsed:.2f}秒) -> {file_path}")
+            return result
+
+        except Exception as e:
+            print(f"設計の書き出し中にエラーが発生しました: {e}")
+            return None
+
+    def _start_mod_variant_indexing(self):
+        """MODの設計バリアントの登録をバックグラウンドで開始する（登録中の場合は何もしない）"""
+        with self._search_lock:
+            if self._mod_variant_thread is not None and self._mod_variant_thread.is_alive():
+                return
+            self._mod_variants_indexed = True
+            generation = self._mod_variant_generation
+            self._mod_variant_thread = threading.Thread(target=self.rebuild_mod_variant_index, args=(generation,),
+                                                        name="ModVariantIndex", daemon=True)
+        self._mod_variant_thread.start()
+
+    def rebuild_mod_variant_index(self, generation=None):
+        """
+        現在のMODのNAVY_Designs.txtの設計バリアントを検索索引に登録し直す
+
+        ファイルの解析は検索索引のロックの外で行い、登録だけをロック内でまとめて行う。
+        解析中にMODやファイルが変更された（generation が古くなった）場合は結果を捨てる。
+        """
+        try:
+            designs_by_country, designs_path = self.load_mod_design_variants()
+        except Exception as e:
+            logger.error(f"検索用の設計バリアントの読み込みに失敗しました: {e}")
+            designs_by_country, designs_path = {}, None
+
+        documents = []
+        for country, variants in designs_by_country.items():
+            # 種別名でも引けるよう同じバリアントが複数のキーで登録されているため、名前で重複を除く
+            for variant in {id(v): v for v in variants.values()}.values():
+                name = str(variant.get('name', '')).strip('"')
+                if not name:
+                    continue
+                original_name = str(variant.get('original_name', '')).strip('"')
+                variant_type = str(variant.get('type', '')).strip('"')
+                documents.append((f"{country}:{name}", name, original_name,
+                                  {'type': variant_type, 'country': country, 'original_name': original_name,
+                                   'path': designs_path}))
+
+        with self._search_lock:
+            if generation is not None and generation != self._mod_variant_generation:
+                return
+            self.search_index.remove_kind(KIND_MOD_VARIANT)
+            for record_id, name, original_name, detail in documents:
+                self.search_index.add(KIND_MOD_VARIANT, record_id, name, aliases=(original_name,), detail=detail)
+            self._mod_variants_indexed = True
+        logger.info(f"検索索引にMODの設計バリアントを登録しました: {len(documents)}件")
+        self.search_index_ready.emit()
+
+    def search_library(self, query, kinds=None, limit=50):
+        """
+        装備・船体・設計・MODの設計バリアントを名前・IDで検索する
+
+        Args:
+            query (str): 検索語（部分一致・あいまい一致）
+            kinds (list, optional): 対象の種別（省略時はすべて）
+            limit (int): 最大件数
+
+        Returns:
+            list: SearchResult のリスト（得点の高い順）。索引の作成中は作成を待たずに作成済みの分から検索し
+            （ライブラリの索引が未作成の場合は空）、作成が終わると search_index_ready を発射する。
+        """
+        try:
+            if not self._search_index_built:
+                self._start_search_index_build()
+                return []
+            if not self._mod_variants_indexed and (kinds is None or KIND_MOD_VARIANT in kinds):
+                self._start_mod_variant_indexing()
+            with self._search_lock:
+                return self.search_index.search(query, kinds=kinds, limit=limit)
+        except Exception as e:
+            logger.error(f"検索中にエラーが発生しました: {e}")
+            return []
+
     def on_first_run(self):
         """初回起動時の処理"""
         # 初回起動フラグをオフに
@@ -304,6 +632,22 @@ class AppController(QObject):
             print(f"装備データ読み込み中にエラーが発生しました: {e}")
             return None
 
+    def get_equipment_data(self, equipment_id):
+        """
+        装備データを取得（性能計算など頻繁に呼ばれる処理用、ログを出さずキャッシュを利用）
+
+        Args:
+            equipment_id (str): 装備ID
+
+        Returns:
+            dict or None: 装備データ辞書、存在しない場合はNone
+        """
+        try:
+            return self.equipment_model.load_equipment(equipment_id)
+        except Exception as e:
+            print(f"装備データ読み込み中にエラーが発生しました: {e}")
+            return None
+
     def get_all_equipment(self, equipment_type=None):
         """
         全装備データまたは指定タイプの装備データを取得
@@ -320,6 +664,94 @@ class AppController(QObject):
             print(f"装備データ取得中にエラーが発生しました: {e}")
             return []
 
+    def get_equipment_page(self, equipment_type=None, after_id=None, limit=256):
+        """
+        装備データをID順に1ページ分取得（一覧表示の遅延読み込み用）
+
+        Args:
+            equipment_type (str, optional): 装備タイプ（指定しない場合は全装備）
+            after_id (str, optional): このIDより後ろの装備を取得
+            limit (int): 取得する最大件数
+
+        Returns:
+            tuple: (装備データのリスト, 次のページの起点のキー)
+        """
+        try:
+            return self.equipment_model.get_equipment_page(equipment_type, after_id, limit)
+        except Exception as e:
+            print(f"装備データ取得中にエラーが発生しました: {e}")
+            return [], None
+
+    def query_equipment(self, equipment_type=None, **filters):
+        """
+        条件に一致する装備データを取得（絞り込み・並べ替え・件数制限・列の指定はデータベース側で行う）
+
+        Args:
+            equipment_type (str, optional): 装備タイプ（同じプレフィックスのタイプをまとめて対象にする）
+            **filters: LibraryStore.query の引数（country, year_from, year_to, min_stats, max_stats,
+                       order_by, descending, offset, limit, fields）
+
+        Returns:
+            list: 装備データ（fields 指定時は指定した列の辞書）のリスト
+        """
+        try:
+            types = self._equipment_store_types(equipment_type)
+            if types == []:
+                return []
+            return self.library_store.query(KIND_EQUIPMENT, types=types, **filters)
+        except Exception as e:
+            print(f"装備データ取得中にエラーが発生しました: {e}")
+            return []
+
+    def get_equipment_candidates(self, category):
+        """
+        スロットの候補になる装備の一覧を取得（カテゴリーごとにキャッシュし、全スロットで共有する）
+
+        Args:
+            category (str): 装備カテゴリー（装備タイプ）
+
+        Returns:
+            tuple: (装備ID, 名前, 種別) のタプル
+        """
+        candidates = self._equipment_candidates.get(category)
+        if candidates is None:
+            version = self.equipment_candidates_version
+            candidates = tuple(
+                (item['id'], item.get('name') or '', item.get('type') or '')
+                for item in self.query_equipment(category, fields=['id', 'name', 'type'])
+                if item.get('id') and item.get('name')
+            )
+            # 取得中に装備が変更された場合は古い一覧をキャッシュしない
+            if version == self.equipment_candidates_version:
+                self._equipment_candidates[category] = candidates
+        return candidates
+
+    def _on_equipment_store_changed(self, kind, record_id, summary):
+        """装備が保存・削除されたらスロットの候補のキャッシュを破棄（保存元のスレッドから呼ばれる）"""
+        if kind == KIND_EQUIPMENT:
+            self._equipment_candidates = {}
+            self.equipment_candidates_version += 1
+
+    def count_equipment(self, equipment_type=None, **filters):
+        """query_equipment と同じ条件に一致する装備の件数を取得"""
+        try:
+            types = self._equipment_store_types(equipment_type)
+            if types == []:
+                return 0
+            return self.library_store.query_count(KIND_EQUIPMENT, types=types, **filters)
+        except Exception as e:
+            print(f"装備データ件数の取得中にエラーが発生しました: {e}")
+            return 0
+
+    def _equipment_store_types(self, equipment_type):
+        """装備タイプをデータベースの種別のリストに変換（未指定はNone、不明なタイプは空リスト）"""
+        if not equipment_type:
+            return None
+        id_prefix = self.equipment_model.get_prefix_for_type(equipment_type)
+        if not id_prefix:
+            return []
+        return self.equipment_model.get_types_for_prefix(id_prefix)
+
     def delete_equipment(self, equipment_id):
         """
         装備データの削除
@@ -399,9 +831,25 @@ class AppController(QObject):
             print(f"装備タイプマッピング取得中にエラーが発生しました: {e}")
             return {}
 
+    def peek_next_equipment_id(self, equipment_type):
+        """
+        次に割り当てられる装備IDを取得（番号は消費しない。フォームでの表示用）
+
+        Args:
+            equipment_type (str): 装備タイプ
+
+        Returns:
+            str: 次の装備ID
+        """
+        try:
+            return self.equipment_model.peek_next_id(equipment_type)
+        except Exception as e:
+            print(f"次の装備ID取得中にエラーが発生しました: {e}")
+            return ""
+
     def get_next_equipment_id(self, equipment_type):
         """
-        次の装備IDを取得
+        次の装備IDを割り当てる（保存時に使用）
 
         Args:
             equipment_type (str): 装備タイプ
@@ -482,6 +930,48 @@ class AppController(QObject):
             print(f"船体データ取得中にエラーが発生しました: {e}")
             return []
 
+    def get_hull_page(self, after_id=None, limit=256):
+        """
+        船体データをID順に1ページ分取得（一覧表示の遅延読み込み用）
+
+        Args:
+            after_id (str, optional): このIDより後ろの船体を取得
+            limit (int): 取得する最大件数
+
+        Returns:
+            tuple: (船体データのリスト, 次のページの起点のキー)
+        """
+        try:
+            return self.hull_model.get_hull_page(after_id, limit)
+        except Exception as e:
+            print(f"船体データ取得中にエラーが発生しました: {e}")
+            return [], None
+
+    def query_hulls(self, **filters):
+        """
+        条件に一致する船体データを取得
+
+        Args:
+            **filters: LibraryStore.query の引数（types, country, year_from, year_to, min_stats, max_stats,
+                       order_by, descending, offset, limit, fields）
+
+        Returns:
+            list: 船体データ（fields 指定時は指定した列の辞書）のリスト
+        """
+        try:
+            return self.library_store.query(KIND_HULL, **filters)
+        except Exception as e:
+            print(f"船体データ取得中にエラーが発生しました: {e}")
+            return []
+
+    def count_hulls(self, **filters):
+        """query_hulls と同じ条件に一致する船体の件数を取得"""
+        try:
+            return self.library_store.query_count(KIND_HULL, **filters)
+        except Exception as e:
+            print(f"船体データ件数の取得中にエラーが発生しました: {e}")
+            return 0
+
     def delete_hull(self, hull_id):
         """
         船体データの削除
@@ -532,8 +1022,9 @@ class AppController(QObject):
                         file_path = os.path.join(data_dir, file_name)
                         os.remove(file_path)
 
-                # キャッシュをクリア
-                self.hull_model.hull_cache = {}
+                # キャッシュとデータベースをクリア
+                self.hull_model.hull_cache.clear()
+                self.library_store.delete_all(KIND_HULL)
 
                 print(f"すべての船体データを削除しました。バックアップ: {backup_dir}")
                 return True
@@ -578,6 +1069,39 @@ class AppController(QObject):
             print(f"CSVからのインポート中にエラーが発生しました: {e}")
             return []
 
+    def import_hulls_from_csv(self, file_path, progress_callback=None, cancel_check=None, json_dir=None):
+        """
+        CSVから船体データをストリーミングでインポート（ワーカースレッドから呼び出し可能）
+
+        Args:
+            file_path: CSVファイルのパス
+            progress_callback: (処理済み行数, 総行数の概算) を受け取る関数
+            cancel_check: Trueを返すと中断する関数
+            json_dir: 船体ディレクトリ以外にもJSONを出力する場合の出力先
+
+        Returns:
+            HullImportResult: インポート結果（失敗時はNone）
+        """
+        try:
+            def write_json_copies(hulls):
+                for hull_data in hulls:
+                    json_path = os.path.join(json_dir, f"{hull_data['id']}.json")
+                    with open(json_path, 'w', encoding='utf-8') as f:
+                        json.dump(hull_data, f, ensure_ascii=False, indent=2)
+
+            copy_json = bool(json_dir) and os.path.normpath(json_dir) != os.path.normpath(self.hull_model.data_dir)
+            if copy_json:
+                os.makedirs(json_dir, exist_ok=True)
+
+            result = self.hull_model.import_from_csv_streaming(file_path, progress_callback, cancel_check,
+                                                               batch_callback=write_json_copies if copy_json else None)
+            print(f"CSVインポート完了: {result.imported}件 / エラー {len(result.errors)}件 ({result.elapsed:.2f}秒)")
+            return result
+
+        except Exception as e:
+            print(f"CSVからのインポート中にエラーが発生しました: {e}")
+            return None
+
     def import_first_hull_from_csv(self, file_path):
         """
         CSVファイルから最初の船体データをインポート
@@ -681,17 +1205,12 @@ class AppController(QObject):
                 design_id = f"DESIGN_{base_id}_{int(time.time())}"
                 design_data["id"] = design_id
 
-            # 保存先ディレクトリの作成
-            base_dir = get_data_dir('designs')
-            os.makedirs(base_dir, exist_ok=True)
-
             # ファイル名は設計IDを使用
             file_name = f"{design_id}.json"
-            file_path = os.path.join(base_dir, file_name)
+            file_path = os.path.join(self.app_settings.design_dir, file_name)
 
-            # JSONに変換して保存
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(design_data, f, ensure_ascii=False, indent=2)
+            # データベースとJSONファイルを同一トランザクションで保存
+            self.library_store.save(KIND_DESIGN, design_data, design_id, json_path=file_path)
 
             # print(f"設計データ '{design_id}' を保存しました。")
             return True
@@ -713,18 +1232,12 @@ class AppController(QObject):
             dict or None: 設計データ、存在しない場合はNone
         """
         try:
-            # 設計データを読み込み
-            designs_dir = self.app_settings.design_dir
-            file_path = os.path.join(designs_dir, f"{design_id}.json")
+            design_data = self.library_store.load(KIND_DESIGN, design_id)
 
-            if not os.path.exists(file_path):
+            if design_data is None:
                 print(f"設計ID '{design_id}' のデータが見つかりません。")
                 return None
 
-            # JSONから読み込み
-            with open(file_path, 'r', encoding='utf-8') as f:
-                design_data = json.load(f)
-
             # print(f"設計ID '{design_id}' のデータを読み込みました。")
             return design_data
 
@@ -740,31 +1253,192 @@ class AppController(QObject):
             list: 設計データのリスト
         """
         try:
-            designs = []
-            designs_dir = self.app_settings.design_dir
+            return self.library_store.list(KIND_DESIGN)
 
-            # ディレクトリが存在しない場合は空リストを返す
-            import os
-            if not os.path.exists(designs_dir):
-                return designs
-
-            # ディレクトリ内のJSONファイルを全て読み込む
-            for file_name in os.listdir(designs_dir):
-                if file_name.endswith('.json'):
-                    file_path = os.path.join(designs_dir, file_name)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            design_data = json.load(f)
-                        designs.append(design_data)
-                    except Exception as e:
-                        print(f"設計ファイル '{file_name}' の読み込みエラー: {e}")
-
-            return designs
+        except Exception as e:
+            print(f"設計データ一覧取得中にエラーが発生しました: {e}")
+            return []
+
+    def query_designs(self, **filters):
+        """
+        条件に一致する設計データを取得
 
+        Args:
+            **filters: LibraryStore.query の引数（types, country, year_from, year_to, min_stats, max_stats,
+                       order_by, descending, offset, limit, fields）
+
+        Returns:
+            list: 設計データ（fields 指定時は指定した列の辞書）のリスト
+        """
+        try:
+            return self.library_store.query(KIND_DESIGN, **filters)
         except Exception as e:
             print(f"設計データ一覧取得中にエラーが発生しました: {e}")
             return []
 
+    def count_designs(self, **filters):
+        """query_designs と同じ条件に一致する設計の件数を取得"""
+        try:
+            return self.library_store.query_count(KIND_DESIGN, **filters)
+        except Exception as e:
+            print(f"設計データ件数の取得中にエラーが発生しました: {e}")
+            return 0
+
+    def evaluate_all_designs(self, include_mod_variants=True):
+        """
+        ライブラリの全設計（とMODの設計バリアント）の性能値を一括で計算する
+
+        設計・船体・装備は必要な列だけをデータベースから取り出し、IDの辞書で参照を解決する。
+
+        Args:
+            include_mod_variants (bool): 現在のMODのNAVY_Designs.txtの設計バリアントも含めるか
+
+        Returns:
+            BatchResult or None: 設計ごとの性能値（失敗時はNone）
+        """
+        try:
+            start_time = time.time()
+            designs = self.library_store.query(
+                KIND_DESIGN, fields=['id', 'name', 'ship_type', 'country', 'hull_id',
+                                     'main_slots', 'internal_slots'])
+            entries = [local_design_entry(design) for design in designs]
+
+            if include_mod_variants:
+                try:
+                    designs_by_country, _ = self.load_mod_design_variants()
+                    entries.extend(mod_variant_entries(designs_by_country))
+                except Exception as e:
+                    logger.error(f"MODの設計バリアントの読み込みに失敗しました: {e}")
+
+            hulls = {hull['id']: hull for hull in self.library_store.query(
+                KIND_HULL, fields=['id', 'speed', 'range', 'crew', 'stats'])}
+            equipment = {item['id']: item for item in self.library_store.query(
+                KIND_EQUIPMENT, fields=['id', 'stats'])}
+
+            result = DesignBatchEvaluator(self.design_stat_engine).evaluate(entries, hulls, equipment)
+            logger.info(f"設計の一括評価: {len(result)}件（計算 {result.elapsed:.2f}秒, 合計 {time.time() - start_time:.2f}秒）")
+            return result
+
+        except Exception as e:
+            print(f"設計の一括評価中にエラーが発生しました: {e}")
+            return None
+
+    def _invalidate_design_stat_table(self, *args):
+        self._design_stat_table = None
+        self.design_stat_table_version += 1
+
+    def _on_design_stat_source_changed(self, kind, record_id, summary):
+        """設計・船体・装備が保存・削除されたら性能表を破棄（保存元のスレッドから呼ばれる）"""
+        if kind in (KIND_DESIGN, KIND_HULL, KIND_EQUIPMENT):
+            self._invalidate_design_stat_table()
+
+    def _on_mod_file_changed_for_design_stats(self, category, file_path, change):
+        if os.path.basename(file_path) == "NAVY_Designs.txt":
+            self._invalidate_design_stat_table()
+
+    def get_design_stat_table(self):
+        """
+        編成の集計用の設計の性能表を取得（一括評価の結果をキャッシュし、データが変更されるまで使い回す）
+
+        Returns:
+            DesignStatTable: 設計ごとの集計用の行（失敗時は艦艇数のみ集計する空の表）
+        """
+        table = self._design_stat_table
+        if table is not None:
+            return table
+
+        version = self.design_stat_table_version
+        archetypes = list(self.hull_model.ship_archetype_mapping)
+        result = self.evaluate_all_designs()
+        if result is None:
+            return DesignStatTable.empty(archetypes)
+        try:
+            hull_weights = {hull['id']: float(hull.get('weight') or 0)
+                            for hull in self.library_store.query(KIND_HULL, fields=['id', 'weight'])}
+            table = DesignStatTable.from_batch(result, hull_weights, archetypes, version)
+        except Exception as e:
+            print(f"設計の性能表の作成中にエラーが発生しました: {e}")
+            return DesignStatTable.empty(archetypes)
+        # 作成中に変更された場合はキャッシュしない
+        if version == self.design_stat_table_version:
+            self._design_stat_table = table
+        return table
+
+    def _invalidate_ship_name_lists(self, *args):
+        self._ship_name_lists = None
+
+    def _on_mod_file_changed_for_ship_names(self, category, file_path, change):
+        if os.path.basename(os.path.dirname(file_path)) == "names_ships":
+            self._invalidate_ship_name_lists()
+
+    def get_ship_name_lists(self):
+        """
+        現在のMODの艦名リストを取得（読み込み結果はファイルが変更されるまで使い回す）
+
+        Returns:
+            list: ShipNameList のリスト（MODが未選択・フォルダがない場合は空）
+        """
+        if self._ship_name_lists is not None:
+            return self._ship_name_lists
+        current_mod = self.get_current_mod()
+        if not current_mod or not current_mod.get("path"):
+            return []
+        names_dir = os.path.join(current_mod["path"], "common", "units", "names_ships")
+        try:
+            start_time = time.time()
+            name_lists = load_ship_name_lists(names_dir)
+            logger.info(f"艦名リストを読み込みました: {len(name_lists)}件 ({time.time() - start_time:.2f}秒)")
+        except Exception as e:
+            print(f"艦名リストの読み込み中にエラーが発生しました: {e}")
+            return []
+        self._ship_name_lists = name_lists
+        return name_lists
+
+    def optimize_loadout(self, hull_data, slot_categories, objectives, constraints=(), max_workers=None,
+                         time_limit=30.0, fixed_equipment_ids=()):
+        """
+        船体のスロット構成に対して、目的・制約を満たす装備の組み合わせを探索する
+
+        Args:
+            hull_data (dict): 船体データ
+            slot_categories (dict): スロットID -> 搭載を許可する装備カテゴリーのリスト
+            objectives (list): [(性能名, 'max' or 'min'), ...]
+            constraints (list): [(性能名, '>=' or '<=', 値), ...]
+            max_workers (int, optional): ワーカープロセス数（省略時はCPU数）
+            time_limit (float): 探索時間の上限（秒）
+            fixed_equipment_ids (list): 探索対象外のスロットに搭載済みの装備ID（性能値の計算に含める）
+
+        Returns:
+            OptimizationResult or None: 目的のパレートフロンティア（失敗時はNone）
+        """
+        try:
+            # 同じカテゴリーを許可するスロットが多いため、カテゴリーごとの候補は1回だけ取得する
+            category_candidates = {}
+            slot_candidates = []
+            for slot_id, categories in slot_categories.items():
+                candidates = {}
+                for category in categories:
+                    if category not in category_candidates:
+                        category_candidates[category] = [
+                            (item['id'], item) for item in self.query_equipment(category, fields=['id', 'stats'])
+                            if item.get('id')
+                        ]
+                    candidates.update(category_candidates[category])
+                slot_candidates.append((slot_id, list(candidates.items())))
+
+            fixed_equipment = [(equipment_id, self.get_equipment_data(equipment_id))
+                               for equipment_id in fixed_equipment_ids]
+
+            optimizer = LoadoutOptimizer(self.design_stat_engine, max_workers=max_workers, time_limit=time_limit)
+            result = optimizer.optimize(hull_data, slot_candidates, objectives, constraints, fixed_equipment)
+            logger.info(f"装備構成の最適化: 解 {len(result.loadouts)}件, 探索ノード {result.nodes}, "
+                        f"{result.elapsed:.2f}秒{'' if result.complete else '（打ち切り）'}")
+            return result
+
+        except Exception as e:
+            print(f"装備構成の最適化中にエラーが発生しました: {e}")
+            return None
+
     def delete_design(self, design_id):
         """
         船体設計データの削除
@@ -776,16 +1450,11 @@ class AppController(QObject):
             bool: 削除成功時はTrue、失敗時はFalse
         """
         try:
-            # 設計データを削除
-            designs_dir = self.app_settings.design_dir
-            file_path = os.path.join(designs_dir, f"{design_id}.json")
-
-            if not os.path.exists(file_path):
+            # 設計データを削除（JSONファイルも削除）
+            if not self.library_store.delete(KIND_DESIGN, design_id):
                 print(f"設計ID '{design_id}' のデータが見つかりません。")
                 return False
 
-            # ファイルを削除
-            os.remove(file_path)
             print(f"設計ID '{design_id}' のデータを削除しました。")
             return True
 
@@ -821,35 +1490,8 @@ class AppController(QObject):
     def get_nation_equipment(self, nation_tag):
         """国家の装備データを取得"""
         try:
-            equipment_list = []
-            equipment_dir = os.path.join(self.app_settings.data_dir, "equipments")
-
-            if not os.path.exists(equipment_dir):
-                return equipment_list
-
-            for filename in os.listdir(equipment_dir):
-                if not filename.endswith('.json'):
-                    continue
-
-                file_path = os.path.join(equipment_dir, filename)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        equipment_data = json.load(f)
-
-                    # 国家タグが一致するものをフィルタリング
-                    if equipment_data.get('country') == nation_tag:
-                        equipment_list.append({
-                            'id': equipment_data.get('id', ''),
-                            'name': equipment_data.get('name', ''),
-                            'type': equipment_data.get('type', ''),
-                            'stats': equipment_data.get('stats', {})
-                        })
-                except Exception as e:
-                    print(f"装備ファイル '{filename}' の読み込みエラー: {e}")
-
-            # 名前でソート
-            equipment_list.sort(key=lambda x: x['name'])
-            return equipment_list
+            # 国家タグの索引から一致するレコードの要約のみを読む
+            return self.library_store.list_summaries(KIND_EQUIPMENT, country=nation_tag)
 
         except Exception as e:
             print(f"国家装備データ取得中にエラーが発生しました: {e}")
@@ -858,35 +1500,7 @@ class AppController(QObject):
     def get_nation_hulls(self, nation_tag):
         """国家の船体データを取得"""
         try:
-            hull_list = []
-            hull_dir = os.path.join(self.app_settings.data_dir, "hulls")
-
-            if not os.path.exists(hull_dir):
-                return hull_list
-
-            for filename in os.listdir(hull_dir):
-                if not filename.endswith('.json'):
-                    continue
-
-                file_path = os.path.join(hull_dir, filename)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        hull_data = json.load(f)
-
-                    # 国家タグが一致するものをフィルタリング
-                    if hull_data.get('country') == nation_tag:
-                        hull_list.append({
-                            'id': hull_data.get('id', ''),
-                            'name': hull_data.get('name', ''),
-                            'type': hull_data.get('type', ''),
-                            'stats': hull_data.get('stats', {})
-                        })
-                except Exception as e:
-                    print(f"船体ファイル '{filename}' の読み込みエラー: {e}")
-
-            # 名前でソート
-            hull_list.sort(key=lambda x: x['name'])
-            return hull_list
+            return self.library_store.list_summaries(KIND_HULL, country=nation_tag)
 
         except Exception as e:
             print(f"国家船体データ取得中にエラーが発生しました: {e}")
@@ -895,39 +1509,7 @@ class AppController(QObject):
     def get_nation_designs(self, nation_tag):
         """国家の設計データを取得"""
         try:
-            design_list = []
-            design_dir = os.path.join(self.app_settings.data_dir, "designs")
-
-            if not os.path.exists(design_dir):
-                return design_list
-
-            for filename in os.listdir(design_dir):
-                if not filename.endswith('.json'):
-                    continue
-
-                file_path = os.path.join(design_dir, filename)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        design_data = json.load(f)
-
-                    # 国家タグが一致するものをフィルタリング
-                    if design_data.get('country') == nation_tag:
-                        design_list.append({
-                            'id': design_data.get('id', ''),
-                            'design_name': design_data.get('design_name', design_data.get('name', '')),
-                            'ship_type': design_data.get('ship_type', design_data.get('hull', '')),
-                            'hull_name': design_data.get('hull_name', ''),
-                            'year': design_data.get('year', ''),
-                            'main_slots': design_data.get('main_slots', {}),
-                            'slot_categories': design_data.get('slot_categories', {}),
-                            'internal_slots': design_data.get('internal_slots', [])
-                        })
-                except Exception as e:
-                    print(f"設計ファイル '{filename}' の読み込みエラー: {e}")
-
-            # 名前でソート
-            design_list.sort(key=lambda x: x['design_name'])
-            return design_list
+            return self.library_store.list_summaries(KIND_DESIGN, country=nation_tag)
 
         except Exception as e:
             print(f"国家設計データ取得中にエラーが発生しました: {e}")
@@ -1058,10 +1640,6 @@ class AppController(QObject):
             bool: 保存成功時はTrue、失敗時はFalse
         """
         try:
-            # 保存先ディレクトリの作成
-            fleet_dir = os.path.join(self.app_settings.data_dir, "fleets")
-            os.makedirs(fleet_dir, exist_ok=True)
-
             # 国家タグを取得
             country_tag = fleet_data.get("country")
             if not country_tag:
@@ -1070,11 +1648,10 @@ class AppController(QObject):
 
             # ファイル名は国家タグを使用
             file_name = f"{country_tag}_fleets.json"
-            file_path = os.path.join(fleet_dir, file_name)
+            file_path = os.path.join(self.app_settings.fleet_dir, file_name)
 
-            # JSONに変換して保存
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(fleet_data, f, ensure_ascii=False, indent=2)
+            # データベースとJSONファイルを同一トランザクションで保存
+            self.library_store.save(KIND_FLEET, fleet_data, country_tag, json_path=file_path)
 
             print(f"艦隊データを保存しました: {file_path}")
             return True
@@ -1083,35 +1660,49 @@ class AppController(QObject):
             print(f"艦隊データの保存中にエラーが発生しました: {e}")
             return False
 
-    def load_fleet_data(self, country_tag):
+    def export_naval_oob(self, fleet_data, units_dir=None):
         """
-        艦隊データを読み込み
+        艦隊データを現在のMODの history/units/TAG_YYYY_naval.txt に書き出す
 
         Args:
-            country_tag (str): 国家タグ
+            fleet_data (dict): 艦隊データ（{"country": 国家タグ, "fleets": [...]}）
+            units_dir (str, optional): 書き出し先（省略時は現在のMODの history/units）
 
         Returns:
-            dict or None: 艦隊データ、存在しない場合はNone
+            OOBWriteResult or None: 書き出し結果（MODが未選択・失敗時はNone）
         """
         try:
-            # 艦隊データのディレクトリ
-            fleet_dir = os.path.join(self.app_settings.data_dir, "fleets")
+            if units_dir is None:
+                current_mod = self.get_current_mod()
+                if not current_mod or not current_mod.get("path"):
+                    print("MODが選択されていないため編成ファイルを書き出せません。")
+                    return None
+                units_dir = os.path.join(current_mod["path"], "history", "units")
 
-            if not os.path.exists(fleet_dir):
-                return None
+            result = NavalOOBWriter(units_dir).write(fleet_data)
+            logger.info(f"編成ファイルの書き出し: {fleet_data.get('country')} {result.ship_count}隻, "
+                        f"更新 {len(result.written)}件, 変更なし {len(result.unchanged)}件 ({result.elapsed:.2f}秒)")
+            return result
 
-            # ファイル名は国家タグを使用
-            file_name = f"{country_tag}_fleets.json"
-            file_path = os.path.join(fleet_dir, file_name)
+        except Exception as e:
+            print(f"編成ファイルの書き出し中にエラーが発生しました: {e}")
+            return None
 
-            if not os.path.exists(file_path):
-                return None
+    def load_fleet_data(self, country_tag):
+        """
+        艦隊データを読み込み
 
-            # JSONから読み込み
-            with open(file_path, 'r', encoding='utf-8') as f:
-                fleet_data = json.load(f)
+        Args:
+            country_tag (str): 国家タグ
+
+        Returns:
+            dict or None: 艦隊データ、存在しない場合はNone
+        """
+        try:
+            fleet_data = self.library_store.load(KIND_FLEET, country_tag)
 
-            print(f"艦隊データを読み込みました: {file_path}")
+            if fleet_data is not None:
+                print(f"艦隊データを読み込みました: {country_tag}")
             return fleet_data
 
         except Exception as e:
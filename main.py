@@ -1,6 +1,7 @@
 import os
 import sys
 import logging
+import multiprocessing
 import platform
 
 # ロガーの設定
@@ -286,4 +287,6 @@ def ensure_assets_directory():
 
 
 if __name__ == "__main__":
+    # PyInstallerでビルドした実行ファイルでは、装備構成の最適化のワーカープロセスがmain()を再実行しないようにする
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -27,6 +27,9 @@ class AppSettings:
         self.design_dir = os.path.join(self.data_dir, "designs")
         self.fleet_dir = os.path.join(self.data_dir, "fleets")
 
+        # 装備・船体・設計・艦隊データのデータベース
+        self.library_db_file = os.path.join(self.data_dir, "library.db")
+
         # 必要なディレクトリを作成
         self._ensure_directories()
 
@@ -39,7 +42,9 @@ class AppSettings:
             "current_mod_name": None,
             "window_size": [800, 600],
             "window_position": [100, 100],
-            "first_run": True
+            "first_run": True,
+            "map_cache_budget_mb": 256,
+            "record_cache_size": 2048
         }
 
         # MOD情報のリスト
@@ -0,0 +1,224 @@
+import csv
+import time
+from typing import Dict, List, Any, Iterable, Tuple
+
+import numpy as np
+
+from models.design_stats import (DesignStatEngine, COMPILED_ROWS, ROW_ADD, ROW_MULTIPLY,
+                                  ROW_AVERAGE, ROW_AVERAGE_COUNT)
+
+# 評価対象の設計の出所
+SOURCE_LOCAL = "local"
+SOURCE_MOD = "mod"
+
+
+class DesignEntry:
+    """一括評価する設計（ローカルの設計・MODの設計バリアントを共通の形にしたもの）"""
+
+    __slots__ = ('key', 'source', 'name', 'country', 'ship_type', 'hull_id', 'equipment_ids')
+
+    def __init__(self, key: str, source: str, name: str, country: str, ship_type: str,
+                 hull_id: str, equipment_ids: List[str]):
+        self.key = key
+        self.source = source
+        self.name = name
+        self.country = country
+        self.ship_type = ship_type
+        self.hull_id = hull_id
+        self.equipment_ids = equipment_ids
+
+
+def local_design_entry(design: Dict[str, Any]) -> DesignEntry:
+    """ローカルの設計データ（メインスロット・内部スロットの装備ID）から評価対象を作成"""
+    equipment_ids = [equipment_id for equipment_id in (design.get('main_slots') or {}).values() if equipment_id]
+    for slot in design.get('internal_slots') or []:
+        if isinstance(slot, dict) and slot.get('equipment_id'):
+            equipment_ids.append(slot['equipment_id'])
+    return DesignEntry(
+        key=str(design.get('id', '')),
+        source=SOURCE_LOCAL,
+        name=design.get('design_name') or design.get('name') or '',
+        country=design.get('country') or '',
+        ship_type=design.get('ship_type') or '',
+        hull_id=design.get('hull_id') or '',
+        equipment_ids=equipment_ids,
+    )
+
+
+def mod_variant_entries(designs_by_country: Dict[str, Dict[str, Dict[str, Any]]]) -> List[DesignEntry]:
+    """
+    EffectParser.parse_designs() の結果から評価対象を作成
+
+    船体は type（例: ship_hull_cruiser_1）、装備は modules の各スロットの値をIDとして参照する。
+    """
+    entries = []
+    for country, variants in designs_by_country.items():
+        # 種別名でも引けるよう同じバリアントが複数のキーで登録されているため、オブジェクトで重複を除く
+        for variant in {id(v): v for v in variants.values()}.values():
+            name = str(variant.get('name', '')).strip('"')
+            if not name:
+                continue
+            modules = variant.get('modules') or {}
+            equipment_ids = [str(module).strip('"') for module in modules.values()
+                             if isinstance(module, str) and module.strip('"')] if isinstance(modules, dict) else []
+            hull_type = str(variant.get('type', '')).strip('"')
+            entries.append(DesignEntry(
+                key=f"{country}:{name}",
+                source=SOURCE_MOD,
+                name=name,
+                country=country,
+                ship_type=hull_type,
+                hull_id=hull_type,
+                equipment_ids=equipment_ids,
+            ))
+    return entries
+
+
+class BatchResult:
+    """一括評価の結果（設計ごとの性能値の行列）"""
+
+    def __init__(self, entries: List[DesignEntry], stat_names: Tuple[str, ...], matrix: np.ndarray,
+                 missing_hull: np.ndarray, missing_equipment: np.ndarray, elapsed: float):
+        self.entries = entries
+        self.stat_names = stat_names
+        self.matrix = matrix
+        # 参照先が見つからなかった船体（bool）・装備の数
+        self.missing_hull = missing_hull
+        self.missing_equipment = missing_equipment
+        self.elapsed = elapsed
+
+    def __len__(self):
+        return len(self.entries)
+
+    def column(self, stat_name: str) -> np.ndarray:
+        return self.matrix[:, self.stat_names.index(stat_name)]
+
+    def order_by(self, stat_name: str, descending: bool = True) -> np.ndarray:
+        """性能値で並べた行番号"""
+        order = np.argsort(self.column(stat_name), kind='stable')
+        return order[::-1] if descending else order
+
+    def row(self, i: int) -> Dict[str, Any]:
+        entry = self.entries[i]
+        row = {
+            'key': entry.key,
+            'source': entry.source,
+            'name': entry.name,
+            'country': entry.country,
+            'ship_type': entry.ship_type,
+            'hull_id': entry.hull_id,
+            'equipment_count': len(entry.equipment_ids),
+            'missing_hull': bool(self.missing_hull[i]),
+            'missing_equipment': int(self.missing_equipment[i]),
+        }
+        row.update(zip(self.stat_names, self.matrix[i].tolist()))
+        return row
+
+    def rows(self, order: Iterable[int] = None) -> List[Dict[str, Any]]:
+        return [self.row(i) for i in (range(len(self.entries)) if order is None else order)]
+
+    def write_csv(self, file_path: str, order: Iterable[int] = None) -> int:
+        """
+        比較表をCSVに書き出す（Excelで開けるようBOM付きUTF-8）
+
+        Returns:
+            int: 書き出した行数
+        """
+        columns = ['key', 'source', 'name', 'country', 'ship_type', 'hull_id',
+                   'equipment_count', 'missing_hull', 'missing_equipment', *self.stat_names]
+        count = 0
+        with open(file_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for i in (range(len(self.entries)) if order is None else order):
+                entry = self.entries[i]
+                writer.writerow([entry.key, entry.source, entry.name, entry.country, entry.ship_type, entry.hull_id,
+                                 len(entry.equipment_ids), int(self.missing_hull[i]), int(self.missing_equipment[i]),
+                                 *(f"{value:.6g}" for value in self.matrix[i])])
+                count += 1
+        return count
+
+
+class DesignBatchEvaluator:
+    """
+    多数の設計の性能値を行列演算でまとめて計算する
+
+    船体・装備はIDで引ける辞書（メモリ上の索引）として渡し、参照された装備だけを
+    DesignStatEngine の COMPILED_ROWS 行の配列（単純加算, %調整, 全装備平均, 全装備平均を指定しているか）に
+    変換して (装備数, COMPILED_ROWS, 性能数) の配列に並べる。
+    各設計のスロットは (設計の行番号, 装備の行番号) の組として平坦に並べ、
+    np.add.at で設計ごとに合計するため、設計数に対してPythonのループは参照の解決だけになる。
+    全装備平均は、合計した4行目（性能値ごとの指定数）で割る。
+    """
+
+    def __init__(self, engine: DesignStatEngine = None):
+        self.engine = engine or DesignStatEngine()
+
+    def evaluate(self, entries: List[DesignEntry], hulls: Dict[str, Dict[str, Any]],
+                 equipment: Dict[str, Dict[str, Any]]) -> BatchResult:
+        """
+        設計の性能値を計算
+
+        Args:
+            entries: 評価する設計
+            hulls: 船体ID -> 船体データ
+            equipment: 装備ID -> 装備データ（stats を含む）
+
+        Returns:
+            BatchResult: 設計ごとの性能値
+        """
+        start_time = time.time()
+        engine = self.engine
+        size = engine.size
+        design_count = len(entries)
+
+        # 船体: 参照された船体ごとに基礎値を1行作り、設計からは行番号で参照する（見つからない場合は0の行）
+        hull_rows = {}
+        hull_vectors = [np.zeros(size)]
+        hull_index = np.zeros(design_count, dtype=np.intp)
+        missing_hull = np.zeros(design_count, dtype=bool)
+
+        # 装備: 参照された装備ごとに4行の配列を作り、スロットは (設計の行番号, 装備の行番号) で表す
+        equipment_rows = {}
+        equipment_arrays = []
+        slot_design = []
+        slot_equipment = []
+        missing_equipment = np.zeros(design_count, dtype=np.intp)
+
+        for i, entry in enumerate(entries):
+            row = hull_rows.get(entry.hull_id)
+            if row is None:
+                hull_data = hulls.get(entry.hull_id)
+                if hull_data is None:
+                    missing_hull[i] = True
+                    row = 0
+                else:
+                    row = hull_rows[entry.hull_id] = len(hull_vectors)
+                    hull_vectors.append(engine.hull_vector(hull_data))
+            hull_index[i] = row
+
+            for equipment_id in entry.equipment_ids:
+                row = equipment_rows.get(equipment_id)
+                if row is None:
+                    equipment_data = equipment.get(equipment_id)
+                    if equipment_data is None:
+                        missing_equipment[i] += 1
+                        continue
+                    row = equipment_rows[equipment_id] = len(equipment_arrays)
+                    equipment_arrays.append(engine.equipment_stats(equipment_id, equipment_data))
+                slot_design.append(i)
+                slot_equipment.append(row)
+
+        base = np.stack(hull_vectors)[hull_index]
+        totals = np.zeros((design_count, COMPILED_ROWS, size))
+        if slot_design:
+            # 4行目（全装備平均を指定しているか）も合計され、設計ごと・性能値ごとの平均の分母になる
+            slot_design = np.asarray(slot_design, dtype=np.intp)
+            np.add.at(totals, slot_design, np.stack(equipment_arrays)[np.asarray(slot_equipment, dtype=np.intp)])
+
+        add, multiply = totals[:, ROW_ADD], totals[:, ROW_MULTIPLY]
+        average = totals[:, ROW_AVERAGE] / np.maximum(totals[:, ROW_AVERAGE_COUNT], 1.0)
+        matrix = (base + add + average) * (1.0 + multiply)
+
+        return BatchResult(entries, engine.stat_names, matrix, missing_hull, missing_equipment,
+                           time.time() - start_time)
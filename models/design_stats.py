@@ -0,0 +1,180 @@
+import os
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+import numpy as np
+
+# 性能値の集計方法（装備データの stats 内のキー）
+MODE_ADD = 'add_stats'
+MODE_MULTIPLY = 'multiply_stats'
+MODE_AVERAGE = 'add_average_stats'
+STAT_MODES = (MODE_ADD, MODE_MULTIPLY, MODE_AVERAGE)
+
+# 装備の変換結果の行（単純加算, %調整, 全装備平均, 全装備平均を指定しているか）
+ROW_ADD, ROW_MULTIPLY, ROW_AVERAGE, ROW_AVERAGE_COUNT = range(4)
+COMPILED_ROWS = 4
+
+# 全装備平均に指定されていても平均せずに単純加算する性能値
+ALWAYS_ADDED_STATS = ('manpower',)
+
+# スーテータス一覧.txt が読めない場合の性能値の並び
+DEFAULT_STAT_NAMES = (
+    'build_cost_ic', 'manpower', 'reliability', 'naval_speed',
+    'lg_armor_piercing', 'lg_attack', 'hg_armor_piercing', 'hg_attack',
+    'torpedo_attack', 'anti_air_attack', 'shore_bombardment', 'evasion',
+    'surface_detection', 'sub_attack', 'sub_detection', 'surface_visibility', 'sub_visibility',
+    'naval_range', 'port_capacity_usage', 'search_and_destroy_coordination', 'convoy_raiding_coordination',
+)
+
+# 船体データの項目から基礎性能値への対応（船体の stats に同名の値がある場合はそちらを加算）
+HULL_FIELD_STATS = {
+    'speed': 'naval_speed',
+    'range': 'naval_range',
+    'crew': 'manpower',
+}
+
+STATS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'スーテータス一覧.txt')
+
+
+def load_stat_names(stats_file: str = STATS_FILE) -> Tuple[str, ...]:
+    """
+    スーテータス一覧.txt から性能値の名前を定義順に読み込む
+
+    ファイルにない既定の性能値は末尾に追加する。
+
+    Returns:
+        Tuple[str, ...]: 性能値の名前
+    """
+    names = []
+    try:
+        with open(stats_file, 'r', encoding='utf-8') as f:
+            # 最初の2行はヘッダー
+            for line in f.readlines()[2:]:
+                if '=' in line:
+                    name = line.split('=')[0].strip()
+                    if name and name not in names:
+                        names.append(name)
+    except OSError:
+        pass
+    names.extend(name for name in DEFAULT_STAT_NAMES if name not in names)
+    return tuple(names)
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class DesignStatEngine:
+    """
+    船体と搭載装備から設計の性能値を集計する
+
+    性能値は固定の並び（stat_names）のNumPy配列で扱い、装備ごとに
+    (単純加算, %調整, 全装備平均, 全装備平均を指定しているか) の4行の配列へ一度だけ変換してキャッシュするため、
+    スロットの装備を変えたときの再計算は配列の合計だけで済む。
+
+    集計式: (船体の基礎値 + 単純加算の合計 + 全装備平均) × (1 + %調整の合計)
+    全装備平均は性能値ごとに、その性能値を指定している（0でない）装備の数で割る。
+    manpowerは全装備平均に指定されていても平均せずに単純加算する。
+    """
+
+    def __init__(self, stat_names: Iterable[str] = None):
+        """
+        初期化
+
+        Args:
+            stat_names: 性能値の並び（省略時はスーテータス一覧.txtから読み込む）
+        """
+        self.stat_names = tuple(stat_names) if stat_names is not None else load_stat_names()
+        self.index = {name: i for i, name in enumerate(self.stat_names)}
+        self.size = len(self.stat_names)
+        # 装備ID -> (変換元のデータ, 4行の配列)
+        self._equipment_cache: Dict[str, Tuple[Dict[str, Any], np.ndarray]] = {}
+
+    def vector(self, stats: Optional[Dict[str, Any]]) -> np.ndarray:
+        """{性能名: 値} を配列に変換（並びにない性能名は無視）"""
+        result = np.zeros(self.size)
+        for name, value in (stats or {}).items():
+            i = self.index.get(name)
+            if i is not None:
+                result[i] = _to_float(value)
+        return result
+
+    def compile_equipment(self, equipment_data: Dict[str, Any]) -> np.ndarray:
+        """
+        装備データを (単純加算, %調整, 全装備平均, 全装備平均を指定しているか) の4行の配列に変換
+
+        4行目は全装備平均の値が0でない性能値で1になり、設計の装備で合計すると性能値ごとの平均の分母になる。
+        manpowerは全装備平均に指定されていても単純加算の行に移す（%調整はそのまま）。
+        """
+        stats = equipment_data.get('stats', {}) or {}
+        compiled = np.zeros((COMPILED_ROWS, self.size))
+        for row, mode in enumerate(STAT_MODES):
+            compiled[row] = self.vector(stats.get(mode))
+        for name in ALWAYS_ADDED_STATS:
+            i = self.index.get(name)
+            if i is not None:
+                compiled[ROW_ADD, i] += compiled[ROW_AVERAGE, i]
+                compiled[ROW_AVERAGE, i] = 0.0
+        compiled[ROW_AVERAGE_COUNT] = compiled[ROW_AVERAGE] != 0.0
+        return compiled
+
+    def equipment_stats(self, equipment_id: str, equipment_data: Dict[str, Any]) -> np.ndarray:
+        """装備の4行の配列を取得（同じデータのオブジェクトに対しては変換結果を再利用）"""
+        cached = self._equipment_cache.get(equipment_id)
+        if cached is not None and cached[0] is equipment_data:
+            return cached[1]
+        compiled = self.compile_equipment(equipment_data)
+        self._equipment_cache[equipment_id] = (equipment_data, compiled)
+        return compiled
+
+    def clear_cache(self):
+        self._equipment_cache.clear()
+
+    def hull_vector(self, hull_data: Optional[Dict[str, Any]]) -> np.ndarray:
+        """船体の基礎性能値（速力・航続距離・乗員と、船体データの stats）"""
+        result = np.zeros(self.size)
+        if not hull_data:
+            return result
+        for field, name in HULL_FIELD_STATS.items():
+            i = self.index.get(name)
+            if i is not None and field in hull_data:
+                result[i] = _to_float(hull_data.get(field))
+        stats = hull_data.get('stats') or {}
+        if any(mode in stats for mode in STAT_MODES):
+            stats = stats.get(MODE_ADD) or {}
+        result += self.vector(stats)
+        return result
+
+    def compute(self, hull_data: Optional[Dict[str, Any]], equipment: Iterable[np.ndarray]) -> np.ndarray:
+        """
+        設計の性能値を計算
+
+        Args:
+            hull_data: 船体データ
+            equipment: 搭載装備の4行の配列（equipment_stats の戻り値）
+
+        Returns:
+            np.ndarray: 性能値の配列（並びは stat_names）
+        """
+        base = self.hull_vector(hull_data)
+        equipment = list(equipment)
+        if not equipment:
+            return base
+        add, multiply, average, average_count = np.sum(equipment, axis=0)
+        return (base + add + average / np.maximum(average_count, 1.0)) * (1.0 + multiply)
+
+    def compute_design(self, hull_data: Optional[Dict[str, Any]],
+                       equipment_list: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, float]:
+        """
+        船体と (装備ID, 装備データ) のリストから性能値を計算して辞書で返す
+        """
+        vectors = [self.equipment_stats(equipment_id, data) for equipment_id, data in equipment_list if data]
+        return self.to_dict(self.compute(hull_data, vectors))
+
+    def to_dict(self, vector: np.ndarray) -> Dict[str, float]:
+        return {name: float(value) for name, value in zip(self.stat_names, vector)}
+
+    def names(self) -> List[str]:
+        return list(self.stat_names)
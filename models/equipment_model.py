@@ -1,18 +1,25 @@
 import os
 import json
-import yaml
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+from models.library_store import KIND_EQUIPMENT
+from models.equipment_templates import get_template_registry
+from models.id_path_index import IdPathIndex
+from models.id_allocator import IdAllocator, STATE_FILE_NAME
+from utils.record_cache import RecordCache, DEFAULT_MAX_ENTRIES
 
 
 class EquipmentModel:
     """装備データモデル"""
 
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, store=None, cache_size: int = DEFAULT_MAX_ENTRIES):
         """
         初期化
 
         Args:
             data_dir: データディレクトリのパス（デフォルトは'../data/equipments'）
+            store: LibraryStore（指定時は一覧・読み込みをデータベースから行う）
+            cache_size: キャッシュする装備データの上限件数
         """
         if data_dir is None:
             # デフォルトのデータディレクトリを設定
@@ -23,135 +30,23 @@ class EquipmentModel:
         # データディレクトリが存在しない場合は作成
         os.makedirs(self.data_dir, exist_ok=True)
 
-        # 装備テンプレート（装備種別など）
-        self.equipment_templates = self._load_equipment_templates()
-
-        # キャッシュ（ID -> 装備データ）
-        self.equipment_cache = {}
-
-    def _load_equipment_templates(self) -> Dict[str, Dict[str, Any]]:
-        """
-        装備テンプレートの読み込み
-
-        Returns:
-            Dict[str, Dict[str, Any]]: 装備テンプレート辞書
-        """
-        templates = {}
-
-        try:
-            # アプリのルートディレクトリを取得
-            root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-            # まず equipments_templates.yml を読み込む
-            yaml_template_file = os.path.join(root_dir, 'equipments_templates.yml')
-
-            if os.path.exists(yaml_template_file):
-                print(f"装備テンプレートファイルを読み込み中: {yaml_template_file}")
-                try:
-                    with open(yaml_template_file, 'r', encoding='utf-8') as f:
-                        yaml_data = yaml.safe_load(f)
-
-                    # YAMLデータを解析して装備テンプレートを構築
-                    self._parse_yaml_templates(yaml_data, templates)
-                    print(f"YAMLテンプレートから {len(templates)} 種類の装備テンプレートを読み込みました")
-
-                except Exception as e:
-                    print(f"YAMLテンプレートファイルの読み込みエラー: {e}")
-
-            # 次に paste.txt もチェック（互換性のため）
-            paste_template_file = os.path.join(root_dir, 'paste.txt')
-
-            # ユーザーのドキュメントディレクトリ内のpaste.txtも検索
-            if not os.path.exists(paste_template_file):
-                import platform
-                from pathlib import Path
-
-                if platform.system() == "Windows":
-                    docs_dir = os.path.join(Path.home(), "Documents", "NavalDesignSystem")
-                elif platform.system() == "Darwin":
-                    docs_dir = os.path.join(Path.home(), "Library", "Application Support", "NavalDesignSystem")
-                else:
-                    docs_dir = os.path.join(Path.home(), ".local", "share", "navaldesignsystem")
-
-                paste_template_file = os.path.join(docs_dir, 'paste.txt')
-
-            if os.path.exists(paste_template_file):
-                print(f"追加テンプレートファイルを読み込み中: {paste_template_file}")
-                try:
-                    with open(paste_template_file, 'r', encoding='utf-8') as f:
-                        content = f.read()
-
-                    # YAMLライクな形式をパースする簡易実装（既存の互換性のため）
-                    self._parse_paste_templates(content, templates)
-                    print(f"paste.txtから追加テンプレートを読み込みました")
-
-                except Exception as e:
-                    print(f"paste.txtテンプレートファイルの読み込みエラー: {e}")
-
-            if not templates:
-                print("警告: 装備テンプレートファイルが見つからないか、読み込みに失敗しました")
-
-        except Exception as e:
-            print(f"装備テンプレート読み込みエラー: {e}")
-
-        return templates
+        # 装備テンプレート（プロセス全体で共有し、解析結果はキャッシュから読み込む）
+        self.template_registry = get_template_registry()
+        self.equipment_templates = self.template_registry.templates
 
-    def _parse_yaml_templates(self, yaml_data: dict, templates: dict):
-        """YAMLデータから装備テンプレートを解析"""
-        try:
-            # 各カテゴリーを処理
-            for category_name, category_data in yaml_data.items():
-                if isinstance(category_data, dict):
-                    # カテゴリー内の各装備タイプを処理
-                    for equipment_name, equipment_data in category_data.items():
-                        if isinstance(equipment_data, dict) and 'id_prefix' in equipment_data:
-                            # 表示名を取得（存在する場合）
-                            display_name = equipment_data.get('display_name', equipment_name)
-
-                            # テンプレートデータを構築
-                            template_entry = {
-                                'category': category_name,
-                                'display_name': display_name,
-                                'id_prefix': equipment_data['id_prefix'],
-                                'common_elements': equipment_data.get('common_elements', {}),
-                                'specific_elements': equipment_data.get('specific_elements', {})
-                            }
-
-                            # 装備名をキーとして保存
-                            templates[equipment_name] = template_entry
-
-                            # 表示名でもアクセス可能にする（異なる場合）
-                            if display_name != equipment_name:
-                                templates[display_name] = template_entry
-
-                            print(
-                                f"装備テンプレートを追加: {equipment_name} ({display_name}) - プレフィックス: {equipment_data['id_prefix']}")
+        # キャッシュ（ID -> 装備データ、ファイルの更新時刻で検証するLRU）
+        self.equipment_cache = RecordCache(cache_size, name='EquipmentCache')
 
-        except Exception as e:
-            print(f"YAMLテンプレート解析エラー: {e}")
+        # ID -> (プレフィックス, パス, 更新時刻) のインデックス（サブディレクトリの走査を避ける）
+        self.path_index = IdPathIndex(self.data_dir)
 
-    def _parse_paste_templates(self, content: str, templates: dict):
-        """paste.txtの内容を解析（既存の互換性のため）"""
-        try:
-            current_type = None
-
-            for line in content.split('\n'):
-                if line.strip() and not line.startswith('#'):
-                    if ':' in line and not line.startswith(' '):
-                        # トップレベルの定義（装備タイプ）
-                        current_type = line.split(':')[0].strip()
-                        if current_type not in templates:
-                            templates[current_type] = {'common_elements': {}, 'specific_elements': {}}
-                    elif 'id_prefix:' in line and current_type:
-                        prefix = line.split('id_prefix:')[1].strip()
-                        templates[current_type]['id_prefix'] = prefix
-                        print(f"paste.txtから装備テンプレートを追加: {current_type} - プレフィックス: {prefix}")
-                    elif 'common_elements:' in line or 'specific_elements:' in line:
-                        # セクション定義は無視（パース簡易化のため）
-                        pass
+        # プレフィックスごとの単調増加IDの割り当て
+        self.id_allocator = IdAllocator(os.path.join(self.data_dir, STATE_FILE_NAME))
 
-        except Exception as e:
-            print(f"paste.txtテンプレート解析エラー: {e}")
+        # SQLiteストア（初回のみ既存のJSONを取り込む）
+        self.store = store
+        if self.store is not None:
+            self.store.migrate_json_directory(KIND_EQUIPMENT, self.data_dir, recursive=True)
 
     def get_equipment_types(self) -> List[str]:
         """
@@ -169,13 +64,7 @@ class EquipmentModel:
         Returns:
             Dict[str, List[str]]: カテゴリー名をキーとした装備タイプのリスト
         """
-        categories = {}
-        for equipment_type, template in self.equipment_templates.items():
-            category = template.get('category', 'その他')
-            if category not in categories:
-                categories[category] = []
-            categories[category].append(equipment_type)
-        return categories
+        return {category: list(types) for category, types in self.template_registry.category_types.items()}
 
     def get_equipment_display_name(self, equipment_type: str) -> str:
         """
@@ -187,9 +76,7 @@ class EquipmentModel:
         Returns:
             str: 表示名
         """
-        if equipment_type in self.equipment_templates:
-            return self.equipment_templates[equipment_type].get('display_name', equipment_type)
-        return equipment_type
+        return self.template_registry.get_display_name(equipment_type)
 
     def get_prefix_for_type(self, equipment_type: str) -> str:
         """
@@ -201,9 +88,19 @@ class EquipmentModel:
         Returns:
             str: IDプレフィックス
         """
-        if equipment_type in self.equipment_templates:
-            return self.equipment_templates[equipment_type].get('id_prefix', '')
-        return ''
+        return self.template_registry.get_prefix(equipment_type)
+
+    def get_types_for_prefix(self, id_prefix: str) -> List[str]:
+        """
+        IDプレフィックスを共有する装備タイプ（キー名・表示名）の一覧を取得
+
+        Args:
+            id_prefix: IDプレフィックス
+
+        Returns:
+            List[str]: 装備タイプのリスト
+        """
+        return self.template_registry.get_types_for_prefix(id_prefix)
 
     def get_template_elements(self, equipment_type: str) -> Dict[str, Any]:
         """
@@ -252,11 +149,21 @@ class EquipmentModel:
             # ファイル名は装備IDを使用
             file_path = os.path.join(save_dir, f"{equipment_id}.json")
 
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(equipment_data, f, ensure_ascii=False, indent=2)
+            if self.store is not None:
+                # データベースとJSONファイルを同一トランザクションで保存
+                self.store.save(KIND_EQUIPMENT, equipment_data, equipment_id, json_path=file_path)
+            else:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    json.dump(equipment_data, f, ensure_ascii=False, indent=2)
 
-            # キャッシュを更新
-            self.equipment_cache[equipment_id] = equipment_data
+            # キャッシュとインデックスを更新
+            self.equipment_cache.put(equipment_id, equipment_data, file_path)
+            self.path_index.update(equipment_id, id_prefix, file_path)
+
+            # 手動で入力されたIDの番号にも割り当てを追従させる
+            number_part = equipment_id[len(id_prefix):] if equipment_id.startswith(id_prefix) else ''
+            if number_part.isdigit():
+                self.id_allocator.observe(id_prefix, int(number_part))
 
             return True
 
@@ -274,31 +181,54 @@ class EquipmentModel:
         Returns:
             Optional[Dict[str, Any]]: 装備データ辞書（存在しない場合はNone）
         """
-        # キャッシュにあれば返す
-        if equipment_id in self.equipment_cache:
-            return self.equipment_cache[equipment_id]
+        # キャッシュにあれば返す（ファイルが更新されていた場合は破棄済み）
+        data = self.equipment_cache.get(equipment_id)
+        if data is not None:
+            return data
+
+        if self.store is not None:
+            entry = self.store.load_entry(KIND_EQUIPMENT, equipment_id)
+            if entry is not None:
+                data, path, mtime = entry
+                self.equipment_cache.put(equipment_id, data, path, mtime)
+                return data
+
+        # キャッシュにない場合はインデックスからファイルを特定して読み込み
+        file_path = self.path_index.get_path(equipment_id)
+        if file_path is None:
+            return None
 
-        # キャッシュにない場合はファイルから読み込み
-        for type_dir in os.listdir(self.data_dir):
-            dir_path = os.path.join(self.data_dir, type_dir)
-            if not os.path.isdir(dir_path):
-                continue
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
 
-            file_path = os.path.join(dir_path, f"{equipment_id}.json")
-            if os.path.exists(file_path):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
+            # キャッシュに保存
+            self.equipment_cache.put(equipment_id, data, file_path)
+            return data
 
-                    # キャッシュに保存
-                    self.equipment_cache[equipment_id] = data
-                    return data
+        except Exception as e:
+            print(f"装備データ読み込みエラー: {e}")
+            return None
 
-                except Exception as e:
-                    print(f"装備データ読み込みエラー: {e}")
-                    return None
+    def handle_file_change(self, file_path: str, change: str):
+        """
+        データディレクトリ内のファイル変更（ファイル監視からの通知）をキャッシュとインデックスに反映
+
+        Args:
+            file_path: 変更されたJSONファイルのパス
+            change: 変更の種類（"added" / "modified" / "removed"）
+        """
+        equipment_id = os.path.splitext(os.path.basename(file_path))[0]
+        id_prefix = os.path.basename(os.path.dirname(file_path))
+        self.equipment_cache.invalidate_path(file_path)
+        if change == "removed":
+            self.path_index.remove(equipment_id)
+        else:
+            self.path_index.update(equipment_id, id_prefix, file_path)
 
-        return None
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """装備キャッシュの統計情報を取得"""
+        return self.equipment_cache.stats()
 
     def get_all_equipment(self, equipment_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -312,6 +242,17 @@ class EquipmentModel:
         """
         result = []
 
+        if self.store is not None:
+            types = None
+            if equipment_type:
+                # 同じプレフィックスのタイプ（キー名と表示名）をまとめて取得
+                id_prefix = self.get_prefix_for_type(equipment_type)
+                if not id_prefix:
+                    return result
+                types = self.get_types_for_prefix(id_prefix)
+            # 一覧取得ではキャッシュを埋めない（キャッシュは単一レコードの読み込み用）
+            return self.store.list(KIND_EQUIPMENT, types=types)
+
         if equipment_type:
             # 特定タイプの装備のみ
             id_prefix = self.get_prefix_for_type(equipment_type)
@@ -325,11 +266,6 @@ class EquipmentModel:
                                 with open(file_path, 'r', encoding='utf-8') as f:
                                     data = json.load(f)
 
-                                # キャッシュに保存
-                                equipment_id = data.get('common', {}).get('ID', '')
-                                if equipment_id:
-                                    self.equipment_cache[equipment_id] = data
-
                                 result.append(data)
                             except Exception as e:
                                 print(f"装備データ読み込みエラー: {e}")
@@ -347,17 +283,42 @@ class EquipmentModel:
                             with open(file_path, 'r', encoding='utf-8') as f:
                                 data = json.load(f)
 
-                            # キャッシュに保存
-                            equipment_id = data.get('common', {}).get('ID', '')
-                            if equipment_id:
-                                self.equipment_cache[equipment_id] = data
-
                             result.append(data)
                         except Exception as e:
                             print(f"装備データ読み込みエラー: {e}")
 
         return result
 
+    def get_equipment_page(self, equipment_type: Optional[str] = None, after_id: Optional[str] = None,
+                           limit: int = 256) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        装備データをID順に1ページ分取得（一覧表示の遅延読み込み用）
+
+        Args:
+            equipment_type: 装備タイプ（指定しない場合は全装備）
+            after_id: このIDより後ろの装備を取得（省略時は先頭から）
+            limit: 取得する最大件数
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[str]]: (装備データリスト, 次のページの起点のキー)
+        """
+        if self.store is not None:
+            types = None
+            if equipment_type:
+                id_prefix = self.get_prefix_for_type(equipment_type)
+                if not id_prefix:
+                    return [], None
+                types = self.get_types_for_prefix(id_prefix)
+            return self.store.list_page(KIND_EQUIPMENT, types=types, after_id=after_id, limit=limit)
+
+        # データベースを使わない場合は全件を読み込んでから切り出す
+        records = sorted(self.get_all_equipment(equipment_type),
+                         key=lambda data: data.get('common', {}).get('ID', ''))
+        if after_id is not None:
+            records = [data for data in records if data.get('common', {}).get('ID', '') > after_id]
+        records = records[:limit]
+        return records, (records[-1].get('common', {}).get('ID', '') if records else None)
+
     def delete_equipment(self, equipment_id: str) -> bool:
         """
         装備データの削除
@@ -368,32 +329,37 @@ class EquipmentModel:
         Returns:
             bool: 削除成功時True
         """
-        # 装備データがどのタイプか検索
-        for type_dir in os.listdir(self.data_dir):
-            dir_path = os.path.join(self.data_dir, type_dir)
-            if not os.path.isdir(dir_path):
-                continue
+        if self.store is not None:
+            try:
+                if self.store.delete(KIND_EQUIPMENT, equipment_id):
+                    self.equipment_cache.pop(equipment_id, None)
+                    self.path_index.remove(equipment_id)
+                    return True
+            except Exception as e:
+                print(f"装備データ削除エラー: {e}")
+                return False
 
-            file_path = os.path.join(dir_path, f"{equipment_id}.json")
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
+        # インデックスからファイルを特定
+        file_path = self.path_index.get_path(equipment_id)
+        if file_path is None:
+            return False
 
-                    # キャッシュから削除
-                    if equipment_id in self.equipment_cache:
-                        del self.equipment_cache[equipment_id]
+        try:
+            os.remove(file_path)
 
-                    return True
+            # キャッシュとインデックスから削除
+            self.equipment_cache.pop(equipment_id, None)
+            self.path_index.remove(equipment_id)
 
-                except Exception as e:
-                    print(f"装備データ削除エラー: {e}")
-                    return False
+            return True
 
-        return False
+        except Exception as e:
+            print(f"装備データ削除エラー: {e}")
+            return False
 
     def get_next_id(self, equipment_type: str) -> str:
         """
-        指定装備タイプの次のIDを生成
+        指定装備タイプの次のIDを割り当てる
 
         Args:
             equipment_type: 装備タイプ
@@ -405,31 +371,56 @@ class EquipmentModel:
         if not id_prefix:
             return ""
 
-        # プレフィックスディレクトリの装備を取得
-        type_dir = os.path.join(self.data_dir, id_prefix)
-        if not os.path.exists(type_dir):
-            os.makedirs(type_dir, exist_ok=True)
-            return f"{id_prefix}001"  # 最初の装備ID
+        os.makedirs(os.path.join(self.data_dir, id_prefix), exist_ok=True)
+        return self.id_allocator.next_id(id_prefix, seed=lambda: self._scan_max_number(id_prefix))
+
+    def peek_next_id(self, equipment_type: str) -> str:
+        """
+        指定装備タイプの次に割り当てられるIDを取得（番号は消費しない）
+
+        Args:
+            equipment_type: 装備タイプ
+
+        Returns:
+            str: 次のID
+        """
+        id_prefix = self.get_prefix_for_type(equipment_type)
+        if not id_prefix:
+            return ""
+        return self.id_allocator.peek_next_id(id_prefix, seed=lambda: self._scan_max_number(id_prefix))
 
-        # 既存のIDから最大値を取得
+    def reserve_ids(self, equipment_type: str, count: int) -> List[str]:
+        """
+        指定装備タイプのIDをまとめて割り当てる（一括インポート用）
+
+        Args:
+            equipment_type: 装備タイプ
+            count: 件数
+
+        Returns:
+            List[str]: 割り当てたIDのリスト
+        """
+        id_prefix = self.get_prefix_for_type(equipment_type)
+        if not id_prefix:
+            return []
+        return self.id_allocator.reserve_ids(id_prefix, count, seed=lambda: self._scan_max_number(id_prefix))
+
+    def _scan_max_number(self, id_prefix: str) -> int:
+        """
+        プレフィックスディレクトリ内の既存IDの最大番号を取得（割り当て状態の初期化時のみ使用）
+        """
         max_number = 0
+        type_dir = os.path.join(self.data_dir, id_prefix)
+        if not os.path.isdir(type_dir):
+            return max_number
+
         for file_name in os.listdir(type_dir):
             if file_name.endswith('.json'):
-                try:
-                    # ファイル名（拡張子なし）＝装備ID
-                    equipment_id = file_name[:-5]
-                    # プレフィックス部分を取り除いて数値部分を取得
-                    if equipment_id.startswith(id_prefix):
-                        number_part = equipment_id[len(id_prefix):]
-                        if number_part.isdigit():
-                            number = int(number_part)
-                            max_number = max(max_number, number)
-                except Exception:
-                    pass
-
-        # 次の番号を生成
-        next_number = max_number + 1
-        return f"{id_prefix}{next_number:03d}"
+                # ファイル名（拡張子なし）＝装備ID
+                number_part = file_name[:-5][len(id_prefix):] if file_name.startswith(id_prefix) else ''
+                if number_part.isdigit():
+                    max_number = max(max_number, int(number_part))
+        return max_number
 
     def get_equipment_type_mapping(self) -> Dict[str, str]:
         """
@@ -438,19 +429,4 @@ class EquipmentModel:
         Returns:
             Dict[str, str]: キー名をキー、表示名を値とする辞書
         """
-        mapping = {}
-        processed = set()
-
-        for key, template in self.equipment_templates.items():
-            if 'display_name' in template:
-                display_name = template['display_name']
-                # 表示名が別のキーとして登録されている場合は、元のキーを優先
-                if key != display_name and key not in processed:
-                    mapping[key] = display_name
-                    processed.add(key)
-                    processed.add(display_name)
-                elif key == display_name and key not in processed:
-                    mapping[key] = display_name
-                    processed.add(key)
-
-        return mapping
\ No newline at end of file
+        return dict(self.template_registry.type_mapping)
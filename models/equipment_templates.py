@@ -0,0 +1,274 @@
+import os
+import pickle
+import platform
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+# コンパイル済みキャッシュの形式（内容を変えた場合は上げる）
+CACHE_FORMAT_VERSION = 1
+CACHE_FILE_NAME = "equipment_templates.cache"
+
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _user_data_dir() -> str:
+    """ユーザーのデータディレクトリ（paste.txtの検索先・キャッシュの保存先）"""
+    if platform.system() == "Windows":
+        return os.path.join(Path.home(), "Documents", "NavalDesignSystem")
+    if platform.system() == "Darwin":
+        return os.path.join(Path.home(), "Library", "Application Support", "NavalDesignSystem")
+    return os.path.join(Path.home(), ".local", "share", "navaldesignsystem")
+
+
+def default_template_files() -> Tuple[str, Optional[str]]:
+    """
+    テンプレートファイルのパスを取得
+
+    Returns:
+        tuple: (equipments_templates.yml のパス, paste.txt のパス or None)
+    """
+    yaml_file = os.path.join(_ROOT_DIR, 'equipments_templates.yml')
+    paste_file = os.path.join(_ROOT_DIR, 'paste.txt')
+    if not os.path.exists(paste_file):
+        paste_file = os.path.join(_user_data_dir(), 'paste.txt')
+    return yaml_file, paste_file if os.path.exists(paste_file) else None
+
+
+def _file_signature(paths) -> Tuple:
+    """キャッシュの検証用に、ファイルのパス・更新時刻・サイズを並べたもの"""
+    signature = []
+    for path in paths:
+        if not path:
+            continue
+        try:
+            stat = os.stat(path)
+            signature.append((os.path.abspath(path), stat.st_mtime, stat.st_size))
+        except OSError:
+            signature.append((os.path.abspath(path), None, None))
+    return tuple(signature)
+
+
+def parse_yaml_templates(yaml_data: dict, templates: dict):
+    """YAMLデータから装備テンプレートを解析（キー名と表示名の両方で登録）"""
+    if not isinstance(yaml_data, dict):
+        return
+    for category_name, category_data in yaml_data.items():
+        if not isinstance(category_data, dict):
+            continue
+        # カテゴリー内の各装備タイプを処理
+        for equipment_name, equipment_data in category_data.items():
+            if not isinstance(equipment_data, dict) or 'id_prefix' not in equipment_data:
+                continue
+            display_name = equipment_data.get('display_name', equipment_name)
+            template_entry = {
+                'category': category_name,
+                'display_name': display_name,
+                'id_prefix': equipment_data['id_prefix'],
+                'common_elements': equipment_data.get('common_elements', {}),
+                'specific_elements': equipment_data.get('specific_elements', {})
+            }
+            templates[equipment_name] = template_entry
+            # 表示名でもアクセス可能にする（異なる場合）
+            if display_name != equipment_name:
+                templates[display_name] = template_entry
+
+
+def parse_paste_templates(content: str, templates: dict):
+    """paste.txtの内容を解析（既存の互換性のため、装備タイプとIDプレフィックスのみ）"""
+    current_type = None
+    for line in content.split('\n'):
+        if not line.strip() or line.startswith('#'):
+            continue
+        if ':' in line and not line.startswith(' '):
+            # トップレベルの定義（装備タイプ）
+            current_type = line.split(':')[0].strip()
+            if current_type not in templates:
+                templates[current_type] = {'common_elements': {}, 'specific_elements': {}}
+        elif 'id_prefix:' in line and current_type:
+            templates[current_type]['id_prefix'] = line.split('id_prefix:')[1].strip()
+
+
+def compile_templates(templates: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    テンプレートから参照用の対応表を作成
+
+    Returns:
+        Dict[str, Any]: templates と各対応表（type_to_prefix, prefix_to_types, prefix_to_type,
+                        category_types, display_names, type_mapping）
+    """
+    type_to_prefix = {}
+    prefix_to_types = {}
+    category_types = {}
+    display_names = {}
+    for equipment_type, template in templates.items():
+        id_prefix = template.get('id_prefix', '')
+        type_to_prefix[equipment_type] = id_prefix
+        if id_prefix:
+            prefix_to_types.setdefault(id_prefix, []).append(equipment_type)
+        category_types.setdefault(template.get('category', 'その他'), []).append(equipment_type)
+        display_names[equipment_type] = template.get('display_name', equipment_type)
+
+    # キー名→表示名（表示名で重複登録したエントリは元のキーを優先して1件にまとめる）
+    type_mapping = {}
+    processed = set()
+    for key, template in templates.items():
+        if 'display_name' not in template or key in processed:
+            continue
+        display_name = template['display_name']
+        type_mapping[key] = display_name
+        processed.add(key)
+        processed.add(display_name)
+
+    # プレフィックス→代表の装備タイプ（最初に登録されたキー名）
+    prefix_to_type = {id_prefix: types[0] for id_prefix, types in prefix_to_types.items()}
+
+    return {
+        'templates': templates,
+        'type_to_prefix': type_to_prefix,
+        'prefix_to_types': prefix_to_types,
+        'prefix_to_type': prefix_to_type,
+        'category_types': category_types,
+        'display_names': display_names,
+        'type_mapping': type_mapping,
+    }
+
+
+class EquipmentTemplateRegistry:
+    """
+    装備テンプレートと対応表（タイプ→プレフィックスなど）を保持するレジストリ
+
+    YAMLの解析は遅いため、解析結果と対応表をpickleでキャッシュし、テンプレートファイルの
+    更新時刻・サイズが変わっていなければキャッシュから読み込む。プロセス内では
+    get_template_registry() で1つのインスタンスを共有する。
+    """
+
+    def __init__(self, yaml_file: str = None, paste_file: str = None, cache_file: str = None):
+        """
+        初期化
+
+        Args:
+            yaml_file: equipments_templates.yml のパス（省略時はアプリのルート）
+            paste_file: paste.txt のパス（省略時はアプリのルート、なければユーザーのデータディレクトリ）
+            cache_file: コンパイル済みキャッシュのパス（省略時はユーザーのデータディレクトリ、Noneなら保存しない）
+        """
+        default_yaml, default_paste = default_template_files()
+        self.yaml_file = yaml_file or default_yaml
+        self.paste_file = paste_file if paste_file is not None else default_paste
+        self.cache_file = cache_file if cache_file is not None else os.path.join(_user_data_dir(), CACHE_FILE_NAME)
+        self._compiled = None
+        self._signature = None
+        self.load()
+
+    def _source_signature(self) -> Tuple:
+        return _file_signature([self.yaml_file, self.paste_file])
+
+    def load(self, force: bool = False):
+        """テンプレートを読み込む（キャッシュが有効ならキャッシュから、force=True の場合は必ず解析し直す）"""
+        signature = self._source_signature()
+        compiled = None if force else self._read_cache(signature)
+        if compiled is None:
+            compiled = compile_templates(self._parse_sources())
+            self._write_cache(signature, compiled)
+        self._compiled = compiled
+        self._signature = signature
+
+    def reload_if_changed(self) -> bool:
+        """テンプレートファイルが更新されていれば読み込み直す"""
+        if self._source_signature() == self._signature:
+            return False
+        self.load()
+        return True
+
+    def _parse_sources(self) -> Dict[str, Dict[str, Any]]:
+        templates = {}
+        if os.path.exists(self.yaml_file):
+            try:
+                import yaml
+                with open(self.yaml_file, 'r', encoding='utf-8') as f:
+                    parse_yaml_templates(yaml.safe_load(f), templates)
+                print(f"YAMLテンプレートから {len(templates)} 種類の装備テンプレートを読み込みました")
+            except Exception as e:
+                print(f"YAMLテンプレートファイルの読み込みエラー: {e}")
+
+        if self.paste_file and os.path.exists(self.paste_file):
+            try:
+                with open(self.paste_file, 'r', encoding='utf-8') as f:
+                    parse_paste_templates(f.read(), templates)
+            except Exception as e:
+                print(f"paste.txtテンプレートファイルの読み込みエラー: {e}")
+
+        if not templates:
+            print("警告: 装備テンプレートファイルが見つからないか、読み込みに失敗しました")
+        return templates
+
+    def _read_cache(self, signature) -> Optional[Dict[str, Any]]:
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('version') == CACHE_FORMAT_VERSION and cached.get('signature') == signature:
+                return cached['compiled']
+        except Exception as e:
+            print(f"装備テンプレートのキャッシュを読み込めません（解析し直します）: {e}")
+        return None
+
+    def _write_cache(self, signature, compiled):
+        if not self.cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+            tmp_path = f"{self.cache_file}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'version': CACHE_FORMAT_VERSION, 'signature': signature, 'compiled': compiled},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            print(f"装備テンプレートのキャッシュを保存できません: {e}")
+
+    # 参照
+
+    @property
+    def templates(self) -> Dict[str, Dict[str, Any]]:
+        """装備タイプ（キー名・表示名）→テンプレート"""
+        return self._compiled['templates']
+
+    @property
+    def type_mapping(self) -> Dict[str, str]:
+        """キー名→表示名（表示名での重複登録を除いたもの）"""
+        return self._compiled['type_mapping']
+
+    @property
+    def category_types(self) -> Dict[str, List[str]]:
+        """カテゴリー→装備タイプのリスト"""
+        return self._compiled['category_types']
+
+    def get_template(self, equipment_type: str) -> Optional[Dict[str, Any]]:
+        return self._compiled['templates'].get(equipment_type)
+
+    def get_prefix(self, equipment_type: str) -> str:
+        return self._compiled['type_to_prefix'].get(equipment_type, '')
+
+    def get_types_for_prefix(self, id_prefix: str) -> List[str]:
+        return list(self._compiled['prefix_to_types'].get(id_prefix, []))
+
+    def get_type_for_prefix(self, id_prefix: str) -> Optional[str]:
+        return self._compiled['prefix_to_type'].get(id_prefix)
+
+    def get_display_name(self, equipment_type: str) -> str:
+        return self._compiled['display_names'].get(equipment_type, equipment_type)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_template_registry() -> EquipmentTemplateRegistry:
+    """プロセス全体で共有する装備テンプレートのレジストリを取得（初回のみ読み込む）"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = EquipmentTemplateRegistry()
+    return _registry
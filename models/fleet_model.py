@@ -0,0 +1,410 @@
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# ノードの種類（編成ツリーの階層）
+NODE_FLEET = 'fleet'
+NODE_TASK_FORCE = 'task_force'
+NODE_SHIP = 'ship'
+
+# 変更の種類
+CHANGE_RESET = 'reset'    # 全体の読み込み・クリア
+CHANGE_INSERT = 'insert'  # nodes を new_parent の new_row 以降に追加
+CHANGE_REMOVE = 'remove'  # nodes[0] を old_parent の old_row から削除
+CHANGE_MOVE = 'move'      # nodes[0] を old_parent の old_row から new_parent の new_row（移動前の位置）へ移動
+CHANGE_UPDATE = 'update'  # nodes[0] の属性を変更
+
+# 艦艇の属性（to_dict に書き出すもの）
+SHIP_FIELDS = ('name', 'exp', 'is_pride', 'design')
+
+
+class Ship:
+    """艦艇"""
+    __slots__ = ('name', 'exp', 'is_pride', 'design', 'version_name', 'parent')
+    node_type = NODE_SHIP
+
+    def __init__(self, name: str, exp: float = 0.0, is_pride: bool = False, design: Any = None,
+                 version_name: Optional[str] = None):
+        self.name = name
+        self.exp = exp
+        self.is_pride = is_pride
+        self.design = design              # ローカルの設計データ、MODの設計バリアント、または definition の文字列
+        self.version_name = version_name  # MOD内編成の表示名（設計の艦級名など）
+        self.parent = None                # 所属する任務部隊
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Ship':
+        return cls(data.get('name', ''), data.get('exp', 0.0) or 0.0, bool(data.get('is_pride', False)),
+                   data.get('design'), data.get('version_name'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "exp": self.exp, "is_pride": self.is_pride, "design": self.design}
+
+    @property
+    def fleet(self) -> Optional['Fleet']:
+        return self.parent.parent if self.parent is not None else None
+
+
+class TaskForce:
+    """任務部隊"""
+    __slots__ = ('name', 'province_id', 'ships', 'parent')
+    node_type = NODE_TASK_FORCE
+
+    def __init__(self, name: str, province_id: Any = None):
+        self.name = name
+        self.province_id = province_id
+        self.ships: List[Ship] = []
+        self.parent = None  # 所属する艦隊
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TaskForce':
+        task_force = cls(data.get('name', ''), data.get('province_id'))
+        for ship_data in data.get('ships') or []:
+            ship = Ship.from_dict(ship_data)
+            ship.parent = task_force
+            task_force.ships.append(ship)
+        return task_force
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "province_id": self.province_id,
+                "ships": [ship.to_dict() for ship in self.ships]}
+
+    @property
+    def fleet(self) -> Optional['Fleet']:
+        return self.parent
+
+
+class Fleet:
+    """艦隊"""
+    __slots__ = ('name', 'province_id', 'task_forces', 'date', 'file')
+    node_type = NODE_FLEET
+    parent = None
+
+    def __init__(self, name: str, province_id: Any = None, date: Optional[str] = None, file: Optional[str] = None):
+        self.name = name
+        self.province_id = province_id
+        self.task_forces: List[TaskForce] = []
+        self.date = date  # MOD内編成の読み込み元ファイルの年
+        self.file = file  # MOD内編成の読み込み元ファイル名
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Fleet':
+        fleet = cls(data.get('name', ''), data.get('province_id'), data.get('date'), data.get('file'))
+        for task_force_data in data.get('task_forces') or []:
+            task_force = TaskForce.from_dict(task_force_data)
+            task_force.parent = fleet
+            fleet.task_forces.append(task_force)
+        return fleet
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "province_id": self.province_id,
+                "task_forces": [task_force.to_dict() for task_force in self.task_forces]}
+
+    @property
+    def fleet(self) -> 'Fleet':
+        return self
+
+    def ship_count(self) -> int:
+        return sum(len(task_force.ships) for task_force in self.task_forces)
+
+
+class FleetChange:
+    """編成の変更内容（変更前・変更後の通知で同じものを渡す）"""
+    __slots__ = ('kind', 'nodes', 'old_parent', 'old_row', 'new_parent', 'new_row', 'provinces')
+
+    def __init__(self, kind: str, nodes: List[Any] = (), old_parent=None, old_row: int = -1,
+                 new_parent=None, new_row: int = -1, provinces: Set[Any] = frozenset()):
+        self.kind = kind
+        self.nodes = list(nodes)
+        self.old_parent = old_parent  # 艦隊の場合はNone（最上位）
+        self.old_row = old_row
+        self.new_parent = new_parent
+        self.new_row = new_row
+        self.provinces = provinces    # 港湾の集計・マップ表示が変わるプロビンス（CHANGE_RESETでは空）
+
+
+def _provinces_of(node) -> Set[Any]:
+    """ノードを含む艦隊の港湾と、ノード以下の任務部隊の位置"""
+    if node is None:
+        return set()
+    fleet = node.fleet
+    provinces = {fleet.province_id} if fleet is not None else set()
+    if node.node_type == NODE_FLEET:
+        provinces.update(task_force.province_id for task_force in node.task_forces)
+    elif node.node_type == NODE_TASK_FORCE:
+        provinces.add(node.province_id)
+    return provinces
+
+
+class FleetModel:
+    """
+    国家の編成（艦隊 -> 任務部隊 -> 艦艇）をメモリ上で保持する
+
+    編成の変更はすべてこのクラスのメソッドで行い、変更の前後に登録された関数へ
+    FleetChange を通知する（変更前の通知はQtのモデルの begin*/end* に対応させるため）。
+    艦隊の港湾ごとの艦隊・任務部隊・艦艇の数は変更のたびに差分で更新するため、
+    港湾一覧やマップの表示は編成全体を走査せずに、変更されたプロビンスの分だけ更新できる。
+    """
+
+    def __init__(self, is_mod: bool = False):
+        """
+        初期化
+
+        Args:
+            is_mod: MOD内の編成（読み取り専用として表示し、to_dict に is_mod を付ける）の場合True
+        """
+        self.is_mod = is_mod
+        self.fleets: List[Fleet] = []
+        self.logger = logging.getLogger('FleetModel')
+        self._pre_listeners = []
+        self._listeners = []
+        # 艦隊の港湾 -> [艦隊数, 任務部隊数, 艦艇数]
+        self._province_counts: Dict[Any, List[int]] = {}
+        # 任務部隊の位置 -> 任務部隊数
+        self._task_force_locations: Dict[Any, int] = {}
+
+    # 変更通知
+
+    def add_change_listener(self, callback: Callable[[FleetChange], None]):
+        """変更後に callback(FleetChange) を呼ぶ"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_change_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def add_pre_change_listener(self, callback: Callable[[FleetChange], None]):
+        """変更前に callback(FleetChange) を呼ぶ（ノードはまだ変更前の位置・値のまま）"""
+        if callback not in self._pre_listeners:
+            self._pre_listeners.append(callback)
+
+    def remove_pre_change_listener(self, callback):
+        if callback in self._pre_listeners:
+            self._pre_listeners.remove(callback)
+
+    def _dispatch(self, listeners, change: FleetChange):
+        for callback in list(listeners):
+            try:
+                callback(change)
+            except Exception as e:
+                self.logger.warning(f"編成の変更通知の処理中にエラーが発生しました: {change.kind} - {e}")
+
+    # 集計
+
+    def _adjust(self, province_id, fleets: int, task_forces: int, ships: int):
+        counts = self._province_counts.setdefault(province_id, [0, 0, 0])
+        counts[0] += fleets
+        counts[1] += task_forces
+        counts[2] += ships
+        if not any(counts):
+            del self._province_counts[province_id]
+
+    def _adjust_location(self, province_id, delta: int):
+        count = self._task_force_locations.get(province_id, 0) + delta
+        if count:
+            self._task_force_locations[province_id] = count
+        else:
+            self._task_force_locations.pop(province_id, None)
+
+    def _count_node(self, node, sign: int):
+        """ノード（以下のすべて）の分だけ集計を増減"""
+        fleet = node.fleet
+        if fleet is None:
+            return
+        if node.node_type == NODE_FLEET:
+            self._adjust(fleet.province_id, sign, sign * len(node.task_forces), sign * node.ship_count())
+            for task_force in node.task_forces:
+                self._adjust_location(task_force.province_id, sign)
+        elif node.node_type == NODE_TASK_FORCE:
+            self._adjust(fleet.province_id, 0, sign, sign * len(node.ships))
+            self._adjust_location(node.province_id, sign)
+        else:
+            self._adjust(fleet.province_id, 0, 0, sign)
+
+    def _rebuild_counts(self):
+        self._province_counts = {}
+        self._task_force_locations = {}
+        for fleet in self.fleets:
+            self._count_node(fleet, 1)
+
+    def province_counts(self, province_id) -> Tuple[int, int, int]:
+        """港湾に所属する (艦隊数, 任務部隊数, 艦艇数)"""
+        counts = self._province_counts.get(province_id)
+        return tuple(counts) if counts else (0, 0, 0)
+
+    def occupied_provinces(self) -> Set[Any]:
+        """艦隊の港湾・任務部隊の位置になっているプロビンス"""
+        return set(self._province_counts) | set(self._task_force_locations)
+
+    def is_occupied(self, province_id) -> bool:
+        return province_id in self._province_counts or province_id in self._task_force_locations
+
+    def fleets_at(self, province_id) -> List[Fleet]:
+        """港湾に所属する艦隊"""
+        if province_id not in self._province_counts:
+            return []
+        return [fleet for fleet in self.fleets if fleet.province_id == province_id]
+
+    def ship_count(self) -> int:
+        return sum(counts[2] for counts in self._province_counts.values())
+
+    # 変換
+
+    def fleet_dict(self, fleet: Fleet) -> Dict[str, Any]:
+        data = fleet.to_dict()
+        if self.is_mod:
+            data["is_mod"] = True
+            for task_force in data["task_forces"]:
+                task_force["is_mod"] = True
+                for ship in task_force["ships"]:
+                    ship["is_mod"] = True
+        return data
+
+    def to_dict(self, country: Optional[str]) -> Dict[str, Any]:
+        """保存・編成ファイル出力用の艦隊データ（{"country": 国家タグ, "fleets": [...]}）"""
+        return {"country": country, "fleets": [self.fleet_dict(fleet) for fleet in self.fleets]}
+
+    def fleets_by_province(self, provinces: Optional[Iterable[Any]] = None) -> Dict[Any, List[Dict[str, Any]]]:
+        """マップ表示用の港湾 -> 艦隊データのリスト（provinces を指定した場合はそのプロビンスのみ）"""
+        result = {}
+        if provinces is None:
+            for fleet in self.fleets:
+                result.setdefault(fleet.province_id, []).append(self.fleet_dict(fleet))
+        else:
+            for province_id in provinces:
+                fleets = self.fleets_at(province_id)
+                if fleets:
+                    result[province_id] = [self.fleet_dict(fleet) for fleet in fleets]
+        return result
+
+    # 位置
+
+    def children(self, node) -> list:
+        if node is None:
+            return self.fleets
+        if node.node_type == NODE_FLEET:
+            return node.task_forces
+        if node.node_type == NODE_TASK_FORCE:
+            return node.ships
+        return []
+
+    def row_of(self, node) -> int:
+        return self.children(node.parent).index(node)
+
+    # 変更
+
+    def load(self, fleets: Iterable[Any]):
+        """編成全体を置き換える（艦隊データの辞書または Fleet のリスト）"""
+        change = FleetChange(CHANGE_RESET)
+        self._dispatch(self._pre_listeners, change)
+        self.fleets = [fleet if isinstance(fleet, Fleet) else Fleet.from_dict(fleet) for fleet in fleets]
+        self._rebuild_counts()
+        self._dispatch(self._listeners, change)
+
+    def clear(self):
+        self.load([])
+
+    def _insert(self, parent, nodes: List[Any], row: Optional[int]):
+        siblings = self.children(parent)
+        row = len(siblings) if row is None else max(0, min(row, len(siblings)))
+        provinces = set()
+        for node in nodes:
+            if parent is not None:
+                node.parent = parent
+            provinces |= _provinces_of(node)
+        change = FleetChange(CHANGE_INSERT, nodes, new_parent=parent, new_row=row, provinces=provinces)
+        self._dispatch(self._pre_listeners, change)
+        siblings[row:row] = nodes
+        for node in nodes:
+            self._count_node(node, 1)
+        self._dispatch(self._listeners, change)
+
+    def add_fleet(self, name: str, province_id: Any, row: Optional[int] = None) -> Fleet:
+        fleet = Fleet(name, province_id)
+        self._insert(None, [fleet], row)
+        return fleet
+
+    def add_task_force(self, fleet: Fleet, name: str, province_id: Any, row: Optional[int] = None) -> TaskForce:
+        task_force = TaskForce(name, province_id)
+        self._insert(fleet, [task_force], row)
+        return task_force
+
+    def add_ship(self, task_force: TaskForce, name: str, exp: float = 0.0, is_pride: bool = False,
+                 design: Any = None, row: Optional[int] = None) -> Ship:
+        ship = Ship(name, exp, is_pride, design)
+        self._insert(task_force, [ship], row)
+        return ship
+
+    def add_ships(self, task_force: TaskForce, ships: Iterable[Ship], row: Optional[int] = None) -> List[Ship]:
+        """複数の艦艇をまとめて追加（通知は1回）"""
+        ships = list(ships)
+        if ships:
+            self._insert(task_force, ships, row)
+        return ships
+
+    def remove(self, node):
+        """ノードを（子要素を含めて）削除"""
+        parent = node.parent
+        row = self.row_of(node)
+        change = FleetChange(CHANGE_REMOVE, [node], old_parent=parent, old_row=row, provinces=_provinces_of(node))
+        self._dispatch(self._pre_listeners, change)
+        self._count_node(node, -1)
+        del self.children(parent)[row]
+        self._dispatch(self._listeners, change)
+
+    def can_move(self, node, new_parent) -> bool:
+        """任務部隊は艦隊へ、艦艇は任務部隊へのみ移動できる"""
+        if node is None or new_parent is None:
+            return False
+        return ((node.node_type == NODE_TASK_FORCE and new_parent.node_type == NODE_FLEET) or
+                (node.node_type == NODE_SHIP and new_parent.node_type == NODE_TASK_FORCE))
+
+    def move(self, node, new_parent, row: Optional[int] = None) -> bool:
+        """
+        任務部隊・艦艇を別の親へ（または同じ親の中で）移動
+
+        Args:
+            node: 移動する任務部隊・艦艇
+            new_parent: 移動先の艦隊・任務部隊
+            row: 移動先での位置（移動前の並びでの挿入位置、Noneの場合は末尾）
+
+        Returns:
+            bool: 移動した場合True（位置が変わらない場合はFalse）
+        """
+        if not self.can_move(node, new_parent):
+            raise ValueError(f"{node.node_type} を {new_parent.node_type if new_parent else None} へは移動できません")
+        old_parent = node.parent
+        old_row = self.row_of(node)
+        siblings = self.children(new_parent)
+        row = len(siblings) if row is None else max(0, min(row, len(siblings)))
+        if new_parent is old_parent and row in (old_row, old_row + 1):
+            return False
+
+        provinces = _provinces_of(node) | _provinces_of(new_parent)
+        change = FleetChange(CHANGE_MOVE, [node], old_parent=old_parent, old_row=old_row,
+                             new_parent=new_parent, new_row=row, provinces=provinces)
+        self._dispatch(self._pre_listeners, change)
+        self._count_node(node, -1)
+        del self.children(old_parent)[old_row]
+        if new_parent is old_parent and row > old_row:
+            row -= 1
+        node.parent = new_parent
+        siblings.insert(row, node)
+        self._count_node(node, 1)
+        self._dispatch(self._listeners, change)
+        return True
+
+    def update(self, node, **values):
+        """ノードの属性（name, province_id, exp, is_pride, design など）を変更"""
+        provinces = _provinces_of(node)
+        if 'province_id' in values and node.node_type != NODE_SHIP:
+            provinces.add(values['province_id'])
+        row = self.row_of(node)
+        change = FleetChange(CHANGE_UPDATE, [node], old_parent=node.parent, old_row=row,
+                             new_parent=node.parent, new_row=row, provinces=provinces)
+        self._dispatch(self._pre_listeners, change)
+        self._count_node(node, -1)
+        for key, value in values.items():
+            setattr(node, key, value)
+        self._count_node(node, 1)
+        self._dispatch(self._listeners, change)
@@ -0,0 +1,282 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from models.fleet_model import (NODE_FLEET, NODE_TASK_FORCE, CHANGE_RESET, CHANGE_INSERT, CHANGE_REMOVE,
+                                CHANGE_MOVE, CHANGE_UPDATE)
+
+# 集計する性能値（displacement は船体の重量）
+AGGREGATE_STATS = (
+    'build_cost_ic', 'displacement',
+    'lg_attack', 'hg_attack', 'torpedo_attack', 'sub_attack',
+    'anti_air_attack', 'surface_detection', 'sub_detection',
+)
+# 攻撃力の合計に含める性能値
+ATTACK_STATS = ('lg_attack', 'hg_attack', 'torpedo_attack')
+# 艦種が分からない設計の分類
+OTHER_ARCHETYPE = 'other'
+
+
+def ship_type_code(ship_type: Any) -> str:
+    """艦種（例: "DD - 一等駆逐艦"）から略号を取得"""
+    return str(ship_type or '').split(' - ')[0].strip().upper()
+
+
+def design_key(design: Any, country: Optional[str] = None) -> Optional[str]:
+    """
+    艦艇の設計から設計の性能表のキーを取得（DesignBatchEvaluator の DesignEntry.key と同じ形式）
+
+    ローカルの設計は設計ID、MODの設計バリアントは「国家タグ:名前」。definition の文字列などはNone。
+    """
+    if not isinstance(design, dict):
+        return None
+    if design.get('hull_id') and design.get('id'):
+        return str(design['id'])
+    name = str(design.get('name') or '').strip('"')
+    country = design.get('country') or country
+    if name and design.get('type') and country:
+        return f"{country}:{name}"
+    return None
+
+
+class FleetAggregate:
+    """艦艇の集計値（任務部隊・艦隊・国家の合計）"""
+    __slots__ = ('ship_count', 'unknown_count', 'stats', 'archetype_counts')
+
+    def __init__(self, ship_count: int, unknown_count: int, stats: Dict[str, float],
+                 archetype_counts: Dict[str, int]):
+        self.ship_count = ship_count
+        self.unknown_count = unknown_count        # 性能の分からない設計の艦艇数
+        self.stats = stats                        # 性能値の合計
+        self.archetype_counts = archetype_counts  # 艦種の略号 -> 隻数（0隻の艦種は含めない）
+
+    @property
+    def attack(self) -> float:
+        return sum(self.stats.get(name, 0.0) for name in ATTACK_STATS)
+
+
+class DesignStatTable:
+    """
+    設計ごとの集計用の行（性能値・艦種の隻数・艦艇数）をまとめた表
+
+    各行は [性能値..., 艦種ごとの隻数（該当する艦種の列が1）..., 性能不明の隻数, 艦艇数] の並びで、
+    艦艇の行を足し合わせるだけで性能値の合計と艦種ごとの隻数が同時に求まる。
+    行0は性能の分からない設計用で、性能不明の隻数と艦艇数だけが1になっている。
+    """
+
+    def __init__(self, keys: List[str], stats: np.ndarray, archetypes: List[str],
+                 design_archetypes: List[Optional[str]], version: int = 0):
+        """
+        初期化
+
+        Args:
+            keys: 設計のキー
+            stats: (設計数, len(AGGREGATE_STATS)) の性能値
+            archetypes: 艦種の略号（HullModel.ship_archetype_mapping のキー）
+            design_archetypes: 設計ごとの艦種の略号（分からない場合はNone）
+            version: 作成元のデータの版（設計・船体・装備が変更されるたびに増える）
+        """
+        self.archetypes = tuple(archetypes) + (OTHER_ARCHETYPE,)
+        self.version = version
+        self._archetype_offset = len(AGGREGATE_STATS)
+        self._unknown_column = self._archetype_offset + len(self.archetypes)
+        self._ship_column = self._unknown_column + 1
+        self.width = self._ship_column + 1
+        self._rows = {key: i + 1 for i, key in enumerate(keys)}
+
+        archetype_index = {code: i for i, code in enumerate(self.archetypes)}
+        other = archetype_index[OTHER_ARCHETYPE]
+        matrix = np.zeros((len(keys) + 1, self.width))
+        if len(keys):
+            matrix[1:, :len(AGGREGATE_STATS)] = stats
+            columns = [archetype_index.get(code, other) for code in design_archetypes]
+            matrix[np.arange(1, len(keys) + 1), self._archetype_offset + np.asarray(columns, dtype=np.intp)] = 1.0
+        matrix[0, self._unknown_column] = 1.0
+        matrix[:, self._ship_column] = 1.0
+        self.matrix = matrix
+
+    @classmethod
+    def from_batch(cls, result, hull_weights: Dict[str, float], archetypes: Iterable[str],
+                   version: int = 0) -> 'DesignStatTable':
+        """
+        設計の一括評価の結果から作成
+
+        Args:
+            result: DesignBatchEvaluator.evaluate の結果（BatchResult）
+            hull_weights: 船体ID -> 重量（排水量）
+            archetypes: 艦種の略号
+            version: 作成元のデータの版
+        """
+        archetypes = list(archetypes)
+        archetype_set = set(archetypes)
+        stats = np.zeros((len(result), len(AGGREGATE_STATS)))
+        for column, name in enumerate(AGGREGATE_STATS):
+            if name in result.stat_names:
+                stats[:, column] = result.column(name)
+        displacement = AGGREGATE_STATS.index('displacement')
+        stats[:, displacement] = [hull_weights.get(entry.hull_id, 0.0) for entry in result.entries]
+
+        design_archetypes = []
+        for entry in result.entries:
+            code = ship_type_code(entry.ship_type)
+            design_archetypes.append(code if code in archetype_set else None)
+        return cls([entry.key for entry in result.entries], stats, archetypes, design_archetypes, version)
+
+    @classmethod
+    def empty(cls, archetypes: Iterable[str] = ()) -> 'DesignStatTable':
+        return cls([], np.zeros((0, len(AGGREGATE_STATS))), list(archetypes), [])
+
+    def __len__(self):
+        return len(self._rows)
+
+    def row(self, design: Any, country: Optional[str] = None) -> int:
+        """設計の行番号（分からない場合は0）"""
+        key = design_key(design, country)
+        return self._rows.get(key, 0) if key is not None else 0
+
+    def rows(self, designs: Iterable[Any], country: Optional[str] = None) -> np.ndarray:
+        return np.fromiter((self.row(design, country) for design in designs), dtype=np.intp)
+
+    def vector(self, design: Any, country: Optional[str] = None) -> np.ndarray:
+        return self.matrix[self.row(design, country)]
+
+    def describe(self, vector: np.ndarray) -> FleetAggregate:
+        """集計した行を FleetAggregate に変換"""
+        stats = dict(zip(AGGREGATE_STATS, vector[:len(AGGREGATE_STATS)].tolist()))
+        counts = np.rint(vector[self._archetype_offset:self._unknown_column]).astype(int)
+        archetype_counts = {code: int(count) for code, count in zip(self.archetypes, counts) if count}
+        return FleetAggregate(int(round(vector[self._ship_column])), int(round(vector[self._unknown_column])),
+                              stats, archetype_counts)
+
+
+class FleetStatistics:
+    """
+    FleetModel の任務部隊・艦隊・国家ごとの集計値を保持する
+
+    読み込み時は全艦艇の設計の行番号と所属する任務部隊の番号を配列にして np.add.at でまとめて合計し、
+    以降は変更通知（変更前に古い位置の分を引き、変更後に新しい位置の分を足す）で
+    変更された艦艇・任務部隊の分だけを更新する。艦艇の移動は性能表の1行の加減算で済む。
+    """
+
+    def __init__(self, fleet_model, table: Optional[DesignStatTable] = None, country: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            fleet_model: 集計する FleetModel
+            table: 設計の性能表（Noneの場合は艦艇数のみ集計）
+            country: MODの設計バリアントを参照するときの国家タグ
+        """
+        self.fleet_model = fleet_model
+        self.table = table or DesignStatTable.empty()
+        self.country = country
+        self._task_force_sums = {}
+        self._fleet_sums = {}
+        self._total = np.zeros(self.table.width)
+        fleet_model.add_pre_change_listener(self._on_before_change)
+        fleet_model.add_change_listener(self._on_change)
+        self.rebuild()
+
+    def detach(self):
+        self.fleet_model.remove_pre_change_listener(self._on_before_change)
+        self.fleet_model.remove_change_listener(self._on_change)
+
+    def set_table(self, table: Optional[DesignStatTable], country: Optional[str] = None):
+        """性能表・国家を変更して集計し直す"""
+        self.table = table or DesignStatTable.empty()
+        self.country = country
+        self.rebuild()
+
+    # 集計値
+
+    def task_force(self, task_force) -> FleetAggregate:
+        return self.table.describe(self._task_force_sums.get(task_force, np.zeros(self.table.width)))
+
+    def fleet(self, fleet) -> FleetAggregate:
+        return self.table.describe(self._fleet_sums.get(fleet, np.zeros(self.table.width)))
+
+    def total(self) -> FleetAggregate:
+        """国家（編成全体）の集計値"""
+        return self.table.describe(self._total)
+
+    def node(self, node) -> FleetAggregate:
+        if node.node_type == NODE_FLEET:
+            return self.fleet(node)
+        if node.node_type == NODE_TASK_FORCE:
+            return self.task_force(node)
+        return self.table.describe(self.table.vector(node.design, self.country))
+
+    # 集計
+
+    def rebuild(self):
+        """全艦艇の行を任務部隊・艦隊ごとにまとめて合計"""
+        task_forces = [task_force for fleet in self.fleet_model.fleets for task_force in fleet.task_forces]
+        fleets = self.fleet_model.fleets
+        width = self.table.width
+
+        designs = [ship.design for task_force in task_forces for ship in task_force.ships]
+        rows = self.table.rows(designs, self.country)
+        group = np.repeat(np.arange(len(task_forces), dtype=np.intp),
+                          [len(task_force.ships) for task_force in task_forces])
+        task_force_sums = np.zeros((len(task_forces), width))
+        if len(rows):
+            np.add.at(task_force_sums, group, self.table.matrix[rows])
+
+        fleet_index = np.repeat(np.arange(len(fleets), dtype=np.intp), [len(fleet.task_forces) for fleet in fleets])
+        fleet_sums = np.zeros((len(fleets), width))
+        if len(task_forces):
+            np.add.at(fleet_sums, fleet_index, task_force_sums)
+
+        self._task_force_sums = dict(zip(task_forces, task_force_sums))
+        self._fleet_sums = dict(zip(fleets, fleet_sums))
+        self._total = fleet_sums.sum(axis=0) if len(fleets) else np.zeros(width)
+
+    def _ships_sum(self, ships) -> np.ndarray:
+        rows = self.table.rows((ship.design for ship in ships), self.country)
+        return self.table.matrix[rows].sum(axis=0) if len(rows) else np.zeros(self.table.width)
+
+    def _add_node(self, node):
+        """ノード（以下のすべて）の分を所属する任務部隊・艦隊・全体に加算"""
+        if node.node_type == NODE_FLEET:
+            fleet_sum = np.zeros(self.table.width)
+            for task_force in node.task_forces:
+                task_force_sum = self._task_force_sums[task_force] = self._ships_sum(task_force.ships)
+                fleet_sum += task_force_sum
+            self._fleet_sums[node] = fleet_sum
+            self._total += fleet_sum
+            return
+        if node.node_type == NODE_TASK_FORCE:
+            vector = self._task_force_sums[node] = self._ships_sum(node.ships)
+        else:
+            vector = self.table.vector(node.design, self.country)
+            self._task_force_sums[node.parent] += vector
+        self._fleet_sums[node.fleet] += vector
+        self._total += vector
+
+    def _subtract_node(self, node):
+        """ノード（以下のすべて）の分を所属する任務部隊・艦隊・全体から減算"""
+        if node.node_type == NODE_FLEET:
+            for task_force in node.task_forces:
+                self._task_force_sums.pop(task_force, None)
+            self._total -= self._fleet_sums.pop(node)
+            return
+        if node.node_type == NODE_TASK_FORCE:
+            vector = self._task_force_sums.pop(node)
+        else:
+            vector = self.table.vector(node.design, self.country)
+            self._task_force_sums[node.parent] -= vector
+        self._fleet_sums[node.fleet] -= vector
+        self._total -= vector
+
+    def _on_before_change(self, change):
+        if change.kind in (CHANGE_REMOVE, CHANGE_MOVE, CHANGE_UPDATE):
+            self._subtract_node(change.nodes[0])
+
+    def _on_change(self, change):
+        if change.kind == CHANGE_RESET:
+            self.rebuild()
+        elif change.kind == CHANGE_INSERT:
+            for node in change.nodes:
+                self._add_node(node)
+        elif change.kind in (CHANGE_MOVE, CHANGE_UPDATE):
+            self._add_node(change.nodes[0])
@@ -0,0 +1,202 @@
+import csv
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+
+
+def count_csv_rows(file_path: str) -> int:
+    """
+    CSVのデータ行数を概算する（進捗表示用、改行を含むセルがある場合は多めになる）
+    """
+    lines = 0
+    last_byte = b"\n"
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            lines += chunk.count(b"\n")
+            last_byte = chunk[-1:]
+    if last_byte != b"\n":
+        lines += 1
+    # ヘッダー行を除く
+    return max(0, lines - 1)
+
+
+def iter_csv_batches(file_path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Tuple[int, Dict[str, str]]]]:
+    """
+    CSVを(行番号, 行データ)のバッチに分けて逐次読み込む（ファイル全体をメモリに載せない）
+    """
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        batch = []
+        for row_number, row in enumerate(reader, start=1):
+            batch.append((row_number, row))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+class HullImportResult:
+    """CSVインポートの結果"""
+
+    def __init__(self):
+        self.total_rows = 0
+        self.processed_rows = 0
+        self.imported = 0
+        self.overwritten = 0
+        # [(行番号, エラーメッセージ), ...]
+        self.errors = []
+        self.cancelled = False
+        self.elapsed = 0.0
+
+    def summary(self, max_errors: int = 10) -> str:
+        """結果の要約文字列"""
+        lines = [f"{self.imported}件の船体データをインポートしました。"]
+        if self.overwritten:
+            lines.append(f"既存の船体データを{self.overwritten}件上書きしました。")
+        if self.cancelled:
+            lines.append("インポートは中断されました。")
+        if self.errors:
+            lines.append(f"{len(self.errors)}行でエラーが発生しました:")
+            for row_number, message in self.errors[:max_errors]:
+                lines.append(f"  行 {row_number}: {message}")
+            if len(self.errors) > max_errors:
+                lines.append(f"  ...他 {len(self.errors) - max_errors}件")
+        return "\n".join(lines)
+
+
+class HullCsvImporter:
+    """
+    船体CSVのストリーミング一括インポート
+
+    行の読み込み → 変換・検証（スレッドプール） → バッチ単位の保存（1バッチ1トランザクション）を
+    パイプライン化し、変換済みのバッチは先読み分しか保持しないため、行数によらずメモリ使用量は一定。
+    進捗と行ごとのエラーはコールバックと結果オブジェクトで報告する。
+    """
+
+    def __init__(self, hull_model, batch_size: int = DEFAULT_BATCH_SIZE, workers: int = DEFAULT_WORKERS):
+        """
+        初期化
+
+        Args:
+            hull_model: 保存先のHullModel
+            batch_size: 1トランザクションで保存する行数
+            workers: 変換・検証のスレッド数
+        """
+        self.hull_model = hull_model
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        # ID未指定の行に割り当てるIDは、バッチ単位でまとめて予約する
+        self._id_lock = threading.Lock()
+        self._reserved_ids = deque()
+
+    def _next_reserved_id(self) -> str:
+        with self._id_lock:
+            if not self._reserved_ids:
+                self._reserved_ids.extend(self.hull_model.reserve_ids(self.batch_size))
+            return self._reserved_ids.popleft()
+
+    def _convert_batch(self, batch):
+        """バッチ内の行を船体データに変換・検証する"""
+        converted = []
+        errors = []
+        for row_number, row in batch:
+            try:
+                hull_data = self.hull_model._convert_csv_row_to_hull_data(row, next_id=self._next_reserved_id)
+                if hull_data:
+                    converted.append((row_number, hull_data))
+                else:
+                    errors.append((row_number, "無効または不完全な船体データ"))
+            except Exception as e:
+                errors.append((row_number, f"変換中にエラーが発生しました: {e}"))
+        return len(batch), converted, errors
+
+    def _write_batch(self, converted, result: HullImportResult, batch_callback=None):
+        """変換済みのバッチを1トランザクションで保存する（失敗時は1行ずつ保存して原因の行を特定）"""
+        if not converted:
+            return
+
+        # 同一バッチ内の重複IDは後の行を優先する
+        unique = {}
+        for row_number, hull_data in converted:
+            unique[hull_data['id']] = (row_number, hull_data)
+        rows = list(unique.values())
+        hulls = [hull_data for _, hull_data in rows]
+
+        overwritten = sum(1 for hull_data in hulls if self.hull_model.hull_exists(hull_data['id']))
+        try:
+            saved = self.hull_model.save_hulls(hulls)
+        except Exception:
+            saved = []
+            for row_number, hull_data in rows:
+                try:
+                    saved.extend(self.hull_model.save_hulls([hull_data]))
+                except Exception as e:
+                    result.errors.append((row_number, f"保存に失敗しました: {e}"))
+
+        result.imported += len(saved)
+        result.overwritten += overwritten
+        if batch_callback and saved:
+            batch_callback(saved)
+
+    def run(self, file_path: str,
+            progress_callback: Callable[[int, int], None] = None,
+            cancel_check: Callable[[], bool] = None,
+            batch_callback: Callable[[List[Dict[str, Any]]], None] = None) -> HullImportResult:
+        """
+        インポートを実行する
+
+        Args:
+            file_path: CSVファイルのパス
+            progress_callback: (処理済み行数, 総行数の概算) を受け取る関数
+            cancel_check: Trueを返すと中断する関数
+            batch_callback: 保存したバッチ（船体データのリスト）を受け取る関数
+
+        Returns:
+            HullImportResult: インポート結果
+        """
+        start_time = time.time()
+        result = HullImportResult()
+        result.total_rows = count_csv_rows(file_path)
+        max_pending = self.workers * 2
+
+        def drain(future):
+            row_count, converted, errors = future.result()
+            result.errors.extend(errors)
+            self._write_batch(converted, result, batch_callback)
+            result.processed_rows += row_count
+            if progress_callback:
+                progress_callback(result.processed_rows, max(result.total_rows, result.processed_rows))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for batch in iter_csv_batches(file_path, self.batch_size):
+                if cancel_check and cancel_check():
+                    result.cancelled = True
+                    break
+                pending.append(executor.submit(self._convert_batch, batch))
+                # 書き込みは行の順序どおりに行い、先読みはmax_pendingバッチまでに抑える
+                while pending and (len(pending) > max_pending or pending[0].done()):
+                    drain(pending.popleft())
+
+            while pending:
+                future = pending.popleft()
+                if result.cancelled:
+                    # 中断時は未保存のバッチを破棄する
+                    future.cancel()
+                    continue
+                drain(future)
+
+        # 使われなかった予約IDは欠番になる（単調増加のため再利用しない）
+        self._reserved_ids.clear()
+        result.errors.sort(key=lambda error: error[0])
+        result.elapsed = time.time() - start_time
+        return result
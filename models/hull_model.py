@@ -1,22 +1,27 @@
 import os
 import json
-import csv
 import re
 import time
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Tuple, Union
 
 from tools.japanese_tools import convert_name
+from models.library_store import KIND_HULL
+from models.id_allocator import IdAllocator, STATE_FILE_NAME, parse_id_number
+from utils.record_cache import RecordCache, DEFAULT_MAX_ENTRIES
+from models.hull_import import HullCsvImporter, HullImportResult, DEFAULT_BATCH_SIZE, DEFAULT_WORKERS
 
 
 class HullModel:
     """船体データモデル"""
 
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, store=None, cache_size: int = DEFAULT_MAX_ENTRIES):
         """
         初期化
 
         Args:
             data_dir: データディレクトリのパス（デフォルトは'../data/hulls'）
+            store: LibraryStore（指定時は一覧・読み込みをデータベースから行う）
+            cache_size: キャッシュする船体データの上限件数
         """
         if data_dir is None:
             # デフォルトのデータディレクトリを設定
@@ -27,8 +32,16 @@ class HullModel:
         # データディレクトリが存在しない場合は作成
         os.makedirs(self.data_dir, exist_ok=True)
 
-        # キャッシュ（ID -> 船体データ）
-        self.hull_cache = {}
+        # キャッシュ（ID -> 船体データ、ファイルの更新時刻で検証するLRU）
+        self.hull_cache = RecordCache(cache_size, name='HullCache')
+
+        # プレフィックスごとの単調増加IDの割り当て
+        self.id_allocator = IdAllocator(os.path.join(self.data_dir, STATE_FILE_NAME))
+
+        # SQLiteストア（初回のみ既存のJSONを取り込む）
+        self.store = store
+        if self.store is not None:
+            self.store.migrate_json_directory(KIND_HULL, self.data_dir, id_from_filename=True)
 
         # 艦種の種別データベース
         self.ship_type_mapping = {
@@ -205,11 +218,20 @@ class HullModel:
             # ファイル名は船体IDを使用
             file_path = os.path.join(self.data_dir, f"{hull_id}.json")
 
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(hull_data, f, ensure_ascii=False, indent=2)
+            if self.store is not None:
+                # データベースとJSONファイルを同一トランザクションで保存
+                self.store.save(KIND_HULL, hull_data, hull_id, json_path=file_path)
+            else:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    json.dump(hull_data, f, ensure_ascii=False, indent=2)
 
             # キャッシュを更新
-            self.hull_cache[hull_id] = hull_data
+            self.hull_cache.put(hull_id, hull_data, file_path)
+
+            # 手動で入力されたIDの番号にも割り当てを追従させる
+            number = parse_id_number(hull_id, 'HULL')
+            if number is not None:
+                self.id_allocator.observe('HULL', number)
 
             return True
 
@@ -227,9 +249,17 @@ class HullModel:
         Returns:
             Optional[Dict[str, Any]]: 船体データ辞書（存在しない場合はNone）
         """
-        # キャッシュにあれば返す
-        if hull_id in self.hull_cache:
-            return self.hull_cache[hull_id]
+        # キャッシュにあれば返す（ファイルが更新されていた場合は破棄済み）
+        data = self.hull_cache.get(hull_id)
+        if data is not None:
+            return data
+
+        if self.store is not None:
+            entry = self.store.load_entry(KIND_HULL, hull_id)
+            if entry is not None:
+                data, path, mtime = entry
+                self.hull_cache.put(hull_id, data, path, mtime)
+                return data
 
         # キャッシュにない場合はファイルから読み込み
         file_path = os.path.join(self.data_dir, f"{hull_id}.json")
@@ -239,7 +269,7 @@ class HullModel:
                     data = json.load(f)
 
                 # キャッシュに保存
-                self.hull_cache[hull_id] = data
+                self.hull_cache.put(hull_id, data, file_path)
                 return data
 
             except Exception as e:
@@ -257,6 +287,10 @@ class HullModel:
         """
         result = []
 
+        if self.store is not None:
+            # 一覧取得ではキャッシュを埋めない（キャッシュは単一レコードの読み込み用）
+            return self.store.list(KIND_HULL)
+
         # 全船体
         if os.path.exists(self.data_dir):
             for file_name in os.listdir(self.data_dir):
@@ -266,17 +300,34 @@ class HullModel:
                         with open(file_path, 'r', encoding='utf-8') as f:
                             data = json.load(f)
 
-                        # キャッシュに保存
-                        hull_id = data.get('id', '')
-                        if hull_id:
-                            self.hull_cache[hull_id] = data
-
                         result.append(data)
                     except Exception as e:
                         print(f"船体データ読み込みエラー: {e}")
 
         return result
 
+    def get_hull_page(self, after_id: Optional[str] = None,
+                      limit: int = 256) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        船体データをID順に1ページ分取得（一覧表示の遅延読み込み用）
+
+        Args:
+            after_id: このIDより後ろの船体を取得（省略時は先頭から）
+            limit: 取得する最大件数
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[str]]: (船体データリスト, 次のページの起点のキー)
+        """
+        if self.store is not None:
+            return self.store.list_page(KIND_HULL, after_id=after_id, limit=limit)
+
+        # データベースを使わない場合は全件を読み込んでから切り出す
+        records = sorted(self.get_all_hulls(), key=lambda data: data.get('id', ''))
+        if after_id is not None:
+            records = [data for data in records if data.get('id', '') > after_id]
+        records = records[:limit]
+        return records, (records[-1].get('id', '') if records else None)
+
     def delete_hull(self, hull_id: str) -> bool:
         """
         船体データの削除
@@ -287,14 +338,22 @@ class HullModel:
         Returns:
             bool: 削除成功時True
         """
+        deleted = False
+        if self.store is not None:
+            try:
+                deleted = self.store.delete(KIND_HULL, hull_id, remove_file=False)
+            except Exception as e:
+                print(f"船体データ削除エラー: {e}")
+                return False
+            self.hull_cache.pop(hull_id, None)
+
         file_path = os.path.join(self.data_dir, f"{hull_id}.json")
         if os.path.exists(file_path):
             try:
                 os.remove(file_path)
 
                 # キャッシュから削除
-                if hull_id in self.hull_cache:
-                    del self.hull_cache[hull_id]
+                self.hull_cache.pop(hull_id, None)
 
                 return True
 
@@ -302,11 +361,72 @@ class HullModel:
                 print(f"船体データ削除エラー: {e}")
                 return False
 
-        return False
+        return deleted
+
+    def handle_file_change(self, file_path: str, change: str):
+        """
+        データディレクトリ内のファイル変更（ファイル監視からの通知）をキャッシュに反映
+
+        Args:
+            file_path: 変更されたJSONファイルのパス
+            change: 変更の種類（"added" / "modified" / "removed"）
+        """
+        self.hull_cache.invalidate_path(file_path)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """船体キャッシュの統計情報を取得"""
+        return self.hull_cache.stats()
+
+    def hull_exists(self, hull_id: str) -> bool:
+        """
+        船体データが存在するか（データを読み込まずに確認）
+
+        Args:
+            hull_id: 船体ID
+
+        Returns:
+            bool: 存在する場合True
+        """
+        if self.store is not None:
+            return self.store.exists(KIND_HULL, hull_id)
+        return os.path.exists(os.path.join(self.data_dir, f"{hull_id}.json"))
+
+    def save_hulls(self, hulls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        複数の船体データを一括保存（ストア使用時は1トランザクション）
+
+        大量インポート用のため、保存したデータはキャッシュに載せず、古いキャッシュのみ破棄する。
+
+        Args:
+            hulls: IDが設定済みの船体データのリスト
+
+        Returns:
+            List[Dict[str, Any]]: 保存した船体データのリスト
+        """
+        os.makedirs(self.data_dir, exist_ok=True)
+        records = [(hull_data, os.path.join(self.data_dir, f"{hull_data['id']}.json")) for hull_data in hulls]
+
+        if self.store is not None:
+            self.store.save_many(KIND_HULL, records)
+        else:
+            for hull_data, file_path in records:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    json.dump(hull_data, f, ensure_ascii=False, indent=2)
+
+        max_number = None
+        for hull_data in hulls:
+            self.hull_cache.pop(hull_data['id'], None)
+            number = parse_id_number(hull_data['id'], 'HULL')
+            if number is not None and (max_number is None or number > max_number):
+                max_number = number
+        if max_number is not None:
+            self.id_allocator.observe('HULL', max_number)
+
+        return hulls
 
     def get_next_id(self, prefix: str = "HULL") -> str:
         """
-        次の船体IDを生成
+        次の船体IDを割り当てる
 
         Args:
             prefix: IDのプレフィックス
@@ -314,28 +434,36 @@ class HullModel:
         Returns:
             str: 次のID
         """
-        # 既存のIDから最大値を取得
+        return self.id_allocator.next_id(prefix, seed=lambda: self._scan_max_number(prefix))
+
+    def reserve_ids(self, count: int, prefix: str = "HULL") -> List[str]:
+        """
+        船体IDをまとめて割り当てる（一括インポート用）
+
+        Args:
+            count: 件数
+            prefix: IDのプレフィックス
+
+        Returns:
+            List[str]: 割り当てたIDのリスト
+        """
+        return self.id_allocator.reserve_ids(prefix, count, seed=lambda: self._scan_max_number(prefix))
+
+    def _scan_max_number(self, prefix: str) -> int:
+        """
+        既存の船体IDの最大番号を取得（割り当て状態の初期化時のみ使用）
+        """
         max_number = 0
 
         if os.path.exists(self.data_dir):
             for file_name in os.listdir(self.data_dir):
                 if file_name.endswith('.json'):
-                    try:
-                        # ファイル名（拡張子なし）＝船体ID
-                        hull_id = file_name[:-5]
-                        # プレフィックス部分を取り除いて数値部分を取得
-                        if hull_id.startswith(prefix):
-                            # 数値部分を抽出（最後の連続する数字）
-                            match = re.search(r'(\d+)$', hull_id)
-                            if match:
-                                number = int(match.group(1))
-                                max_number = max(max_number, number)
-                    except Exception:
-                        pass
-
-        # 次の番号を生成
-        next_number = max_number + 1
-        return f"{prefix}{next_number:03d}"
+                    # ファイル名（拡張子なし）＝船体ID
+                    number = parse_id_number(file_name[:-5], prefix)
+                    if number is not None:
+                        max_number = max(max_number, number)
+
+        return max_number
 
     def convert_name(self, name: str, country: str, ship_type: str) -> str:
         """
@@ -386,10 +514,12 @@ class HullModel:
 
         return "_".join(id_parts)
 
-    def import_from_csv(self, file_path: str) -> List[Dict[str, Any]]:
+    def import_from_csv(self, file_path: str, progress_callback=None, cancel_check=None) -> List[Dict[str, Any]]:
         """
         CSVから船体データをインポート（全行の連続的な読み込み）
 
+        大量の行を扱う場合は、データを保持しない import_from_csv_streaming を使用する。
+
         Args:
             file_path: CSVファイルのパス
 
@@ -397,61 +527,43 @@ class HullModel:
             List[Dict[str, Any]]: インポートされた船体データのリスト
         """
         imported_hulls = []
-
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-
-                # 全行を処理
-                for row_number, row in enumerate(reader, start=1):
-                    try:
-                        # 各行のデータをパース
-                        hull_data = self._convert_csv_row_to_hull_data(row)
-
-                        if hull_data:
-                            # IDが未設定または自動生成が必要な場合は新しいIDを生成
-                            if not hull_data.get('id') or hull_data.get('id') == '-':
-                                name = hull_data.get('name', '')
-                                country = hull_data.get('country', '')
-                                ship_type = hull_data.get('type', '')
-
-                                if name and (country or ship_type):
-                                    hull_data['id'] = self.convert_name(name, country, ship_type)
-                                else:
-                                    hull_data['id'] = self.get_next_id('HULL')
-
-                            # 既存データの確認
-                            existing_hull = self.load_hull(hull_data['id'])
-                            if existing_hull:
-                                print(f"警告: 行 {row_number} - 既存の船体ID '{hull_data['id']}' が上書きされます")
-
-                            # 船体データを保存
-                            if self.save_hull(hull_data):
-                                print(f"行 {row_number} - 船体データ '{hull_data.get('name', '')}' (ID: {hull_data['id']}) を保存しました")
-                                imported_hulls.append(hull_data)
-                            else:
-                                print(f"エラー: 行 {row_number} - 船体データの保存に失敗しました")
-                        else:
-                            print(f"エラー: 行 {row_number} - 無効または不完全な船体データ")
-
-                    except Exception as e:
-                        print(f"エラー: 行 {row_number} - 処理中にエラーが発生しました: {e}")
-                        # 個別の行のエラーで処理を中断せず、次の行に進む
-                        continue
-
+            result = self.import_from_csv_streaming(file_path, progress_callback, cancel_check,
+                                                    batch_callback=imported_hulls.extend)
+            for row_number, message in result.errors:
+                print(f"エラー: 行 {row_number} - {message}")
             print(f"CSVのインポートが完了しました。合計: {len(imported_hulls)}件の船体データをインポートしました。")
-            return imported_hulls
-
         except Exception as e:
             print(f"CSVインポートエラー: {e}")
-            return imported_hulls
+        return imported_hulls
+
+    def import_from_csv_streaming(self, file_path: str, progress_callback=None, cancel_check=None,
+                                  batch_callback=None, batch_size: int = DEFAULT_BATCH_SIZE,
+                                  workers: int = DEFAULT_WORKERS) -> HullImportResult:
+        """
+        CSVから船体データをストリーミングでインポート（バッチ単位で保存し、データは保持しない）
+
+        Args:
+            file_path: CSVファイルのパス
+            progress_callback: (処理済み行数, 総行数の概算) を受け取る関数
+            cancel_check: Trueを返すと中断する関数
+            batch_callback: 保存したバッチを受け取る関数
+            batch_size: 1トランザクションで保存する行数
+            workers: 変換・検証のスレッド数
+
+        Returns:
+            HullImportResult: インポート結果（件数・行ごとのエラー）
+        """
+        importer = HullCsvImporter(self, batch_size=batch_size, workers=workers)
+        return importer.run(file_path, progress_callback, cancel_check, batch_callback)
 
-    def _convert_csv_row_to_hull_data(self, row: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    def _convert_csv_row_to_hull_data(self, row: Dict[str, str], next_id=None) -> Optional[Dict[str, Any]]:
         """
         CSVの行データを船体データ形式に変換
 
         Args:
             row: CSVの行データ
+            next_id: ID未指定時に呼ぶID生成関数（省略時は get_next_id('HULL')）
 
         Returns:
             Optional[Dict[str, Any]]: 変換された船体データ（変換できない場合はNone）
@@ -495,7 +607,7 @@ class HullModel:
             if name and (country or ship_type):
                 hull_data['id'] = convert_name(name, country, ship_type)
             else:
-                hull_data['id'] = self.get_next_id('HULL')
+                hull_data['id'] = next_id() if next_id else self.get_next_id('HULL')
         # 艦種（type）の処理 - 短い艦種コードから完全な記述に変換
         if 'type' in hull_data:
             ship_type = hull_data['type']
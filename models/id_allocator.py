@@ -0,0 +1,177 @@
+import os
+import re
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# プロセス間の排他制御にはOSのファイルロックを使う（プロセスが終了するとOSが解放する）
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+STATE_FILE_NAME = ".id_sequences"
+
+
+def format_id(prefix: str, number: int, width: int = 3) -> str:
+    """プレフィックスと番号からIDを生成（例: SMLG001）"""
+    return f"{prefix}{number:0{width}d}"
+
+
+def parse_id_number(record_id: str, prefix: str) -> Optional[int]:
+    """IDがプレフィックスで始まる場合、末尾の番号を取得"""
+    if not record_id or not record_id.startswith(prefix):
+        return None
+    match = re.search(r'(\d+)$', record_id[len(prefix):])
+    return int(match.group(1)) if match else None
+
+
+class IdAllocator:
+    """
+    プレフィックスごとの単調増加IDの割り当て
+
+    各プレフィックスの最終番号を状態ファイルに保存し、割り当てのたびに
+    ディレクトリを走査する必要をなくす。状態ファイルは一時ファイルからの置き換えで
+    更新し、ロックファイルのOSのファイルロックで複数プロセスからの同時割り当てを直列化する。
+    """
+
+    def __init__(self, state_file: str):
+        """
+        初期化
+
+        Args:
+            state_file: 状態ファイルのパス
+        """
+        self.state_file = state_file
+        self.lock_file = f"{state_file}.lock"
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _try_lock(fd: int) -> bool:
+        """ロックファイルの排他ロックを待たずに取得する（他のプロセスが保持中の場合はFalse）"""
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _unlock(fd: int):
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    @contextmanager
+    def _exclusive(self, timeout: float = 5.0):
+        """
+        スレッド間・プロセス間の排他制御
+
+        ロックファイルは削除せずに残し、OSのファイルロックで排他する。ロックは保持している
+        プロセスが異常終了してもOSが解放するため、古いロックを推測で削除する必要がない。
+        """
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_file)), exist_ok=True)
+            fd = os.open(self.lock_file, os.O_CREAT | os.O_RDWR)
+            try:
+                deadline = time.time() + timeout
+                while not self._try_lock(fd):
+                    if time.time() > deadline:
+                        raise TimeoutError(f"ID割り当てのロックを取得できません: {self.lock_file}")
+                    time.sleep(0.01)
+                try:
+                    yield
+                finally:
+                    self._unlock(fd)
+            finally:
+                os.close(fd)
+
+    def _read_state(self) -> Dict[str, int]:
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return {prefix: int(number) for prefix, number in json.load(f).items()}
+        except Exception as e:
+            print(f"ID割り当て状態の読み込みエラー: {e}")
+            return {}
+
+    def _write_state(self, state: Dict[str, int]):
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_file)
+
+    def reserve(self, prefix: str, count: int = 1, seed: Callable[[], int] = None) -> range:
+        """
+        連続する番号をまとめて予約する（一括インポート用）
+
+        Args:
+            prefix: IDプレフィックス
+            count: 予約する件数
+            seed: プレフィックスが未登録の場合に既存データの最大番号を返す関数（初回のみ呼ばれる）
+
+        Returns:
+            range: 予約された番号の範囲
+        """
+        if count < 1:
+            return range(0)
+        with self._exclusive():
+            state = self._read_state()
+            if prefix not in state:
+                state[prefix] = int(seed()) if seed else 0
+            start = state[prefix] + 1
+            state[prefix] = start + count - 1
+            self._write_state(state)
+        return range(start, start + count)
+
+    def next_id(self, prefix: str, width: int = 3, seed: Callable[[], int] = None) -> str:
+        """次のIDを割り当てる"""
+        number = self.reserve(prefix, 1, seed)[0]
+        return format_id(prefix, number, width)
+
+    def reserve_ids(self, prefix: str, count: int, width: int = 3, seed: Callable[[], int] = None) -> List[str]:
+        """連続するIDをまとめて割り当てる"""
+        return [format_id(prefix, number, width) for number in self.reserve(prefix, count, seed)]
+
+    def observe(self, prefix: str, number: int):
+        """
+        手動で指定されたIDの番号を通知する（割り当て済みの番号より大きい場合は追従する）
+
+        未登録のプレフィックスは初回の割り当て時に既存データから初期化されるため何もしない。
+        """
+        with self._lock:
+            state = self._read_state()
+            if prefix not in state or number <= state[prefix]:
+                return
+        with self._exclusive():
+            state = self._read_state()
+            if prefix in state and number > state[prefix]:
+                state[prefix] = number
+                self._write_state(state)
+
+    def peek(self, prefix: str) -> Optional[int]:
+        """最後に割り当てた番号（未登録の場合はNone）"""
+        with self._lock:
+            return self._read_state().get(prefix)
+
+    def peek_next_id(self, prefix: str, width: int = 3, seed: Callable[[], int] = None) -> str:
+        """
+        次に割り当てられるIDを返す（番号は消費しない。フォームでの表示用）
+
+        プレフィックスが未登録の場合は seed の最大番号の次を返すが、状態ファイルには記録しない。
+        """
+        number = self.peek(prefix)
+        if number is None:
+            number = int(seed()) if seed else 0
+        return format_id(prefix, number + 1, width)
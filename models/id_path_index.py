@@ -0,0 +1,154 @@
+import os
+import json
+import threading
+from typing import Dict, Optional, Tuple
+
+INDEX_FILE_NAME = ".id_index.json"
+INDEX_VERSION = 1
+
+
+class IdPathIndex:
+    """
+    レコードID -> (プレフィックス, ファイルパス, 更新時刻) の永続インデックス
+
+    data_dir/<プレフィックス>/<ID>.json の構成を前提とし、サブディレクトリの更新時刻が
+    前回の走査時から変わったディレクトリだけを走査し直す（ファイルの追加・削除・名前変更で
+    ディレクトリの更新時刻が変わる）。単一レコードの検索はプレフィックスの数によらずO(1)。
+    """
+
+    def __init__(self, data_dir: str, index_file: str = None):
+        """
+        初期化
+
+        Args:
+            data_dir: データディレクトリのパス
+            index_file: インデックスファイルのパス（デフォルトは data_dir/.id_index.json）
+        """
+        self.data_dir = data_dir
+        self.index_file = index_file or os.path.join(data_dir, INDEX_FILE_NAME)
+        self._lock = threading.RLock()
+        # ID -> (プレフィックス, パス, 更新時刻)
+        self._entries: Dict[str, Tuple[str, str, float]] = {}
+        # プレフィックス -> 走査時のディレクトリ更新時刻
+        self._dir_mtimes: Dict[str, float] = {}
+        self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, record_id):
+        return record_id in self._entries
+
+    def _load(self):
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return
+            self._dir_mtimes = {prefix: float(mtime) for prefix, mtime in data.get('dirs', {}).items()}
+            self._entries = {
+                record_id: (prefix, os.path.join(self.data_dir, prefix, f"{record_id}.json"), float(mtime))
+                for record_id, (prefix, mtime) in data.get('ids', {}).items()
+            }
+        except Exception as e:
+            print(f"IDインデックスの読み込みエラー: {e}")
+            self._entries = {}
+            self._dir_mtimes = {}
+
+    def save(self):
+        """インデックスをファイルに書き出す"""
+        with self._lock:
+            data = {
+                'version': INDEX_VERSION,
+                'dirs': self._dir_mtimes,
+                'ids': {record_id: [prefix, mtime] for record_id, (prefix, _, mtime) in self._entries.items()},
+            }
+        try:
+            tmp_path = f"{self.index_file}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_file)
+        except Exception as e:
+            print(f"IDインデックスの保存エラー: {e}")
+
+    def refresh(self) -> bool:
+        """
+        更新時刻が変わったサブディレクトリだけを走査し直す
+
+        Returns:
+            bool: インデックスが変更された場合True
+        """
+        changed = False
+        with self._lock:
+            if not os.path.isdir(self.data_dir):
+                return False
+
+            seen = set()
+            for entry in os.scandir(self.data_dir):
+                if not entry.is_dir():
+                    continue
+                prefix = entry.name
+                seen.add(prefix)
+                dir_mtime = entry.stat().st_mtime
+                if self._dir_mtimes.get(prefix) == dir_mtime:
+                    continue
+                self._rescan_prefix(prefix, entry.path)
+                self._dir_mtimes[prefix] = dir_mtime
+                changed = True
+
+            # 削除されたサブディレクトリ
+            for prefix in set(self._dir_mtimes) - seen:
+                self._drop_prefix(prefix)
+                del self._dir_mtimes[prefix]
+                changed = True
+
+        if changed:
+            self.save()
+        return changed
+
+    def _drop_prefix(self, prefix: str):
+        for record_id in [rid for rid, entry in self._entries.items() if entry[0] == prefix]:
+            del self._entries[record_id]
+
+    def _rescan_prefix(self, prefix: str, dir_path: str):
+        self._drop_prefix(prefix)
+        for entry in os.scandir(dir_path):
+            if entry.is_file() and entry.name.endswith('.json'):
+                self._entries[entry.name[:-5]] = (prefix, entry.path, entry.stat().st_mtime)
+
+    def lookup(self, record_id: str) -> Optional[Tuple[str, str, float]]:
+        """
+        IDからエントリを取得（見つからない・ファイルが消えている場合は変更されたディレクトリを走査し直す）
+
+        Returns:
+            Optional[Tuple[str, str, float]]: (プレフィックス, パス, 更新時刻)
+        """
+        with self._lock:
+            entry = self._entries.get(record_id)
+            if entry is not None and os.path.exists(entry[1]):
+                return entry
+            if self.refresh():
+                entry = self._entries.get(record_id)
+                if entry is not None and os.path.exists(entry[1]):
+                    return entry
+            return None
+
+    def get_path(self, record_id: str) -> Optional[str]:
+        entry = self.lookup(record_id)
+        return entry[1] if entry else None
+
+    def update(self, record_id: str, prefix: str, file_path: str):
+        """保存したレコードのエントリを更新する"""
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(file_path)
+            except OSError:
+                mtime = 0.0
+            self._entries[record_id] = (prefix, file_path, mtime)
+
+    def remove(self, record_id: str):
+        """削除したレコードのエントリを削除する"""
+        with self._lock:
+            self._entries.pop(record_id, None)
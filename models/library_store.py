@@ -0,0 +1,777 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+# 保存対象のデータ種別
+KIND_EQUIPMENT = "equipment"
+KIND_HULL = "hull"
+KIND_DESIGN = "design"
+KIND_FLEET = "fleet"
+
+LIBRARY_KINDS = (KIND_EQUIPMENT, KIND_HULL, KIND_DESIGN, KIND_FLEET)
+
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    type TEXT,
+    country TEXT,
+    year INTEGER,
+    name TEXT,
+    path TEXT,
+    mtime REAL,
+    summary TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS idx_records_type ON records (kind, type);
+CREATE INDEX IF NOT EXISTS idx_records_country ON records (kind, country);
+CREATE INDEX IF NOT EXISTS idx_records_year ON records (kind, year);
+CREATE INDEX IF NOT EXISTS idx_records_path ON records (path);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+# 索引列（query() の絞り込み・並べ替え・射影でデータ本体を読まずに使える列）
+INDEX_COLUMNS = ('id', 'type', 'country', 'year', 'name')
+
+# 種別ごとの性能値の格納先（データ内のドット区切りのキー、空文字はデータ直下）。複数ある場合は先に見つかった値を使う
+STAT_ROOTS = {
+    KIND_EQUIPMENT: ('stats.add_stats', 'stats.add_average_stats'),
+    KIND_HULL: ('',),
+    KIND_DESIGN: ('stats',),  # 設計の保存時に計算した性能値
+    KIND_FLEET: ('',),
+}
+
+
+def _json_path(*keys: str) -> str:
+    """データ内のキーの並びをSQLiteのJSONパス（$."a"."b"）に変換"""
+    parts = []
+    for key in keys:
+        key = str(key)
+        if '"' in key:
+            raise ValueError(f"JSONのキーに使用できない文字が含まれています: {key}")
+        parts.append(f'."{key}"')
+    return '$' + ''.join(parts)
+
+
+def _to_year(value) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _equipment_summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    common = data.get('common', {}) or {}
+    return {
+        'id': common.get('ID', ''),
+        'type': data.get('equipment_type', ''),
+        'country': common.get('開発国', ''),
+        'year': _to_year(common.get('開発年')),
+        'name': common.get('名前', ''),
+    }
+
+
+def _hull_summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': data.get('id', ''),
+        'type': data.get('type', ''),
+        'country': data.get('country', ''),
+        'year': _to_year(data.get('year')),
+        'name': data.get('name', ''),
+    }
+
+
+def _design_summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': data.get('id', ''),
+        'type': data.get('ship_type', data.get('hull', '')),
+        'country': data.get('country', ''),
+        'year': _to_year(data.get('year')),
+        'name': data.get('design_name', data.get('name', '')),
+    }
+
+
+def _fleet_summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    country = data.get('country', '')
+    return {
+        'id': country,
+        'type': 'fleet',
+        'country': country,
+        'year': _to_year(data.get('year')),
+        'name': country,
+    }
+
+
+# 種別ごとの索引列の抽出関数
+SUMMARY_EXTRACTORS = {
+    KIND_EQUIPMENT: _equipment_summary,
+    KIND_HULL: _hull_summary,
+    KIND_DESIGN: _design_summary,
+    KIND_FLEET: _fleet_summary,
+}
+
+
+def _equipment_listing(data: Dict[str, Any], summary: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': summary['id'],
+        'name': summary['name'],
+        'type': summary['type'],
+        'year': summary['year'],
+        'stats': data.get('specific', data.get('stats', {})),
+    }
+
+
+def _hull_listing(data: Dict[str, Any], summary: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': summary['id'],
+        'name': summary['name'],
+        'type': summary['type'],
+        'year': summary['year'],
+        'stats': data.get('stats', {}),
+    }
+
+
+def _design_listing(data: Dict[str, Any], summary: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': summary['id'],
+        'design_name': summary['name'],
+        'ship_type': summary['type'],
+        'hull_name': data.get('hull_name', ''),
+        'year': data.get('year', ''),
+        'main_slots': data.get('main_slots', {}),
+        'slot_categories': data.get('slot_categories', {}),
+        'internal_slots': data.get('internal_slots', []),
+    }
+
+
+def _fleet_listing(data: Dict[str, Any], summary: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': summary['id'],
+        'fleet_count': len(data.get('fleets', []) or []),
+    }
+
+
+# 種別ごとの一覧表示用の要約（国家別の一覧などでデータ本体を読まずに返す）
+LISTING_BUILDERS = {
+    KIND_EQUIPMENT: _equipment_listing,
+    KIND_HULL: _hull_listing,
+    KIND_DESIGN: _design_listing,
+    KIND_FLEET: _fleet_listing,
+}
+
+
+def write_json_atomic(file_path: str, data: Dict[str, Any]):
+    """一時ファイルに書き出してから置き換える（書き込み途中のファイルを残さない）"""
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, file_path)
+
+
+class LibraryStore:
+    """
+    装備・船体・設計・艦隊データのSQLiteストア
+
+    各レコードはJSON列にそのまま格納し、ID・種別・国家・年を索引列として持つ。
+    従来のJSONファイル（1レコード1ファイル）は互換性のため書き出しを続けるが、
+    一覧・絞り込みはデータベースから行うため、ファイルを開き直す必要がない。
+    """
+
+    def __init__(self, db_path: str):
+        """
+        初期化
+
+        Args:
+            db_path: データベースファイルのパス
+        """
+        self.db_path = db_path
+        self.logger = logging.getLogger('LibraryStore')
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        # 同一接続を複数スレッドから使うためロックで直列化する
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        # 変更通知（コミット後にまとめて通知し、ロールバックされた変更は通知しない）
+        self._listeners = []
+        self._pending_changes = []
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._upgrade_schema()
+        self.set_meta("schema_version", SCHEMA_VERSION)
+
+    def _upgrade_schema(self):
+        """旧バージョンのデータベースに不足している列を追加し、要約を補完する"""
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(records)")}
+        if 'summary' not in columns:
+            self._conn.execute("ALTER TABLE records ADD COLUMN summary TEXT")
+
+        with self.transaction() as conn:
+            rows = conn.execute("SELECT kind, id, data FROM records WHERE summary IS NULL").fetchall()
+            for row in rows:
+                try:
+                    summary = self._summary(row['kind'], json.loads(row['data']), row['id'])
+                except Exception as e:
+                    self.logger.warning(f"要約の作成に失敗しました: {row['kind']}/{row['id']} - {e}")
+                    continue
+                conn.execute("UPDATE records SET summary = ? WHERE kind = ? AND id = ?",
+                             (json.dumps(summary['listing'], ensure_ascii=False), row['kind'], row['id']))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @contextmanager
+    def transaction(self):
+        """
+        トランザクション（ブロック内で例外が発生した場合はロールバック）
+
+        入れ子で呼ばれた場合は外側のトランザクションにまとめる。
+        """
+        with self._lock:
+            if self._conn.in_transaction:
+                yield self._conn
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self._pending_changes = []
+                raise
+            else:
+                self._conn.execute("COMMIT")
+                changes, self._pending_changes = self._pending_changes, []
+        self._dispatch_changes(changes)
+
+    # 変更通知
+
+    def add_change_listener(self, callback):
+        """
+        レコードの変更を通知する関数を登録する
+
+        callback(種別, ID, 要約) の形で呼ばれる。削除時の要約はNone、種別の全削除時はIDもNone。
+        保存元のスレッドから呼ばれるため、呼び出し側でスレッドセーフにすること。
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_change_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, kind: str, record_id: Optional[str], summary: Optional[Dict[str, Any]]):
+        if not self._listeners:
+            return
+        self._pending_changes.append((kind, record_id, summary))
+        if not self._conn.in_transaction:
+            changes, self._pending_changes = self._pending_changes, []
+            self._dispatch_changes(changes)
+
+    def _dispatch_changes(self, changes):
+        for kind, record_id, summary in changes:
+            for callback in list(self._listeners):
+                try:
+                    callback(kind, record_id, summary)
+                except Exception as e:
+                    self.logger.warning(f"変更通知の処理中にエラーが発生しました: {kind}/{record_id} - {e}")
+
+    # メタ情報
+
+    def get_meta(self, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        return json.loads(row['value'])
+
+    def set_meta(self, key: str, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                               (key, json.dumps(value, ensure_ascii=False)))
+
+    # 書き込み
+
+    def _summary(self, kind: str, data: Dict[str, Any], record_id: Optional[str]) -> Dict[str, Any]:
+        summary = SUMMARY_EXTRACTORS[kind](data)
+        if record_id:
+            summary['id'] = record_id
+        if not summary['id']:
+            raise ValueError(f"{kind} のIDが指定されていません")
+        summary['listing'] = LISTING_BUILDERS[kind](data, summary)
+        return summary
+
+    def _upsert(self, conn, kind: str, data: Dict[str, Any], record_id=None, path=None, mtime=None):
+        summary = self._summary(kind, data, record_id)
+        conn.execute(
+            "INSERT OR REPLACE INTO records "
+            "(kind, id, type, country, year, name, path, mtime, summary, data, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, summary['id'], summary['type'], summary['country'], summary['year'], summary['name'],
+             path, mtime, json.dumps(summary['listing'], ensure_ascii=False),
+             json.dumps(data, ensure_ascii=False), time.time()))
+        self._notify(kind, summary['id'], summary)
+        return summary['id']
+
+    def save(self, kind: str, data: Dict[str, Any], record_id: str = None, json_path: str = None) -> str:
+        """
+        レコードを保存する
+
+        json_path を指定した場合は同じトランザクション内でJSONファイルも書き出し、
+        ファイルの書き込みに失敗した場合はデータベースへの変更も取り消す。
+
+        Returns:
+            str: 保存したレコードのID
+        """
+        with self.transaction() as conn:
+            record_id = self._upsert(conn, kind, data, record_id, json_path)
+            if json_path:
+                write_json_atomic(json_path, data)
+                conn.execute("UPDATE records SET mtime = ? WHERE kind = ? AND id = ?",
+                             (os.path.getmtime(json_path), kind, record_id))
+        return record_id
+
+    def save_many(self, kind: str, records: Iterable[Tuple[Dict[str, Any], Optional[str]]]) -> int:
+        """
+        複数レコードを1トランザクションで保存する
+
+        Args:
+            records: (データ, JSONファイルのパス or None) の反復可能オブジェクト
+
+        Returns:
+            int: 保存件数
+        """
+        count = 0
+        with self.transaction() as conn:
+            for data, json_path in records:
+                record_id = self._upsert(conn, kind, data, None, json_path)
+                if json_path:
+                    write_json_atomic(json_path, data)
+                    conn.execute("UPDATE records SET mtime = ? WHERE kind = ? AND id = ?",
+                                 (os.path.getmtime(json_path), kind, record_id))
+                count += 1
+        return count
+
+    def delete(self, kind: str, record_id: str, remove_file: bool = True) -> bool:
+        """
+        レコードを削除する（remove_file=True の場合は対応するJSONファイルも削除）
+
+        Returns:
+            bool: レコードが存在して削除できた場合True
+        """
+        with self.transaction() as conn:
+            row = conn.execute("SELECT path FROM records WHERE kind = ? AND id = ?", (kind, record_id)).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM records WHERE kind = ? AND id = ?", (kind, record_id))
+            if remove_file and row['path'] and os.path.exists(row['path']):
+                os.remove(row['path'])
+            self._notify(kind, record_id, None)
+        return True
+
+    def delete_all(self, kind: str) -> int:
+        """種別のレコードをすべて削除する（JSONファイルは削除しない）"""
+        with self.transaction() as conn:
+            count = conn.execute("DELETE FROM records WHERE kind = ?", (kind,)).rowcount
+            self._notify(kind, None, None)
+        return count
+
+    # 読み込み
+
+    def load(self, kind: str, record_id: str, validate: bool = False) -> Optional[Dict[str, Any]]:
+        entry = self.load_entry(kind, record_id, validate)
+        return entry[0] if entry else None
+
+    def load_entry(self, kind: str, record_id: str, validate: bool = True):
+        """
+        レコードをファイルのパス・更新時刻とともに取得する
+
+        validate=True の場合、JSONファイルが外部で更新されていればファイルから読み直して
+        データベースを更新し、削除されていればレコードも削除する。
+
+        Returns:
+            tuple or None: (データ, パス, 更新時刻)
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT data, path, mtime FROM records WHERE kind = ? AND id = ?",
+                                     (kind, record_id)).fetchone()
+            if row is None:
+                return None
+
+            path, mtime = row['path'], row['mtime']
+            if not validate or not path:
+                return json.loads(row['data']), path, mtime
+
+            try:
+                current_mtime = os.path.getmtime(path)
+            except OSError:
+                self.logger.info(f"ファイルが削除されていたためレコードを削除: {kind}/{record_id}")
+                self._conn.execute("DELETE FROM records WHERE kind = ? AND id = ?", (kind, record_id))
+                self._notify(kind, record_id, None)
+                return None
+
+            if current_mtime == mtime:
+                return json.loads(row['data']), path, mtime
+
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                self.logger.warning(f"更新されたファイルを読み込めません: {path} - {e}")
+                return json.loads(row['data']), path, mtime
+
+            with self.transaction() as conn:
+                self._upsert(conn, kind, data, record_id, path, current_mtime)
+            return data, path, current_mtime
+
+    def get_path(self, kind: str, record_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT path FROM records WHERE kind = ? AND id = ?",
+                                     (kind, record_id)).fetchone()
+        return row['path'] if row else None
+
+    def exists(self, kind: str, record_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM records WHERE kind = ? AND id = ?",
+                                     (kind, record_id)).fetchone()
+        return row is not None
+
+    def _where(self, kind: str, types=None, country=None) -> Tuple[str, list]:
+        clauses = ["kind = ?"]
+        params = [kind]
+        if types:
+            if isinstance(types, str):
+                types = [types]
+            types = list(types)
+            clauses.append(f"type IN ({','.join('?' * len(types))})")
+            params.extend(types)
+        if country:
+            clauses.append("country = ?")
+            params.append(country)
+        return " AND ".join(clauses), params
+
+    def list(self, kind: str, types=None, country: str = None) -> List[Dict[str, Any]]:
+        """
+        レコードの一覧を取得する
+
+        Args:
+            kind: データ種別
+            types: 種別（文字列またはリスト、省略時はすべて）
+            country: 国家タグ（省略時はすべて）
+
+        Returns:
+            List[Dict[str, Any]]: レコードデータのリスト
+        """
+        where, params = self._where(kind, types, country)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT data FROM records WHERE {where} ORDER BY id", params).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def list_summaries(self, kind: str, types=None, country: str = None) -> List[Dict[str, Any]]:
+        """
+        一覧表示用の要約を名前順に取得する（国家での絞り込みは索引を使用）
+
+        Returns:
+            List[Dict[str, Any]]: 要約のリスト（内容は LISTING_BUILDERS を参照）
+        """
+        where, params = self._where(kind, types, country)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT summary FROM records WHERE {where} ORDER BY name, id",
+                                      params).fetchall()
+        return [json.loads(row['summary']) for row in rows if row['summary']]
+
+    def list_page(self, kind: str, types=None, country: str = None, after_id: str = None,
+                  limit: int = 256) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        レコードをID順に1ページ分取得する（一覧表示の遅延読み込み用）
+
+        OFFSETではなく直前のページの最後のIDを起点にするため、後ろのページでも主キーの索引だけで取得できる。
+        起点にはデータ内のIDではなくストアのキー（records.id）を使う（両者が異なるレコードでも同じページを繰り返さない）。
+
+        Args:
+            after_id: このキーより後ろのレコードを取得（省略時は先頭から）
+            limit: 取得する最大件数
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Optional[str]]: (レコードデータのリスト, 最後のレコードのキー)。
+            次のページはこのキーを after_id に指定して取得する。
+        """
+        where, params = self._where(kind, types, country)
+        if after_id is not None:
+            where += " AND id > ?"
+            params.append(after_id)
+        params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id, data FROM records WHERE {where} ORDER BY id LIMIT ?",
+                                      params).fetchall()
+        return [json.loads(row['data']) for row in rows], (rows[-1]['id'] if rows else None)
+
+    def list_index_rows(self, kind: str, types=None, country: str = None, after_id: str = None,
+                        limit: int = None) -> List[Dict[str, Any]]:
+        """
+        索引列（ID・種別・国家・年・名前）のみを取得する（検索索引の作成用、データ本体は読まない）
+
+        limit を指定した場合はID順に after_id より後ろを最大 limit 件取得する（短い読み取りに分けて、
+        他の書き込みを長時間待たせないため）。
+        """
+        where, params = self._where(kind, types, country)
+        sql = f"SELECT id, type, country, year, name FROM records WHERE {where}"
+        if after_id is not None:
+            sql += " AND id > ?"
+            params.append(after_id)
+        if limit is not None:
+            sql += " ORDER BY id LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_ids(self, kind: str, types=None, country: str = None) -> List[str]:
+        where, params = self._where(kind, types, country)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id FROM records WHERE {where} ORDER BY id", params).fetchall()
+        return [row['id'] for row in rows]
+
+    def count(self, kind: str, types=None, country: str = None) -> int:
+        where, params = self._where(kind, types, country)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM records WHERE {where}", params).fetchone()[0]
+
+    # 条件付きの取得
+
+    def _field_path(self, field: str) -> str:
+        """索引列以外のフィールド名（"common.名前" のようなドット区切り）をJSONパスに変換"""
+        return _json_path(*field.split('.'))
+
+    def _stat_paths(self, kind: str, stat: str) -> List[str]:
+        """性能名のJSONパス（ドット区切りの場合はデータ直下からのパスとして扱う）"""
+        if '.' in stat:
+            return [self._field_path(stat)]
+        return [_json_path(*root.split('.'), stat) if root else _json_path(stat)
+                for root in STAT_ROOTS.get(kind, ('',))]
+
+    def _query_where(self, kind: str, types=None, country=None, year_from=None, year_to=None,
+                     min_stats=None, max_stats=None) -> Tuple[str, list]:
+        where, params = self._where(kind, types, country)
+        clauses = [where]
+        if year_from is not None:
+            clauses.append("year >= ?")
+            params.append(int(year_from))
+        if year_to is not None:
+            clauses.append("year <= ?")
+            params.append(int(year_to))
+        # 性能値は文字列で保存されている場合もあるため数値に変換して比較する
+        for stats, op in ((min_stats, '>='), (max_stats, '<=')):
+            for stat, threshold in (stats or {}).items():
+                paths = self._stat_paths(kind, stat)
+                value = ", ".join("json_extract(data, ?)" for _ in paths)
+                if len(paths) > 1:
+                    value = f"COALESCE({value})"
+                clauses.append(f"CAST({value} AS REAL) {op} ?")
+                params.extend(paths + [float(threshold)])
+        return " AND ".join(clauses), params
+
+    def query(self, kind: str, types=None, country: str = None, year_from: int = None, year_to: int = None,
+              min_stats: Dict[str, float] = None, max_stats: Dict[str, float] = None,
+              order_by: str = 'id', descending: bool = False, offset: int = 0, limit: int = None,
+              fields: Iterable[str] = None) -> List[Dict[str, Any]]:
+        """
+        条件に一致するレコードを取得する
+
+        絞り込み・並べ替え・件数の制限はすべてデータベース側で行い、fields を指定した場合は
+        その列だけを取り出すため、表示に必要な行と列の分しかJSONを復元しない。
+
+        Args:
+            kind: データ種別
+            types: 種別（文字列またはリスト、省略時はすべて）
+            country: 国家タグ（省略時はすべて）
+            year_from: 開発年の下限（この年を含む）
+            year_to: 開発年の上限（この年を含む）
+            min_stats: {性能名: 下限値}（性能値の格納先は STAT_ROOTS を参照。"stats.add_stats.lg_attack" のような
+                ドット区切りの場合はデータ直下からのパス）
+            max_stats: {性能名: 上限値}
+            order_by: 並べ替えのキー（索引列またはドット区切りのフィールド名、同値はID順）
+            descending: 降順にするか
+            offset: 先頭から読み飛ばす件数
+            limit: 取得する最大件数（省略時はすべて）
+            fields: 取得するフィールド（索引列またはドット区切りのフィールド名、省略時はデータ全体）
+
+        Returns:
+            List[Dict[str, Any]]: fields を指定した場合は {フィールド名: 値}、省略時はレコードデータのリスト
+        """
+        where, params = self._query_where(kind, types, country, year_from, year_to, min_stats, max_stats)
+
+        if fields is None:
+            columns = "data"
+        else:
+            fields = list(fields)
+            selects = []
+            select_params = []
+            for field in fields:
+                if field in INDEX_COLUMNS:
+                    selects.append(field)
+                else:
+                    # オブジェクト・配列はJSON文字列で返るため、型も取得して復元する
+                    path = self._field_path(field)
+                    selects.append("json_extract(data, ?), json_type(data, ?)")
+                    select_params.extend([path, path])
+            columns = ", ".join(selects)
+            params = select_params + params
+
+        direction = "DESC" if descending else "ASC"
+        if order_by in INDEX_COLUMNS:
+            order = f"{order_by} {direction}"
+        else:
+            order = f"json_extract(data, ?) {direction}"
+            params.append(self._field_path(order_by))
+        if order_by != 'id':
+            order += f", id {direction}"
+
+        sql = f"SELECT {columns} FROM records WHERE {where} ORDER BY {order}"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([-1 if limit is None else int(limit), int(offset or 0)])
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        if fields is None:
+            return [json.loads(row['data']) for row in rows]
+
+        results = []
+        for row in rows:
+            values = iter(row)
+            record = {}
+            for field in fields:
+                value = next(values)
+                if field not in INDEX_COLUMNS:
+                    if next(values) in ('object', 'array') and value is not None:
+                        value = json.loads(value)
+                record[field] = value
+            results.append(record)
+        return results
+
+    def query_count(self, kind: str, types=None, country: str = None, year_from: int = None, year_to: int = None,
+                    min_stats: Dict[str, float] = None, max_stats: Dict[str, float] = None) -> int:
+        """query() と同じ条件に一致するレコードの件数を取得する（ページ数の計算用）"""
+        where, params = self._query_where(kind, types, country, year_from, year_to, min_stats, max_stats)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM records WHERE {where}", params).fetchone()[0]
+
+    # ファイル変更の取り込み
+
+    def sync_file(self, kind: str, file_path: str, id_from_filename: bool = False) -> Optional[str]:
+        """
+        外部で追加・更新されたJSONファイルをデータベースに反映する
+
+        データベースに記録された更新時刻と同じ場合（アプリ自身の保存など）は何もしない。
+
+        Returns:
+            Optional[str]: 反映したレコードのID（変更なし・読み込み失敗時はNone）
+        """
+        try:
+            mtime = os.path.getmtime(file_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            row = self._conn.execute("SELECT id, mtime FROM records WHERE kind = ? AND path = ?",
+                                     (kind, file_path)).fetchone()
+            if row is not None and row['mtime'] == mtime:
+                return None
+
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                self.logger.warning(f"JSONファイルを取り込めません: {file_path} - {e}")
+                return None
+
+            record_id = os.path.splitext(os.path.basename(file_path))[0] if id_from_filename else None
+            with self.transaction() as conn:
+                return self._upsert(conn, kind, data, record_id, file_path, mtime)
+
+    def remove_path(self, kind: str, file_path: str) -> List[str]:
+        """
+        外部で削除されたJSONファイルに対応するレコードを削除する
+
+        Returns:
+            List[str]: 削除したレコードのID
+        """
+        with self.transaction() as conn:
+            rows = conn.execute("SELECT id FROM records WHERE kind = ? AND path = ?", (kind, file_path)).fetchall()
+            conn.execute("DELETE FROM records WHERE kind = ? AND path = ?", (kind, file_path))
+            for row in rows:
+                self._notify(kind, row['id'], None)
+        return [row['id'] for row in rows]
+
+    # JSONディレクトリからの移行
+
+    def migrate_json_directory(self, kind: str, directory: str, recursive: bool = False,
+                               id_from_filename: bool = False, force: bool = False) -> int:
+        """
+        既存のJSONディレクトリをデータベースに取り込む（初回のみ）
+
+        Args:
+            kind: データ種別
+            directory: JSONファイルのディレクトリ
+            recursive: サブディレクトリも対象にするか（装備はプレフィックス別のサブディレクトリ）
+            id_from_filename: ファイル名（拡張子なし）をIDとして使うか
+            force: 移行済みでも再度取り込むか
+
+        Returns:
+            int: 取り込んだ件数
+        """
+        meta_key = f"migrated:{kind}"
+        if not force and self.get_meta(meta_key):
+            return 0
+
+        start_time = time.time()
+        count = 0
+        errors = 0
+        with self.transaction() as conn:
+            if os.path.isdir(directory):
+                for file_path in self._iter_json_files(directory, recursive):
+                    try:
+                        with open(file_path, 'r', encoding='utf-8') as f:
+                            data = json.load(f)
+                        record_id = os.path.splitext(os.path.basename(file_path))[0] if id_from_filename else None
+                        self._upsert(conn, kind, data, record_id, file_path, os.path.getmtime(file_path))
+                        count += 1
+                    except Exception as e:
+                        errors += 1
+                        self.logger.warning(f"JSONファイルの取り込みに失敗しました: {file_path} - {e}")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                         (meta_key, json.dumps({'directory': directory, 'count': count, 'time': time.time()})))
+
+        self.logger.info(f"{kind}: {count}件のJSONを取り込みました（失敗 {errors}件, {time.time() - start_time:.2f}秒）")
+        return count
+
+    @staticmethod
+    def _iter_json_files(directory: str, recursive: bool):
+        for entry in os.scandir(directory):
+            # インデックスなどの隠しファイルは対象外
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir():
+                if recursive:
+                    yield from LibraryStore._iter_json_files(entry.path, False)
+            elif entry.name.endswith('.json'):
+                yield entry.path
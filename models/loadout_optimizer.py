@@ -0,0 +1,373 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.design_stats import (DesignStatEngine, COMPILED_ROWS, ROW_ADD, ROW_MULTIPLY, ROW_AVERAGE,
+                                  ROW_AVERAGE_COUNT)
+
+OBJECTIVE_MAX = 'max'
+OBJECTIVE_MIN = 'min'
+CONSTRAINT_MIN = '>='
+CONSTRAINT_MAX = '<='
+
+# 探索を打ち切るまでのノード数（1タスクあたり）
+DEFAULT_MAX_NODES = 2_000_000
+# 並列探索の前に、枝刈りの基準となる解を集めるための探索ノード数
+SEED_NODES = 20_000
+
+
+class Loadout:
+    """最適化で見つかった装備の組み合わせ"""
+
+    __slots__ = ('equipment_ids', 'objectives', 'stats')
+
+    def __init__(self, equipment_ids: Dict[str, str], objectives: Dict[str, float], stats: Dict[str, float]):
+        self.equipment_ids = equipment_ids  # スロットID -> 装備ID
+        self.objectives = objectives        # 目的の性能名 -> 値
+        self.stats = stats                  # 全性能値
+
+    def __repr__(self):
+        return f"Loadout({self.objectives})"
+
+
+class OptimizationResult:
+    """最適化の結果（目的関数のパレートフロンティア）"""
+
+    def __init__(self, loadouts: List[Loadout], nodes: int, elapsed: float, complete: bool,
+                 candidate_counts: Dict[str, Tuple[int, int]]):
+        self.loadouts = loadouts
+        self.nodes = nodes
+        self.elapsed = elapsed
+        # 探索を打ち切らずにすべての枝を調べ終えた場合True（Falseの場合は近似解）
+        self.complete = complete
+        # スロットID -> (候補数, 優越する候補を除いた後の数)
+        self.candidate_counts = candidate_counts
+
+
+def _product_bounds(a_lo, a_hi, b_lo, b_hi):
+    """区間の積 [a_lo, a_hi] × [b_lo, b_hi] の下限・上限（要素ごと）"""
+    corners = np.stack([a_lo * b_lo, a_lo * b_hi, a_hi * b_lo, a_hi * b_hi])
+    return corners.min(axis=0), corners.max(axis=0)
+
+
+def _pareto_mask(points: np.ndarray) -> np.ndarray:
+    """
+    大きいほど良い点の集合から、他の点に優越されない点のマスクを作成
+
+    すべての値が等しい点は最初の1つだけを残す。
+    """
+    count = len(points)
+    keep = np.ones(count, dtype=bool)
+    for i in range(count):
+        if not keep[i]:
+            continue
+        others = keep.copy()
+        others[i] = False
+        dominated_by = (points[others] >= points[i]).all(axis=1)
+        if dominated_by.any():
+            # 等しい点に対しては先にある点を残す
+            equal = (points[others] == points[i]).all(axis=1)
+            other_index = np.flatnonzero(others)
+            if (dominated_by & ~equal).any() or (other_index[equal] < i).any():
+                keep[i] = False
+    return keep
+
+
+class _SearchData:
+    """ワーカーに渡す探索用のデータ（NumPy配列のみで、プロセス間で受け渡せる）"""
+
+    def __init__(self, base, fixed, slot_p, slot_m, slot_a, slot_c, objective_index, objective_sign,
+                 constraint_lo, constraint_hi):
+        self.base = base                    # (性能数,) 船体の基礎値
+        self.fixed = fixed                  # (行数, 性能数) 探索対象外のスロットに固定された装備の合計
+        self.slot_p = slot_p                # スロットごとの (候補数, 性能数) 単純加算
+        self.slot_m = slot_m                # スロットごとの (候補数, 性能数) %調整
+        self.slot_a = slot_a                # スロットごとの (候補数, 性能数) 全装備平均
+        self.slot_c = slot_c                # スロットごとの (候補数, 性能数) 全装備平均を指定しているか（0 or 1）
+        self.objective_index = objective_index
+        self.objective_sign = objective_sign  # 最大化は1、最小化は-1
+        self.constraint_lo = constraint_lo    # 性能ごとの下限（なしは-inf）
+        self.constraint_hi = constraint_hi    # 性能ごとの上限（なしは+inf）
+
+        # 残りのスロットで取り得る加算値・%調整の合計の範囲（スロット j 以降、メモ化して各ノードで再計算しない）
+        slot_count = len(slot_p)
+        size = len(base)
+        self.suffix_p_lo = np.zeros((slot_count + 1, size))
+        self.suffix_p_hi = np.zeros((slot_count + 1, size))
+        self.suffix_m_lo = np.zeros((slot_count + 1, size))
+        self.suffix_m_hi = np.zeros((slot_count + 1, size))
+        # 残りのスロットの候補が平均に加え得る値の範囲（平均を指定する候補がない場合は +inf / -inf）
+        self.suffix_a_lo = np.full((slot_count + 1, size), np.inf)
+        self.suffix_a_hi = np.full((slot_count + 1, size), -np.inf)
+        for j in range(slot_count - 1, -1, -1):
+            self.suffix_p_lo[j] = self.suffix_p_lo[j + 1] + slot_p[j].min(axis=0)
+            self.suffix_p_hi[j] = self.suffix_p_hi[j + 1] + slot_p[j].max(axis=0)
+            self.suffix_m_lo[j] = self.suffix_m_lo[j + 1] + slot_m[j].min(axis=0)
+            self.suffix_m_hi[j] = self.suffix_m_hi[j + 1] + slot_m[j].max(axis=0)
+            contributes = slot_c[j] > 0
+            self.suffix_a_lo[j] = np.minimum(self.suffix_a_lo[j + 1],
+                                             np.where(contributes, slot_a[j], np.inf).min(axis=0))
+            self.suffix_a_hi[j] = np.maximum(self.suffix_a_hi[j + 1],
+                                             np.where(contributes, slot_a[j], -np.inf).max(axis=0))
+
+
+class _Search:
+    """分枝限定法による探索（1タスク分）"""
+
+    def __init__(self, data: _SearchData, frontier: np.ndarray, max_nodes: int, deadline: float):
+        self.data = data
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.nodes = 0
+        self.complete = True
+        # 見つかった解（目的は大きいほど良い向きに揃えた値）と選んだ候補の番号
+        self.frontier = frontier if frontier is not None else np.zeros((0, len(data.objective_index)))
+        self.seed_count = len(self.frontier)
+        self.solutions: List[Tuple[np.ndarray, Tuple[int, ...]]] = []
+
+    def _bounds(self, depth, p, m, a, c):
+        """
+        スロット depth 以降を選んだときの性能値の範囲（p, m, a, c は候補ごとの部分和の行列）
+
+        平均は要素の凸結合なので、選択済みの平均と残りの候補の値の範囲に収まる
+        （まだ平均を指定する装備がない性能値は、最後まで指定されない場合の0も範囲に含める）。
+        """
+        data = self.data
+        has_average = c > 0
+        average = a / np.maximum(c, 1.0)
+        average_lo = np.minimum(np.where(has_average, average, 0.0), data.suffix_a_lo[depth])
+        average_hi = np.maximum(np.where(has_average, average, 0.0), data.suffix_a_hi[depth])
+        base = data.base + p
+        return _product_bounds(base + data.suffix_p_lo[depth] + average_lo,
+                               base + data.suffix_p_hi[depth] + average_hi,
+                               1.0 + m + data.suffix_m_lo[depth], 1.0 + m + data.suffix_m_hi[depth])
+
+    def _dominated(self, optimistic: np.ndarray) -> np.ndarray:
+        """楽観値が既存の解に（弱く）優越される行のマスク"""
+        if not len(self.frontier):
+            return np.zeros(len(optimistic), dtype=bool)
+        return (self.frontier[None, :, :] >= optimistic[:, None, :]).all(axis=2).any(axis=1)
+
+    def _add_solution(self, value: np.ndarray, choice: Tuple[int, ...]):
+        if len(self.frontier) and (self.frontier >= value).all(axis=1).any():
+            return
+        keep = ~(value >= self.frontier).all(axis=1) if len(self.frontier) else np.zeros(0, dtype=bool)
+        self.frontier = np.vstack([self.frontier[keep], value[None, :]])
+        self.solutions = [(v, c) for v, c in self.solutions if not (value >= v).all()]
+        self.solutions.append((value, choice))
+
+    def run(self, prefix: Tuple[int, ...]):
+        data = self.data
+        p, m, a, c = data.fixed[ROW_ADD], data.fixed[ROW_MULTIPLY], data.fixed[ROW_AVERAGE], data.fixed[ROW_AVERAGE_COUNT]
+        for j, choice in enumerate(prefix):
+            p = p + data.slot_p[j][choice]
+            m = m + data.slot_m[j][choice]
+            a = a + data.slot_a[j][choice]
+            c = c + data.slot_c[j][choice]
+        self._expand(len(prefix), p, m, a, c, prefix)
+
+    def _expand(self, depth, p, m, a, c, choice):
+        data = self.data
+        if self.nodes >= self.max_nodes or time.time() > self.deadline:
+            self.complete = False
+            return
+
+        # 子ノード（このスロットの全候補）の部分和と範囲をまとめて計算する
+        child_p = p + data.slot_p[depth]
+        child_m = m + data.slot_m[depth]
+        child_a = a + data.slot_a[depth]
+        child_c = c + data.slot_c[depth]
+        self.nodes += len(child_p)
+        lo, hi = self._bounds(depth + 1, child_p, child_m, child_a, child_c)
+
+        # 制約を満たし得ない子を除く
+        feasible = (hi >= data.constraint_lo).all(axis=1) & (lo <= data.constraint_hi).all(axis=1)
+        # 目的の楽観値（最大化は上限、最小化は下限）が既存の解に優越される子を除く
+        sign = data.objective_sign
+        optimistic = np.where(sign > 0, hi[:, data.objective_index], -lo[:, data.objective_index])
+        candidates = np.flatnonzero(feasible & ~self._dominated(optimistic))
+        if not len(candidates):
+            return
+
+        if depth + 1 == len(data.slot_p):
+            # 最後のスロットは範囲が確定値になる
+            for i in candidates[np.argsort(-optimistic[candidates, 0], kind='stable')]:
+                if not self._dominated(optimistic[i:i + 1])[0]:
+                    self._add_solution(optimistic[i], choice + (int(i),))
+            return
+
+        # 楽観値の良い子から調べる（早く良い解が見つかると枝刈りが効く）
+        for i in candidates[np.argsort(-optimistic[candidates, 0], kind='stable')]:
+            if self._dominated(optimistic[i:i + 1])[0]:
+                continue
+            self._expand(depth + 1, child_p[i], child_m[i], child_a[i], child_c[i], choice + (int(i),))
+
+
+def _search_task(data: _SearchData, prefixes: Sequence[Tuple[int, ...]], frontier: Optional[np.ndarray],
+                 max_nodes: int, deadline: float):
+    """ワーカープロセスで実行する探索（プレフィックスごとに探索し、解をまとめて返す）"""
+    search = _Search(data, frontier, max_nodes, deadline)
+    for prefix in prefixes:
+        search.run(prefix)
+    return search.solutions, search.nodes, search.complete
+
+
+class LoadoutOptimizer:
+    """
+    船体のスロット構成に対する装備の組み合わせの最適化
+
+    目的（性能値の最大化・最小化、複数可）と制約（性能値の下限・上限）に対し、
+    分枝限定法でスロットごとの候補を探索し、目的のパレートフロンティアを返す。
+
+    - 各候補は DesignStatEngine の変換結果（単純加算, %調整, 全装備平均, 平均の指定数）を使い、残りのスロットで
+      取り得る値の範囲をスロットごとにメモ化して、部分解の性能値の範囲を区間演算で求める
+    - 関係する性能値で他の候補に優越される候補は、探索の前にスロットごとに除く
+      （性能値の加算部分が0以上であることを前提とする）
+    - 最初のいくつかのスロットの選び方で探索を分割し、プロセスプールで並列に探索する
+
+    スロットはすべて埋めるものとし、全装備平均は DesignStatEngine と同じく性能値ごとに指定している装備の数で割る。
+    探索対象外のスロットに固定された装備も、船体の基礎値と同様に性能値に含める。
+    """
+
+    def __init__(self, engine: DesignStatEngine = None, max_workers: int = None,
+                 max_nodes: int = DEFAULT_MAX_NODES, time_limit: float = 30.0):
+        """
+        初期化
+
+        Args:
+            engine: 性能値の集計エンジン
+            max_workers: ワーカープロセス数（省略時はCPU数、1の場合は呼び出し元で探索）
+            max_nodes: 1タスクあたりの探索ノード数の上限
+            time_limit: 探索時間の上限（秒）
+        """
+        self.engine = engine or DesignStatEngine()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+
+    def optimize(self, hull_data: Dict[str, Any], slot_candidates: Sequence[Tuple[str, Sequence[Tuple[str, Dict[str, Any]]]]],
+                 objectives: Sequence[Tuple[str, str]], constraints: Sequence[Tuple[str, str, float]] = (),
+                 fixed_equipment: Sequence[Tuple[str, Dict[str, Any]]] = ()) -> OptimizationResult:
+        """
+        最適な装備の組み合わせを探索
+
+        Args:
+            hull_data: 船体データ
+            slot_candidates: [(スロットID, [(装備ID, 装備データ), ...]), ...]
+            objectives: [(性能名, 'max' or 'min'), ...]（先頭の目的を優先して探索する）
+            constraints: [(性能名, '>=' or '<=', 値), ...]
+            fixed_equipment: 探索対象外のスロットに搭載済みの装備 [(装備ID, 装備データ), ...]
+
+        Returns:
+            OptimizationResult: 目的のパレートフロンティア
+        """
+        start_time = time.time()
+        engine = self.engine
+        if not objectives:
+            raise ValueError("目的が指定されていません")
+
+        # 目的・制約に関係する性能値だけを扱う
+        stat_names = []
+        for name in [name for name, _ in objectives] + [name for name, _, _ in constraints]:
+            if name not in engine.index:
+                raise ValueError(f"不明な性能値です: {name}")
+            if name not in stat_names:
+                stat_names.append(name)
+        columns = [engine.index[name] for name in stat_names]
+
+        slots = [(slot_id, [(eid, data) for eid, data in candidates if data]) for slot_id, candidates in slot_candidates]
+        slots = [(slot_id, candidates) for slot_id, candidates in slots if candidates]
+        if not slots:
+            return OptimizationResult([], 0, time.time() - start_time, True, {})
+        slot_count = len(slots)
+        fixed_equipment = [(eid, data) for eid, data in fixed_equipment if data]
+
+        objective_index = np.array([stat_names.index(name) for name, _ in objectives])
+        objective_sign = np.array([1.0 if sense == OBJECTIVE_MAX else -1.0 for _, sense in objectives])
+        constraint_lo = np.full(len(stat_names), -np.inf)
+        constraint_hi = np.full(len(stat_names), np.inf)
+        for name, op, value in constraints:
+            k = stat_names.index(name)
+            if op == CONSTRAINT_MIN:
+                constraint_lo[k] = max(constraint_lo[k], float(value))
+            else:
+                constraint_hi[k] = min(constraint_hi[k], float(value))
+
+        # 性能値ごとの良い向き（最大化・下限制約は大きいほど良く、最小化・上限制約は小さいほど良い）
+        directions = []
+        for name, sense in objectives:
+            directions.append((stat_names.index(name), 1.0 if sense == OBJECTIVE_MAX else -1.0))
+        for name, op, _ in constraints:
+            directions.append((stat_names.index(name), 1.0 if op == CONSTRAINT_MIN else -1.0))
+        directions = sorted(set(directions))
+
+        slot_ids, slot_p, slot_m, slot_a, slot_c, slot_equipment, candidate_counts = [], [], [], [], [], [], {}
+        for slot_id, candidates in slots:
+            compiled = np.stack([engine.equipment_stats(eid, data) for eid, data in candidates])
+            p = compiled[:, ROW_ADD, columns]
+            m = compiled[:, ROW_MULTIPLY, columns]
+            a = compiled[:, ROW_AVERAGE, columns]
+            c = compiled[:, ROW_AVERAGE_COUNT, columns]
+            # 平均は指定の有無が同じ候補どうしでのみ比べる（有無の列を両方の向きで加える）
+            goodness = np.hstack([np.column_stack([sign * p[:, k], sign * m[:, k], sign * a[:, k], c[:, k], -c[:, k]])
+                                  for k, sign in directions])
+            keep = np.flatnonzero(_pareto_mask(goodness))
+            slot_ids.append(slot_id)
+            slot_p.append(p[keep])
+            slot_m.append(m[keep])
+            slot_a.append(a[keep])
+            slot_c.append(c[keep])
+            slot_equipment.append([candidates[i] for i in keep])
+            candidate_counts[slot_id] = (len(candidates), len(keep))
+
+        fixed = np.zeros((COMPILED_ROWS, len(columns)))
+        for eid, equipment_data in fixed_equipment:
+            fixed += engine.equipment_stats(eid, equipment_data)[:, columns]
+        data = _SearchData(engine.hull_vector(hull_data)[columns], fixed, slot_p, slot_m, slot_a, slot_c,
+                           objective_index, objective_sign, constraint_lo, constraint_hi)
+        deadline = start_time + self.time_limit
+
+        # 最初のスロットから順に選び方を展開して、ワーカー数の数倍のタスクに分ける
+        prefixes = [()]
+        target = self.max_workers * 4 if self.max_workers > 1 else 1
+        depth = 0
+        while len(prefixes) < target and depth < slot_count - 1:
+            prefixes = [prefix + (i,) for prefix in prefixes for i in range(len(slot_p[depth]))]
+            depth += 1
+
+        solutions, nodes, complete = [], 0, True
+        if self.max_workers <= 1 or len(prefixes) == 1:
+            solutions, nodes, complete = _search_task(data, prefixes, None, self.max_nodes, deadline)
+        else:
+            # 少ないノード数で先に解を集め、各ワーカーの枝刈りの基準として渡す
+            solutions, nodes, _ = _search_task(data, [()], None, SEED_NODES, deadline)
+            seed = np.stack([value for value, _ in solutions]) if solutions else None
+            chunks = [prefixes[i::self.max_workers * 4] for i in range(min(len(prefixes), self.max_workers * 4))]
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = [pool.submit(_search_task, data, chunk, seed, self.max_nodes, deadline) for chunk in chunks]
+                for future in futures:
+                    task_solutions, task_nodes, task_complete = future.result()
+                    solutions.extend(task_solutions)
+                    nodes += task_nodes
+                    complete = complete and task_complete
+
+        # タスクごとの解をまとめてパレートフロンティアを作る
+        loadouts = []
+        if solutions:
+            values = np.stack([value for value, _ in solutions])
+            for i in np.flatnonzero(_pareto_mask(values)):
+                _, choice = solutions[i]
+                selected = [slot_equipment[j][c] for j, c in enumerate(choice)]
+                stats = engine.compute_design(hull_data, selected + fixed_equipment)
+                loadouts.append(Loadout(
+                    {slot_ids[j]: eid for j, (eid, _) in enumerate(selected)},
+                    {name: stats[name] for name, _ in objectives},
+                    stats,
+                ))
+            first, sense = objectives[0]
+            loadouts.sort(key=lambda loadout: loadout.objectives[first], reverse=(sense == OBJECTIVE_MAX))
+
+        return OptimizationResult(loadouts, nodes, time.time() - start_time, complete, candidate_counts)
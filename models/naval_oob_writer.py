@@ -0,0 +1,342 @@
+import hashlib
+import os
+import shutil
+import time
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+from models.navy_design_exporter import split_top_level_blocks
+
+# 編成ファイルの既定の年（history/units/TAG_1936_naval.txt）
+DEFAULT_OOB_YEAR = 1936
+
+# 書き込みバッファのサイズ
+WRITE_BUFFER_SIZE = 1 << 16
+
+# エディターが書き出した fleet ブロックの目印。目印のない fleet（MOD側で書かれた艦隊）は書き換えずに残す
+FLEET_MARKER = "#@neditor_fleet"
+
+# 艦種の略号 -> 編成ファイルの definition（ここにない艦種は駆逐艦として扱う）
+DEFINITION_BY_SHIP_TYPE = {}
+for _definition, _codes in {
+    'carrier': ('CV', 'CVE', 'CVL', 'CVS', 'AV', 'SV', 'MAC', 'CAM', 'AAV', 'DDH'),
+    'submarine': ('SS', 'SC', 'SF', 'SM', 'CSS', 'MSM', 'SCV'),
+    'battleship': ('B', 'BB', 'BBG', 'BC', 'BF', 'BM', 'FBB', 'PB', 'SB', 'CDB', 'IC'),
+    'heavy_cruiser': ('CA', 'CB', 'ACR'),
+    'light_cruiser': ('C', 'CL', 'CF', 'CG', 'CM', 'CS', 'HTC', 'TC', 'TCL', 'AC'),
+}.items():
+    DEFINITION_BY_SHIP_TYPE.update((code, _definition) for code in _codes)
+DEFAULT_DEFINITION = 'destroyer'
+
+# 艦種のないMODの設計バリアントは、船体の装備種別（例: ship_hull_super_heavy_1）に含まれる語で判断する
+DEFINITION_BY_HULL_KEYWORD = (
+    ('carrier', 'carrier'),
+    ('submarine', 'submarine'),
+    ('heavy', 'battleship'),
+    ('cruiser', 'light_cruiser'),
+)
+
+
+def oob_file_name(country: str, year: int = DEFAULT_OOB_YEAR) -> str:
+    """編成ファイル名（例: JAP_1936_naval.txt）"""
+    return f"{country}_{year}_naval.txt"
+
+
+def _string(value: Any) -> str:
+    return '"' + str(value).replace('"', "'").replace('\n', ' ') + '"'
+
+
+def _number(value: Any) -> str:
+    """数値を編成ファイルの表記に変換（整数はそのまま、小数は3桁まで）"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return "0"
+    if number.is_integer():
+        return str(int(number))
+    return f"{number:.3f}".rstrip('0').rstrip('.')
+
+
+def province_number(value: Any) -> Optional[int]:
+    """プロヴィンスID（正の整数）に変換（'不明' など数値でない場合はNone）"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not number.is_integer() or number <= 0:
+        return None
+    return int(number)
+
+
+def writable_fleets(fleets: Iterable[Dict[str, Any]], skipped: List[str]) -> List[Dict[str, Any]]:
+    """
+    プロヴィンスIDが数値の艦隊・任務部隊だけを残す
+
+    母港が数値でない艦隊と、位置が数値でない任務部隊は書き出さず、名前を skipped に追加する。
+    """
+    result = []
+    for fleet in fleets:
+        fleet_name = fleet.get('name', '')
+        naval_base = province_number(fleet.get('province_id'))
+        if naval_base is None:
+            skipped.append(f"{fleet_name}（母港: {fleet.get('province_id')}）")
+            continue
+        task_forces = []
+        for task_force in fleet.get('task_forces') or []:
+            location = province_number(task_force.get('province_id', naval_base))
+            if location is None:
+                skipped.append(f"{fleet_name} / {task_force.get('name', '')}（位置: {task_force.get('province_id')}）")
+                continue
+            task_forces.append(dict(task_force, province_id=location))
+        result.append(dict(fleet, province_id=naval_base, task_forces=task_forces))
+    return result
+
+
+def mod_units_content(units_text: str) -> str:
+    """
+    既存の units ブロックから、エディターが書き出した fleet を除いた中身を取得
+
+    目印のない fleet やコメントなどは元の文字列のまま残す。
+    """
+    start = units_text.find('{')
+    end = units_text.rfind('}')
+    if start < 0 or end <= start:
+        return ""
+    inner = units_text[start + 1:end]
+    first_line_end = inner.find('\n')
+    if first_line_end >= 0 and not inner[:first_line_end].strip():
+        inner = inner[first_line_end + 1:]
+    kept = []
+    for block_key, text in split_top_level_blocks(inner):
+        if block_key == 'fleet' and FLEET_MARKER in text:
+            # 除いた fleet の行のインデントも残さない
+            if kept:
+                kept[-1] = kept[-1].rstrip(' \t')
+            continue
+        kept.append(text)
+    content = ''.join(kept).rstrip(' \t')
+    if content and not content.endswith('\n'):
+        content += '\n'
+    return content if content.strip() else ""
+
+
+def ship_definition(design: Any) -> str:
+    """設計の艦種（例: "BB - 戦艦"）、なければ船体の装備種別から definition を決める"""
+    if isinstance(design, str):
+        return design or DEFAULT_DEFINITION
+    design = design or {}
+    ship_type = str(design.get('ship_type') or '')
+    if ship_type:
+        code = ship_type.split(' - ')[0].strip().upper()
+        return DEFINITION_BY_SHIP_TYPE.get(code, DEFAULT_DEFINITION)
+    hull_type = str(design.get('type') or '').lower()
+    for keyword, definition in DEFINITION_BY_HULL_KEYWORD:
+        if keyword in hull_type:
+            return definition
+    return DEFAULT_DEFINITION
+
+
+def ship_equipment(design: Any) -> Tuple[Optional[str], Optional[str]]:
+    """
+    艦艇の設計から (船体の装備種別, version_name) を取得
+
+    ローカルの設計は船体IDと設計ID（NAVY_Designs.txtに書き出した name）、
+    MODの設計バリアントは type と元の name を使う。
+    """
+    if not isinstance(design, dict):
+        return None, None
+    if design.get('hull_id'):
+        return design['hull_id'], design.get('id') or design.get('design_name')
+    hull_type = str(design.get('type') or '').strip('"')
+    if hull_type:
+        version_name = design.get('original_name') if design.get('name_overridden') else design.get('name')
+        return hull_type, str(version_name or '').strip('"') or None
+    return None, None
+
+
+def iter_ship_lines(ship: Dict[str, Any], country: str, indent: str) -> Iterator[str]:
+    """艦艇1隻分の ship ブロックを生成"""
+    design = ship.get('design')
+    definition = ship.get('definition') or ship_definition(design)
+    parts = [f"name = {_string(ship.get('name', ''))}", f"definition = {definition}"]
+    if ship.get('exp'):
+        parts.append(f"start_experience_factor = {_number(ship['exp'])}")
+    if ship.get('is_pride'):
+        parts.append("pride_of_the_fleet = yes")
+    hull_type, version_name = ship_equipment(design)
+    if hull_type:
+        equipment = f"{hull_type} = {{ amount = 1 owner = {country}"
+        if version_name:
+            equipment += f" version_name = {_string(version_name)}"
+        parts.append(f"equipment = {{ {equipment} }} }}")
+    yield f"{indent}ship = {{ {' '.join(parts)} }}\n"
+
+
+def iter_oob_lines(country: str, fleets: Iterable[Dict[str, Any]], mod_units: str = "") -> Iterator[str]:
+    """
+    艦隊データ（fleet -> task_forces -> ships）から編成ファイルの units ブロックを1行ずつ生成
+
+    艦艇は1行にまとめて書くため、行数は艦艇数とほぼ同じになる。
+    mod_units（mod_units_content の結果）は、書き出す艦隊の前にそのまま残す。
+    艦隊のプロヴィンスIDは writable_fleets で数値に変換済みであること。
+    """
+    yield "units = {\n"
+    if mod_units:
+        yield mod_units
+    for fleet in fleets:
+        yield "\tfleet = {\n"
+        yield f"\t\t{FLEET_MARKER}\n"
+        yield f"\t\tname = {_string(fleet.get('name', ''))}\n"
+        yield f"\t\tnaval_base = {_number(fleet.get('province_id'))}\n"
+        for task_force in fleet.get('task_forces') or []:
+            yield "\t\ttask_force = {\n"
+            yield f"\t\t\tname = {_string(task_force.get('name', ''))}\n"
+            location = task_force.get('province_id', fleet.get('province_id'))
+            yield f"\t\t\tlocation = {_number(location)}\n"
+            for ship in task_force.get('ships') or []:
+                yield from iter_ship_lines(ship, country, "\t\t\t")
+            yield "\t\t}\n"
+        yield "\t}\n"
+    yield "}\n"
+
+
+class OOBWriteResult:
+    """編成ファイルの書き出し結果"""
+
+    def __init__(self, written: List[str], unchanged: List[str], ship_count: int, elapsed: float,
+                 backups: List[str] = None, skipped: List[str] = None):
+        self.written = written      # 書き換えたファイルのパス
+        self.unchanged = unchanged  # 内容が同じだったため書き換えなかったファイルのパス
+        self.ship_count = ship_count
+        self.elapsed = elapsed
+        self.backups = backups or []  # 書き換える前の元のファイルのバックアップのパス
+        self.skipped = skipped or []  # プロヴィンスIDが数値でないため書き出さなかった艦隊・任務部隊
+
+
+class NavalOOBWriter:
+    """
+    艦隊データを history/units/TAG_YYYY_naval.txt に書き出す
+
+    艦隊は年（fleet の year、なければ既定の年）ごとのファイルに分ける。既存のファイルは
+    units ブロックのうちエディターが書き出した fleet（FLEET_MARKER のあるもの）だけを置き換え、
+    MOD側の fleet や instant_effect など他のブロックは元の文字列のまま残す。
+    生成した内容のハッシュが既存のファイルと同じであればそのファイルは書き換えない。
+    書き換える場合は元のファイルを <ファイル名>.<日時>.bak にコピーしてから置き換える。
+    書き出しは行単位のジェネレーターからバッファ付きで一時ファイルに書き、最後に置き換える。
+    """
+
+    def __init__(self, units_dir: str, default_year: int = DEFAULT_OOB_YEAR):
+        """
+        初期化
+
+        Args:
+            units_dir: 書き出し先（<MOD>/history/units）
+            default_year: year のない艦隊を書き出すファイルの年
+        """
+        self.units_dir = units_dir
+        self.default_year = default_year
+
+    def write(self, fleet_data: Dict[str, Any]) -> OOBWriteResult:
+        """
+        国家の艦隊データを書き出す
+
+        Args:
+            fleet_data: {"country": 国家タグ, "fleets": [艦隊, ...]}
+
+        Returns:
+            OOBWriteResult: 書き出し結果
+        """
+        start_time = time.time()
+        country = fleet_data.get('country')
+        if not country:
+            raise ValueError("国家タグが指定されていません")
+
+        fleets_by_year = {}
+        for fleet in fleet_data.get('fleets') or []:
+            fleets_by_year.setdefault(int(fleet.get('year') or self.default_year), []).append(fleet)
+
+        written, unchanged, backups, skipped = [], [], [], []
+        ship_count = 0
+        for year in sorted(fleets_by_year):
+            fleets = writable_fleets(fleets_by_year[year], skipped)
+            ship_count += sum(len(task_force.get('ships') or [])
+                              for fleet in fleets for task_force in fleet.get('task_forces') or [])
+            file_path = os.path.join(self.units_dir, oob_file_name(country, year))
+            backup_path = self._write_if_changed(file_path, self._iter_file(file_path, country, fleets))
+            if backup_path is not None:
+                written.append(file_path)
+                if backup_path:
+                    backups.append(backup_path)
+            else:
+                unchanged.append(file_path)
+        return OOBWriteResult(written, unchanged, ship_count, time.time() - start_time, backups, skipped)
+
+    @staticmethod
+    def _iter_file(file_path: str, country: str, fleets: List[Dict[str, Any]]) -> Iterator[str]:
+        """既存のファイルの units ブロックに艦隊を書き出した内容を生成（ファイルがなければ units ブロックのみ）"""
+        segments = []
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8-sig') as f:
+                segments = split_top_level_blocks(f.read())
+        replaced = False
+        for block_key, text in segments:
+            if block_key == 'units' and not replaced:
+                yield from iter_oob_lines(country, fleets, mod_units_content(text))
+                replaced = True
+            else:
+                yield text
+        if not replaced:
+            if segments and not segments[-1][1].endswith('\n'):
+                yield '\n'
+            yield from iter_oob_lines(country, fleets)
+
+    @staticmethod
+    def _backup_path(file_path: str) -> str:
+        """既存のバックアップを上書きしないバックアップのパス（<ファイル名>.<日時>[_番号].bak）"""
+        stem = f"{file_path}.{time.strftime('%Y%m%d%H%M%S')}"
+        backup_path = f"{stem}.bak"
+        number = 1
+        while os.path.exists(backup_path):
+            backup_path = f"{stem}_{number}.bak"
+            number += 1
+        return backup_path
+
+    @staticmethod
+    def _file_digest(file_path: str) -> Optional[str]:
+        if not os.path.exists(file_path):
+            return None
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(WRITE_BUFFER_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _write_if_changed(self, file_path: str, lines: Iterable[str]) -> Optional[str]:
+        """
+        一時ファイルに書きながらハッシュを計算し、既存のファイルと同じなら一時ファイルを捨てる
+
+        Returns:
+            Optional[str]: 書き換えなかった場合はNone、書き換えた場合は元のファイルのバックアップのパス
+            （新しく作成した場合は空文字列）
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        tmp_path = f"{file_path}.tmp"
+        digest = hashlib.sha1()
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', newline='\n', buffering=WRITE_BUFFER_SIZE) as f:
+                for line in lines:
+                    digest.update(line.encode('utf-8'))
+                    f.write(line)
+            existing_digest = self._file_digest(file_path)
+            if digest.hexdigest() == existing_digest:
+                os.remove(tmp_path)
+                return None
+            backup_path = ""
+            if existing_digest is not None:
+                backup_path = self._backup_path(file_path)
+                shutil.copy2(file_path, backup_path)
+            os.replace(tmp_path, file_path)
+            return backup_path
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
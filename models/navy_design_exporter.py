@@ -0,0 +1,415 @@
+import hashlib
+import os
+import re
+import time
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+# エクスポーターが書き出すブロックの名前（<国家タグ>_neditor_designs）。この名前のブロックだけを書き換え、
+# MOD側で書かれた他のブロックはそのまま残す
+EXPORT_BLOCK_SUFFIX = "_neditor_designs"
+
+# 設計のメインスロットの並び（船体のモジュールスロットへはこの順に割り当て、その後に内部スロットを割り当てる）
+MAIN_SLOT_TYPES = ('PA', 'SA', 'PSA', 'SSA', 'PLA', 'SLA')
+
+# 書き込みバッファのサイズ
+WRITE_BUFFER_SIZE = 1 << 16
+
+_ID_PATTERN = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*\Z')
+# ファイルの最上位のブロックを区切るためのトークン（コメント・文字列内の括弧は数えない）
+_BLOCK_TOKEN_PATTERN = re.compile(r'#[^\n]*|"[^"\n]*"|[{}]')
+_BLOCK_KEY_PATTERN = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)\s*=\s*\Z')
+_COUNTRY_TAG_PATTERN = re.compile(r'#@COUNTRY\s*=\s*"([^"]*)"')
+# スクリプトのトークン（コメント・文字列・括弧・等号・それ以外の語）
+_TOKEN_PATTERN = re.compile(r'#[^\n]*|"([^"\n]*)"|([{}=])|([^\s{}=#"]+)')
+
+
+def parse_blocks(text: str) -> List[Tuple[Optional[str], Any]]:
+    """
+    ファイルの内容を (キー, 値) のリストにする
+
+    値は文字列、またはブロックの場合は同じ形式のリスト。unique = { "A" "B" } のような
+    値だけの要素はキーをNoneにする。コメント・文字列内の括弧は数えない。
+    """
+    items = []
+    stack = [items]
+    key = None        # 直前の語（次が「=」ならキー、そうでなければ値だけの要素）
+    assigned = False  # 「キー =」の後で値を待っている
+    for match in _TOKEN_PATTERN.finditer(text):
+        string, symbol, word = match.groups()
+        if string is None and symbol is None and word is None:
+            continue  # コメント
+        current = stack[-1]
+        if symbol == '=':
+            assigned = key is not None
+            continue
+        if symbol is not None:
+            if key is not None and not assigned:
+                current.append((None, key))
+            if symbol == '{':
+                block = []
+                current.append((key if assigned else None, block))
+                stack.append(block)
+            elif len(stack) > 1:
+                stack.pop()
+            key, assigned = None, False
+            continue
+        value = string if string is not None else word
+        if assigned:
+            current.append((key, value))
+            key, assigned = None, False
+        else:
+            if key is not None:
+                current.append((None, key))
+            key = value
+    if key is not None:
+        stack[-1].append((None, key))
+    return items
+
+
+def _string(value: Any) -> str:
+    """引用符付きの文字列（EffectParserの文字列トークンは引用符を含められないため除く）"""
+    return '"' + str(value).replace('"', "'").replace('\n', ' ') + '"'
+
+
+def _value(value: Any) -> str:
+    """識別子として書ける値はそのまま、それ以外は引用符付きで書く"""
+    text = str(value)
+    return text if _ID_PATTERN.match(text) and text not in ('yes', 'no') else _string(text)
+
+
+def _items(items: List[Tuple[Optional[str], Any]], key: str) -> List[Any]:
+    return [value for item_key, value in items if item_key == key]
+
+
+def _words(value: Any) -> List[str]:
+    """「キー = { 値 値 ... }」の値のリスト（ブロックでなければ1要素）"""
+    if isinstance(value, list):
+        return [v for k, v in value if k is None and isinstance(v, str)]
+    return [value]
+
+
+def parse_hull_module_slots(text: str) -> Dict[str, Dict[str, Any]]:
+    """
+    装備定義ファイル（common/units/equipment）から船体ごとのモジュールスロットの定義を取得
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 船体の装備ID -> {'slots': [(スロットのキー, 許可するモジュールカテゴリー, 許可するモジュール), ...]
+        または 'inherit', 'parent': 親の装備ID, 'archetype': アーキタイプ}
+    """
+    hulls = {}
+    for _, equipments in parse_blocks(text):
+        if not isinstance(equipments, list):
+            continue
+        for hull_id, block in equipments:
+            if not hull_id or not isinstance(block, list):
+                continue
+            module_slots = _items(block, 'module_slots')
+            if not module_slots:
+                continue
+            slots = module_slots[-1]
+            if isinstance(slots, list):
+                slots = [(slot_key, set().union(*map(_words, _items(slot, 'allowed_module_categories'))),
+                          set().union(*map(_words, _items(slot, 'allowed_modules'))))
+                         for slot_key, slot in slots if slot_key and isinstance(slot, list)]
+            parent = _items(block, 'parent')
+            archetype = _items(block, 'archetype')
+            hulls[hull_id] = {
+                'slots': slots,
+                'parent': parent[-1] if parent and isinstance(parent[-1], str) else None,
+                'archetype': archetype[-1] if archetype and isinstance(archetype[-1], str) else None,
+            }
+    return hulls
+
+
+def parse_module_categories(text: str) -> Dict[str, str]:
+    """モジュール定義ファイル（common/units/modules）からモジュールID -> カテゴリーを取得"""
+    categories = {}
+    for _, modules in parse_blocks(text):
+        if not isinstance(modules, list):
+            continue
+        for module_id, block in modules:
+            if module_id and isinstance(block, list):
+                category = _items(block, 'category')
+                if category and isinstance(category[-1], str):
+                    categories[module_id] = category[-1]
+    return categories
+
+
+def _read_definitions(directory: str, parse) -> Dict[str, Any]:
+    definitions = {}
+    if directory and os.path.isdir(directory):
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith('.txt'):
+                with open(os.path.join(directory, filename), 'r', encoding='utf-8-sig', errors='replace') as f:
+                    definitions.update(parse(f.read()))
+    return definitions
+
+
+class ModuleSlotResolver:
+    """
+    MODの船体・モジュールの定義から、設計の装備を書き出す modules のキーを決める
+
+    船体の module_slots に並ぶスロットのうち、装備のモジュールカテゴリー（または装備ID）を許可する
+    空きスロットへ、メインスロット（PA, SA, ...）・内部スロットの順に割り当てる。
+    module_slots = inherit の船体は parent、archetype の順に定義をたどる。
+    """
+
+    def __init__(self, hull_slots: Dict[str, Dict[str, Any]], module_categories: Dict[str, str]):
+        self.hull_slots = hull_slots
+        self.module_categories = module_categories
+
+    @classmethod
+    def from_mod(cls, mod_path: str) -> 'ModuleSlotResolver':
+        """MODの common/units/equipment と common/units/modules から作成"""
+        units_dir = os.path.join(mod_path, "common", "units")
+        return cls(_read_definitions(os.path.join(units_dir, "equipment"), parse_hull_module_slots),
+                   _read_definitions(os.path.join(units_dir, "modules"), parse_module_categories))
+
+    def slots(self, hull_id: str) -> Optional[List[Tuple[str, set, set]]]:
+        """船体のモジュールスロットの定義（見つからない場合はNone）"""
+        visited = set()
+        while hull_id and hull_id not in visited:
+            visited.add(hull_id)
+            hull = self.hull_slots.get(hull_id)
+            if hull is None:
+                return None
+            if isinstance(hull['slots'], list):
+                return hull['slots']
+            hull_id = hull['parent'] or hull['archetype']
+        return None
+
+    def design_modules(self, design: Dict[str, Any]) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """
+        設計データから (modules のキー, 装備ID) のリストを作成
+
+        Returns:
+            Tuple[List[Tuple[str, str]], List[str]]: 書き出すモジュールと、割り当てられるスロットがなかった装備ID
+        """
+        equipment_ids = []
+        main_slots = design.get('main_slots') or {}
+        for slot_type in MAIN_SLOT_TYPES:
+            if main_slots.get(slot_type):
+                equipment_ids.append(main_slots[slot_type])
+        for slot in design.get('internal_slots') or []:
+            if isinstance(slot, dict) and slot.get('equipment_id'):
+                equipment_ids.append(slot['equipment_id'])
+
+        slots = self.slots(design.get('hull_id') or '')
+        if slots is None:
+            return [], equipment_ids
+
+        modules, unplaced = [], []
+        free = list(slots)
+        for equipment_id in equipment_ids:
+            category = self.module_categories.get(equipment_id)
+            for i, (slot_key, categories, allowed) in enumerate(free):
+                if equipment_id in allowed or (category is not None and category in categories):
+                    modules.append((slot_key, equipment_id))
+                    del free[i]
+                    break
+            else:
+                unplaced.append(equipment_id)
+        return modules, unplaced
+
+
+def iter_variant_lines(design: Dict[str, Any], modules: List[Tuple[str, str]] = (),
+                       indent: str = "\t") -> Iterator[str]:
+    """
+    設計データを create_equipment_variant のブロックとして1行ずつ生成
+
+    MODの設計ファイルと同じく、name には艦級名、#@override.name にはローカライズ名（ある場合）を書く。
+
+    Args:
+        design: 設計データ
+        modules: [(modules のキー, 装備ID), ...]（ModuleSlotResolver.design_modules の結果）
+        indent: ブロックのインデント
+    """
+    inner = indent + "\t"
+    yield f"{indent}create_equipment_variant = {{\n"
+    design_name = design.get('design_name') or design.get('name') or design.get('id')
+    localized_name = design.get('localized_name')
+    if localized_name and localized_name != design_name:
+        yield f"{inner}#@override.name({_string(localized_name)})\n"
+    yield f"{inner}name = {_string(design_name)}\n"
+    if design.get('hull_id'):
+        yield f"{inner}type = {_value(design['hull_id'])}\n"
+    if modules:
+        yield f"{inner}modules = {{\n"
+        for module_key, equipment_id in modules:
+            yield f"{inner}\t{module_key} = {_value(equipment_id)}\n"
+        yield f"{inner}}}\n"
+    yield f"{indent}}}\n"
+
+
+def iter_country_block(country: str, designs: Iterable[Tuple[Dict[str, Any], List[Tuple[str, str]]]]) -> Iterator[str]:
+    """国家の設計をまとめた最上位のブロックを1行ずつ生成（designs は (設計データ, modules) のリスト）"""
+    yield f"{country}{EXPORT_BLOCK_SUFFIX} = {{\n"
+    yield f"\t#@COUNTRY = {_string(country)}\n"
+    for design, modules in designs:
+        yield from iter_variant_lines(design, modules)
+    yield "}\n"
+
+
+def split_top_level_blocks(text: str) -> List[Tuple[Optional[str], str]]:
+    """
+    ファイルの内容を最上位のブロックとその間の部分に分ける
+
+    Returns:
+        List[Tuple[Optional[str], str]]: (ブロック名 or None, 元の文字列) のリスト。
+        連結すると元の内容に戻る。
+    """
+    segments = []
+    depth = 0
+    block_start = None
+    last_end = 0
+    for match in _BLOCK_TOKEN_PATTERN.finditer(text):
+        token = match.group()
+        if token == '{':
+            if depth == 0:
+                # 「名前 =」からブロックとして扱う
+                line_start = text.rfind('\n', last_end, match.start()) + 1
+                key_match = _BLOCK_KEY_PATTERN.search(text, line_start, match.start())
+                block_start = key_match.start() if key_match else match.start()
+                if block_start > last_end:
+                    segments.append((None, text[last_end:block_start]))
+                block_key = key_match.group(1) if key_match else None
+            depth += 1
+        elif token == '}' and depth > 0:
+            depth -= 1
+            if depth == 0:
+                end = match.end()
+                if text[end:end + 1] == '\n':
+                    end += 1
+                segments.append((block_key, text[block_start:end]))
+                last_end = end
+    if last_end < len(text):
+        segments.append((None, text[last_end:]))
+    return segments
+
+
+def export_block_country(block_key: Optional[str], block_text: str) -> Optional[str]:
+    """エクスポーターが書いたブロックであれば国家タグを返す"""
+    if not block_key or not block_key.endswith(EXPORT_BLOCK_SUFFIX):
+        return None
+    match = _COUNTRY_TAG_PATTERN.search(block_text)
+    return match.group(1) if match else block_key[:-len(EXPORT_BLOCK_SUFFIX)]
+
+
+def _hash_lines(lines: Iterable[str]) -> Tuple[str, List[str]]:
+    digest = hashlib.sha1()
+    collected = []
+    for line in lines:
+        digest.update(line.encode('utf-8'))
+        collected.append(line)
+    return digest.hexdigest(), collected
+
+
+class ExportResult:
+    """NAVY_Designs.txt への書き出し結果"""
+
+    def __init__(self, file_path: str, written: bool, changed: List[str], unchanged: List[str],
+                 variant_count: int, elapsed: float, unplaced: Dict[str, List[str]] = None):
+        self.file_path = file_path
+        self.written = written          # ファイルを書き換えた場合True
+        self.changed = changed          # 内容が変わった（追加・更新した）国家タグ
+        self.unchanged = unchanged      # 内容が同じだったため書き換えなかった国家タグ
+        self.variant_count = variant_count
+        self.elapsed = elapsed
+        # 艦級名 -> 船体のモジュールスロットに割り当てられず書き出さなかった装備ID
+        self.unplaced = unplaced or {}
+
+
+class NavyDesignExporter:
+    """
+    ローカルの設計を create_equipment_variant として common/scripted_effects のファイルに書き出す
+
+    国家ごとに <国家タグ>_neditor_designs ブロックを作り、既存のファイルにある同じ国家の
+    ブロックと内容のハッシュを比べて、変わった国家のブロックだけを置き換える。
+    他のブロック・コメントは元の文字列のまま残し、どの国家も変わっていなければファイルに書き込まない。
+    書き出しは行単位のジェネレーターからバッファ付きで一時ファイルに書き、最後に置き換える。
+    """
+
+    def __init__(self, file_path: str, slot_resolver: ModuleSlotResolver):
+        """
+        初期化
+
+        Args:
+            file_path: 書き出し先（例: <MOD>/common/scripted_effects/NAVY_Designs.txt）
+            slot_resolver: 装備を船体のモジュールスロットに割り当てる ModuleSlotResolver
+        """
+        self.file_path = file_path
+        self.slot_resolver = slot_resolver
+
+    def export(self, designs_by_country: Dict[str, List[Dict[str, Any]]]) -> ExportResult:
+        """
+        国家ごとの設計を書き出す
+
+        Args:
+            designs_by_country: 国家タグ -> 設計データのリスト（設計のない国家のブロックは変更しない）
+
+        Returns:
+            ExportResult: 書き出し結果
+        """
+        start_time = time.time()
+        segments = []
+        if os.path.exists(self.file_path):
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                segments = split_top_level_blocks(f.read())
+
+        existing = {}
+        for i, (block_key, block_text) in enumerate(segments):
+            country = export_block_country(block_key, block_text)
+            if country:
+                existing[country] = i
+
+        changed, unchanged = [], []
+        replacements = {}
+        appended = []
+        variant_count = 0
+        unplaced = {}
+        for country in sorted(designs_by_country):
+            designs = []
+            for design in sorted(designs_by_country[country], key=lambda design: str(design.get('id', ''))):
+                modules, skipped = self.slot_resolver.design_modules(design)
+                if skipped:
+                    unplaced[design.get('design_name') or str(design.get('id', ''))] = skipped
+                designs.append((design, modules))
+            if not designs:
+                continue
+            variant_count += len(designs)
+            digest, lines = _hash_lines(iter_country_block(country, designs))
+            index = existing.get(country)
+            if index is not None:
+                if hashlib.sha1(segments[index][1].encode('utf-8')).hexdigest() == digest:
+                    unchanged.append(country)
+                    continue
+                replacements[index] = lines
+            else:
+                appended.append(lines)
+            changed.append(country)
+
+        written = False
+        if changed:
+            self._write(self._iter_output(segments, replacements, appended))
+            written = True
+        return ExportResult(self.file_path, written, changed, unchanged, variant_count, time.time() - start_time,
+                            unplaced)
+
+    @staticmethod
+    def _iter_output(segments, replacements, appended) -> Iterator[str]:
+        for i, (_, text) in enumerate(segments):
+            if i in replacements:
+                yield from replacements[i]
+            else:
+                yield text
+        if appended and segments and not segments[-1][1].endswith('\n'):
+            yield '\n'
+        for lines in appended:
+            yield from lines
+
+    def _write(self, chunks: Iterable[str]):
+        os.makedirs(os.path.dirname(os.path.abspath(self.file_path)), exist_ok=True)
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8', newline='\n', buffering=WRITE_BUFFER_SIZE) as f:
+            f.writelines(chunks)
+        os.replace(tmp_path, self.file_path)
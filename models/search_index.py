@@ -0,0 +1,258 @@
+import bisect
+import heapq
+import math
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 検索対象の種別（ライブラリの種別に加えてMODの設計バリアント）
+KIND_MOD_VARIANT = "mod_variant"
+
+# 3文字以上の検索語で、一致を必要とするbi-gramの割合（これ未満の一致は候補にしない）
+DEFAULT_MIN_COVERAGE = 0.5
+
+# カタカナ（ァ〜ヶ）をひらがなに寄せ、空白を除去する変換表
+_FOLD_TABLE = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+_FOLD_TABLE.update({ord(char): None for char in " \t\r\n　"})
+
+
+def normalize_text(text: Any) -> str:
+    """
+    検索用の正規化（NFKCで全角英数・半角カナを統一し、小文字化、カタカナをひらがなに寄せ、空白を除去）
+    """
+    if text is None:
+        return ""
+    return unicodedata.normalize('NFKC', str(text)).casefold().translate(_FOLD_TABLE)
+
+
+def text_ngrams(text: str) -> set:
+    """
+    正規化済みの文字列からn-gramを作成（1文字はuni-gram、2文字以上はbi-gram）
+
+    単語の区切りがない日本語でも形態素解析なしで部分一致を検索できる。
+    """
+    if not text:
+        return set()
+    if len(text) == 1:
+        return {text}
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class SearchResult:
+    """検索結果の1件"""
+
+    __slots__ = ('kind', 'record_id', 'name', 'score', 'detail')
+
+    def __init__(self, kind: str, record_id: str, name: str, score: float, detail: Dict[str, Any]):
+        self.kind = kind
+        self.record_id = record_id
+        self.name = name
+        self.score = score
+        self.detail = detail
+
+    def __repr__(self):
+        return f"SearchResult({self.kind!r}, {self.record_id!r}, {self.name!r}, {self.score:.3f})"
+
+
+class _Document:
+    __slots__ = ('name', 'texts', 'norm_id', 'grams', 'detail')
+
+    def __init__(self, name, texts, norm_id, grams, detail):
+        self.name = name
+        self.texts = texts
+        self.norm_id = norm_id
+        self.grams = grams
+        self.detail = detail
+
+
+class SearchIndex:
+    """
+    文字n-gramの転置索引による名前の全文・あいまい検索
+
+    名前（と別名）はuni-gramとbi-gramで索引化し、検索語のbi-gramのうち一定割合以上を含む
+    レコードを候補として、一致率に完全一致・前方一致・部分一致の加点をした得点順に返すため、
+    1文字違いの表記ゆれでも見つけられる。IDは「SMLG001」のように共通の接頭辞を持つため
+    n-gramではなく整列済みのリストで完全一致・前方一致のみを検索する。
+    レコード単位で追加・削除できるので、保存のたびに索引全体を作り直す必要はない。
+    """
+
+    def __init__(self, min_coverage: float = DEFAULT_MIN_COVERAGE):
+        self.min_coverage = min_coverage
+        self._lock = threading.RLock()
+        # (種別, ID) -> _Document
+        self._docs: Dict[Tuple[str, str], _Document] = {}
+        # n-gram -> {(種別, ID)}
+        self._postings: Dict[str, set] = defaultdict(set)
+        # [(正規化したID, (種別, ID))] の整列済みリスト（Noneの場合は次の検索時に作り直す）
+        self._sorted_ids: Optional[List[Tuple[str, Tuple[str, str]]]] = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, key):
+        return key in self._docs
+
+    def add(self, kind: str, record_id: str, name: str, aliases: Iterable[Any] = (),
+            detail: Optional[Dict[str, Any]] = None):
+        """
+        レコードを追加する（既に存在する場合は置き換える）
+
+        Args:
+            kind: 種別
+            record_id: レコードID
+            name: 表示名（主な検索対象）
+            aliases: 名前と同様に検索対象とする別名（元の名前など）
+            detail: 検索結果にそのまま添える情報（種別・国家など）
+        """
+        if not record_id:
+            return
+        key = (kind, record_id)
+        texts = tuple(text for text in (normalize_text(value) for value in (name or record_id, *aliases)) if text)
+        grams = set()
+        for text in texts:
+            grams |= text_ngrams(text)
+            grams.update(text)
+
+        with self._lock:
+            self._remove_locked(key)
+            doc = _Document(name or record_id, texts, normalize_text(record_id), frozenset(grams), detail or {})
+            self._docs[key] = doc
+            for gram in grams:
+                self._postings[gram].add(key)
+            if self._sorted_ids is not None:
+                bisect.insort(self._sorted_ids, (doc.norm_id, key))
+
+    def remove(self, kind: str, record_id: str) -> bool:
+        """レコードを削除する"""
+        with self._lock:
+            return self._remove_locked((kind, record_id))
+
+    def _remove_locked(self, key) -> bool:
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return False
+        for gram in doc.grams:
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+        if self._sorted_ids is not None:
+            entry = (doc.norm_id, key)
+            position = bisect.bisect_left(self._sorted_ids, entry)
+            if position < len(self._sorted_ids) and self._sorted_ids[position] == entry:
+                del self._sorted_ids[position]
+        return True
+
+    def remove_kind(self, kind: str) -> int:
+        """種別のレコードをすべて削除する"""
+        with self._lock:
+            keys = [key for key in self._docs if key[0] == kind]
+            self._sorted_ids = None
+            for key in keys:
+                self._remove_locked(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._sorted_ids = None
+
+    def _match_ids(self, norm_query: str, kinds, limit: int) -> Dict[Tuple[str, str], float]:
+        """IDの完全一致・前方一致（整列済みリストの二分探索、完全一致が先頭に並ぶ）"""
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted((doc.norm_id, key) for key, doc in self._docs.items())
+        matches = {}
+        position = bisect.bisect_left(self._sorted_ids, (norm_query,))
+        while position < len(self._sorted_ids):
+            norm_id, key = self._sorted_ids[position]
+            position += 1
+            if not norm_id.startswith(norm_query):
+                break
+            if kinds is not None and key[0] not in kinds:
+                continue
+            if norm_id == norm_query:
+                matches[key] = 3.0
+            elif limit and len(matches) >= limit:
+                break
+            else:
+                # 前方一致は一致した長さの割合で評価する
+                matches[key] = 1.5 + len(norm_query) / len(norm_id)
+        return matches
+
+    def search(self, query: str, kinds: Iterable[str] = None, limit: int = 50) -> List[SearchResult]:
+        """
+        検索する
+
+        Args:
+            query: 検索語（名前の部分一致・あいまい一致、IDの完全一致・前方一致）
+            kinds: 対象の種別（省略時はすべて）
+            limit: 最大件数
+
+        Returns:
+            List[SearchResult]: 得点の高い順の検索結果
+        """
+        norm_query = normalize_text(query)
+        query_grams = text_ngrams(norm_query)
+        if not query_grams:
+            return []
+        kinds = set(kinds) if kinds else None
+        query_chars = set(norm_query)
+
+        if len(query_grams) >= 2:
+            required = max(2, math.ceil(len(query_grams) * self.min_coverage))
+        else:
+            required = 1
+
+        with self._lock:
+            scores = self._match_ids(norm_query, kinds, limit)
+
+            # 名前に含まれる検索語のn-gramの数を数える
+            counts = Counter()
+            for gram in query_grams:
+                counts.update(self._postings.get(gram, ()))
+            candidates = [(count, key) for key, count in counts.items()
+                          if count >= required and (kinds is None or key[0] in kinds)]
+
+            # 完全一致・前方一致・部分一致の加点はすべてのn-gramを含むものにしか付かないため、
+            # それ以外の候補は加点なしの上限（一致率 + 文字単位の加点）で上位に入り得るものだけを評価する
+            if limit and len(candidates) > limit:
+                strict = [candidate for candidate in candidates if candidate[0] >= len(query_grams)]
+                others = [candidate for candidate in candidates if candidate[0] < len(query_grams)]
+                if len(others) > limit:
+                    cutoff = heapq.nlargest(limit, others)[-1][0] - 0.2 * len(query_grams)
+                    others = [candidate for candidate in others if candidate[0] >= cutoff]
+                candidates = strict + others
+
+            docs = self._docs
+            for count, key in candidates:
+                doc = docs[key]
+                score = count / len(query_grams)
+                if count >= len(query_grams):
+                    if norm_query in doc.texts:
+                        score += 2.0
+                    elif any(text.startswith(norm_query) for text in doc.texts):
+                        score += 1.0
+                    elif any(norm_query in text for text in doc.texts):
+                        score += 0.5
+                # 文字単位の一致率（bi-gramが同数の場合に、より多くの文字を含むものを優先）
+                score += 0.2 * len(query_chars & doc.grams) / len(query_chars)
+                # 同じ一致度なら短い名前（より特定的な一致）を優先
+                score -= min(0.2, 0.005 * abs(len(doc.texts[0]) - len(norm_query)))
+                scores[key] = max(scores.get(key, 0.0), score)
+
+            results = [SearchResult(key[0], key[1], self._docs[key].name, score, self._docs[key].detail)
+                       for key, score in scores.items()]
+
+        results.sort(key=lambda result: (-result.score, result.name, result.record_id))
+        return results[:limit] if limit else results
+
+    def stats(self) -> Dict[str, int]:
+        """索引の統計情報"""
+        with self._lock:
+            per_kind = defaultdict(int)
+            for kind, _ in self._docs:
+                per_kind[kind] += 1
+            return {'documents': len(self._docs), 'ngrams': len(self._postings), **per_kind}
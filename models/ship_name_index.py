@@ -0,0 +1,354 @@
+import os
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models.fleet_model import NODE_SHIP, CHANGE_RESET, CHANGE_INSERT, CHANGE_REMOVE, CHANGE_UPDATE
+from models.naval_oob_writer import ship_definition
+from models.navy_design_exporter import parse_blocks
+
+# 船体の装備種別の末尾の番号（例: ship_hull_light_2 -> ship_hull_light）
+_HULL_NUMBER_PATTERN = re.compile(r'_\d+$')
+
+
+def _block_values(items: List[Tuple[Optional[str], Any]], key: str) -> List[str]:
+    """「キー = { 値 値 ... }」の値（同じキーが複数あれば連結）"""
+    values = []
+    for item_key, value in items:
+        if item_key == key:
+            if isinstance(value, list):
+                values.extend(v for k, v in value if k is None and isinstance(v, str))
+            else:
+                values.append(value)
+    return values
+
+
+def _block_value(items: List[Tuple[Optional[str], Any]], key: str) -> Optional[str]:
+    for item_key, value in items:
+        if item_key == key and isinstance(value, str):
+            return value
+    return None
+
+
+def hull_type_base(ship_type: str) -> str:
+    """船体の装備種別から末尾の番号を除く（例: ship_hull_light_2 -> ship_hull_light）"""
+    return _HULL_NUMBER_PATTERN.sub('', ship_type)
+
+
+def design_ship_types(design: Any) -> List[str]:
+    """
+    艦艇の設計から艦名リストを探す ship_types の候補を優先順に返す
+
+    MODの設計バリアントは船体の装備種別（番号付き・番号なし）、それ以外は編成ファイルの
+    definition（destroyer など）で探す。
+    """
+    types = []
+    if isinstance(design, dict):
+        hull_type = str(design.get('type') or '').strip('"')
+        if hull_type:
+            types.append(hull_type)
+            base = hull_type_base(hull_type)
+            if base != hull_type:
+                types.append(base)
+    definition = ship_definition(design)
+    if definition not in types:
+        types.append(definition)
+    return types
+
+
+class ShipNameList:
+    """艦名リスト（common/units/names_ships の1ブロック）"""
+    __slots__ = ('key', 'name', 'countries', 'ship_types', 'prefix', 'fallback_name', 'unique', 'file')
+
+    def __init__(self, key: str, name: str = "", countries: Iterable[str] = (), ship_types: Iterable[str] = (),
+                 prefix: str = "", fallback_name: str = "", unique: Iterable[str] = (), file: Optional[str] = None):
+        self.key = key                        # ブロック名（例: BUL_HISTORICAL_DD）
+        self.name = name                      # 艦名テーマのローカライズキー
+        self.countries = tuple(countries)     # for_countries（空の場合は全国家）
+        self.ship_types = tuple(ship_types)   # 船体の装備種別・definition
+        self.prefix = prefix
+        self.fallback_name = fallback_name    # 固有の艦名を使い切った後の名前（例: "Razrushitel %d"）
+        self.unique = tuple(unique)           # 固有の艦名（この順に使う）
+        self.file = file
+
+    @classmethod
+    def from_block(cls, key: str, items: List[Tuple[Optional[str], Any]],
+                   file: Optional[str] = None) -> Optional['ShipNameList']:
+        """ブロックから作成（type = ship でないブロックはNone）"""
+        if (_block_value(items, 'type') or 'ship') != 'ship':
+            return None
+        return cls(key, _block_value(items, 'name') or key, _block_values(items, 'for_countries'),
+                   _block_values(items, 'ship_types'), _block_value(items, 'prefix') or "",
+                   _block_value(items, 'fallback_name') or "", _block_values(items, 'unique'), file)
+
+    def fallback(self, number: int) -> str:
+        """番号付きの艦名（fallback_name がなければブロック名に番号を付ける）"""
+        template = self.fallback_name or f"{self.key} %d"
+        if '%d' in template:
+            return template.replace('%d', str(number))
+        return f"{template} {number}"
+
+
+def parse_ship_name_lists(text: str, file: Optional[str] = None) -> List[ShipNameList]:
+    """艦名リストのファイルの内容から ShipNameList を作成"""
+    lists = []
+    for key, value in parse_blocks(text):
+        if key and isinstance(value, list):
+            name_list = ShipNameList.from_block(key, value, file)
+            if name_list is not None:
+                lists.append(name_list)
+    return lists
+
+
+def load_ship_name_lists(directory: str) -> List[ShipNameList]:
+    """ディレクトリ（common/units/names_ships）内の全ファイルの艦名リストをファイル名順に読み込む"""
+    lists = []
+    if not directory or not os.path.isdir(directory):
+        return lists
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.txt'):
+            continue
+        file_path = os.path.join(directory, filename)
+        with open(file_path, 'r', encoding='utf-8-sig', errors='replace') as f:
+            lists.extend(parse_ship_name_lists(f.read(), file_path))
+    return lists
+
+
+class _NamePool:
+    """艦名リストごとの割り当て状態（次に使う固有名の位置・返却された固有名・番号付きの艦名の番号）"""
+    __slots__ = ('name_list', 'cursor', 'released', 'number')
+
+    def __init__(self, name_list: ShipNameList):
+        self.name_list = name_list
+        self.cursor = 0
+        self.released = []
+        self.number = 1
+
+
+class ShipNameIndex:
+    """
+    国家の艦名リストの索引と、重複しない艦名の割り当て
+
+    (国家, ship_types) -> 艦名リストを辞書で引き、使用中の艦名は名前 -> 使用数の辞書で数える。
+    固有の艦名はリストの先頭から順に使い、位置を戻さないため、1隻の割り当ては使用中の名前を
+    読み飛ばす分を除いて定数時間で済む（削除された艦艇の固有名は返却されて次に優先して使う）。
+    track した FleetModel の艦艇の追加・削除・改名は変更通知で使用中の艦名に反映する。
+    """
+
+    def __init__(self, name_lists: Iterable[ShipNameList] = (), country: Optional[str] = None,
+                 fleet_models: Iterable[Any] = ()):
+        """
+        初期化
+
+        Args:
+            name_lists: 艦名リスト
+            country: 国家タグ（for_countries に含まれるリストと、for_countries のないリストを使う）
+            fleet_models: 艦名を使用中として数える FleetModel（歴史的編成・ローカルの編成）
+        """
+        self._fleet_models = []
+        self._used: Dict[str, int] = {}
+        # 割り当て済みで、まだ編成に追加されていない艦名（追加時に使用数へ数え替える）
+        self._reserved = set()
+        self._pools: Dict[str, List[_NamePool]] = {}
+        self._pool_of_name: Dict[str, _NamePool] = {}
+        # 該当する艦名リストがない場合の番号付きの艦名（番号の書式 -> 割り当て状態）
+        self._default_pools: Dict[str, _NamePool] = {}
+        self.country = None
+        self.set_lists(name_lists, country)
+        for fleet_model in fleet_models:
+            self.track(fleet_model)
+
+    def set_lists(self, name_lists: Iterable[ShipNameList], country: Optional[str] = None):
+        """艦名リスト・国家を変更（使用中の艦名は track した編成から数え直す）"""
+        self.country = country
+        self._pools = {}
+        self._pool_of_name = {}
+        for name_list in name_lists:
+            if name_list.countries and country not in name_list.countries:
+                continue
+            pool = _NamePool(name_list)
+            for ship_type in name_list.ship_types:
+                self._pools.setdefault(ship_type, []).append(pool)
+            for name in name_list.unique:
+                self._pool_of_name.setdefault(name, pool)
+        self.recount()
+
+    def __len__(self):
+        return len({id(pool) for pools in self._pools.values() for pool in pools})
+
+    # 編成の追跡
+
+    def track(self, fleet_model):
+        """FleetModel の艦艇の艦名を使用中として数え、以降の変更も反映する"""
+        if fleet_model in self._fleet_models:
+            return
+        self._fleet_models.append(fleet_model)
+        fleet_model.add_pre_change_listener(self._on_before_change)
+        fleet_model.add_change_listener(self._on_change)
+        self.mark_used(self._model_ship_names(fleet_model))
+
+    def untrack(self, fleet_model):
+        if fleet_model not in self._fleet_models:
+            return
+        self._fleet_models.remove(fleet_model)
+        fleet_model.remove_pre_change_listener(self._on_before_change)
+        fleet_model.remove_change_listener(self._on_change)
+        self.release(self._model_ship_names(fleet_model))
+
+    def recount(self):
+        """使用中の艦名を track した編成から数え直し、割り当ての位置を先頭に戻す"""
+        self._used = {}
+        self._reserved = set()
+        self._default_pools = {}
+        for pools in self._pools.values():
+            for pool in pools:
+                pool.cursor, pool.released, pool.number = 0, [], 1
+        for fleet_model in self._fleet_models:
+            self.mark_used(self._model_ship_names(fleet_model))
+
+    @staticmethod
+    def _model_ship_names(fleet_model) -> Iterator[str]:
+        for fleet in fleet_model.fleets:
+            for task_force in fleet.task_forces:
+                for ship in task_force.ships:
+                    yield ship.name
+
+    @staticmethod
+    def _node_ship_names(node) -> Iterator[str]:
+        if node.node_type == NODE_SHIP:
+            yield node.name
+            return
+        task_forces = node.task_forces if hasattr(node, 'task_forces') else [node]
+        for task_force in task_forces:
+            for ship in task_force.ships:
+                yield ship.name
+
+    def _on_before_change(self, change):
+        if change.kind in (CHANGE_REMOVE, CHANGE_UPDATE):
+            self.release(self._node_ship_names(change.nodes[0]))
+
+    def _on_change(self, change):
+        if change.kind == CHANGE_RESET:
+            # 編成全体の読み込み時は数え直す
+            self.recount()
+        elif change.kind == CHANGE_INSERT:
+            for node in change.nodes:
+                self.mark_used(self._node_ship_names(node))
+        elif change.kind == CHANGE_UPDATE:
+            self.mark_used(self._node_ship_names(change.nodes[0]))
+
+    # 使用中の艦名
+
+    def is_used(self, name: str) -> bool:
+        return _normalize(name) in self._used
+
+    def mark_used(self, names: Iterable[str]):
+        used = self._used
+        reserved = self._reserved
+        for name in names:
+            name = _normalize(name)
+            if not name:
+                continue
+            if name in reserved:
+                # 割り当てた艦名の艦艇が追加された（割り当て時に数えた分をそのまま使う）
+                reserved.discard(name)
+                continue
+            used[name] = used.get(name, 0) + 1
+
+    def release(self, names: Iterable[str]):
+        """艦名の使用数を減らし、使われなくなった固有名は艦名リストに返却する"""
+        used = self._used
+        for name in names:
+            name = _normalize(name)
+            count = used.get(name)
+            if count is None:
+                continue
+            if count > 1:
+                used[name] = count - 1
+                continue
+            del used[name]
+            self._reserved.discard(name)
+            pool = self._pool_of_name.get(name)
+            if pool is not None:
+                pool.released.append(name)
+
+    # 割り当て
+
+    def name_lists(self, ship_types: Iterable[str]) -> List[ShipNameList]:
+        """ship_types の候補（優先順）に該当する艦名リスト"""
+        return [pool.name_list for pool in self._find_pools(ship_types)]
+
+    def _find_pools(self, ship_types: Iterable[str]) -> List[_NamePool]:
+        if isinstance(ship_types, str):
+            ship_types = [ship_types]
+        for ship_type in ship_types:
+            pools = self._pools.get(ship_type)
+            if pools:
+                return pools
+        return []
+
+    def _take_unique(self, pool: _NamePool) -> Optional[str]:
+        used = self._used
+        while pool.released:
+            name = pool.released.pop()
+            if name not in used:
+                return name
+        unique = pool.name_list.unique
+        while pool.cursor < len(unique):
+            name = unique[pool.cursor]
+            pool.cursor += 1
+            if name not in used:
+                return name
+        return None
+
+    def _take_fallback(self, pool: _NamePool) -> str:
+        used = self._used
+        while True:
+            name = pool.name_list.fallback(pool.number)
+            pool.number += 1
+            if name not in used:
+                return name
+
+    def allocate(self, ship_types: Iterable[str], default_name: str = "艦艇 %d") -> str:
+        """
+        未使用の艦名を1つ割り当てる
+
+        割り当てた艦名は使用中になる。track した編成に追加しない場合は release で返却する。
+
+        Args:
+            ship_types: ship_types の候補（優先順、design_ship_types の結果など）
+            default_name: 該当する艦名リストがない場合の番号付きの艦名
+
+        Returns:
+            str: 艦名。固有の艦名をリストの順に使い、すべて使用中なら最初のリストの fallback_name に番号を付ける。
+        """
+        pools = self._find_pools(ship_types)
+        name = None
+        for pool in pools:
+            name = self._take_unique(pool)
+            if name is not None:
+                break
+        if name is None:
+            if pools:
+                name = self._take_fallback(pools[0])
+            else:
+                pool = self._default_pools.get(default_name)
+                if pool is None:
+                    pool = self._default_pools[default_name] = _NamePool(ShipNameList('', fallback_name=default_name))
+                name = self._take_fallback(pool)
+        self._used[name] = 1
+        self._reserved.add(name)
+        return name
+
+    def allocate_many(self, ship_types: Iterable[str], count: int, default_name: str = "艦艇 %d") -> List[str]:
+        """未使用の艦名を count 個割り当てる"""
+        ship_types = list(ship_types) if not isinstance(ship_types, str) else [ship_types]
+        return [self.allocate(ship_types, default_name) for _ in range(count)]
+
+    def allocate_for_design(self, design: Any, count: int = 1) -> List[str]:
+        """艦艇の設計の艦種に合う艦名を count 個割り当てる"""
+        return self.allocate_many(design_ship_types(design), count)
+
+
+def _normalize(name: Any) -> str:
+    return str(name or '').strip().strip('"')
+
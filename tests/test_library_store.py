@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.library_store import LibraryStore, KIND_EQUIPMENT, KIND_DESIGN
+
+
+def _equipment(equipment_id, lg_attack, reliability=0.0):
+    return {
+        'equipment_type': '小口径砲',
+        'common': {'ID': equipment_id, '名前': equipment_id, '開発年': 1936, '開発国': 'JAP'},
+        'specific': {'caliber_cm': 12.7},
+        'stats': {
+            'add_stats': {'lg_attack': lg_attack},
+            'multiply_stats': {},
+            'add_average_stats': {'reliability': reliability},
+        },
+    }
+
+
+class LibraryStoreStatFilterTest(unittest.TestCase):
+    """query() / query_count() の性能値による絞り込み"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = LibraryStore(os.path.join(self.tmp_dir.name, 'library.db'))
+        self.store.save(KIND_EQUIPMENT, _equipment('SMLG001', 3.5, 0.8), 'SMLG001')
+        self.store.save(KIND_EQUIPMENT, _equipment('SMLG002', 0.5, 0.6), 'SMLG002')
+        self.store.save(KIND_EQUIPMENT, _equipment('SMLG003', 6.0), 'SMLG003')
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_equipment_filtered_by_add_stats(self):
+        self.assertEqual(self.store.query_count(KIND_EQUIPMENT, min_stats={'lg_attack': 1}), 2)
+        rows = self.store.query(KIND_EQUIPMENT, min_stats={'lg_attack': 1}, max_stats={'lg_attack': 5},
+                                fields=['id'])
+        self.assertEqual([row['id'] for row in rows], ['SMLG001'])
+
+    def test_equipment_filtered_by_average_stats(self):
+        rows = self.store.query(KIND_EQUIPMENT, min_stats={'reliability': 0.7}, fields=['id'])
+        self.assertEqual([row['id'] for row in rows], ['SMLG001'])
+
+    def test_dotted_stat_path(self):
+        rows = self.store.query(KIND_EQUIPMENT, min_stats={'specific.caliber_cm': 12}, fields=['id'])
+        self.assertEqual(len(rows), 3)
+
+    def test_design_filtered_by_saved_stats(self):
+        self.store.save(KIND_DESIGN, {'id': 'D1', 'design_name': 'A', 'stats': {'lg_attack': 10.0}}, 'D1')
+        self.store.save(KIND_DESIGN, {'id': 'D2', 'design_name': 'B', 'stats': {'lg_attack': 2.0}}, 'D2')
+        rows = self.store.query(KIND_DESIGN, min_stats={'lg_attack': 5}, fields=['id'])
+        self.assertEqual([row['id'] for row in rows], ['D1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,250 @@
+import os
+import logging
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+# 変更の種類
+CHANGE_ADDED = "added"
+CHANGE_MODIFIED = "modified"
+CHANGE_REMOVED = "removed"
+
+
+def scan_directory(dir_path, suffixes=None):
+    """
+    ディレクトリ直下のファイルの更新時刻とサブディレクトリを取得
+
+    Returns:
+        tuple: ({ファイルパス: (更新時刻, サイズ)}, [サブディレクトリのパス])
+    """
+    files = {}
+    subdirs = []
+    try:
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                # 一時ファイル・インデックスなどの隠しファイルは対象外
+                if entry.name.startswith('.') or entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    if entry.is_dir():
+                        subdirs.append(entry.path)
+                    elif not suffixes or entry.name.endswith(suffixes):
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_mtime, stat.st_size)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, subdirs
+
+
+class _WatchedRoot:
+    def __init__(self, category, root, recursive, suffixes):
+        self.category = category
+        self.root = os.path.normpath(root)
+        self.recursive = recursive
+        self.suffixes = tuple(suffixes) if suffixes else None
+        # ディレクトリ -> {ファイルパス: (更新時刻, サイズ)}
+        self.snapshots = {}
+
+    def contains(self, path):
+        path = os.path.normpath(path)
+        return path == self.root or path.startswith(self.root + os.sep)
+
+
+class FileWatcherService(QObject):
+    """
+    アプリのデータディレクトリとMODのフォルダを監視し、ファイル単位の変更を通知するサービス
+
+    QFileSystemWatcherでディレクトリを監視し、通知のあったディレクトリだけを前回の
+    スナップショットと比較して追加・変更・削除を判定する。ファイル内容の変更は
+    ディレクトリの通知では検出できないため、監視ファイル数が上限以下ならファイルも監視し、
+    上限を超える場合やQFileSystemWatcherが使えない場合は定期的なポーリングで比較する。
+    """
+
+    # (カテゴリ, ファイルパス, 変更の種類)
+    file_changed = pyqtSignal(str, str, str)
+
+    def __init__(self, parent=None, poll_interval_ms=3000, debounce_ms=200, max_watched_files=2000,
+                 use_polling=False):
+        """
+        初期化
+
+        Args:
+            poll_interval_ms: ポーリング間隔（ミリ秒）
+            debounce_ms: 通知をまとめる待ち時間（ミリ秒）
+            max_watched_files: QFileSystemWatcherで個別に監視するファイル数の上限
+            use_polling: Trueの場合はQFileSystemWatcherを使わずポーリングのみで監視
+        """
+        super().__init__(parent)
+        self.logger = logging.getLogger('FileWatcherService')
+        self.max_watched_files = max_watched_files
+        self._roots = {}  # カテゴリ -> [_WatchedRoot]
+        self._pending_dirs = set()
+
+        self._watcher = None if use_polling else QFileSystemWatcher(self)
+        if self._watcher is not None:
+            self._watcher.directoryChanged.connect(self._on_directory_changed)
+            self._watcher.fileChanged.connect(self._on_file_changed)
+
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(debounce_ms)
+        self._debounce_timer.timeout.connect(self._process_pending)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(poll_interval_ms)
+        self._poll_timer.timeout.connect(self.poll)
+
+    @property
+    def is_polling(self):
+        return self._poll_timer.isActive()
+
+    def add_root(self, category, root, recursive=True, suffixes=None):
+        """
+        監視対象のディレクトリを追加する
+
+        Args:
+            category: 通知に付けるカテゴリ名（例: "hull", "mod:history"）
+            root: ディレクトリのパス
+            recursive: サブディレクトリも監視するか
+            suffixes: 対象とするファイルの拡張子（省略時はすべて）
+        """
+        if not root or not os.path.isdir(root):
+            self.logger.debug(f"監視対象のディレクトリが存在しません: {root}")
+            return
+
+        watched = _WatchedRoot(category, root, recursive, suffixes)
+        self._roots.setdefault(category, []).append(watched)
+        self._snapshot_tree(watched, watched.root)
+        self._update_watch_mode()
+
+    def remove_category(self, category):
+        """カテゴリの監視をすべて解除する"""
+        for watched in self._roots.pop(category, []):
+            if self._watcher is not None:
+                paths = list(watched.snapshots.keys())
+                for files in watched.snapshots.values():
+                    paths.extend(files.keys())
+                existing = set(self._watcher.directories()) | set(self._watcher.files())
+                paths = [p for p in paths if p in existing]
+                if paths:
+                    self._watcher.removePaths(paths)
+        self._update_watch_mode()
+
+    def clear(self):
+        for category in list(self._roots.keys()):
+            self.remove_category(category)
+
+    def categories(self):
+        return list(self._roots.keys())
+
+    def _snapshot_tree(self, watched, dir_path, emit=False):
+        """ディレクトリ（再帰監視の場合は配下も）のスナップショットを作成する"""
+        stack = [dir_path]
+        while stack:
+            current = stack.pop()
+            files, subdirs = scan_directory(current, watched.suffixes)
+            watched.snapshots[current] = files
+            self._watch_paths([current])
+            if emit:
+                for path in files:
+                    self.file_changed.emit(watched.category, path, CHANGE_ADDED)
+            if watched.recursive:
+                stack.extend(subdirs)
+
+    def _watch_paths(self, paths):
+        if self._watcher is None or not paths:
+            return
+        existing = set(self._watcher.directories()) | set(self._watcher.files())
+        paths = [path for path in paths if path not in existing]
+        if not paths:
+            return
+        failed = self._watcher.addPaths(paths)
+        if failed:
+            self.logger.debug(f"{len(failed)}件のパスを監視できませんでした（ポーリングで補完）")
+
+    def _total_files(self):
+        return sum(len(files) for roots in self._roots.values() for watched in roots
+                   for files in watched.snapshots.values())
+
+    def _update_watch_mode(self):
+        """監視ファイル数に応じて、ファイル単位の監視かポーリングかを切り替える"""
+        if self._watcher is None:
+            if self._roots and not self._poll_timer.isActive():
+                self._poll_timer.start()
+            return
+
+        if self._total_files() <= self.max_watched_files:
+            self._poll_timer.stop()
+            self._watch_paths([path for roots in self._roots.values() for watched in roots
+                               for files in watched.snapshots.values() for path in files])
+        else:
+            # ファイル数が多い場合はファイル単位の監視をやめ、内容の変更はポーリングで検出する
+            if self._watcher.files():
+                self._watcher.removePaths(self._watcher.files())
+            if not self._poll_timer.isActive():
+                self.logger.info("監視ファイル数が上限を超えたため、内容の変更はポーリングで検出します")
+                self._poll_timer.start()
+
+    def _on_directory_changed(self, path):
+        self._pending_dirs.add(os.path.normpath(path))
+        self._debounce_timer.start()
+
+    def _on_file_changed(self, path):
+        self._pending_dirs.add(os.path.dirname(os.path.normpath(path)))
+        self._debounce_timer.start()
+
+    def _process_pending(self):
+        pending = self._pending_dirs
+        self._pending_dirs = set()
+        for dir_path in pending:
+            for roots in list(self._roots.values()):
+                for watched in roots:
+                    if watched.contains(dir_path):
+                        self._diff_directory(watched, dir_path)
+        self._update_watch_mode()
+
+    def poll(self):
+        """監視中のすべてのディレクトリを前回のスナップショットと比較する"""
+        for roots in list(self._roots.values()):
+            for watched in roots:
+                for dir_path in list(watched.snapshots.keys()):
+                    self._diff_directory(watched, dir_path)
+
+    def _diff_directory(self, watched, dir_path):
+        """ディレクトリの現在の状態をスナップショットと比較して変更を通知する"""
+        previous = watched.snapshots.get(dir_path)
+        if previous is None:
+            # 新しく作られたサブディレクトリ
+            if os.path.isdir(dir_path) and watched.recursive:
+                self._snapshot_tree(watched, dir_path, emit=True)
+            return
+
+        if not os.path.isdir(dir_path):
+            # ディレクトリごと削除された場合は配下のファイルをすべて削除として通知
+            for sub_dir in [d for d in watched.snapshots if d == dir_path or d.startswith(dir_path + os.sep)]:
+                for path in watched.snapshots.pop(sub_dir):
+                    self.file_changed.emit(watched.category, path, CHANGE_REMOVED)
+            return
+
+        current, subdirs = scan_directory(dir_path, watched.suffixes)
+        watched.snapshots[dir_path] = current
+
+        for path, state in current.items():
+            old_state = previous.get(path)
+            if old_state is None:
+                self.file_changed.emit(watched.category, path, CHANGE_ADDED)
+            elif old_state != state:
+                self.file_changed.emit(watched.category, path, CHANGE_MODIFIED)
+        for path in previous.keys() - current.keys():
+            self.file_changed.emit(watched.category, path, CHANGE_REMOVED)
+
+        if watched.recursive:
+            for sub_dir in subdirs:
+                if sub_dir not in watched.snapshots:
+                    self._snapshot_tree(watched, sub_dir, emit=True)
+            # 削除されたサブディレクトリ
+            removed_dirs = [d for d in watched.snapshots
+                            if os.path.dirname(d) == dir_path and d not in subdirs]
+            for removed_dir in removed_dirs:
+                self._diff_directory(watched, removed_dir)
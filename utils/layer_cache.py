@@ -0,0 +1,198 @@
+import logging
+import threading
+from collections import OrderedDict
+
+
+def estimate_nbytes(value):
+    """キャッシュ値のメモリ使用量（バイト）を推定する"""
+    if value is None:
+        return 0
+
+    # NumPy配列
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+
+    # QImage (Qt 5.10以降は sizeInBytes、それ以前は byteCount)
+    for attr in ('sizeInBytes', 'byteCount'):
+        method = getattr(value, attr, None)
+        if callable(method):
+            try:
+                return int(method())
+            except Exception:
+                pass
+
+    # QPixmap (ピクセル数 x 色深度から推定)
+    if hasattr(value, 'width') and hasattr(value, 'height') and hasattr(value, 'depth'):
+        try:
+            return int(value.width() * value.height() * max(value.depth(), 8) // 8)
+        except Exception:
+            pass
+
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+
+    return 0
+
+
+class LayerCache:
+    """
+    描画済みマップレイヤー・タイル用のバイト数管理付きLRUキャッシュ
+
+    予算（バイト数）を超えた場合は最も古く使用されたレイヤーから破棄する。
+    """
+
+    def __init__(self, budget_bytes=256 * 1024 * 1024, name="LayerCache"):
+        self.name = name
+        self.budget_bytes = max(0, int(budget_bytes))
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._current_bytes = 0
+        self._lock = threading.RLock()
+
+        # 統計情報
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.peak_bytes = 0
+
+        self.logger = logging.getLogger(name)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    @property
+    def current_bytes(self):
+        return self._current_bytes
+
+    def keys(self):
+        """LRU順（古い順）のキー一覧を取得"""
+        with self._lock:
+            return list(self._entries.keys())
+
+    def get(self, key, default=None):
+        """値を取得し、最近使用したものとしてマークする"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        """値を格納し、予算を超えた分をLRU順に破棄する"""
+        if nbytes is None:
+            nbytes = estimate_nbytes(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._current_bytes -= self._entries.pop(key)[1]
+
+            # 予算を単独で超えるレイヤーは保持しない
+            if self.budget_bytes and nbytes > self.budget_bytes:
+                self.logger.warning(
+                    f"{key} はキャッシュ予算を超えるため保持しません "
+                    f"({nbytes / 1024 / 1024:.1f} MB > {self.budget_bytes / 1024 / 1024:.1f} MB)")
+                return value
+
+            self._entries[key] = (value, nbytes)
+            self._current_bytes += nbytes
+            self.peak_bytes = max(self.peak_bytes, self._current_bytes)
+            self._evict_to(self.budget_bytes, keep=key)
+            return value
+
+    def pop(self, key, default=None):
+        """指定したキーを削除して値を返す"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self._current_bytes -= entry[1]
+            return entry[0]
+
+    def discard_prefix(self, prefix):
+        """キーが指定プレフィックスで始まるエントリをすべて削除する（タプルキーは先頭要素で比較）"""
+        with self._lock:
+            for key in list(self._entries.keys()):
+                head = key[0] if isinstance(key, tuple) else key
+                if head == prefix or (isinstance(head, str) and head.startswith(prefix)):
+                    self.pop(key)
+
+    def set_budget(self, budget_bytes):
+        """予算を変更し、超過分を破棄する"""
+        with self._lock:
+            self.budget_bytes = max(0, int(budget_bytes))
+            self._evict_to(self.budget_bytes)
+
+    def trim(self, ratio=0.5):
+        """
+        現在の使用量を指定比率まで削減する（メモリ逼迫時用）
+
+        Returns:
+            int: 解放したバイト数
+        """
+        with self._lock:
+            before = self._current_bytes
+            target = int(self._current_bytes * max(0.0, min(1.0, ratio)))
+            self._evict_to(target)
+            freed = before - self._current_bytes
+            if freed:
+                self.logger.info(f"キャッシュを削減しました: {freed / 1024 / 1024:.1f} MB 解放")
+            return freed
+
+    def clear(self):
+        """すべてのエントリを破棄する"""
+        with self._lock:
+            if self._entries:
+                self.evictions += len(self._entries)
+                self.evicted_bytes += self._current_bytes
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self):
+        """キャッシュの統計情報を取得"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'current_bytes': self._current_bytes,
+                'budget_bytes': self.budget_bytes,
+                'peak_bytes': self.peak_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+                'evictions': self.evictions,
+                'evicted_bytes': self.evicted_bytes,
+            }
+
+    def _evict_to(self, target_bytes, keep=None):
+        """使用量が target_bytes 以下になるまで古いエントリを破棄する"""
+        while self._entries and self._current_bytes > target_bytes:
+            oldest_key = next(iter(self._entries))
+            if oldest_key == keep:
+                # 直前に追加したエントリのみが残っている場合は保持
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(oldest_key)
+                continue
+            _, nbytes = self._entries.pop(oldest_key)
+            self._current_bytes -= nbytes
+            self.evictions += 1
+            self.evicted_bytes += nbytes
+            self.logger.debug(f"レイヤーを破棄: {oldest_key} ({nbytes / 1024 / 1024:.1f} MB)")
@@ -0,0 +1,130 @@
+import numpy as np
+
+# 階級区分図のフィルター名のプレフィックス（例: "choropleth:manpower"）
+CHOROPLETH_PREFIX = "choropleth:"
+
+# 値なし（海・未所属など）の色
+NO_DATA_COLOR = (50, 50, 50)
+
+# 色のグラデーション（低い値 → 高い値）
+DEFAULT_COLOR_RAMP = (
+    (255, 255, 204),
+    (161, 218, 180),
+    (65, 182, 196),
+    (44, 127, 184),
+    (37, 52, 148),
+)
+
+
+def _state_value(key):
+    def extract(state_data):
+        return state_data.get(key)
+    return extract
+
+
+def _state_building(key):
+    def extract(state_data):
+        buildings = state_data.get('buildings')
+        if isinstance(buildings, dict):
+            return buildings.get(key)
+        return None
+    return extract
+
+
+# 属性名 -> (表示名, 範囲('state' / 'province'), 値の取得関数)
+CHOROPLETH_ATTRIBUTES = {
+    'manpower': ("人的資源", 'state', _state_value('manpower')),
+    'infrastructure': ("インフラ", 'state', _state_building('infrastructure')),
+    'industrial_complex': ("民需工場", 'state', _state_building('industrial_complex')),
+    'arms_factory': ("軍需工場", 'state', _state_building('arms_factory')),
+    'dockyard': ("造船所", 'state', _state_building('dockyard')),
+    'naval_base': ("海軍基地レベル", 'province', None),
+    'victory_points': ("勝利点", 'province', None),
+}
+
+# 値の偏りが大きいため対数スケールで色分けする属性
+LOG_SCALE_ATTRIBUTES = {'manpower'}
+
+
+def choropleth_filter_name(attribute):
+    return f"{CHOROPLETH_PREFIX}{attribute}"
+
+
+def parse_choropleth_filter(filter_name):
+    """フィルター名から属性名を取得（階級区分図でない場合はNone）"""
+    if isinstance(filter_name, str) and filter_name.startswith(CHOROPLETH_PREFIX):
+        attribute = filter_name[len(CHOROPLETH_PREFIX):]
+        if attribute in CHOROPLETH_ATTRIBUTES:
+            return attribute
+    return None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def compute_values(map_data, attribute):
+    """
+    属性値をプロビンスIDを添字とした配列として取得
+
+    Returns:
+        np.ndarray: float64配列（値なしはNaN）
+    """
+    label, scope, extractor = CHOROPLETH_ATTRIBUTES[attribute]
+    values = np.full(map_data.max_province_id + 1, np.nan, dtype=np.float64)
+
+    if scope == 'state':
+        for state_id, state in map_data.states_data.items():
+            value = _to_float(extractor(state['raw_data']))
+            if np.isnan(value):
+                continue
+            provinces = np.asarray(state['provinces'], dtype=np.int64)
+            provinces = provinces[(provinces >= 0) & (provinces < len(values))]
+            values[provinces] = value
+
+    elif attribute == 'naval_base':
+        for prov_id, level in map_data.naval_base_locations.items():
+            if 0 <= prov_id < len(values):
+                values[prov_id] = _to_float(level)
+
+    elif attribute == 'victory_points':
+        for state in map_data.states_data.values():
+            for vp in state['raw_data'].get('victory_points', []) or []:
+                prov_id = vp.get('province') if isinstance(vp, dict) else None
+                if prov_id is not None and 0 <= prov_id < len(values):
+                    values[prov_id] = _to_float(vp.get('value'))
+
+    return values
+
+
+def values_to_palette(values, color_ramp=DEFAULT_COLOR_RAMP, log_scale=False):
+    """
+    属性値の配列を色パレットに変換（最小値〜最大値をグラデーションに線形補間）
+
+    Returns:
+        tuple: (パレット (N, 3) uint8, (最小値, 最大値) または None)
+    """
+    palette = np.empty((len(values), 3), dtype=np.uint8)
+    palette[:] = NO_DATA_COLOR
+
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return palette, None
+
+    data = values[valid]
+    scaled = np.log1p(np.maximum(data, 0)) if log_scale else data
+    low, high = float(scaled.min()), float(scaled.max())
+    if high > low:
+        t = (scaled - low) / (high - low)
+    else:
+        t = np.ones_like(scaled)
+
+    ramp = np.asarray(color_ramp, dtype=np.float64)
+    stops = np.linspace(0.0, 1.0, len(ramp))
+    colors = np.stack([np.interp(t, stops, ramp[:, channel]) for channel in range(3)], axis=1)
+    palette[valid] = np.round(colors).astype(np.uint8)
+
+    return palette, (float(data.min()), float(data.max()))
@@ -0,0 +1,495 @@
+import os
+import csv
+import time
+import random
+import logging
+
+import numpy as np
+from PIL import Image
+
+from parser.StateParser import StateParser
+from parser.StateParser import ParserError
+from parser.StrategicRegionParser import StrategicRegionParser
+from parser.CountryColorParser import CountryColorParser
+from utils.province_search import ProvinceSearchIndex, load_localisation
+from utils import map_selection
+from utils import map_choropleth
+
+# 表示モード（フィルター）の一覧
+MAP_FILTERS = ("provinces", "states", "strategic_regions", "countries")
+
+DEFAULT_UNKNOWN_COLOR = (50, 50, 50)
+
+
+class MapDataError(Exception):
+    """マップデータ読み込み時のエラー"""
+    pass
+
+
+def get_file_content(file_path):
+    """ファイルの内容を読み込む関数"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except UnicodeDecodeError:
+        try:
+            with open(file_path, 'r', encoding='latin-1') as f:
+                return f.read()
+        except Exception as e:
+            # print(f"ファイルの読み込みに失敗しました: {file_path} - {str(e)}")
+            return None
+    except Exception as e:
+        # print(f"ファイルの読み込みに失敗しました: {file_path} - {str(e)}")
+        return None
+
+
+# プロビンスデータを保持するクラス
+class Province:
+    def __init__(self, id, r, g, b, name, type):
+        self.id = id
+        self.color_rgb = (r, g, b)
+        self.name = name
+        self.type = type
+        self.state_id = None
+        self.strategic_region_id = None
+        self.display_color = (r, g, b)
+
+
+def _random_color():
+    return (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
+
+
+class MapData:
+    """
+    MODのマップデータ（プロビンス・ステート・戦略地域・国家色）を読み込み、
+    表示モードごとのレイヤー配列を生成するクラス
+
+    QWidgetに依存しないため、MapViewerとヘッドレスのエクスポートの両方から利用する。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('MapData')
+        self._rgb_to_id_map_array = np.full(256 * 256 * 256, -1, dtype=np.int32)
+        self.reset()
+
+    def reset(self):
+        """読み込み済みのデータをすべて破棄する"""
+        self.mod_path = None
+        self.original_map_image_data = None
+        self.original_width = 0
+        self.original_height = 0
+
+        self.provinces_data_by_rgb = {}
+        self.provinces_data_by_id = {}
+        self.states_data = {}
+        self.strategic_regions_data = {}
+        self.country_colors = {}
+        self.state_owners = {}
+
+        self._rgb_to_id_map_array.fill(-1)
+        self.province_centroids = {}
+        self.naval_base_locations = {}
+        self.state_boundaries = {}
+
+        self._palette_province = None
+        self._palette_state = None
+        self._palette_region = None
+        self._palette_country = None
+        self._province_id_raster = None
+        self._lookup_arrays = None
+        # 階級区分図のパレットキャッシュ: 属性名 -> (パレット, 値の範囲)
+        self._choropleth_palettes = {}
+
+        self.localisation = {}
+        self.search_index = None
+
+    @property
+    def max_province_id(self):
+        return max(self.provinces_data_by_id.keys()) if self.provinces_data_by_id else 0
+
+    def load(self, mod_path):
+        """
+        MODディレクトリからマップデータを読み込む
+
+        Args:
+            mod_path (str): MODのルートディレクトリ
+
+        Raises:
+            MapDataError: provinces.bmp / definition.csv が見つからない場合
+        """
+        start_time = time.time()
+        self.reset()
+        self.mod_path = mod_path
+
+        base_mod_dir = mod_path
+
+        # 国家の色情報を読み込む
+        colors_txt_path = os.path.join(base_mod_dir, 'common', 'countries', 'colors.txt')
+        if os.path.exists(colors_txt_path):
+            content = get_file_content(colors_txt_path)
+            if content:
+                parser = CountryColorParser(content)
+                self.country_colors = parser.parse()
+
+        provinces_img_path = os.path.join(base_mod_dir, 'map', 'provinces.bmp')
+        if not os.path.exists(provinces_img_path):
+            raise MapDataError(f"provinces.bmp が指定されたModパスのmap/ ディレクトリ以下に見つかりません。\n({provinces_img_path})")
+
+        definition_csv_path = os.path.join(base_mod_dir, 'map', 'definition.csv')
+        if not os.path.exists(definition_csv_path):
+            raise MapDataError(f"definition.csv が指定されたModパスのmap/ ディレクトリ以下に見つかりません。\n({definition_csv_path})")
+
+        img_pil = Image.open(provinces_img_path).convert("RGB")
+        self.original_width, self.original_height = img_pil.size
+        self.original_map_image_data = np.array(img_pil)
+
+        self._load_definitions(definition_csv_path)
+        self._load_states(os.path.join(base_mod_dir, 'history', 'states'))
+        self._load_strategic_regions(os.path.join(base_mod_dir, 'map', 'strategicregions'))
+
+        # プロビンス重心の計算
+        self.calculate_province_centroids()
+
+        # ステートの境界線を計算
+        self.calculate_state_boundaries()
+
+        # 高速化用の色マップを構築
+        self.build_palettes()
+
+        # 検索インデックスを構築（ステート名・戦略地域名・国家名はローカライズを使用）
+        owner_prefixes = tuple(f"{tag}:" for tag in set(self.state_owners.values()))
+        self.localisation = load_localisation(base_mod_dir, prefixes=('STATE_', 'STRATEGICREGION_') + owner_prefixes)
+        self.search_index = ProvinceSearchIndex.build(self, self.localisation)
+
+        self.logger.debug(f"マップデータの読み込み時間: {time.time() - start_time:.2f}秒")
+        return True
+
+    def _load_definitions(self, definition_csv_path):
+        """definition.csv からプロビンス定義を読み込む"""
+        with open(definition_csv_path, 'r', encoding='latin-1') as f:
+            reader = csv.reader(f, delimiter=';')
+            next(reader)
+            for row in reader:
+                if len(row) >= 5:
+                    try:
+                        id = int(row[0])
+                        r, g, b = int(row[1]), int(row[2]), int(row[3])
+                        name = row[4].strip()
+                        province_type = row[5].strip() if len(row) > 5 else "unknown"
+                        province = Province(id, r, g, b, name, province_type)
+                        self.provinces_data_by_rgb[(r, g, b)] = province
+                        self.provinces_data_by_id[id] = province
+
+                        rgb_hash = r * 65536 + g * 256 + b
+                        if rgb_hash < len(self._rgb_to_id_map_array):
+                            self._rgb_to_id_map_array[rgb_hash] = id
+                    except ValueError:
+                        pass
+
+    def _load_states(self, states_dir):
+        """history/states からステートを読み込む"""
+        if not os.path.exists(states_dir):
+            return
+
+        for filename in os.listdir(states_dir):
+            if not filename.endswith('.txt'):
+                continue
+            content = get_file_content(os.path.join(states_dir, filename))
+            if not content:
+                continue
+            try:
+                state_data = StateParser(content).parse()
+            except ParserError:
+                continue
+            except Exception:
+                continue
+
+            state_id = state_data.get('id')
+            if state_id is None or not state_data.get('provinces'):
+                continue
+
+            state_name = state_data.get('name', f"State {state_id}").strip('"')
+            self.states_data[state_id] = {
+                'name': state_name,
+                'provinces': state_data['provinces'],
+                'color': _random_color(),
+                'raw_data': state_data
+            }
+
+            owner = state_data.get('owner')
+            if owner:
+                self.state_owners[state_id] = owner
+
+            for prov_id in state_data['provinces']:
+                if prov_id in self.provinces_data_by_id:
+                    self.provinces_data_by_id[prov_id].state_id = state_id
+
+            # 海軍基地情報の取得
+            if 'province_buildings' in state_data:
+                for prov_id, buildings in state_data['province_buildings'].items():
+                    if isinstance(buildings, dict) and 'naval_base' in buildings:
+                        self.naval_base_locations[prov_id] = buildings['naval_base']
+
+    def _load_strategic_regions(self, strategic_regions_dir):
+        """map/strategicregions から戦略地域を読み込む"""
+        if not os.path.exists(strategic_regions_dir):
+            return
+
+        for filename in os.listdir(strategic_regions_dir):
+            if not filename.endswith('.txt'):
+                continue
+            content = get_file_content(os.path.join(strategic_regions_dir, filename))
+            if not content:
+                continue
+            try:
+                region_data = StrategicRegionParser(content).parse()
+            except ParserError:
+                continue
+            except Exception:
+                continue
+
+            region_id = region_data.get('id')
+            if region_id is None or not region_data.get('provinces'):
+                continue
+
+            region_name = region_data.get('name', f"Strategic Region {region_id}").strip('"')
+            self.strategic_regions_data[region_id] = {
+                'name': region_name,
+                'provinces': region_data['provinces'],
+                'color': _random_color(),
+                'raw_data': region_data
+            }
+            for prov_id in region_data['provinces']:
+                if prov_id in self.provinces_data_by_id:
+                    self.provinces_data_by_id[prov_id].strategic_region_id = region_id
+
+    def get_province_id_raster(self):
+        """
+        ピクセルごとのプロビンスID配列（平坦化、未定義は-1）を取得する
+
+        初回呼び出し時に計算し、以降は同じ配列を返す。
+        """
+        if self._province_id_raster is None and self.original_map_image_data is not None:
+            pixels_flat = self.original_map_image_data.reshape(-1, 3)
+            pixel_hashes = (pixels_flat[:, 0].astype(np.int32) * 65536 +
+                            pixels_flat[:, 1].astype(np.int32) * 256 +
+                            pixels_flat[:, 2].astype(np.int32))
+            # ハッシュは常に0〜256^3-1の範囲に収まる
+            self._province_id_raster = self._rgb_to_id_map_array[pixel_hashes]
+        return self._province_id_raster
+
+    def get_province_id_grid(self):
+        """プロビンスID配列を (height, width) の形で取得（コピーしないビュー）"""
+        raster = self.get_province_id_raster()
+        if raster is None:
+            return None
+        return raster.reshape(self.original_height, self.original_width)
+
+    def get_province_lookup_arrays(self):
+        """
+        プロビンスIDを添字とした属性配列（ステートID・戦略地域ID・海軍基地レベル）を取得
+
+        選択範囲の集計をベクトル化するために使用する。未所属は-1、海軍基地なしは0。
+        """
+        if self._lookup_arrays is None:
+            size = self.max_province_id + 1
+            state = np.full(size, -1, dtype=np.int32)
+            region = np.full(size, -1, dtype=np.int32)
+            naval_base = np.zeros(size, dtype=np.int32)
+            for prov_id, province in self.provinces_data_by_id.items():
+                if province.state_id is not None:
+                    state[prov_id] = province.state_id
+                if province.strategic_region_id is not None:
+                    region[prov_id] = province.strategic_region_id
+            for prov_id, level in self.naval_base_locations.items():
+                if 0 <= prov_id < size:
+                    try:
+                        naval_base[prov_id] = int(level)
+                    except (TypeError, ValueError):
+                        pass
+            self._lookup_arrays = {'state': state, 'strategic_region': region, 'naval_base': naval_base}
+        return self._lookup_arrays
+
+    def select_rect(self, x0, y0, x1, y1):
+        """矩形範囲内のプロビンスを選択して集計結果を返す（画像座標）"""
+        grid = self.get_province_id_grid()
+        if grid is None:
+            return None
+        province_ids, counts = map_selection.rect_province_ids(grid, x0, y0, x1, y1)
+        return map_selection.summarize_selection(self, province_ids, counts)
+
+    def select_polygon(self, points):
+        """多角形（投げ縄）内のプロビンスを選択して集計結果を返す（画像座標）"""
+        grid = self.get_province_id_grid()
+        if grid is None:
+            return None
+        province_ids, counts = map_selection.polygon_province_ids(grid, points)
+        return map_selection.summarize_selection(self, province_ids, counts)
+
+    def calculate_province_centroids(self):
+        if self.original_map_image_data is None:
+            return
+
+        height, width, _ = self.original_map_image_data.shape
+        prov_ids_flat = self.get_province_id_raster()
+
+        # 有効なプロビンスIDを持つピクセルのみを抽出
+        valid_prov_pixel_indices = np.flatnonzero(prov_ids_flat != -1)
+        valid_prov_ids = prov_ids_flat[valid_prov_pixel_indices]
+
+        # 平坦化インデックスからX, Y座標を求める
+        valid_y_coords, valid_x_coords = np.divmod(valid_prov_pixel_indices, width)
+
+        max_prov_id = valid_prov_ids.max() if len(valid_prov_ids) > 0 else 0
+
+        # NumPyのbincountを使って、プロビンスIDごとの座標合計とピクセル数を計算
+        sum_x_per_prov = np.bincount(valid_prov_ids, weights=valid_x_coords, minlength=max_prov_id + 1)
+        sum_y_per_prov = np.bincount(valid_prov_ids, weights=valid_y_coords, minlength=max_prov_id + 1)
+        count_per_prov = np.bincount(valid_prov_ids, minlength=max_prov_id + 1)
+
+        self.province_centroids = {}
+        for prov_id in self.provinces_data_by_id.keys():
+            if prov_id <= max_prov_id and count_per_prov[prov_id] > 0:
+                center_x = sum_x_per_prov[prov_id] / count_per_prov[prov_id]
+                center_y = sum_y_per_prov[prov_id] / count_per_prov[prov_id]
+                self.province_centroids[prov_id] = (center_x, center_y)
+            else:
+                self.province_centroids[prov_id] = None  # プロビンスが画像中に見つからない場合
+
+    def calculate_state_boundaries(self):
+        if self.original_map_image_data is None:
+            return
+
+        height, width, _ = self.original_map_image_data.shape
+        self.state_boundaries = {}
+
+        for state_id, state_data in self.states_data.items():
+            provinces = state_data['provinces']
+            if not provinces:
+                continue
+
+            boundaries = set()
+            for prov_id in provinces:
+                if self.province_centroids.get(prov_id) is None:
+                    continue
+
+                center_x, center_y = self.province_centroids[prov_id]
+                center_x, center_y = int(center_x), int(center_y)
+
+                # 8方向の隣接ピクセルをチェック
+                for dx, dy in [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]:
+                    nx, ny = center_x + dx, center_y + dy
+                    if 0 <= nx < width and 0 <= ny < height:
+                        pixel_rgb = tuple(self.original_map_image_data[ny, nx])
+                        neighbor_prov = self.provinces_data_by_rgb.get(pixel_rgb)
+                        if neighbor_prov and neighbor_prov.id not in provinces:
+                            boundaries.add((center_x, center_y, nx, ny))
+
+            self.state_boundaries[state_id] = list(boundaries)
+
+    def build_palettes(self):
+        """プロビンスID→色のパレットを構築する"""
+        max_prov_id = self.max_province_id
+
+        self._palette_province = np.full((max_prov_id + 1, 3), (0, 0, 0), dtype=np.uint8)
+        self._palette_state = np.full((max_prov_id + 1, 3), DEFAULT_UNKNOWN_COLOR, dtype=np.uint8)
+        self._palette_region = np.full((max_prov_id + 1, 3), DEFAULT_UNKNOWN_COLOR, dtype=np.uint8)
+        self._palette_country = None
+        self._choropleth_palettes = {}
+
+        for prov_id, prov_obj in self.provinces_data_by_id.items():
+            self._palette_province[prov_id] = prov_obj.color_rgb
+
+            if prov_obj.state_id is not None and prov_obj.state_id in self.states_data:
+                self._palette_state[prov_id] = self.states_data[prov_obj.state_id]['color']
+
+            if prov_obj.strategic_region_id is not None and prov_obj.strategic_region_id in self.strategic_regions_data:
+                self._palette_region[prov_id] = self.strategic_regions_data[prov_obj.strategic_region_id]['color']
+
+    def build_country_palette(self):
+        """ステートの所有者の色を使った国家パレットを構築する"""
+        max_prov_id = self.max_province_id
+        palette = np.full((max_prov_id + 1, 3), DEFAULT_UNKNOWN_COLOR, dtype=np.uint8)
+        for state_id, state_data in self.states_data.items():
+            owner = state_data['raw_data'].get('owner', None)
+            if owner and owner in self.country_colors:
+                color = self.country_colors[owner]['color']
+                for prov_id in state_data['provinces']:
+                    if prov_id <= max_prov_id:
+                        palette[prov_id] = color
+        return palette
+
+    def get_palette(self, filter_name):
+        """表示モードに対応するパレットを取得する"""
+        if self._palette_province is None:
+            self.build_palettes()
+
+        if filter_name == "provinces":
+            return self._palette_province
+        elif filter_name == "states":
+            return self._palette_state
+        elif filter_name == "strategic_regions":
+            return self._palette_region
+        elif filter_name == "countries":
+            if self._palette_country is None:
+                self._palette_country = self.build_country_palette()
+            return self._palette_country
+
+        attribute = map_choropleth.parse_choropleth_filter(filter_name)
+        if attribute:
+            return self.get_choropleth(attribute)[0]
+        return np.full((self.max_province_id + 1, 3), (0, 0, 0), dtype=np.uint8)
+
+    def get_choropleth(self, attribute):
+        """
+        属性の階級区分図パレットと値の範囲を取得（属性ごとにキャッシュ）
+
+        Returns:
+            tuple: (パレット (N, 3) uint8, (最小値, 最大値) または None)
+        """
+        if attribute not in self._choropleth_palettes:
+            values = map_choropleth.compute_values(self, attribute)
+            self._choropleth_palettes[attribute] = map_choropleth.values_to_palette(
+                values, log_scale=attribute in map_choropleth.LOG_SCALE_ATTRIBUTES)
+        return self._choropleth_palettes[attribute]
+
+    def render_layer(self, filter_name, palette=None):
+        """
+        表示モードのレイヤーをRGB配列として生成する
+
+        Args:
+            filter_name (str): 表示モード
+            palette (np.ndarray, optional): 使用するパレット（省略時は表示モードのパレット）
+
+        Returns:
+            np.ndarray: (height, width, 3) のuint8配列
+        """
+        if self.original_map_image_data is None:
+            return None
+
+        if palette is None:
+            palette = self.get_palette(filter_name)
+        prov_ids_flat = self.get_province_id_raster()
+
+        filtered_colors_flat = np.empty((prov_ids_flat.shape[0], 3), dtype=np.uint8)
+        filtered_colors_flat[:] = DEFAULT_UNKNOWN_COLOR
+
+        max_id_in_palette = palette.shape[0] - 1
+        valid = (prov_ids_flat >= 0) & (prov_ids_flat <= max_id_in_palette)
+        filtered_colors_flat[valid] = palette[prov_ids_flat[valid]]
+
+        return filtered_colors_flat.reshape(self.original_height, self.original_width, 3)
+
+    def search(self, query, limit=20):
+        """プロビンス・ステート・戦略地域・国家を検索する（ProvinceSearchIndex.search を参照）"""
+        if self.search_index is None:
+            return []
+        return self.search_index.search(query, limit)
+
+    def get_state_owner(self, state_id):
+        """ステートの所有者を取得"""
+        return self.state_owners.get(state_id)
+
+    def get_country_tags(self):
+        """ステートを所有している国家タグの一覧を取得"""
+        return sorted(set(self.state_owners.values()))
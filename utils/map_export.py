@@ -0,0 +1,242 @@
+"""
+マップのヘッドレス一括エクスポート
+
+GUIを起動せずにMODのマップを読み込み、表示モードごとの地図・国家別の港湾マップ・
+艦隊配置マップをPNGとして書き出す（ドキュメントの一括生成用）。
+
+使用例:
+    python -m utils.map_export <MODディレクトリ> -o <出力ディレクトリ> [--countries JAP ENG] [--workers 4]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# ウィンドウシステムを使用せずに描画する
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtGui import QGuiApplication
+
+from utils.map_data import MapData, MAP_FILTERS
+from utils import map_painter
+from utils import map_choropleth
+
+# 書き出し可能な表示モード（階級区分図を含む）
+EXPORT_FILTERS = MAP_FILTERS + tuple(map_choropleth.choropleth_filter_name(attribute)
+                                     for attribute in map_choropleth.CHOROPLETH_ATTRIBUTES)
+
+logger = logging.getLogger('MapExport')
+
+
+def fleets_by_province(fleet_json):
+    """
+    保存済みの艦隊データ（{TAG}_fleets.json の内容）をプロビンスID別に整理する
+
+    Returns:
+        dict: {province_id: [fleet, ...]}
+    """
+    result = {}
+    for fleet in fleet_json.get("fleets", []):
+        if not isinstance(fleet, dict) or "province_id" not in fleet:
+            continue
+        try:
+            prov_id = int(fleet["province_id"])
+        except (TypeError, ValueError):
+            continue
+        result.setdefault(prov_id, []).append(fleet)
+    return result
+
+
+def load_saved_fleets(fleet_dir, country_tag):
+    """アプリのデータディレクトリから国家の艦隊データを読み込む"""
+    if not fleet_dir:
+        return {}
+    file_path = os.path.join(fleet_dir, f"{country_tag}_fleets.json")
+    if not os.path.exists(file_path):
+        return {}
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return fleets_by_province(json.load(f))
+    except Exception as e:
+        logger.error(f"艦隊データの読み込みに失敗しました: {file_path} - {e}")
+        return {}
+
+
+class MapExporter:
+    """MapDataから各種マップ画像を生成して保存するクラス"""
+
+    def __init__(self, map_data, output_dir, fleet_dir=None):
+        self.map_data = map_data
+        self.output_dir = output_dir
+        self.fleet_dir = fleet_dir
+        self._base_images = {}
+
+    def _base_image(self, filter_name):
+        """表示モードのベース画像（描画用にコピーして使う）"""
+        if filter_name not in self._base_images:
+            display_array = self.map_data.render_layer(filter_name)
+            self._base_images[filter_name] = map_painter.array_to_qimage(display_array)
+        return self._base_images[filter_name]
+
+    def _save(self, image, *parts):
+        path = os.path.join(self.output_dir, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not image.save(path, "PNG"):
+            raise IOError(f"画像の保存に失敗しました: {path}")
+        return path
+
+    def export_filters(self, filters=MAP_FILTERS):
+        """表示モードごとの地図を書き出す"""
+        paths = []
+        for filter_name in filters:
+            image = self._base_image(filter_name).copy()
+            if filter_name == "countries":
+                map_painter.draw_state_boundaries(image, self.map_data.state_boundaries)
+            map_painter.draw_naval_bases(image, self.map_data.naval_base_locations,
+                                         self.map_data.province_centroids)
+            file_name = filter_name.replace(map_choropleth.CHOROPLETH_PREFIX, "choropleth_")
+            paths.append(self._save(image, f"map_{file_name}.png"))
+        return paths
+
+    def _prepare_country(self, country_tag):
+        """
+        国家別マップのうち文字を含まない部分（ステート境界・港湾マーカー）を描画し、艦隊データを読み込む
+
+        QImageへの図形の描画はGUIスレッド以外でも行えるため、並列化する場合はワーカースレッドで呼ぶ。
+
+        Returns:
+            tuple: (描画途中の画像, プロビンスID別の艦隊データ)
+        """
+        image = self._base_image("countries").copy()
+        map_painter.draw_state_boundaries(image, self.map_data.state_boundaries)
+        map_painter.draw_country_naval_bases(image, self.map_data, country_tag, labels=False)
+        return image, load_saved_fleets(self.fleet_dir, country_tag)
+
+    def _label_country(self, country_tag, image, fleet_data):
+        """
+        港湾名・艦隊マーカー（隻数）を描画し、書き出す画像を返す
+
+        フォントを使う文字の描画はGUIスレッド以外では安全でないため、必ずGUIスレッドで呼ぶ。
+
+        Returns:
+            list: (画像, 出力先のパスの要素) のリスト
+        """
+        map_painter.draw_country_naval_base_labels(image, self.map_data, country_tag)
+        images = [(image, ("naval_bases", f"{country_tag}.png"))]
+        if fleet_data:
+            # 港湾マップは保存前に上書きされないように複製してから艦隊マーカーを重ねる
+            images[0] = (image.copy(), images[0][1])
+            map_painter.draw_fleet_markers(image, fleet_data, self.map_data.province_centroids)
+            images.append((image, ("fleets", f"{country_tag}.png")))
+        return images
+
+    def export_country(self, country_tag):
+        """国家別の港湾マップと艦隊配置マップを書き出す"""
+        image, fleet_data = self._prepare_country(country_tag)
+        return [self._save(image, *parts) for image, parts in self._label_country(country_tag, image, fleet_data)]
+
+    def export_countries(self, country_tags, workers=1):
+        """
+        複数国家を書き出す（workers > 1 の場合はスレッドで並列化）
+
+        ワーカースレッドでは図形の描画・艦隊データの読み込み・PNGの保存のみを行い、
+        文字の描画は呼び出し元（GUIスレッド）で行う。
+        """
+        # 共有するベース画像は並列処理の前に生成しておく
+        self._base_image("countries")
+
+        paths = []
+        errors = {}
+        if workers <= 1:
+            for tag in country_tags:
+                try:
+                    paths.extend(self.export_country(tag))
+                except Exception as e:
+                    errors[tag] = str(e)
+            return paths, errors
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self._prepare_country, tag): tag for tag in country_tags}
+            save_futures = {}
+            for future in as_completed(futures):
+                tag = futures[future]
+                try:
+                    images = self._label_country(tag, *future.result())
+                except Exception as e:
+                    errors[tag] = str(e)
+                    continue
+                for image, parts in images:
+                    save_futures[executor.submit(self._save, image, *parts)] = tag
+
+            for future in as_completed(save_futures):
+                tag = save_futures[future]
+                try:
+                    paths.append(future.result())
+                except Exception as e:
+                    errors.setdefault(tag, str(e))
+        return paths, errors
+
+
+def _default_fleet_dir():
+    try:
+        from models.app_settings import AppSettings
+        return AppSettings().fleet_dir
+    except Exception as e:
+        logger.warning(f"アプリのデータディレクトリを取得できませんでした: {e}")
+        return None
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="HOI4 MODのマップをPNGに一括エクスポートします")
+    arg_parser.add_argument("mod_path", help="MODのルートディレクトリ")
+    arg_parser.add_argument("-o", "--output", default="map_export", help="出力ディレクトリ")
+    arg_parser.add_argument("--filters", nargs="*", choices=EXPORT_FILTERS, default=list(MAP_FILTERS),
+                            help="書き出す表示モード（choropleth:<属性> で階級区分図）")
+    arg_parser.add_argument("--countries", nargs="*", default=None,
+                            help="国家別マップを書き出す国家タグ（省略時はステートを所有する全国家）")
+    arg_parser.add_argument("--no-countries", action="store_true", help="国家別マップを書き出さない")
+    arg_parser.add_argument("--fleet-dir", default=None,
+                            help="艦隊データ({TAG}_fleets.json)のディレクトリ（省略時はアプリのデータディレクトリ）")
+    arg_parser.add_argument("--workers", type=int, default=1, help="国家別マップの並列数")
+    args = arg_parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    # テキスト描画のためQGuiApplicationのみ生成（QWidgetは使用しない）。書き出しが終わるまで参照を保持する
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    logger.info(f"Qtプラットフォーム: {app.platformName()}")
+
+    start_time = time.time()
+    map_data = MapData()
+    try:
+        map_data.load(args.mod_path)
+    except Exception as e:
+        logger.error(f"マップデータの読み込みに失敗しました: {e}")
+        return 1
+    logger.info(f"マップデータを読み込みました: {len(map_data.provinces_data_by_id)}プロビンス, "
+                f"{len(map_data.states_data)}ステート ({time.time() - start_time:.2f}秒)")
+
+    fleet_dir = args.fleet_dir if args.fleet_dir else _default_fleet_dir()
+    exporter = MapExporter(map_data, args.output, fleet_dir=fleet_dir)
+
+    written = exporter.export_filters(args.filters)
+
+    errors = {}
+    if not args.no_countries:
+        country_tags = args.countries if args.countries else map_data.get_country_tags()
+        country_paths, errors = exporter.export_countries(country_tags, workers=max(1, args.workers))
+        written.extend(country_paths)
+
+    for tag, message in errors.items():
+        logger.error(f"{tag} の書き出しに失敗しました: {message}")
+
+    logger.info(f"{len(written)}枚の画像を書き出しました: {args.output} ({time.time() - start_time:.2f}秒)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
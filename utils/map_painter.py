@@ -0,0 +1,205 @@
+import logging
+
+from PyQt5.QtGui import QImage, QColor, QPainter, QFont, QPen, QBrush
+from PyQt5.QtCore import Qt, QPointF, QPoint
+
+logger = logging.getLogger('MapPainter')
+
+# 港湾マーカーの半径
+NAVAL_BASE_RADIUS = 8
+
+
+def array_to_qimage(display_array):
+    """(height, width, 3) のuint8配列からQImageを生成（配列から独立したコピーを返す）"""
+    height, width, channel = display_array.shape
+    bytes_per_line = channel * width
+    q_image = QImage(display_array.data, width, height, bytes_per_line, QImage.Format_RGB888)
+    return q_image.copy()
+
+
+def _naval_base_color(level, highlight=False):
+    """港湾レベルに応じた色を取得"""
+    if highlight:
+        if level >= 10:
+            return QColor(255, 0, 0)  # 赤
+        elif level >= 5:
+            return QColor(255, 128, 0)  # オレンジ
+        return QColor(255, 255, 0)  # 黄
+    if level >= 10:
+        return QColor(0, 0, 255)  # 青
+    elif level >= 5:
+        return QColor(0, 128, 255)  # 水色
+    return QColor(0, 255, 255)  # 薄い水色
+
+
+def _draw_naval_base_marker(painter, center_x, center_y, base_color):
+    # 外側の円（港湾の色の輪郭）
+    painter.setPen(QPen(base_color, 2))
+    painter.setBrush(QColor(base_color.red(), base_color.green(), base_color.blue(), 100))
+    painter.drawEllipse(QPointF(center_x, center_y), NAVAL_BASE_RADIUS, NAVAL_BASE_RADIUS)
+
+    # 内側の円（白い輪郭）
+    inner_radius = NAVAL_BASE_RADIUS * 0.7
+    painter.setPen(QPen(QColor(255, 255, 255, 200), 1))
+    painter.setBrush(QColor(255, 255, 255, 150))
+    painter.drawEllipse(QPointF(center_x, center_y), inner_radius, inner_radius)
+
+
+def draw_state_boundaries(target, state_boundaries):
+    """ステートの境界線を描画（target は QPixmap / QImage）"""
+    painter = QPainter(target)
+    painter.setRenderHint(QPainter.Antialiasing, True)
+    painter.setPen(QPen(QColor(0, 0, 0, 200), 2))
+
+    for state_id, boundaries in state_boundaries.items():
+        for x1, y1, x2, y2 in boundaries:
+            painter.drawLine(x1, y1, x2, y2)
+
+    painter.end()
+
+
+def draw_naval_bases(target, naval_base_locations, province_centroids):
+    """すべての港湾を描画"""
+    painter = QPainter(target)
+    painter.setRenderHint(QPainter.Antialiasing, True)
+
+    for prov_id, level in naval_base_locations.items():
+        centroid = province_centroids.get(prov_id)
+        if centroid is None:
+            continue
+        center_x, center_y = centroid
+        _draw_naval_base_marker(painter, center_x, center_y, _naval_base_color(level))
+
+    painter.end()
+
+
+def _country_naval_bases(map_data, country_tag):
+    """指定した国家が所有する港湾の (プロビンス, 港湾レベル, 中心座標) を順に返す"""
+    for prov_id, level in map_data.naval_base_locations.items():
+        centroid = map_data.province_centroids.get(prov_id)
+        if centroid is None:
+            continue
+
+        # プロビンスが属するステートの所有者を確認
+        province = map_data.provinces_data_by_id.get(prov_id)
+        if not province or not province.state_id:
+            continue
+        state_data = map_data.states_data.get(province.state_id)
+        if not state_data or state_data['raw_data'].get('owner') != country_tag:
+            continue
+
+        yield province, level, centroid
+
+
+def draw_country_naval_bases(target, map_data, country_tag, labels=True):
+    """
+    指定した国家が所有する港湾のみを描画
+
+    labels がTrueの場合は港湾名も描画する。文字の描画はGUIスレッドで行う必要があるため、
+    ワーカースレッドではFalseで描画し、港湾名は後からGUIスレッドで draw_country_naval_base_labels で描画する。
+    """
+    if not country_tag:
+        return
+
+    painter = QPainter(target)
+    painter.setRenderHint(QPainter.Antialiasing, True)
+
+    for province, level, (center_x, center_y) in _country_naval_bases(map_data, country_tag):
+        _draw_naval_base_marker(painter, center_x, center_y, _naval_base_color(level, highlight=True))
+
+    painter.end()
+
+    if labels:
+        draw_country_naval_base_labels(target, map_data, country_tag)
+
+
+def draw_country_naval_base_labels(target, map_data, country_tag):
+    """指定した国家が所有する港湾の港湾名を描画（GUIスレッドから呼ぶ）"""
+    if not country_tag:
+        return
+
+    painter = QPainter(target)
+    painter.setRenderHint(QPainter.Antialiasing, True)
+
+    # 港湾名を表示するためのフォント設定
+    font = QFont()
+    font.setPointSize(8)
+    painter.setFont(font)
+
+    for province, level, (center_x, center_y) in _country_naval_bases(map_data, country_tag):
+        if not province.name:
+            continue
+        text = f"{province.name} (Lv{level})"
+        text_rect = painter.fontMetrics().boundingRect(text)
+        text_rect.moveCenter(QPoint(int(center_x), int(center_y + NAVAL_BASE_RADIUS + 5)))
+        text_rect.adjust(-2, -2, 2, 2)  # パディングを追加
+
+        # 背景を描画
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 180))
+        painter.drawRect(text_rect)
+
+        # テキストを描画
+        painter.setPen(QColor(255, 255, 255))
+        painter.drawText(text_rect, Qt.AlignCenter, text)
+
+    painter.end()
+
+
+def count_fleet_ships(fleets):
+    """プロビンス内の艦隊リストから総隻数を数える"""
+    total_ships = 0
+    for fleet in fleets:
+        if not isinstance(fleet, dict):
+            logger.warning(f"無効な艦隊データ: {fleet}")
+            continue
+        for task_force in fleet.get('task_forces', []):
+            if not isinstance(task_force, dict):
+                logger.warning(f"無効な任務部隊データ: {task_force}")
+                continue
+            ships = task_force.get('ships', [])
+            if not isinstance(ships, list):
+                logger.warning(f"無効な艦艇リスト: {ships}")
+                continue
+            total_ships += len(ships)
+    return total_ships
+
+
+def draw_fleet_markers(target, fleet_data, province_centroids):
+    """プロビンスごとの艦隊マーカー（総隻数）を描画"""
+    painter = QPainter(target)
+    painter.setRenderHint(QPainter.Antialiasing)
+
+    font = QFont()
+    font.setPointSize(8)
+
+    try:
+        for province_id, fleets in fleet_data.items():
+            try:
+                centroid = province_centroids.get(province_id)
+                if centroid is None:
+                    logger.warning(f"プロビンス {province_id} の中心座標が見つかりません")
+                    continue
+
+                center_x, center_y = int(centroid[0]), int(centroid[1])
+                total_ships = count_fleet_ships(fleets)
+
+                # 四角形のサイズを計算（艦艇数に応じて調整）
+                rect_size = int(min(40, max(20, total_ships * 2)))
+                rect_x = int(center_x - rect_size / 2)
+                rect_y = int(center_y - rect_size / 2)
+
+                painter.setPen(QPen(Qt.black, 2))
+                painter.setBrush(QBrush(Qt.white))
+                painter.drawRect(rect_x, rect_y, rect_size, rect_size)
+
+                # 艦艇数を描画
+                painter.setPen(QPen(Qt.black))
+                painter.setFont(font)
+                painter.drawText(rect_x, rect_y, rect_size, rect_size, Qt.AlignCenter, str(total_ships))
+
+            except Exception as e:
+                logger.error(f"プロビンス {province_id} の処理中にエラーが発生: {str(e)}")
+                continue
+    finally:
+        painter.end()
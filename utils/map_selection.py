@@ -0,0 +1,137 @@
+import numpy as np
+
+
+def _clip_bounds(x0, y0, x1, y1, width, height):
+    """矩形を画像範囲に収める（右端・下端を含む）"""
+    left, right = sorted((int(np.floor(x0)), int(np.floor(x1))))
+    top, bottom = sorted((int(np.floor(y0)), int(np.floor(y1))))
+    left = max(0, left)
+    top = max(0, top)
+    right = min(width - 1, right)
+    bottom = min(height - 1, bottom)
+    if left > right or top > bottom:
+        return None
+    return left, top, right, bottom
+
+
+def rect_province_ids(id_raster, x0, y0, x1, y1):
+    """
+    矩形内のプロビンスIDとピクセル数を取得
+
+    Args:
+        id_raster (np.ndarray): (height, width) のプロビンスID配列（未定義は-1）
+
+    Returns:
+        tuple: (プロビンスID配列, ピクセル数配列)
+    """
+    height, width = id_raster.shape
+    bounds = _clip_bounds(x0, y0, x1, y1, width, height)
+    if bounds is None:
+        return np.empty(0, dtype=id_raster.dtype), np.empty(0, dtype=np.int64)
+    left, top, right, bottom = bounds
+    return _unique_valid(id_raster[top:bottom + 1, left:right + 1].ravel())
+
+
+def polygon_mask(points, left, top, right, bottom):
+    """
+    多角形（投げ縄）の内側を表すマスクを生成（偶奇規則、ピクセル中心で判定）
+
+    行ごとに全辺との交点を一括計算し、交点間の区間を塗りつぶす。
+
+    Returns:
+        np.ndarray: (bottom - top + 1, right - left + 1) のboolマスク
+    """
+    pts = np.asarray(points, dtype=np.float64)
+    xs, ys = pts[:, 0], pts[:, 1]
+    nxs, nys = np.roll(xs, -1), np.roll(ys, -1)
+
+    # 水平な辺は交点を持たないため除外
+    non_horizontal = ys != nys
+    xs, ys, nxs, nys = xs[non_horizontal], ys[non_horizontal], nxs[non_horizontal], nys[non_horizontal]
+    slopes = (nxs - xs) / (nys - ys)
+    y_min = np.minimum(ys, nys)
+    y_max = np.maximum(ys, nys)
+
+    mask = np.zeros((bottom - top + 1, right - left + 1), dtype=bool)
+    if len(xs) == 0:
+        return mask
+
+    for row in range(top, bottom + 1):
+        sample_y = row + 0.5
+        crossing = (y_min <= sample_y) & (y_max > sample_y)
+        if not crossing.any():
+            continue
+        cross_x = np.sort(xs[crossing] + (sample_y - ys[crossing]) * slopes[crossing])
+        for start_x, end_x in zip(cross_x[0::2], cross_x[1::2]):
+            # ピクセル中心(x + 0.5)が区間内にある列を塗る
+            col_start = max(left, int(np.ceil(start_x - 0.5)))
+            col_end = min(right, int(np.floor(end_x - 0.5)))
+            if col_start <= col_end:
+                mask[row - top, col_start - left:col_end - left + 1] = True
+    return mask
+
+
+def polygon_province_ids(id_raster, points):
+    """
+    多角形（投げ縄）内のプロビンスIDとピクセル数を取得
+
+    Args:
+        id_raster (np.ndarray): (height, width) のプロビンスID配列
+        points (list): [(x, y), ...] 画像座標の頂点列
+
+    Returns:
+        tuple: (プロビンスID配列, ピクセル数配列)
+    """
+    if len(points) < 3:
+        return np.empty(0, dtype=id_raster.dtype), np.empty(0, dtype=np.int64)
+
+    height, width = id_raster.shape
+    pts = np.asarray(points, dtype=np.float64)
+    bounds = _clip_bounds(pts[:, 0].min(), pts[:, 1].min(), pts[:, 0].max(), pts[:, 1].max(), width, height)
+    if bounds is None:
+        return np.empty(0, dtype=id_raster.dtype), np.empty(0, dtype=np.int64)
+    left, top, right, bottom = bounds
+
+    mask = polygon_mask(pts, left, top, right, bottom)
+    return _unique_valid(id_raster[top:bottom + 1, left:right + 1][mask])
+
+
+def _unique_valid(ids):
+    province_ids, counts = np.unique(ids, return_counts=True)
+    valid = province_ids >= 0
+    return province_ids[valid], counts[valid]
+
+
+def summarize_selection(map_data, province_ids, pixel_counts=None):
+    """
+    選択されたプロビンスの集計を行う
+
+    Returns:
+        dict: province_ids / state_ids / strategic_region_ids / owners / naval_base_count /
+              naval_base_total / pixel_count
+    """
+    lookup = map_data.get_province_lookup_arrays()
+    province_ids = np.asarray(province_ids, dtype=np.int64)
+    province_ids = province_ids[(province_ids >= 0) & (province_ids < len(lookup['state']))]
+
+    state_ids = lookup['state'][province_ids]
+    state_ids = np.unique(state_ids[state_ids >= 0])
+    region_ids = lookup['strategic_region'][province_ids]
+    region_ids = np.unique(region_ids[region_ids >= 0])
+    naval_levels = lookup['naval_base'][province_ids]
+
+    owners = {}
+    for state_id in state_ids.tolist():
+        owner = map_data.state_owners.get(state_id)
+        if owner:
+            owners[owner] = owners.get(owner, 0) + 1
+
+    return {
+        'province_ids': province_ids.tolist(),
+        'state_ids': state_ids.tolist(),
+        'strategic_region_ids': region_ids.tolist(),
+        'owners': owners,
+        'naval_base_count': int(np.count_nonzero(naval_levels)),
+        'naval_base_total': int(naval_levels.sum()),
+        'pixel_count': int(pixel_counts.sum()) if pixel_counts is not None else None,
+    }
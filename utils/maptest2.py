@@ -3,53 +3,29 @@ import sys
 import os
 import sys
 import os
-import csv
 import re
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QGraphicsView, QGraphicsScene,
     QFileDialog, QVBoxLayout, QWidget, QMessageBox, QLabel,
-    QPushButton, QHBoxLayout, QComboBox, QLineEdit
+    QPushButton, QHBoxLayout, QComboBox, QLineEdit, QCompleter
 )
-from PyQt5.QtGui import QPixmap, QImage, QColor, QPainter, QFont, QPen, QBrush
-from PyQt5.QtCore import Qt, QRectF, QPointF, QPoint
-from PIL import Image
+from PyQt5.QtGui import QPixmap, QColor, QPainter, QPen, QBrush, QPainterPath, QPolygonF
+from PyQt5.QtCore import Qt, QRectF, QPointF, QStringListModel, pyqtSignal
 import numpy as np
-import random # 色をランダムに割り当てるため
 import time # パフォーマンス計測用
-from parser.StateParser import StateParser
-from parser.StateParser import ParserError
-from parser.StrategicRegionParser import StrategicRegionParser
-from parser.CountryColorParser import CountryColorParser
 from parser.NavalOOBParser import NavalOOBParser
+from utils.layer_cache import LayerCache
+from utils.map_data import MapData, MapDataError
+from utils import map_painter
+from utils import map_choropleth
 
-def get_file_content(file_path):
-    """ファイルの内容を読み込む関数"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    except UnicodeDecodeError:
-        try:
-            with open(file_path, 'r', encoding='latin-1') as f:
-                return f.read()
-        except Exception as e:
-            # print(f"ファイルの読み込みに失敗しました: {file_path} - {str(e)}")
-            return None
-    except Exception as e:
-        # print(f"ファイルの読み込みに失敗しました: {file_path} - {str(e)}")
-        return None
-
-# プロビンスデータを保持するクラス
-class Province:
-    def __init__(self, id, r, g, b, name, type):
-        self.id = id
-        self.color_rgb = (r, g, b)
-        self.name = name
-        self.type = type
-        self.state_id = None
-        self.strategic_region_id = None
-        self.display_color = QColor(r, g, b)
+# 描画済みレイヤーキャッシュのデフォルト予算 (MB)
+DEFAULT_MAP_CACHE_BUDGET_MB = 256
 
 class MapViewer(QGraphicsView):
+    # 複数プロビンス選択時のシグナル（集計結果の辞書を送信）
+    provinces_selected = pyqtSignal(dict)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         
@@ -82,9 +58,16 @@ class MapViewer(QGraphicsView):
         self.original_height = 0
 
         self.current_filter = "provinces"
-        self.base_qimage_cache = {}
+        # app_controllerを追加
+        self.app_controller = parent.app_controller if parent else None
+
+        # 描画済みレイヤーのLRUキャッシュ（バイト数で予算管理）
+        self.base_qimage_cache = LayerCache(self._get_cache_budget_bytes(), name='MapLayerCache')
 
-        self._rgb_to_id_map_array = np.full(256*256*256, -1, dtype=np.int32)
+        # マップデータ（読み込み・パレット・レイヤー生成はMapDataに委譲）
+        self.map_data = MapData()
+        self._rgb_to_id_map_array = self.map_data._rgb_to_id_map_array
+        self.state_owners = {}
 
         self.province_centroids = {}
         self.naval_base_locations = {}
@@ -96,9 +79,6 @@ class MapViewer(QGraphicsView):
         self.current_country = None  # 現在選択されている国家
         self.show_mod_fleets = False  # MOD内の艦隊を表示するフラグ
         
-        # app_controllerを追加
-        self.app_controller = parent.app_controller if parent else None
-        
         # マウスオーバー時のツールチップ用
         self.setMouseTracking(True)
         self.hovered_province = None
@@ -120,8 +100,17 @@ class MapViewer(QGraphicsView):
         search_layout = QHBoxLayout(search_widget)
         search_layout.setContentsMargins(0, 0, 0, 0)
 
-        self.search_label = QLabel("ID検索:", self)
+        self.search_label = QLabel("検索:", self)
         self.search_input = QLineEdit(self)
+        self.search_input.setPlaceholderText("ID・名前・ステート・地域・国家タグ")
+
+        # 入力中の補完候補（検索インデックスの結果）
+        self.search_completer_model = QStringListModel(self)
+        self.search_completer = QCompleter(self.search_completer_model, self)
+        self.search_completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.search_completer.setFilterMode(Qt.MatchContains)
+        self.search_input.setCompleter(self.search_completer)
+        self._last_search_results = []
         self.search_button = QPushButton("検索", self)
         self.search_result_label = QLabel("", self)
 
@@ -158,6 +147,8 @@ class MapViewer(QGraphicsView):
         # 検索ボタンのクリックイベントを接続
         self.search_button.clicked.connect(self.search_province)
         self.search_input.returnPressed.connect(self.search_province)
+        self.search_input.textEdited.connect(self.on_search_text_edited)
+        self.search_completer.activated[str].connect(lambda text: self.search_province())
 
         # フィルター切り替え用のプルダウンを追加
         self.filter_combo = QComboBox(self)
@@ -165,6 +156,9 @@ class MapViewer(QGraphicsView):
         self.filter_combo.addItem("ステート", "states")
         self.filter_combo.addItem("戦略地域", "strategic_regions")
         self.filter_combo.addItem("国家", "countries")
+        # 階級区分図（ステート・プロビンスの数値属性）
+        for attribute, (label, _, _) in map_choropleth.CHOROPLETH_ATTRIBUTES.items():
+            self.filter_combo.addItem(f"統計: {label}", map_choropleth.choropleth_filter_name(attribute))
         self.filter_combo.currentIndexChanged.connect(self.on_filter_changed)
         
         # Windows 98風のクラシックなスタイル設定
@@ -206,321 +200,63 @@ class MapViewer(QGraphicsView):
         # プルダウンの位置を設定
         self.filter_combo.move(10, 10)
 
+        # 選択モード切り替え用のプルダウン（単一/矩形/投げ縄）
+        self.selection_mode = "single"
+        self.selection_combo = QComboBox(self)
+        self.selection_combo.addItem("単一選択", "single")
+        self.selection_combo.addItem("矩形選択", "rect")
+        self.selection_combo.addItem("投げ縄選択", "lasso")
+        self.selection_combo.currentIndexChanged.connect(self.on_selection_mode_changed)
+        self.selection_combo.setStyleSheet(self.filter_combo.styleSheet())
+        self.selection_combo.move(140, 10)
+
+        # 範囲選択の状態
+        self._selection_points = []
+        self._selection_item = None
+        self.last_selection = None
+
     def load_map_data(self, mod_path):
         start_time = time.time()
         self.scene.clear()
+        self._selection_item = None
         self.map_image_item = None
-        self.original_map_image_data = None
-        self.provinces_data_by_rgb = {}
-        self.provinces_data_by_id = {}
-        self.states_data = {}
-        self.strategic_regions_data = {}
-        self.country_colors = {}
-        self.base_qimage_cache = {}
-        self.state_owners = {}  # ステートの所有者情報を保持
-
-        self._rgb_to_id_map_array.fill(-1)
-        self.province_centroids = {}
-        self.naval_base_locations = {}
-        self.state_boundaries = {}
-
-        base_mod_dir = mod_path
-
-        # 国家の色情報を読み込む
-        colors_txt_path = os.path.join(base_mod_dir, 'common', 'countries', 'colors.txt')
-        if os.path.exists(colors_txt_path):
-            # print(f"Loading country colors from: {colors_txt_path}")
-            content = get_file_content(colors_txt_path)
-            if content:
-                parser = CountryColorParser(content)
-                self.country_colors = parser.parse()
-                # print(f"Loaded {len(self.country_colors)} country colors")
-                # デバッグ: 国家の色情報を出力
-                # print("\n=== 国家の色情報 ===")
-                # for country, color_data in self.country_colors.items():
-                #     print(f"国家: {country}, 色: {color_data['color']}")
-                # print("===================\n")
-
-        provinces_img_path = os.path.join(base_mod_dir, 'map', 'provinces.bmp')
-        # print(f"Searching for provinces.bmp at: {provinces_img_path}")
-        if not os.path.exists(provinces_img_path):
-            QMessageBox.critical(self, "エラー", f"provinces.bmp が指定されたModパスのmap/ ディレクトリ以下に見つかりません。\n({provinces_img_path})")
-            return False
-
-        definition_csv_path = os.path.join(base_mod_dir, 'map', 'definition.csv')
-        # print(f"Searching for definition.csv at: {definition_csv_path}")
-        if not os.path.exists(definition_csv_path):
-            QMessageBox.critical(self, "エラー", f"definition.csv が指定されたModパスのmap/ ディレクトリ以下に見つかりません。\n({definition_csv_path})")
-            return False
+        self.base_qimage_cache.clear()
 
         try:
-            # print(f"Loading provinces image from: {provinces_img_path}")
-            img_pil = Image.open(provinces_img_path).convert("RGB")
-            self.original_width, self.original_height = img_pil.size
-            self.original_map_image_data = np.array(img_pil)
-
-            # print(f"Loading definition.csv from: {definition_csv_path}")
-            with open(definition_csv_path, 'r', encoding='latin-1') as f:
-                reader = csv.reader(f, delimiter=';')
-                next(reader)
-                for row in reader:
-                    if len(row) >= 5:
-                        try:
-                            id = int(row[0])
-                            r, g, b = int(row[1]), int(row[2]), int(row[3])
-                            name = row[4].strip()
-                            province_type = row[5].strip() if len(row) > 5 else "unknown"
-                            province = Province(id, r, g, b, name, province_type)
-                            self.provinces_data_by_rgb[(r, g, b)] = province
-                            self.provinces_data_by_id[id] = province
-
-                            rgb_hash = r * 65536 + g * 256 + b
-                            if rgb_hash < len(self._rgb_to_id_map_array):
-                                self._rgb_to_id_map_array[rgb_hash] = id
-                        except ValueError as e:
-                            # print(f"Skipping malformed row in definition.csv: {row} - Error: {e}")
-                            pass
-            # print(f"Loaded {len(self.provinces_data_by_id)} provinces from definition.csv.")
-
-            # ステートデータの読み込み
-            states_dir = os.path.join(base_mod_dir, 'history', 'states')
-
-            if os.path.exists(states_dir):
-                # print(f"Loading states from: {states_dir}")
-                for filename in os.listdir(states_dir):
-                    if filename.endswith('.txt'):
-                        file_path = os.path.join(states_dir, filename)
-                        content = get_file_content(file_path)
-                        if content:
-                            try:
-                                parser_ply = StateParser(content)
-                                state_data = parser_ply.parse()
-
-                                state_id = state_data.get('id')
-                                if state_id is not None and 'provinces' in state_data and state_data['provinces']:
-                                    state_name = state_data.get('name', f"State {state_id}").strip('"')
-                                    state_color = QColor(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-                                    self.states_data[state_id] = {
-                                        'name': state_name,
-                                        'provinces': state_data['provinces'],
-                                        'color': (state_color.red(), state_color.green(), state_color.blue()),
-                                        'raw_data': state_data
-                                    }
-                                    # デバッグ: ステートの所有者情報を出力
-                                    owner = state_data.get('owner')
-                                    if owner:
-                                        self.state_owners[state_id] = owner  # 所有者情報を保存
-                                        # print(f"ステート {state_id} ({state_name}) の所有者: {owner}")
-                                        pass
-                                    else:
-                                        # print(f"ステート {state_id} ({state_name}) の所有者: なし")
-                                        pass
-                                    for prov_id in state_data['provinces']:
-                                        if prov_id in self.provinces_data_by_id:
-                                            self.provinces_data_by_id[prov_id].state_id = state_id
-
-                                    # 海軍基地情報の取得
-                                    if 'province_buildings' in state_data:
-                                        for prov_id, buildings in state_data['province_buildings'].items():
-                                            if isinstance(buildings, dict) and 'naval_base' in buildings:
-                                                self.naval_base_locations[prov_id] = buildings['naval_base']
-                                                # print(f"Found naval base in province {prov_id} with level {buildings['naval_base']}")
-
-                                    # print(f"Successfully loaded state file: {filename} (ID: {state_id}, Provinces: {len(state_data['provinces'])})")
-                                else:
-                                    # print(f"Skipping state file {filename}: Missing 'id', 'provinces' key, or 'provinces' is empty.")
-                                    pass
-                            except ParserError as e:
-                                # print(f"Error parsing state file {filename}: {e}")
-                                pass
-                            except Exception as e:
-                                # print(f"Unexpected error processing state file {filename}: {e}")
-                                pass
-                        else:
-                            # print(f"Skipping state file {filename}: Could not read content.")
-                            pass
-            else:
-                # print(f"State directory not found: {states_dir}")
-                pass
-            # print(f"Loaded {len(self.states_data)} states.")
-
-            # 戦略地域の読み込み (map/strategicregions)
-            self.strategic_regions_data = {}
-            strategic_regions_dir = os.path.join(base_mod_dir, 'map', 'strategicregions')
-
-            if os.path.exists(strategic_regions_dir):
-                # print(f"Loading strategic regions from: {strategic_regions_dir}")
-                for filename in os.listdir(strategic_regions_dir):
-                    if filename.endswith('.txt'):
-                        file_path = os.path.join(strategic_regions_dir, filename)
-                        content = get_file_content(file_path)
-                        if content:
-                            try:
-                                parser = StrategicRegionParser(content)
-                                region_data = parser.parse()
-
-                                region_id = region_data.get('id')
-                                if region_id is not None and 'provinces' in region_data and region_data['provinces']:
-                                    region_name = region_data.get('name', f"Strategic Region {region_id}").strip('"')
-                                    region_color = QColor(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-                                    self.strategic_regions_data[region_id] = {
-                                        'name': region_name,
-                                        'provinces': region_data['provinces'],
-                                        'color': (region_color.red(), region_color.green(), region_color.blue()),
-                                        'raw_data': region_data
-                                    }
-                                    for prov_id in region_data['provinces']:
-                                        if prov_id in self.provinces_data_by_id:
-                                            self.provinces_data_by_id[prov_id].strategic_region_id = region_id
-                                    # print(f"Successfully loaded strategic region file: {filename} (ID: {region_id}, Provinces: {len(region_data['provinces'])})")
-                                else:
-                                    # print(f"Skipping strategic region file {filename}: Missing 'id', 'provinces' key, or 'provinces' is empty.")
-                                    pass
-                            except ParserError as e:
-                                # print(f"Error parsing strategic region file {filename}: {e}")
-                                pass
-                            except Exception as e:
-                                # print(f"Unexpected error processing strategic region file {filename}: {e}")
-                                pass
-                        else:
-                            # print(f"Skipping strategic region file {filename}: Could not read content.")
-                            pass
-            else:
-                # print(f"Strategic region directory not found: {strategic_regions_dir}")
-                pass
-            # print(f"Loaded {len(self.strategic_regions_data)} strategic regions.")
-
-            # プロビンス重心の計算
-            self.calculate_province_centroids()
-
-            # ステートの境界線を計算
-            self.calculate_state_boundaries()
-
-            # 高速化用の色マップを構築 (NumPy配列として)
-            max_prov_id = max(self.provinces_data_by_id.keys()) if self.provinces_data_by_id else 0
-
-            default_unknown_color = (50, 50, 50)
-
-            self._palette_province = np.full((max_prov_id + 1, 3), (0,0,0), dtype=np.uint8)
-            self._palette_state = np.full((max_prov_id + 1, 3), default_unknown_color, dtype=np.uint8)
-            self._palette_region = np.full((max_prov_id + 1, 3), default_unknown_color, dtype=np.uint8)
-
-            for prov_id, prov_obj in self.provinces_data_by_id.items():
-                if prov_id <= max_prov_id:
-                    self._palette_province[prov_id] = prov_obj.color_rgb
-
-                    if prov_obj.state_id is not None and prov_obj.state_id in self.states_data:
-                        self._palette_state[prov_id] = self.states_data[prov_obj.state_id]['color']
-
-                    # strategic_regions_dataが空の場合もあるためチェック
-                    if prov_obj.strategic_region_id is not None and self.strategic_regions_data and prov_obj.strategic_region_id in self.strategic_regions_data:
-                        self._palette_region[prov_id] = self.strategic_regions_data[prov_obj.strategic_region_id]['color']
-
-            self.render_map()
-            end_time = time.time()
-            # print(f"Total map data loading and initial rendering time: {end_time - start_time:.2f} seconds.")
-            # print(f"DEBUG: naval_base_locations: {self.naval_base_locations}")
-            return True
-
+            self.map_data.load(mod_path)
+        except MapDataError as e:
+            self._sync_from_map_data()
+            QMessageBox.critical(self, "エラー", str(e))
+            return False
         except Exception as e:
+            self._sync_from_map_data()
             QMessageBox.critical(self, "ロードエラー", f"地図データの読み込み中にエラーが発生しました: {e}")
             import traceback
             traceback.print_exc()
             return False
 
-    def calculate_province_centroids(self):
-        # print("Calculating province centroids (highly optimized)...")
-        start_time = time.time()
-        if self.original_map_image_data is None:
-            return
-
-        height, width, _ = self.original_map_image_data.shape
-
-        # 全ピクセルのRGBハッシュを計算
-        pixels_flat = self.original_map_image_data.reshape(-1, 3)
-        pixel_hashes = (pixels_flat[:, 0].astype(np.int32) * 65536 +
-                        pixels_flat[:, 1].astype(np.int32) * 256 +
-                        pixels_flat[:, 2].astype(np.int32))
-
-        # RGBハッシュからプロビンスIDへのマッピングを一括で適用
-        prov_ids_flat = np.full_like(pixel_hashes, -1)
-        valid_hash_indices = (pixel_hashes >= 0) & (pixel_hashes < len(self._rgb_to_id_map_array))
-        prov_ids_flat[valid_hash_indices] = self._rgb_to_id_map_array[pixel_hashes[valid_hash_indices]]
-
-        # 有効なプロビンスIDを持つピクセルのみを抽出
-        valid_prov_pixel_indices = prov_ids_flat != -1
-        valid_prov_ids = prov_ids_flat[valid_prov_pixel_indices]
-
-        # 各ピクセルの座標配列を生成 (0からwidth-1, 0からheight-1の繰り返し)
-        x_indices, y_indices = np.meshgrid(np.arange(width), np.arange(height))
-        x_coords_flat = x_indices.flatten()
-        y_coords_flat = y_indices.flatten()
-
-        # 有効なプロビンスピクセルに属するX, Y座標を抽出
-        valid_x_coords = x_coords_flat[valid_prov_pixel_indices]
-        valid_y_coords = y_coords_flat[valid_prov_pixel_indices]
-
-        # NumPyのbincountを使って、プロビンスIDごとのX座標の合計、Y座標の合計、ピクセル数を高速に計算
-        # bincountの出力はインデックスがプロビンスIDに対応
-        max_prov_id = valid_prov_ids.max() if len(valid_prov_ids) > 0 else 0
-
-        # 指定された範囲を超える可能性があるため、minlengthで配列サイズを保証
-        sum_x_per_prov = np.bincount(valid_prov_ids, weights=valid_x_coords, minlength=max_prov_id + 1)
-        sum_y_per_prov = np.bincount(valid_prov_ids, weights=valid_y_coords, minlength=max_prov_id + 1)
-        count_per_prov = np.bincount(valid_prov_ids, minlength=max_prov_id + 1)
-
-        self.province_centroids = {}
-        for prov_id in self.provinces_data_by_id.keys():
-            if prov_id <= max_prov_id and count_per_prov[prov_id] > 0:
-                center_x = sum_x_per_prov[prov_id] / count_per_prov[prov_id]
-                center_y = sum_y_per_prov[prov_id] / count_per_prov[prov_id]
-                self.province_centroids[prov_id] = (center_x, center_y)
-            else:
-                self.province_centroids[prov_id] = None # プロビンスが存在しない、または画像中に見つからない場合
-
-        end_time = time.time()
-        # print(f"Province centroid calculation time (highly optimized): {end_time - start_time:.2f} seconds.")
-
-    def calculate_state_boundaries(self):
-        # print("Calculating state boundaries...")
-        start_time = time.time()
-        
-        if self.original_map_image_data is None:
-            return
-
-        height, width, _ = self.original_map_image_data.shape
-        self.state_boundaries = {}
-
-        # 各ステートのプロビンスを取得
-        for state_id, state_data in self.states_data.items():
-            provinces = state_data['provinces']
-            if not provinces:
-                continue
-
-            # ステートの境界線を計算
-            boundaries = set()
-            for prov_id in provinces:
-                if prov_id not in self.province_centroids:
-                    continue
-
-                # プロビンスの中心座標を取得
-                center_x, center_y = self.province_centroids[prov_id]
-                center_x, center_y = int(center_x), int(center_y)
-
-                # 8方向の隣接ピクセルをチェック
-                for dx, dy in [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]:
-                    nx, ny = center_x + dx, center_y + dy
-                    if 0 <= nx < width and 0 <= ny < height:
-                        pixel_rgb = tuple(self.original_map_image_data[ny, nx])
-                        neighbor_prov = self.provinces_data_by_rgb.get(pixel_rgb)
-                        if neighbor_prov and neighbor_prov.id not in provinces:
-                            # 境界線を追加（両端の座標を追加）
-                            boundaries.add((center_x, center_y, nx, ny))
-
-            self.state_boundaries[state_id] = list(boundaries)
+        self._sync_from_map_data()
 
+        self.render_map()
         end_time = time.time()
-        # print(f"State boundary calculation time: {end_time - start_time:.2f} seconds")
+        # print(f"Total map data loading and initial rendering time: {end_time - start_time:.2f} seconds.")
+        return True
+
+    def _sync_from_map_data(self):
+        """MapDataの内容をビューの属性に反映（既存の参照箇所との互換用）"""
+        data = self.map_data
+        self.original_map_image_data = data.original_map_image_data
+        self.original_width = data.original_width
+        self.original_height = data.original_height
+        self.provinces_data_by_rgb = data.provinces_data_by_rgb
+        self.provinces_data_by_id = data.provinces_data_by_id
+        self.states_data = data.states_data
+        self.strategic_regions_data = data.strategic_regions_data
+        self.country_colors = data.country_colors
+        self.state_owners = data.state_owners
+        self.province_centroids = data.province_centroids
+        self.naval_base_locations = data.naval_base_locations
+        self.state_boundaries = data.state_boundaries
 
     def render_map(self):
         start_time = time.time()
@@ -531,56 +267,15 @@ class MapViewer(QGraphicsView):
         print(f"render_map called: current_filter={self.current_filter}, show_fleet_info={self.show_fleet_info}")
         print(f"艦隊データの状態: {self.fleet_data}")
         
-        if self.current_filter not in self.base_qimage_cache:
+        base_qimage = self.base_qimage_cache.get(self.current_filter)
+        if base_qimage is None:
             print("キャッシュからマップを生成")
-            original_pixels_flat = self.original_map_image_data.reshape(-1, 3)
-
-            pixel_hashes = (original_pixels_flat[:, 0].astype(np.int32) * 65536 +
-                            original_pixels_flat[:, 1].astype(np.int32) * 256 +
-                            original_pixels_flat[:, 2].astype(np.int32))
-
-            prov_ids_flat = np.full_like(pixel_hashes, -1)
-            valid_hash_indices = (pixel_hashes >= 0) & (pixel_hashes < len(self._rgb_to_id_map_array))
-            prov_ids_flat[valid_hash_indices] = self._rgb_to_id_map_array[pixel_hashes[valid_hash_indices]]
-
-            if self.current_filter == "provinces":
-                selected_palette = self._palette_province
-            elif self.current_filter == "states":
-                selected_palette = self._palette_state
-            elif self.current_filter == "strategic_regions":
-                selected_palette = self._palette_region
-            elif self.current_filter == "countries":
-                # 国家モードの場合、ステートの所有者の色を使用
-                selected_palette = np.full((max(self.provinces_data_by_id.keys()) + 1 if self.provinces_data_by_id else 1, 3), (50, 50, 50), dtype=np.uint8)
-                for state_id, state_data in self.states_data.items():
-                    owner = state_data['raw_data'].get('owner', None)
-                    if owner and owner in self.country_colors:
-                        color = self.country_colors[owner]['color']
-                        for prov_id in state_data['provinces']:
-                            if prov_id <= max(self.provinces_data_by_id.keys()):
-                                selected_palette[prov_id] = color
-            else:
-                selected_palette = np.full((max(self.provinces_data_by_id.keys()) + 1 if self.provinces_data_by_id else 1, 3), (0,0,0), dtype=np.uint8)
-
-            default_unknown_color = (50, 50, 50)
-            filtered_colors_flat = np.full_like(original_pixels_flat, default_unknown_color, dtype=np.uint8)
-
-            max_id_in_palette = selected_palette.shape[0] - 1
-            valid_indices_for_palette_lookup = (prov_ids_flat >= 0) & (prov_ids_flat <= max_id_in_palette)
-
-            filtered_colors_flat[valid_indices_for_palette_lookup] = selected_palette[prov_ids_flat[valid_indices_for_palette_lookup]]
-
-            display_array = filtered_colors_flat.reshape(self.original_height, self.original_width, 3)
-
-            height, width, channel = display_array.shape
-            bytes_per_line = channel * width
-            q_image = QImage(display_array.data, width, height, bytes_per_line, QImage.Format_RGB888)
-            self.base_qimage_cache[self.current_filter] = q_image.copy()
+            display_array = self.map_data.render_layer(self.current_filter)
+            base_qimage = self.base_qimage_cache.put(self.current_filter, map_painter.array_to_qimage(display_array))
         else:
             print("キャッシュからマップを読み込み")
-            pass
 
-        current_pixmap = QPixmap.fromImage(self.base_qimage_cache[self.current_filter])
+        current_pixmap = QPixmap.fromImage(base_qimage)
 
         # 国家モードの場合、ステートの境界線を描画
         if self.current_filter == "countries":
@@ -598,6 +293,7 @@ class MapViewer(QGraphicsView):
             print(f"艦隊情報の描画をスキップ: show_fleet_info={self.show_fleet_info}, fleet_data={bool(self.fleet_data)}")
 
         self.scene.clear()
+        self._selection_item = None
         self.map_image_item = self.scene.addPixmap(current_pixmap)
         self.setSceneRect(QRectF(current_pixmap.rect()))
         self.fitInView(self.sceneRect(), Qt.KeepAspectRatio)
@@ -607,114 +303,43 @@ class MapViewer(QGraphicsView):
         end_time = time.time()
         print(f"マップの描画が完了: 所要時間 {end_time - start_time:.2f}秒")
 
-    def draw_state_boundaries(self, target_pixmap: QPixmap):
-        painter = QPainter(target_pixmap)
-        painter.setRenderHint(QPainter.Antialiasing, True)
-        painter.setPen(QPen(QColor(0, 0, 0, 200), 2))  # 線の太さを2に増やし、より見やすく
-
-        for state_id, boundaries in self.state_boundaries.items():
-            for x1, y1, x2, y2 in boundaries:
-                painter.drawLine(x1, y1, x2, y2)
-
-        painter.end()
-
-    def draw_naval_bases(self, target_pixmap: QPixmap):
-        painter = QPainter(target_pixmap)
-        painter.setRenderHint(QPainter.Antialiasing, True)
+    def _get_cache_budget_bytes(self):
+        """AppSettingsからレイヤーキャッシュの予算を取得（バイト単位）"""
+        budget_mb = DEFAULT_MAP_CACHE_BUDGET_MB
+        try:
+            if self.app_controller and hasattr(self.app_controller, 'app_settings'):
+                budget_mb = self.app_controller.app_settings.get_setting("map_cache_budget_mb", budget_mb)
+        except Exception as e:
+            self.logger.warning(f"キャッシュ予算の取得に失敗しました: {e}")
+        return int(float(budget_mb) * 1024 * 1024)
 
-        # 固定の円のサイズを使用
-        circle_radius = 8
+    def set_cache_budget(self, budget_mb):
+        """レイヤーキャッシュの予算を変更（MB単位）"""
+        self.base_qimage_cache.set_budget(int(float(budget_mb) * 1024 * 1024))
 
-        for prov_id, level in self.naval_base_locations.items():
-            if prov_id in self.province_centroids and self.province_centroids[prov_id] is not None:
-                center_x, center_y = self.province_centroids[prov_id]
+    def trim_cache(self, ratio=0.5):
+        """メモリ逼迫時に古いレイヤーから破棄してキャッシュを指定比率まで削減"""
+        freed = self.base_qimage_cache.trim(ratio)
+        self.logger.info(f"レイヤーキャッシュ統計: {self.base_qimage_cache.stats()}")
+        return freed
 
-                # 港湾の色を設定（レベルに応じて）
-                if level >= 10:
-                    base_color = QColor(0, 0, 255)  # 青
-                elif level >= 5:
-                    base_color = QColor(0, 128, 255)  # 水色
-                else:
-                    base_color = QColor(0, 255, 255)  # 薄い水色
+    def clear_cache(self):
+        """描画済みレイヤーキャッシュをすべて破棄"""
+        self.base_qimage_cache.clear()
 
-                # 外側の円（港湾の色の輪郭）
-                painter.setPen(QPen(base_color, 2))
-                painter.setBrush(QColor(base_color.red(), base_color.green(), base_color.blue(), 100))
-                painter.drawEllipse(QPointF(center_x, center_y), circle_radius, circle_radius)
+    def get_cache_stats(self):
+        """レイヤーキャッシュの統計情報を取得"""
+        return self.base_qimage_cache.stats()
 
-                # 内側の円（白い輪郭）
-                inner_radius = circle_radius * 0.7
-                painter.setPen(QPen(QColor(255, 255, 255, 200), 1))
-                painter.setBrush(QColor(255, 255, 255, 150))
-                painter.drawEllipse(QPointF(center_x, center_y), inner_radius, inner_radius)
+    def draw_state_boundaries(self, target_pixmap: QPixmap):
+        map_painter.draw_state_boundaries(target_pixmap, self.state_boundaries)
 
-        painter.end()
+    def draw_naval_bases(self, target_pixmap: QPixmap):
+        map_painter.draw_naval_bases(target_pixmap, self.naval_base_locations, self.province_centroids)
 
     def draw_selected_country_naval_bases(self, target_pixmap: QPixmap, country_tag):
         """選択された国家の港湾のみを表示する"""
-        if not country_tag:
-            return
-
-        painter = QPainter(target_pixmap)
-        painter.setRenderHint(QPainter.Antialiasing, True)
-
-        # 固定の円のサイズを使用
-        circle_radius = 8
-
-        # 港湾名を表示するためのフォント設定
-        font = QFont()
-        font.setPointSize(8)
-        painter.setFont(font)
-
-        # 選択された国家の港湾のみを表示
-        for prov_id, level in self.naval_base_locations.items():
-            if prov_id in self.province_centroids and self.province_centroids[prov_id] is not None:
-                # プロビンスが属するステートを取得
-                province = self.provinces_data_by_id.get(prov_id)
-                if province and province.state_id:
-                    state_data = self.states_data.get(province.state_id)
-                    if state_data and state_data['raw_data'].get('owner') == country_tag:
-                        center_x, center_y = self.province_centroids[prov_id]
-
-                        # 港湾の色を設定（レベルに応じて）
-                        if level >= 10:
-                            base_color = QColor(255, 0, 0)  # 赤
-                        elif level >= 5:
-                            base_color = QColor(255, 128, 0)  # オレンジ
-                        else:
-                            base_color = QColor(255, 255, 0)  # 黄
-
-                        # 外側の円（港湾の色の輪郭）
-                        painter.setPen(QPen(base_color, 2))
-                        painter.setBrush(QColor(base_color.red(), base_color.green(), base_color.blue(), 100))
-                        painter.drawEllipse(QPointF(center_x, center_y), circle_radius, circle_radius)
-
-                        # 内側の円（白い輪郭）
-                        inner_radius = circle_radius * 0.7
-                        painter.setPen(QPen(QColor(255, 255, 255, 200), 1))
-                        painter.setBrush(QColor(255, 255, 255, 150))
-                        painter.drawEllipse(QPointF(center_x, center_y), inner_radius, inner_radius)
-
-                        # 港湾名を表示
-                        if prov_id in self.provinces_data_by_id:
-                            prov_obj = self.provinces_data_by_id[prov_id]
-                            if prov_obj.name:
-                                # 港湾名の背景を描画
-                                text = f"{prov_obj.name} (Lv{level})"
-                                text_rect = painter.fontMetrics().boundingRect(text)
-                                text_rect.moveCenter(QPoint(int(center_x), int(center_y + circle_radius + 5)))
-                                text_rect.adjust(-2, -2, 2, 2)  # パディングを追加
-                                
-                                # 背景を描画
-                                painter.setPen(Qt.NoPen)
-                                painter.setBrush(QColor(0, 0, 0, 180))
-                                painter.drawRect(text_rect)
-                                
-                                # テキストを描画
-                                painter.setPen(QColor(255, 255, 255))
-                                painter.drawText(text_rect, Qt.AlignCenter, text)
-
-        painter.end()
+        map_painter.draw_country_naval_bases(target_pixmap, self.map_data, country_tag)
 
     def draw_fleet_info(self, pixmap):
         """艦隊情報を描画"""
@@ -730,86 +355,9 @@ class MapViewer(QGraphicsView):
         self.logger.info(f"艦隊データのプロビンス数: {len(self.fleet_data)}")
 
         try:
-            painter = QPainter(pixmap)
-            painter.setRenderHint(QPainter.Antialiasing)
-
-            # プロビンスごとに艦隊情報を描画
-            for province_id, fleets in self.fleet_data.items():
-                try:
-                    self.logger.info(f"プロビンス {province_id} の処理開始")
-                    
-                    # プロビンスの中心座標を取得
-                    if province_id not in self.province_centroids:
-                        self.logger.warning(f"プロビンス {province_id} の中心座標が見つかりません")
-                        continue
-
-                    center_x, center_y = self.province_centroids[province_id]
-                    # NumPyの浮動小数点数を整数に変換
-                    center_x = int(center_x)
-                    center_y = int(center_y)
-                    self.logger.info(f"プロビンス {province_id} の中心座標: ({center_x}, {center_y})")
-
-                    # 艦隊情報を描画
-                    total_ships = 0
-                    for fleet in fleets:
-                        if not isinstance(fleet, dict):
-                            self.logger.warning(f"無効な艦隊データ: {fleet}")
-                            continue
-                            
-                        # 艦隊名のオーバーライドを確認
-                        fleet_name = fleet.get('name', '')
-                        if isinstance(fleet_name, dict) and 'override' in fleet_name:
-                            fleet_name = fleet_name['override']
-                            
-                        for task_force in fleet.get('task_forces', []):
-                            if not isinstance(task_force, dict):
-                                self.logger.warning(f"無効な任務部隊データ: {task_force}")
-                                continue
-                                
-                            # 任務部隊名のオーバーライドを確認
-                            task_force_name = task_force.get('name', '')
-                            if isinstance(task_force_name, dict) and 'override' in task_force_name:
-                                task_force_name = task_force_name['override']
-                                
-                            ships = task_force.get('ships', [])
-                            if not isinstance(ships, list):
-                                self.logger.warning(f"無効な艦艇リスト: {ships}")
-                                continue
-                                
-                            total_ships += len(ships)
-
-                    self.logger.info(f"プロビンス {province_id} の総隻数: {total_ships}")
-
-                    # 四角形のサイズを計算（艦艇数に応じて調整）
-                    size = min(40, max(20, total_ships * 2))
-                    rect_size = int(size)  # 整数に変換
-                    rect_x = int(center_x - rect_size / 2)  # 整数に変換
-                    rect_y = int(center_y - rect_size / 2)  # 整数に変換
-
-                    self.logger.info(f"四角形の描画位置: ({rect_x}, {rect_y}), サイズ: {rect_size}")
-
-                    # 四角形を描画
-                    painter.setPen(QPen(Qt.black, 2))
-                    painter.setBrush(QBrush(Qt.white))
-                    painter.drawRect(rect_x, rect_y, rect_size, rect_size)
-
-                    # 艦艇数を描画
-                    painter.setPen(QPen(Qt.black))
-                    font = QFont()
-                    font.setPointSize(8)
-                    painter.setFont(font)
-                    painter.drawText(rect_x, rect_y, rect_size, rect_size, Qt.AlignCenter, str(total_ships))
-
-                except Exception as e:
-                    self.logger.error(f"プロビンス {province_id} の処理中にエラーが発生: {str(e)}")
-                    continue
-
-            painter.end()
-            
+            map_painter.draw_fleet_markers(pixmap, self.fleet_data, self.province_centroids)
         except Exception as e:
             self.logger.error(f"艦隊情報の描画中にエラーが発生: {str(e)}")
-            if painter:
-                painter.end()
 
     def show_fleet_details(self, province_id):
         """艦隊の詳細情報を表示する"""
@@ -840,29 +388,52 @@ class MapViewer(QGraphicsView):
             self.search_result_label.setText("")
             return
 
-        try:
-            search_id = int(search_text)
-            if search_id in self.provinces_data_by_id:
-                province = self.provinces_data_by_id[search_id]
-                self.search_result_label.setText(f"プロビンス {search_id}: {province.name}")
-                
-                # プロビンスの中心座標を取得
-                if search_id in self.province_centroids and self.province_centroids[search_id] is not None:
-                    center_x, center_y = self.province_centroids[search_id]
-                    # その位置に移動
-                    self.centerOn(center_x, center_y)
-                    # ズームイン
-                    self.scale(2.0, 2.0)
-            else:
-                self.search_result_label.setText(f"プロビンス {search_id} は見つかりませんでした")
-        except ValueError:
-            self.search_result_label.setText("有効なIDを入力してください")
+        # 補完候補から選択された場合はその項目、それ以外は最上位の結果へ移動
+        result = next((r for r in self._last_search_results if self._format_search_result(r) == search_text), None)
+        if result is None:
+            results = self.map_data.search(search_text, limit=10)
+            if not results:
+                self.search_result_label.setText(f"「{search_text}」は見つかりませんでした")
+                return
+            result = results[0]
+        self.search_result_label.setText(self._format_search_result(result))
+
+        if result['centroid'] is not None:
+            center_x, center_y = result['centroid']
+            # その位置に移動
+            self.centerOn(center_x, center_y)
+            # ズームイン
+            self.scale(2.0, 2.0)
+
+    def on_search_text_edited(self, text):
+        """入力中の検索語から補完候補を更新する"""
+        results = self.map_data.search(text, limit=15) if text.strip() else []
+        self._last_search_results = results
+        self.search_completer_model.setStringList([self._format_search_result(r) for r in results])
+
+    def _format_search_result(self, result):
+        kind_labels = {
+            'province': "プロビンス",
+            'state': "ステート",
+            'strategic_region': "戦略地域",
+            'country': "国家",
+        }
+        return f"{kind_labels.get(result['kind'], result['kind'])} {result['id']}: {result['label']}"
 
     def mouseMoveEvent(self, event):
         super().mouseMoveEvent(event)
         
         # マウス位置をシーンの座標に変換
         scene_pos = self.mapToScene(event.pos())
+
+        # 範囲選択のドラッグ中
+        if self._selection_points and event.buttons() & Qt.LeftButton:
+            point = (scene_pos.x(), scene_pos.y())
+            if self.selection_mode == "rect":
+                self._selection_points[1:] = [point]
+            else:
+                self._selection_points.append(point)
+            self._update_selection_item()
         x, y = int(scene_pos.x()), int(scene_pos.y())
 
         # マウス位置が有効な範囲内かチェック
@@ -910,6 +481,16 @@ class MapViewer(QGraphicsView):
         self.current_filter = self.filter_combo.currentData()
         self.render_map()
 
+        # 階級区分図の場合は値の範囲を表示
+        attribute = map_choropleth.parse_choropleth_filter(self.current_filter)
+        if attribute and self.original_map_image_data is not None:
+            label = map_choropleth.CHOROPLETH_ATTRIBUTES[attribute][0]
+            value_range = self.map_data.get_choropleth(attribute)[1]
+            if value_range:
+                self.search_result_label.setText(f"{label}: {value_range[0]:g} 〜 {value_range[1]:g}")
+            else:
+                self.search_result_label.setText(f"{label}: データなし")
+
     def zoom_in(self):
         self.scale(1.25, 1.25)
 
@@ -920,7 +501,78 @@ class MapViewer(QGraphicsView):
         # マウスホイールによるズームを無効化
         pass
 
+    def on_selection_mode_changed(self, index):
+        """選択モードが変更された時の処理"""
+        self.selection_mode = self.selection_combo.currentData()
+        self._cancel_range_selection()
+
+    def _cancel_range_selection(self):
+        self._selection_points = []
+        if self._selection_item is not None:
+            if self._selection_item.scene() is self.scene:
+                self.scene.removeItem(self._selection_item)
+            self._selection_item = None
+
+    def _update_selection_item(self):
+        """ドラッグ中の選択範囲を描画"""
+        if len(self._selection_points) < 2:
+            return
+        pen = QPen(QColor(255, 255, 0), 0)
+        pen.setStyle(Qt.DashLine)
+        if self.selection_mode == "rect":
+            (x0, y0), (x1, y1) = self._selection_points[0], self._selection_points[-1]
+            rect = QRectF(QPointF(x0, y0), QPointF(x1, y1)).normalized()
+            if self._selection_item is None:
+                self._selection_item = self.scene.addRect(rect, pen, QBrush(QColor(255, 255, 0, 40)))
+            else:
+                self._selection_item.setRect(rect)
+        else:
+            path = QPainterPath()
+            path.addPolygon(QPolygonF([QPointF(x, y) for x, y in self._selection_points]))
+            path.closeSubpath()
+            if self._selection_item is None:
+                self._selection_item = self.scene.addPath(path, pen, QBrush(QColor(255, 255, 0, 40)))
+            else:
+                self._selection_item.setPath(path)
+
+    def _finish_range_selection(self):
+        """範囲選択を確定して集計結果を表示"""
+        points = self._selection_points
+        mode = self.selection_mode
+        self._cancel_range_selection()
+
+        if mode == "rect" and len(points) >= 2:
+            (x0, y0), (x1, y1) = points[0], points[-1]
+            result = self.map_data.select_rect(x0, y0, x1, y1)
+        elif mode == "lasso" and len(points) >= 3:
+            result = self.map_data.select_polygon(points)
+        else:
+            return
+
+        if not result or not result['province_ids']:
+            self.search_result_label.setText("選択範囲にプロビンスがありません")
+            return
+
+        self.last_selection = result
+        self.provinces_selected.emit(result)
+
+        owners = ", ".join(f"{tag}({count})" for tag, count in sorted(result['owners'].items()))
+        info = (f"プロビンス数: {len(result['province_ids'])}\n"
+                f"ステート数: {len(result['state_ids'])}\n"
+                f"戦略地域数: {len(result['strategic_region_ids'])}\n"
+                f"海軍基地: {result['naval_base_count']}箇所 (合計レベル {result['naval_base_total']})\n")
+        if owners:
+            info += f"所有国: {owners}\n"
+        QMessageBox.information(self, "選択範囲の情報", info)
+
     def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self.selection_mode != "single":
+            if self.original_map_image_data is not None:
+                pos = self.mapToScene(event.pos())
+                self._cancel_range_selection()
+                self._selection_points = [(pos.x(), pos.y())]
+            return
+
         if event.button() == Qt.LeftButton:
             # マウス位置からプロビンスIDを取得
             pos = self.mapToScene(event.pos())
@@ -954,6 +606,12 @@ class MapViewer(QGraphicsView):
             super().mousePressEvent(event)
 
     def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton and self._selection_points:
+            pos = self.mapToScene(event.pos())
+            self._selection_points.append((pos.x(), pos.y()))
+            self._finish_range_selection()
+            return
+
         if event.button() == Qt.MiddleButton:
             self.setDragMode(QGraphicsView.NoDrag)
         super().mouseReleaseEvent(event)
@@ -1144,6 +802,25 @@ class MapViewer(QGraphicsView):
             self.fleet_data = {}
             self.show_fleet_info = False
 
+    def update_fleet_provinces(self, fleet_data, provinces):
+        """
+        指定したプロビンスの艦隊情報だけを置き換える（編成の変更を差分で反映する）
+
+        Args:
+            fleet_data: プロビンスID -> 艦隊データのリスト（艦隊がなくなったプロビンスは含めない）
+            provinces: 置き換えるプロビンスIDの集合
+        """
+        changed = False
+        for prov_id in provinces:
+            fleets = fleet_data.get(prov_id)
+            if fleets:
+                self.fleet_data[prov_id] = fleets
+                changed = True
+            elif self.fleet_data.pop(prov_id, None) is not None:
+                changed = True
+        if changed and self.show_fleet_info:
+            self.render_map()
+
     def clear_fleet_data(self):
         """艦隊情報をクリアする"""
         self.fleet_data = {}
@@ -1153,7 +830,7 @@ class MapViewer(QGraphicsView):
 
     def get_state_owner(self, state_id):
         """ステートの所有者を取得"""
-        return self.state_owners.get(state_id)
+        return self.map_data.get_state_owner(state_id)
 
     def toggle_mod_fleets(self):
         """MOD内の艦隊表示を切り替え"""
@@ -0,0 +1,230 @@
+import re
+import os
+import time
+import bisect
+import logging
+
+# 検索結果の種別ごとの優先度（小さいほど上位）
+KIND_PRIORITY = {
+    'province': 0,
+    'state': 1,
+    'strategic_region': 2,
+    'country': 3,
+}
+
+# 一致の種類ごとの優先度
+MATCH_EXACT = 0
+MATCH_PREFIX = 1
+MATCH_SUBSTRING = 2
+
+_LOCALISATION_LINE = re.compile(r'^\s*([A-Za-z0-9_.\-]+):\d*\s*"(.*)"\s*(?:#.*)?$')
+
+
+def load_localisation(mod_path, language="japanese", prefixes=None):
+    """
+    MODのローカライズファイル(localisation/<language>/*.yml)からキーと表示名を読み込む
+
+    Args:
+        mod_path (str): MODのルートディレクトリ
+        language (str): 言語ディレクトリ名
+        prefixes (tuple, optional): 読み込むキーのプレフィックス（省略時はすべて）
+
+    Returns:
+        dict: {キー: 表示名}
+    """
+    result = {}
+    localisation_dir = os.path.join(mod_path, "localisation", language)
+    if not os.path.exists(localisation_dir):
+        return result
+
+    for root, _, files in os.walk(localisation_dir):
+        for file in files:
+            if not file.endswith('.yml'):
+                continue
+            try:
+                with open(os.path.join(root, file), 'r', encoding='utf-8-sig') as f:
+                    for line in f:
+                        if prefixes and not line.lstrip().startswith(prefixes):
+                            continue
+                        match = _LOCALISATION_LINE.match(line)
+                        if match:
+                            result[match.group(1)] = match.group(2)
+            except Exception as e:
+                logging.getLogger('ProvinceSearchIndex').warning(f"ローカライズファイルの読み込みエラー: {file} - {e}")
+    return result
+
+
+class ProvinceSearchIndex:
+    """
+    プロビンス名・ステート名（ローカライズ含む）・戦略地域名・所有国タグによる検索インデックス
+
+    前方一致はソート済みキーの二分探索、部分一致は全キーを連結した文字列に対する
+    str.find で検索するため、数万件のキーでも1ミリ秒未満で結果を返す。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('ProvinceSearchIndex')
+        # entries[i] = (kind, ref_id, label, province_ids, centroid)
+        self._entries = []
+        self._keys = []
+        # 前方一致用のソート済み (key, entry_index)
+        self._sorted_keys = []
+        # 部分一致用の連結文字列とエントリ開始位置
+        self._haystack = ""
+        self._offsets = []
+        self._province_entry = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def build(cls, map_data, localisation=None):
+        """MapDataから検索インデックスを構築する"""
+        start_time = time.time()
+        index = cls()
+        localisation = localisation or {}
+        centroids = map_data.province_centroids
+
+        for prov_id, province in map_data.provinces_data_by_id.items():
+            centroid = centroids.get(prov_id)
+            label = province.name or f"Province {prov_id}"
+            entry_index = index._add_entry('province', prov_id, label, (prov_id,), centroid)
+            index._province_entry[prov_id] = entry_index
+            if province.name:
+                index._add_key(province.name, entry_index)
+
+        for state_id, state in map_data.states_data.items():
+            raw_name = state['name']
+            display_name = localisation.get(raw_name, raw_name)
+            entry_index = index._add_entry('state', state_id, display_name, tuple(state['provinces']),
+                                           cls._mean_centroid(state['provinces'], centroids))
+            index._add_key(display_name, entry_index)
+            if display_name != raw_name:
+                index._add_key(raw_name, entry_index)
+
+        for region_id, region in map_data.strategic_regions_data.items():
+            raw_name = region['name']
+            display_name = localisation.get(raw_name, raw_name)
+            entry_index = index._add_entry('strategic_region', region_id, display_name, tuple(region['provinces']),
+                                           cls._mean_centroid(region['provinces'], centroids))
+            index._add_key(display_name, entry_index)
+            if display_name != raw_name:
+                index._add_key(raw_name, entry_index)
+
+        owned_provinces = {}
+        for state_id, owner in map_data.state_owners.items():
+            state = map_data.states_data.get(state_id)
+            if state:
+                owned_provinces.setdefault(owner, []).extend(state['provinces'])
+        for tag, provinces in owned_provinces.items():
+            display_name = localisation.get(tag, tag)
+            entry_index = index._add_entry('country', tag, display_name, tuple(provinces),
+                                           cls._mean_centroid(provinces, centroids))
+            index._add_key(tag, entry_index)
+            if display_name != tag:
+                index._add_key(display_name, entry_index)
+
+        index._finalize()
+        index.logger.debug(f"検索インデックスを構築: {len(index._keys)}キー ({time.time() - start_time:.3f}秒)")
+        return index
+
+    @staticmethod
+    def _mean_centroid(province_ids, centroids):
+        points = [centroids[p] for p in province_ids if centroids.get(p) is not None]
+        if not points:
+            return None
+        return (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+
+    def _add_entry(self, kind, ref_id, label, province_ids, centroid):
+        self._entries.append((kind, ref_id, label, province_ids, centroid))
+        return len(self._entries) - 1
+
+    def _add_key(self, text, entry_index):
+        key = str(text).strip().lower()
+        if key:
+            # 区切り文字は検索語に含まれないようにする
+            self._keys.append((key.replace('\x00', ''), entry_index))
+
+    def _finalize(self):
+        self._sorted_keys = sorted((key, i) for i, (key, _) in enumerate(self._keys))
+        self._offsets = []
+        parts = []
+        position = 0
+        for key, _ in self._keys:
+            self._offsets.append(position)
+            parts.append(key)
+            position += len(key) + 1
+        self._haystack = '\x00'.join(parts)
+
+    def search(self, query, limit=20):
+        """
+        検索を実行する
+
+        Args:
+            query (str): 検索語（数値の場合はプロビンスIDとしても検索）
+            limit (int): 最大件数
+
+        Returns:
+            list: 一致度順の結果 [{'kind', 'id', 'label', 'province_ids', 'centroid', 'match'}, ...]
+        """
+        q = query.strip().lower()
+        if not q or not self._entries:
+            return []
+
+        # entry_index -> (match_rank, key_length)
+        best = {}
+
+        def record(entry_index, rank, key_length):
+            current = best.get(entry_index)
+            if current is None or (rank, key_length) < current:
+                best[entry_index] = (rank, key_length)
+
+        # 数値の場合はプロビンスIDの完全一致
+        if q.isdigit():
+            entry_index = self._province_entry.get(int(q))
+            if entry_index is not None:
+                record(entry_index, MATCH_EXACT, 0)
+
+        # 十分な件数を集めたら打ち切る（順位付けのため上限の数倍まで収集）
+        collect_limit = max(limit * 4, limit + 16)
+
+        # 前方一致（二分探索）
+        pos = bisect.bisect_left(self._sorted_keys, (q, -1))
+        collected = 0
+        while pos < len(self._sorted_keys) and collected < collect_limit:
+            key, key_index = self._sorted_keys[pos]
+            if not key.startswith(q):
+                break
+            record(self._keys[key_index][1], MATCH_EXACT if key == q else MATCH_PREFIX, len(key))
+            collected += 1
+            pos += 1
+
+        # 部分一致（連結文字列を検索）
+        if len(best) < collect_limit:
+            haystack = self._haystack
+            offsets = self._offsets
+            pos = haystack.find(q)
+            while pos != -1 and len(best) < collect_limit:
+                key_index = bisect.bisect_right(offsets, pos) - 1
+                key, entry_index = self._keys[key_index]
+                if pos != offsets[key_index]:
+                    record(entry_index, MATCH_SUBSTRING, len(key))
+                # 同じキー内の重複ヒットを飛ばす
+                next_start = offsets[key_index] + len(key) + 1
+                pos = haystack.find(q, next_start)
+
+        ranked = sorted(best.items(),
+                        key=lambda item: (item[1][0], KIND_PRIORITY.get(self._entries[item[0]][0], 9), item[1][1]))
+
+        results = []
+        for entry_index, (rank, _) in ranked[:limit]:
+            kind, ref_id, label, province_ids, centroid = self._entries[entry_index]
+            results.append({
+                'kind': kind,
+                'id': ref_id,
+                'label': label,
+                'province_ids': province_ids,
+                'centroid': centroid,
+                'match': rank,
+            })
+        return results
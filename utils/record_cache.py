@@ -0,0 +1,148 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 2048
+
+
+def _file_mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class RecordCache:
+    """
+    装備・船体などのレコード用の件数上限付きLRUキャッシュ
+
+    エントリには元ファイルのパスと更新時刻を記録し、取得時にファイルの更新時刻が
+    変わっていれば（他のプロセスやgit pullで書き換えられた場合）破棄して古いデータを返さない。
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, name="RecordCache"):
+        self.name = name
+        self.max_entries = max(0, int(max_entries))
+        self._entries = OrderedDict()  # key -> (value, path, mtime)
+        self._lock = threading.RLock()
+
+        # 統計情報
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+
+        self.logger = logging.getLogger(name)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._entries[key]
+
+    def keys(self):
+        """LRU順（古い順）のキー一覧を取得"""
+        with self._lock:
+            return list(self._entries.keys())
+
+    def get(self, key, default=None):
+        """
+        値を取得する（元ファイルが更新・削除されていた場合はエントリを破棄してミス扱い）
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, path, mtime = entry
+            if path is not None and _file_mtime(path) != mtime:
+                del self._entries[key]
+                self.stale += 1
+                self.misses += 1
+                self.logger.debug(f"ファイルが更新されたためキャッシュを破棄: {key}")
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, path=None, mtime=None):
+        """
+        値を格納し、上限を超えた分をLRU順に破棄する
+
+        Args:
+            path: 元ファイルのパス（指定時は取得のたびに更新時刻を検証）
+            mtime: 読み込み時のファイル更新時刻（省略時は現在の値）
+        """
+        if path is not None and mtime is None:
+            mtime = _file_mtime(path)
+
+        with self._lock:
+            if self.max_entries == 0:
+                return value
+            self._entries.pop(key, None)
+            self._entries[key] = (value, path, mtime)
+            self._evict_to(self.max_entries)
+            return value
+
+    def pop(self, key, default=None):
+        """指定したキーを削除して値を返す"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def invalidate_path(self, path):
+        """指定ファイルから読み込んだエントリを破棄する"""
+        path = os.path.normpath(path)
+        with self._lock:
+            for key, (_, entry_path, _) in list(self._entries.items()):
+                if entry_path is not None and os.path.normpath(entry_path) == path:
+                    del self._entries[key]
+
+    def set_max_entries(self, max_entries):
+        """上限件数を変更し、超過分を破棄する"""
+        with self._lock:
+            self.max_entries = max(0, int(max_entries))
+            self._evict_to(self.max_entries)
+
+    def clear(self):
+        """すべてのエントリを破棄する"""
+        with self._lock:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """キャッシュの統計情報を取得"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+                'evictions': self.evictions,
+                'stale': self.stale,
+            }
+
+    def _evict_to(self, max_entries):
+        while len(self._entries) > max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
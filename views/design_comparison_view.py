@@ -0,0 +1,132 @@
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableView,
+                             QLineEdit, QCheckBox, QHeaderView, QMessageBox, QFileDialog, QApplication)
+from PyQt5.QtCore import Qt
+
+from models.design_batch import SOURCE_MOD
+from .library_table_model import LibraryTableModel, LibraryProxyModel, RECORD_ID_ROLE
+
+# 比較表の固定列（性能値の列はこの後ろに並ぶ）
+FIXED_HEADERS = ["No.", "出所", "名前", "国家", "艦種", "船体", "装備数"]
+
+
+def _format_value(value):
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+
+class DesignComparisonDialog(QDialog):
+    """全設計の性能値を並べて比較するダイアログ（列見出しのクリックで並べ替え、CSVに出力）"""
+
+    def __init__(self, parent=None, app_controller=None):
+        super(DesignComparisonDialog, self).__init__(parent)
+        self.app_controller = app_controller
+        self.result = None
+        self.setWindowTitle("設計の一括比較")
+        self.resize(1100, 650)
+
+        layout = QVBoxLayout(self)
+
+        top_layout = QHBoxLayout()
+        self.include_mod_check = QCheckBox("MODの設計バリアントを含める")
+        self.include_mod_check.setChecked(True)
+        top_layout.addWidget(self.include_mod_check)
+
+        recalc_button = QPushButton("再計算")
+        recalc_button.clicked.connect(self.evaluate)
+        top_layout.addWidget(recalc_button)
+
+        top_layout.addWidget(QLabel("絞り込み:"))
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("名前・国家・艦種などで絞り込み")
+        self.filter_edit.textChanged.connect(self.on_filter_changed)
+        top_layout.addWidget(self.filter_edit)
+
+        export_button = QPushButton("CSV出力")
+        export_button.clicked.connect(self.export_csv)
+        top_layout.addWidget(export_button)
+        layout.addLayout(top_layout)
+
+        self.table_model = LibraryTableModel(FIXED_HEADERS, self._load_page, self._build_row, parent=self)
+        self.proxy = LibraryProxyModel(self)
+        self.proxy.setSourceModel(self.table_model)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setSortIndicator(0, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+    def _load_page(self, after_row, limit):
+        """結果の行番号をページ単位で返す（起点のキーは最後の行番号）"""
+        if self.result is None:
+            return [], None
+        start = 0 if after_row is None else after_row + 1
+        rows = list(range(start, min(start + limit, len(self.result))))
+        return rows, (rows[-1] if rows else None)
+
+    def _build_row(self, row):
+        entry = self.result.entries[row]
+        values = self.result.matrix[row].tolist()
+        source = "MOD" if entry.source == SOURCE_MOD else "ローカル"
+        display = [str(row + 1), source, entry.name, entry.country, entry.ship_type, entry.hull_id,
+                   str(len(entry.equipment_ids))]
+        display.extend(_format_value(value) for value in values)
+        sort_values = [row, source, entry.name, entry.country, entry.ship_type, entry.hull_id,
+                       len(entry.equipment_ids), *values]
+        # 参照先の船体・装備が見つからない設計は色を変える
+        missing = self.result.missing_hull[row] or self.result.missing_equipment[row]
+        return row, display, sort_values, (250, 225, 225) if missing else None
+
+    def evaluate(self):
+        """全設計を評価して比較表を作り直す"""
+        if not self.app_controller:
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            self.result = self.app_controller.evaluate_all_designs(self.include_mod_check.isChecked())
+        finally:
+            QApplication.restoreOverrideCursor()
+
+        if self.result is None:
+            QMessageBox.warning(self, "エラー", "設計の一括評価に失敗しました。")
+            return
+
+        self.table_model.reload(headers=FIXED_HEADERS + list(self.result.stat_names))
+        if self.filter_edit.text():
+            self.proxy.set_filter_text(self.filter_edit.text())
+
+        missing = int((self.result.missing_hull | (self.result.missing_equipment > 0)).sum())
+        self.status_label.setText(
+            f"{len(self.result)}件の設計を評価しました（{self.result.elapsed:.2f}秒）"
+            + (f" / 船体・装備が見つからない設計: {missing}件" if missing else "")
+        )
+
+    def on_filter_changed(self, text):
+        self.proxy.set_filter_text(text)
+
+    def export_csv(self):
+        """表示中の並び順・絞り込みのまま比較表をCSVに出力"""
+        if self.result is None or not len(self.result):
+            QMessageBox.information(self, "情報", "出力する設計がありません。")
+            return
+
+        options = QFileDialog.Options()
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, "比較表をCSVに出力", "design_comparison.csv", "CSV Files (*.csv)", options=options
+        )
+        if not file_name:
+            return
+
+        self.table_model.fetch_all()
+        order = [self.proxy.data(self.proxy.index(row, 0), RECORD_ID_ROLE) for row in range(self.proxy.rowCount())]
+        try:
+            count = self.result.write_csv(file_name, order)
+            QMessageBox.information(self, "出力完了", f"{count}件の設計をCSVに出力しました。")
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"CSVの出力中にエラーが発生しました: {e}")
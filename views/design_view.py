@@ -1,10 +1,35 @@
+import re
+
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QFormLayout,
                              QLabel, QLineEdit, QComboBox, QPushButton, QGroupBox,
                              QDialog, QListWidget, QTableWidget, QTableWidgetItem,
-                             QScrollArea, QMessageBox, QHeaderView, QListWidgetItem)
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QColor, QPalette
+                             QScrollArea, QMessageBox, QHeaderView, QListWidgetItem, QInputDialog,
+                             QApplication)
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QColor, QPalette, QStandardItemModel
 from utils.path_utils import get_data_dir
+from models.equipment_templates import get_template_registry
+from models.design_stats import DesignStatEngine
+from .equipment_candidate_model import (EquipmentCandidateModels, setup_candidate_combo, candidate_text,
+                                        EQUIPMENT_ID_ROLE, PLACEHOLDER_TEXT)
+
+# 装備コンボボックスの表示（「装備名 (ID) - カテゴリー」）から装備IDを取り出す
+_EQUIPMENT_ID_PATTERN = re.compile(r'\(([^()]+)\)(?= - |$)')
+
+
+def _format_stat(name, value):
+    """性能値の表示用の文字列"""
+    if name == 'reliability':
+        return f"{value * 100:.0f}%"
+    if name == 'naval_range':
+        return f"{value:.0f} km"
+    if name == 'naval_speed':
+        return f"{value:.1f} km/h"
+    if name == 'build_cost_ic':
+        return f"{value:.2f} IC"
+    if name == 'manpower':
+        return f"{value:.0f}"
+    return f"{value:.2f}".rstrip('0').rstrip('.')
 
 class DesignView(QWidget):
     def __init__(self, parent=None, app_controller=None):
@@ -24,8 +49,44 @@ class DesignView(QWidget):
         self.stats_labels = {}    # 性能ラベル用の辞書を初期化
         self.internal_slots = []  # 内部スロットのリストを初期化
         self.slot_category_selections = {}  # スロットカテゴリー選択を初期化
+        self._equipment_model = None  # app_controllerがない場合に使う装備モデル（初回のみ作成）
+        self.stat_engine = DesignStatEngine()  # 性能値の集計
+        self.current_stats = {}  # 最後に計算した性能値
+        # スロットの変更が続けて起きても性能の再計算は1回にまとめる
+        self._stats_timer = QTimer(self)
+        self._stats_timer.setSingleShot(True)
+        self._stats_timer.setInterval(0)
+        self._stats_timer.timeout.connect(self.update_stats)
+        # カテゴリーの組み合わせごとに装備コンボボックスのモデルを共有する
+        self.candidate_models = EquipmentCandidateModels(self.app_controller, self._load_candidates_without_controller,
+                                                         self)
         self.initUI()
 
+    def _get_equipment_model(self):
+        """app_controllerがない場合の装備モデル（テンプレートは共有のレジストリを使うので1つで足りる）"""
+        if self._equipment_model is None:
+            from models.equipment_model import EquipmentModel
+            self._equipment_model = EquipmentModel()
+        return self._equipment_model
+
+    def _load_candidates_without_controller(self, category):
+        """app_controllerがない場合のスロットの候補 (装備ID, 名前, 種別)"""
+        try:
+            return [(equipment.get('common', {}).get('ID', ''), equipment.get('common', {}).get('名前', ''),
+                     equipment.get('equipment_type', ''))
+                    for equipment in self._get_equipment_model().get_all_equipment(category)
+                    if equipment.get('common', {}).get('ID') and equipment.get('common', {}).get('名前')]
+        except Exception as e:
+            print(f"装備データ取得エラー: {e}")
+            return []
+
+    def _reset_slot_combo(self, combo, text):
+        """装備コンボボックスを1項目だけの表示にする（共有モデルを使っている場合は専用のモデルに切り替える）"""
+        if self.candidate_models.is_shared(combo.model()):
+            combo.setModel(QStandardItemModel(combo))
+        combo.clear()
+        combo.addItem(text)
+
     def initUI(self):
         # メインレイアウト
         main_layout = QVBoxLayout(self)
@@ -174,6 +235,10 @@ class DesignView(QWidget):
         name_layout.addWidget(QLabel("艦級名:"))
         self.design_name_edit = QLineEdit()
         name_layout.addWidget(self.design_name_edit)
+        name_layout.addWidget(QLabel("ローカライズ名:"))
+        self.localized_name_edit = QLineEdit()
+        self.localized_name_edit.setPlaceholderText("MODへ出力時の#@override.name（省略可）")
+        name_layout.addWidget(self.localized_name_edit)
         main_layout.addLayout(name_layout)
 
         # 中央部：スロットと性能表示
@@ -207,7 +272,9 @@ class DesignView(QWidget):
 
             # 装備選択コンボボックス
             equipment_combo = QComboBox()
-            equipment_combo.addItem("選択する")
+            equipment_combo.addItem(PLACEHOLDER_TEXT)
+            setup_candidate_combo(equipment_combo)
+            equipment_combo.currentIndexChanged.connect(self.schedule_stats_update)
             self.slot_combos[slot_type] = equipment_combo
             slot_layout.addWidget(equipment_combo)
 
@@ -372,6 +439,18 @@ class DesignView(QWidget):
         close_button.clicked.connect(self.close_design)
         button_layout.addWidget(close_button)
 
+        compare_button = QPushButton("一括比較")
+        compare_button.clicked.connect(self.show_design_comparison)
+        button_layout.addWidget(compare_button)
+
+        optimize_button = QPushButton("装備を最適化")
+        optimize_button.clicked.connect(self.show_loadout_optimizer)
+        button_layout.addWidget(optimize_button)
+
+        export_button = QPushButton("MODへ出力")
+        export_button.clicked.connect(self.export_designs_to_mod)
+        button_layout.addWidget(export_button)
+
         button_layout.addStretch()
         main_layout.addLayout(button_layout)
 
@@ -436,43 +515,15 @@ class DesignView(QWidget):
         except Exception as e:
             print(f"装備カテゴリー読み込みエラー: {e}")
 
-    def on_slot_category_changed(self, slot_type, index):
-        """スロットのカテゴリーが変更されたときの処理"""
+    def on_slot_category_changed(self, slot_type, categories):
+        """スロットのカテゴリーが変更されたときの処理（装備の候補はカテゴリーごとの共有モデルで表示する）"""
         try:
-            category_combo = self.slot_category_combos[slot_type]
-            equipment_combo = self.slot_combos[slot_type]
-
-            # カテゴリー選択の場合は装備コンボボックスをクリア
-            if index == 0:
-                equipment_combo.clear()
-                equipment_combo.addItem("選択する")
-                return
-
-            # 選択されたカテゴリー
-            category = category_combo.currentText()
-
-            # 装備コンボボックスをカテゴリーに合わせて更新
-            equipment_combo.clear()
-            equipment_combo.addItem("選択する")
-
-            if self.app_controller:
-                # 現在選択されている船体の排水量を取得
-                displacement = 0
-                if self.current_hull:
-                    displacement = self.current_hull.get("weight", 0)
-
-                # カテゴリーに対応する装備を取得
-                equipments = self.app_controller.get_all_equipment(category)
-
-                # 派生タイプを考慮して装備を表示
-                for eq in equipments:
-                    eq_id = eq.get('common', {}).get('ID', '')
-                    eq_name = eq.get('common', {}).get('名前', '')
-
-                    if eq_id and eq_name:
-                        # 排水量による派生タイプを考慮（将来的な実装）
-                        # 現在は通常の装備をそのまま表示
-                        equipment_combo.addItem(f"{eq_name} ({eq_id})")
+            if isinstance(categories, str):
+                categories = [categories]
+            categories = [category for category in categories or [] if category]
+            self.slot_category_selections[slot_type] = categories
+            self._update_category_button(slot_type, categories)
+            self.update_equipment_combo(slot_type)
 
         except Exception as e:
             print(f"スロットカテゴリー変更エラー: {e}")
@@ -593,6 +644,7 @@ class DesignView(QWidget):
 
             # 艦級名フィールドにデフォルト値を設定
             self.design_name_edit.setText(hull_data.get("name", ""))
+            self.localized_name_edit.clear()
 
             # 艦種コンボボックスを更新
             ship_type = hull_data.get("type", "")
@@ -606,9 +658,8 @@ class DesignView(QWidget):
             # スロット情報を取得し、開放状況に応じてUIを更新
             self.update_slot_availability()
 
-            # 性能表示も更新（ただし今は計算なしでダミーデータ）
-            # 性能計算部分はまだ実装していないためコメントアウト
-            # self.update_stats(hull_data)
+            # 性能表示を更新
+            self.update_stats(hull_data)
 
         except Exception as e:
             QMessageBox.critical(self, "エラー", f"船体データの設定中にエラーが発生しました: {e}")
@@ -674,8 +725,7 @@ class DesignView(QWidget):
 
                     # デフォルトテキスト
                     category_button.setText("(使用不可)")
-                    equipment_combo.clear()
-                    equipment_combo.addItem("(使用不可)")
+                    self._reset_slot_combo(equipment_combo, "(使用不可)")
                 elif slot_status == "=":
                     # 有効化可能なスロット
                     category_button.setEnabled(True)
@@ -687,8 +737,7 @@ class DesignView(QWidget):
 
                     # 初期化
                     category_button.setText("カテゴリー選択")
-                    equipment_combo.clear()
-                    equipment_combo.addItem("(有効化可能)")
+                    self._reset_slot_combo(equipment_combo, "(有効化可能)")
                 else:
                     # 有効なスロット
                     category_button.setEnabled(True)
@@ -700,8 +749,7 @@ class DesignView(QWidget):
 
                     # 初期化
                     category_button.setText("カテゴリー選択")
-                    equipment_combo.clear()
-                    equipment_combo.addItem("選択する")
+                    self._reset_slot_combo(equipment_combo, PLACEHOLDER_TEXT)
 
         except Exception as e:
             QMessageBox.critical(self, "エラー", f"スロット情報の更新中にエラーが発生しました: {e}")
@@ -794,16 +842,28 @@ class DesignView(QWidget):
             import traceback
             traceback.print_exc()
 
+    def _update_category_button(self, slot_type, categories):
+        """カテゴリーボタンのテキストを選択中のカテゴリーの表示名で更新"""
+        if slot_type not in self.slot_category_combos:
+            return
+        button = self.slot_category_combos[slot_type]
+        if len(categories) == 0:
+            button.setText("カテゴリー選択")
+        elif len(categories) == 1:
+            # 選択されたキー名から表示名を取得
+            key = categories[0]
+            if self.app_controller:
+                button.setText(self.app_controller.get_equipment_display_name(key))
+            else:
+                button.setText(key)  # デフォルトの場合
+        else:
+            button.setText(f"{len(categories)}種類選択")
+
     def set_slot_categories(self, slot_categories):
-        """スロットカテゴリーを設定"""
-        for slot_type, category in slot_categories.items():
+        """スロットカテゴリーを設定（値はカテゴリー、またはカテゴリーのリスト）"""
+        for slot_type, categories in slot_categories.items():
             if slot_type in self.slot_category_combos:
-                combo = self.slot_category_combos[slot_type]
-                index = combo.findText(category)
-                if index >= 0:
-                    combo.setCurrentIndex(index)
-                    # カテゴリー変更イベントを発火
-                    self.on_slot_category_changed(slot_type, index)
+                self.on_slot_category_changed(slot_type, categories)
 
     def set_slot_equipment(self, slots):
         """スロット装備を設定"""
@@ -834,14 +894,126 @@ class DesignView(QWidget):
             if self.parent() and hasattr(self.parent(), 'show_view'):
                 self.parent().show_view("home")
 
+    def show_design_comparison(self):
+        """全設計の性能値の比較表を表示"""
+        if not self.app_controller:
+            QMessageBox.warning(self, "警告", "app_controllerが設定されていないため一括比較できません。")
+            return
+        from .design_comparison_view import DesignComparisonDialog
+        dialog = DesignComparisonDialog(self, self.app_controller)
+        dialog.show()
+        dialog.evaluate()
+        dialog.exec_()
+
+    def export_designs_to_mod(self):
+        """保存済みの設計を現在のMODのNAVY_Designs.txtに書き出す"""
+        if not self.app_controller:
+            QMessageBox.warning(self, "警告", "app_controllerが設定されていないため書き出せません。")
+            return
+
+        text, ok = QInputDialog.getText(self, "MODへ出力", "書き出す国家タグ（カンマ区切り、空欄で全国家）:")
+        if not ok:
+            return
+        countries = [tag for tag in text.replace('、', ',').split(',') if tag.strip()]
+
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            result = self.app_controller.export_designs_to_mod(countries or None)
+        finally:
+            QApplication.restoreOverrideCursor()
+
+        if result is None:
+            QMessageBox.warning(self, "エラー", "設計の書き出しに失敗しました。MODが選択されているか確認してください。")
+        elif not result.variant_count:
+            QMessageBox.information(self, "情報", "書き出す設計がありません（国家が設定された設計のみ書き出します）。")
+        elif not result.written:
+            QMessageBox.information(self, "書き出し完了", f"{result.variant_count}件の設計はすべて書き出し済みです。")
+        else:
+            QMessageBox.information(
+                self, "書き出し完了",
+                f"{result.variant_count}件の設計を書き出しました。\n"
+                f"更新: {', '.join(result.changed)}" + (f"\n変更なし: {', '.join(result.unchanged)}" if result.unchanged else "")
+                + f"\n{result.file_path}"
+            )
+        if result is not None and result.unplaced:
+            QMessageBox.warning(
+                self, "警告",
+                "船体のモジュールスロットに割り当てられなかった装備は書き出していません"
+                "（MODの船体・モジュール定義を確認してください）。\n"
+                + "\n".join(f"{name}: {', '.join(equipment_ids)}" for name, equipment_ids in result.unplaced.items())
+            )
+
+    def show_loadout_optimizer(self):
+        """目的・制約から装備の組み合わせを探索し、選んだ組み合わせをスロットに適用する"""
+        if not self.app_controller:
+            QMessageBox.warning(self, "警告", "app_controllerが設定されていないため最適化できません。")
+            return
+        if not self.current_hull:
+            QMessageBox.warning(self, "警告", "先に船体を選択してください。")
+            return
+
+        # カテゴリーが選択されていて使用可能なスロットだけを対象にし、それ以外のスロットの装備は固定して計算に含める
+        slot_categories = {}
+        fixed_equipment_ids = []
+        for slot_id, combo in self.slot_combos.items():
+            categories = self.slot_category_selections.get(slot_id) or []
+            if categories and combo.isEnabled():
+                slot_categories[slot_id] = list(categories)
+            else:
+                match = _EQUIPMENT_ID_PATTERN.search(combo.currentText())
+                if match:
+                    fixed_equipment_ids.append(match.group(1))
+        if not slot_categories:
+            QMessageBox.information(self, "情報", "装備カテゴリーを選択したスロットがありません。")
+            return
+
+        from .loadout_optimizer_dialog import LoadoutOptimizerDialog
+        stat_descriptions = {name: description for name, (description, _) in self.stats_labels.items()}
+        dialog = LoadoutOptimizerDialog(self, self.app_controller, self.current_hull, slot_categories,
+                                        self.stat_engine.names(), stat_descriptions, fixed_equipment_ids)
+        if dialog.exec_() != QDialog.Accepted or dialog.selected_loadout is None:
+            return
+
+        for slot_id, equipment_id in dialog.selected_loadout.equipment_ids.items():
+            self.set_equipment_selection(slot_id, equipment_id)
+        self.update_stats()
+
+    def schedule_stats_update(self, *args):
+        """スロットの装備が変わったときに性能の再計算を予約する"""
+        if self.current_hull:
+            self._stats_timer.start()
+
+    def selected_slot_equipment_ids(self):
+        """メインスロット・内部スロットで選択されている装備IDのリスト"""
+        equipment_ids = []
+        for combo in self.slot_combos.values():
+            match = _EQUIPMENT_ID_PATTERN.search(combo.currentText())
+            if match:
+                equipment_ids.append(match.group(1))
+        return equipment_ids
+
+    def _load_slot_equipment(self, equipment_id):
+        if self.app_controller:
+            return self.app_controller.get_equipment_data(equipment_id)
+        return self._get_equipment_model().load_equipment(equipment_id)
+
     def update_stats(self, hull_data=None):
-        """設計性能を計算して表示を更新する
+        """船体と搭載装備から設計性能を計算して表示を更新する"""
+        self._stats_timer.stop()
+        hull_data = hull_data or self.current_hull
+        if not hull_data:
+            return
+
+        try:
+            equipment_list = [(equipment_id, self._load_slot_equipment(equipment_id))
+                              for equipment_id in self.selected_slot_equipment_ids()]
+            self.current_stats = self.stat_engine.compute_design(hull_data, equipment_list)
 
-        注: この機能は将来実装される予定です
-        """
-        # 現時点では実装保留
-        # 後で実装される性能計算機能のための枠組みのみ提供
-        pass
+            for name, (_, label) in self.stats_labels.items():
+                if name in self.current_stats:
+                    label.setText(_format_stat(name, self.current_stats[name]))
+        except Exception as e:
+            print(f"性能計算エラー: {e}")
 
     def add_internal_slot(self):
         """内部スロットの追加"""
@@ -876,7 +1048,9 @@ class DesignView(QWidget):
 
             # 装備選択コンボボックス
             equipment_combo = QComboBox()
-            equipment_combo.addItem("選択する")
+            equipment_combo.addItem(PLACEHOLDER_TEXT)
+            setup_candidate_combo(equipment_combo)
+            equipment_combo.currentIndexChanged.connect(self.schedule_stats_update)
             self.internal_slots_grid.addWidget(equipment_combo, row, col + 2)
 
             # 内部スロット情報を格納
@@ -949,42 +1123,14 @@ class DesignView(QWidget):
             equipment_combo = self.slot_combos[slot_id]
             selected_categories = self.slot_category_selections[slot_id]
 
-            # コンボボックスをクリア
-            equipment_combo.clear()
-            equipment_combo.addItem("選択する")
-
-            # カテゴリーが選択されていない場合は終了
+            # カテゴリーが選択されていない場合は未選択の表示のみ
             if not selected_categories:
+                self._reset_slot_combo(equipment_combo, PLACEHOLDER_TEXT)
                 return
 
-            # 該当するすべての装備を取得
-            all_equipment = []
-
-            for category in selected_categories:
-                if self.app_controller:
-                    # アプリコントローラーを使用して装備を取得
-                    equipment_list = self.app_controller.get_all_equipment(category)
-                    all_equipment.extend(equipment_list)
-                else:
-                    # 直接モデルを使用
-                    try:
-                        from models.equipment_model import EquipmentModel
-                        equipment_model = EquipmentModel()
-                        equipment_list = equipment_model.get_all_equipment(category)
-                        all_equipment.extend(equipment_list)
-                    except Exception as e:
-                        print(f"装備データ取得エラー: {e}")
-
-            # 装備をコンボボックスに追加
-            for equipment in all_equipment:
-                eq_id = equipment.get('common', {}).get('ID', '')
-                eq_name = equipment.get('common', {}).get('名前', '')
-                eq_type = equipment.get('equipment_type', '')
-
-                if eq_id and eq_name:
-                    # 表示形式は「装備名 (ID) - カテゴリー」
-                    display_text = f"{eq_name} ({eq_id}) - {eq_type}"
-                    equipment_combo.addItem(display_text)
+            # 同じカテゴリーを選んだスロットと共有するモデルに切り替える（表示形式は「装備名 (ID) - カテゴリー」）
+            equipment_combo.setModel(self.candidate_models.model_for(selected_categories))
+            equipment_combo.setCurrentIndex(0)
 
         except Exception as e:
             QMessageBox.critical(self, "エラー", f"装備コンボボックス更新中にエラーが発生しました: {e}")
@@ -1005,9 +1151,13 @@ class DesignView(QWidget):
             return
 
         try:
+            # 保存する性能値は現在の装備で計算し直す（ライブラリの性能値による絞り込みに使う）
+            self.update_stats()
+
             # 設計データの構築
             design_data = {
                 "design_name": design_name,
+                "localized_name": self.localized_name_edit.text().strip(),
                 "ship_type": self.ship_type_combo.currentText(),
                 "hull_id": self.current_hull.get("id", ""),
                 "hull_name": self.current_hull.get("name", ""),
@@ -1015,7 +1165,8 @@ class DesignView(QWidget):
                 "slot_categories": {},     # スロットに割り当てられたカテゴリー
                 "internal_slots": [],      # 内部スロットの情報
                 "year": self.current_hull.get("year", 1936),  # 設計年
-                "country": self.current_hull.get("country", "")  # 建造国
+                "country": self.current_hull.get("country", ""),  # 建造国
+                "stats": dict(self.current_stats)  # 計算した設計性能
             }
 
             # メインスロットのカテゴリーと装備の取得
@@ -1105,6 +1256,7 @@ class DesignView(QWidget):
 
                     # 艦級名を設定
                     self.design_name_edit.setText(design_data.get("design_name", ""))
+                    self.localized_name_edit.setText(design_data.get("localized_name", ""))
 
                     # 艦種を更新
                     ship_type = design_data.get("ship_type", "")
@@ -1182,7 +1334,7 @@ class DesignView(QWidget):
                                     self.set_equipment_selection(slot_id, equipment_id)
 
                     # 性能表示を更新
-                    # self.update_stats()
+                    self.update_stats()
 
                     QMessageBox.information(self, "読み込み完了", f"艦級「{design_data.get('design_name', '')}」の設計を読み込みました。")
                 else:
@@ -1203,30 +1355,31 @@ class DesignView(QWidget):
 
             combo = self.slot_combos[slot_id]
 
-            # 装備データを取得
+            # コンボボックスの候補から装備IDで検索
+            index = combo.findData(equipment_id, EQUIPMENT_ID_ROLE)
+            if index >= 0:
+                combo.setCurrentIndex(index)
+                return
+
+            # 候補にない場合だけ装備データを取得
             equipment_data = None
             if self.app_controller:
                 equipment_data = self.app_controller.load_equipment(equipment_id)
             else:
                 # 直接モデルを使用
-                from models.equipment_model import EquipmentModel
-                equipment_model = EquipmentModel()
-                equipment_data = equipment_model.load_equipment(equipment_id)
+                equipment_data = self._get_equipment_model().load_equipment(equipment_id)
 
             if equipment_data:
                 equipment_name = equipment_data.get('common', {}).get('名前', '')
                 equipment_type = equipment_data.get('equipment_type', '')
 
-                # コンボボックス内を検索
-                for i in range(combo.count()):
-                    item_text = combo.itemText(i)
-                    if f"({equipment_id})" in item_text:
-                        combo.setCurrentIndex(i)
-                        return
-
-                # 見つからない場合はアイテムを追加
-                display_text = f"{equipment_name} ({equipment_id}) - {equipment_type}"
-                combo.addItem(display_text)
+                # 共有モデルには追加せず、このスロット専用のモデルに写してから追加する
+                if self.candidate_models.is_shared(combo.model()):
+                    items = [(combo.itemText(i), combo.itemData(i, EQUIPMENT_ID_ROLE)) for i in range(combo.count())]
+                    combo.setModel(QStandardItemModel(combo))
+                    for text, data in items:
+                        combo.addItem(text, data)
+                combo.addItem(candidate_text(equipment_id, equipment_name, equipment_type), equipment_id)
                 combo.setCurrentIndex(combo.count() - 1)
 
         except Exception as e:
@@ -1257,37 +1410,19 @@ class DesignView(QWidget):
             # 現在選択されているカテゴリー（キー名）を取得
             current_categories = self.slot_category_selections.get(slot_type, [])
 
-            # カテゴリーを追加
+            # カテゴリーを追加（キー名→表示名のマッピング、app_controllerがない場合は共有のテンプレートレジストリから）
             if self.app_controller:
-                # キー名→表示名のマッピングを取得
                 type_mapping = self.app_controller.get_equipment_type_mapping()
-
-                for key, display_name in type_mapping.items():
-                    item = QListWidgetItem(display_name)
-                    item.setData(Qt.UserRole, key)  # キー名を内部データとして保存
-                    category_list.addItem(item)
-                    # 現在選択されているカテゴリー（キー名ベース）を選択状態にする
-                    if key in current_categories:
-                        item.setSelected(True)
             else:
-                # デフォルトのカテゴリー
-                default_categories = [
-                    "小口径砲", "中口径砲", "大口径砲", "超大口径砲", "対空砲",
-                    "魚雷", "潜水艦魚雷", "対艦ミサイル", "対空ミサイル",
-                    "水上機", "艦上偵察機", "回転翼機", "対潜哨戒機", "大型飛行艇",
-                    "爆雷投射機", "爆雷", "対潜迫撃砲",
-                    "ソナー", "大型ソナー", "小型電探", "大型電探", "測距儀",
-                    "機関", "増設バルジ(中型艦)", "増設バルジ(大型艦)", "格納庫", "その他"
-                ]
-
-                # デフォルトの場合はキー名も表示名も同じとして扱う
-                for category in default_categories:
-                    item = QListWidgetItem(category)
-                    item.setData(Qt.UserRole, category)  # この場合はキー名も表示名と同じ
-                    category_list.addItem(item)
-                    # 現在選択されているカテゴリーを選択状態にする
-                    if category in current_categories:
-                        item.setSelected(True)
+                type_mapping = get_template_registry().type_mapping
+
+            for key, display_name in type_mapping.items():
+                item = QListWidgetItem(display_name)
+                item.setData(Qt.UserRole, key)  # キー名を内部データとして保存
+                category_list.addItem(item)
+                # 現在選択されているカテゴリー（キー名ベース）を選択状態にする
+                if key in current_categories:
+                    item.setSelected(True)
 
             layout.addWidget(category_list)
 
@@ -1317,27 +1452,8 @@ class DesignView(QWidget):
                     if key:
                         selected_categories.append(key)
 
-                # self.slot_category_selectionsにキー名を保存
-                self.slot_category_selections[slot_type] = selected_categories
-
-                # カテゴリーボタンのテキストは表示名を使用して更新
-                if slot_type in self.slot_category_combos:
-                    button = self.slot_category_combos[slot_type]
-                    if len(selected_categories) == 0:
-                        button.setText("カテゴリー選択")
-                    elif len(selected_categories) == 1:
-                        # 選択されたキー名から表示名を取得
-                        key = selected_categories[0]
-                        if self.app_controller:
-                            display_name = self.app_controller.get_equipment_display_name(key)
-                            button.setText(display_name)
-                        else:
-                            button.setText(key)  # デフォルトの場合
-                    else:
-                        button.setText(f"{len(selected_categories)}種類選択")
-
-                # 装備コンボボックスを更新
-                self.update_equipment_combo(slot_type)
+                # キー名を保存し、カテゴリーボタンと装備コンボボックスを更新
+                self.on_slot_category_changed(slot_type, selected_categories)
                 dialog.accept()
 
             ok_button.clicked.connect(on_ok)
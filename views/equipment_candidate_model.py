@@ -0,0 +1,103 @@
+from PyQt5.QtWidgets import QComboBox, QCompleter
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtCore import Qt, QObject
+
+# 装備コンボボックスの先頭の項目
+PLACEHOLDER_TEXT = "選択する"
+EQUIPMENT_ID_ROLE = Qt.UserRole
+
+
+def candidate_text(equipment_id, name, equipment_type):
+    """装備コンボボックスの表示（「装備名 (ID) - カテゴリー」）"""
+    return f"{name} ({equipment_id}) - {equipment_type}"
+
+
+def setup_candidate_combo(combo):
+    """
+    装備コンボボックスを入力で絞り込めるようにする
+
+    入力した文字を含む候補（装備名・ID・カテゴリー）をポップアップに表示し、
+    候補にない文字列で確定した場合は選択中の項目の表示に戻す。
+    """
+    combo.setEditable(True)
+    combo.setInsertPolicy(QComboBox.NoInsert)
+    completer = combo.completer()
+    completer.setCompletionMode(QCompleter.PopupCompletion)
+    completer.setFilterMode(Qt.MatchContains)
+    completer.setCaseSensitivity(Qt.CaseInsensitive)
+    combo.lineEdit().editingFinished.connect(
+        lambda: combo.setEditText(combo.itemText(combo.currentIndex())) if combo.currentIndex() >= 0 else None
+    )
+
+
+class EquipmentCandidateModels(QObject):
+    """
+    スロットのカテゴリーの組み合わせごとに、装備コンボボックス用のモデルを共有する
+
+    候補の一覧はカテゴリーごとに1回だけ取得し、同じカテゴリーを選んだスロットの
+    コンボボックスは同じモデルを参照するため、スロット数が多くても装備の読み込みと
+    項目の作成はカテゴリーの組み合わせごとに1回で済む。
+    """
+
+    def __init__(self, app_controller=None, fallback_loader=None, parent=None):
+        """
+        初期化
+
+        Args:
+            app_controller: アプリケーションコントローラー（get_equipment_candidates で候補を取得）
+            fallback_loader: app_controllerがない場合にカテゴリーから (ID, 名前, 種別) のリストを返す関数
+            parent: 親オブジェクト（モデルの親になる）
+        """
+        super(EquipmentCandidateModels, self).__init__(parent)
+        self.app_controller = app_controller
+        self.fallback_loader = fallback_loader
+        self._models = {}
+        self._version = self._current_version()
+
+    def _current_version(self):
+        return getattr(self.app_controller, 'equipment_candidates_version', 0)
+
+    def _candidates(self, category):
+        if self.app_controller:
+            return self.app_controller.get_equipment_candidates(category)
+        if self.fallback_loader:
+            return self.fallback_loader(category)
+        return ()
+
+    def model_for(self, categories):
+        """カテゴリーの組み合わせに対応する共有モデルを取得（装備が変更されていれば作り直す）"""
+        version = self._current_version()
+        if version != self._version:
+            self.invalidate()
+            self._version = version
+
+        key = tuple(categories)
+        model = self._models.get(key)
+        if model is None:
+            model = QStandardItemModel(self)
+            model.appendRow(QStandardItem(PLACEHOLDER_TEXT))
+            seen = set()
+            for category in key:
+                for equipment_id, name, equipment_type in self._candidates(category):
+                    if equipment_id in seen:
+                        continue
+                    seen.add(equipment_id)
+                    item = QStandardItem(candidate_text(equipment_id, name, equipment_type))
+                    item.setData(equipment_id, EQUIPMENT_ID_ROLE)
+                    model.appendRow(item)
+            self._models[key] = model
+        return model
+
+    def is_shared(self, model):
+        return model is not None and model.parent() is self
+
+    def invalidate(self):
+        """共有モデルを破棄（表示中のコンボボックスは、次にカテゴリーを設定するまで古いモデルを使い続ける）"""
+        in_use = set()
+        parent = self.parent()
+        if parent is not None:
+            in_use = {id(combo.model()) for combo in parent.findChildren(QComboBox)}
+        for model in self._models.values():
+            if id(model) not in in_use:
+                model.deleteLater()
+        self._models = {}
@@ -8,6 +8,8 @@ from PyQt5.QtWidgets import (QWidget, QFormLayout, QLineEdit, QComboBox,
                              QScrollArea, QMessageBox, QFileDialog, QApplication, QDialog, QListWidget, QListWidgetItem)
 from PyQt5.QtCore import Qt, pyqtSignal
 
+from models.equipment_templates import get_template_registry
+
 class EquipmentForm(QWidget):
     """装備データ登録用フォーム"""
     equipment_saved = pyqtSignal(str)  # 装備保存時のシグナル（装備IDを送信）
@@ -15,6 +17,8 @@ class EquipmentForm(QWidget):
     def __init__(self, parent=None, app_controller=None):
         super(EquipmentForm, self).__init__(parent)
         self.app_controller = app_controller
+        # フォームに表示した次のID（装備タイプ, ID）。番号は保存時に割り当てる
+        self._previewed_id = None
         self.init_ui()
         self.load_equipment_templates()
 
@@ -205,53 +209,11 @@ class EquipmentForm(QWidget):
                     self.equipment_type_combo.addItem(display_name, key)
                 return
 
-            # 従来の方法（AppControllerがない場合）
-            import os
-            root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            template_file = os.path.join(root_dir, 'paste.txt')
-
-            if not os.path.exists(template_file):
-                print(f"警告: 装備テンプレートファイル '{template_file}' が見つかりません。")
-                return
-
-            with open(template_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # YAMLライクな形式をパースする改良版実装
-            self.equipment_templates = {}
-            current_category = None
-            current_type = None
-
-            for line in content.split('\n'):
-                if not line.strip() or line.strip().startswith('#'):
-                    continue
-
-                # 行のインデントレベルを判断
-                indent = len(line) - len(line.lstrip())
-                stripped_line = line.strip()
-
-                if ':' in stripped_line:
-                    if indent == 0:
-                        # トップレベルのカテゴリ (例: "砲系統:")
-                        current_category = stripped_line.rstrip(':')
-                    elif indent == 2 and current_category:
-                        # 第2レベルの装備タイプ (例: "  小口径砲:")
-                        current_type = stripped_line.rstrip(':')
-                        type_key = current_type  # 表示と内部キーを同じにする
-                        self.equipment_templates[type_key] = {
-                            'category': current_category,
-                            'id_prefix': '',
-                            'common_elements': {},
-                            'specific_elements': {}
-                        }
-                    elif 'id_prefix:' in stripped_line and current_type:
-                        # ID接頭辞の設定
-                        prefix = stripped_line.split('id_prefix:')[1].strip()
-                        self.equipment_templates[current_type]['id_prefix'] = prefix
-
-            # コンボボックスに追加（従来方式では表示名とキー名が同じ）
-            for eq_type in sorted(self.equipment_templates.keys()):
-                self.equipment_type_combo.addItem(eq_type, eq_type)
+            # AppControllerがない場合は共有のテンプレートレジストリから取得
+            registry = get_template_registry()
+            self.equipment_templates = registry.templates
+            for key, display_name in registry.type_mapping.items():
+                self.equipment_type_combo.addItem(display_name, key)
 
         except Exception as e:
             print(f"装備テンプレート読み込みエラー: {e}")
@@ -289,14 +251,16 @@ class EquipmentForm(QWidget):
             self.specific_group.update()
             QApplication.processEvents()
 
-            # 装備IDのプレフィックスを自動設定
+            # 装備IDのプレフィックスを自動設定（表示のみで番号は消費しない）
+            self._previewed_id = None
             if 'ID' in self.common_fields:
                 if self.app_controller:
-                    next_id = self.app_controller.get_next_equipment_id(current_type)
+                    next_id = self.app_controller.peek_next_equipment_id(current_type)
                     if next_id:
                         self.common_fields['ID'].setText(next_id)
-                elif current_type in self.equipment_templates and 'id_prefix' in self.equipment_templates[current_type]:
-                    prefix = self.equipment_templates[current_type]['id_prefix']
+                        self._previewed_id = (current_type, next_id)
+                elif current_type in self.equipment_templates:
+                    prefix = get_template_registry().get_prefix(current_type)
                     self.common_fields['ID'].setText(f"{prefix}")
 
         except Exception as e:
@@ -340,11 +304,11 @@ class EquipmentForm(QWidget):
                     item.setData(Qt.UserRole, key)  # キー名を内部データとして保存
                     category_list.addItem(item)
             else:
-                # テンプレートから取得（従来方式）
-                equipment_types = list(self.equipment_templates.keys())
-                for category in sorted(equipment_types):
-                    item = QListWidgetItem(category)
-                    item.setData(Qt.UserRole, category)  # この場合はキー名も表示名と同じ
+                # 共有のテンプレートレジストリから取得
+                type_mapping = get_template_registry().type_mapping
+                for key, display_name in sorted(type_mapping.items(), key=lambda x: x[1]):
+                    item = QListWidgetItem(display_name)
+                    item.setData(Qt.UserRole, key)
                     category_list.addItem(item)
 
             # 検索機能
@@ -483,6 +447,13 @@ class EquipmentForm(QWidget):
 
         # AppControllerを使用して装備を保存
         if self.app_controller:
+            # 表示したIDのまま保存する場合は、ここで番号を割り当てる（他の保存で使われていれば次の番号になる）
+            if self._previewed_id and equipment_data["common"]["ID"] == self._previewed_id[1]:
+                allocated_id = self.app_controller.get_next_equipment_id(self._previewed_id[0])
+                if allocated_id:
+                    equipment_data["common"]["ID"] = allocated_id
+                    self.common_fields['ID'].setText(allocated_id)
+                self._previewed_id = None
             if self.app_controller.save_equipment(equipment_data):
                 equipment_id = equipment_data["common"]["ID"]
                 QMessageBox.information(self, "保存成功", f"装備データを保存しました。\nID: {equipment_id}")
@@ -560,6 +531,7 @@ class EquipmentForm(QWidget):
 
     def set_form_data(self, data):
         """フォームにデータを設定"""
+        self._previewed_id = None
         # 共通フィールドの設定
         for field_name, value in data.get('common', {}).items():
             if field_name in self.common_fields:
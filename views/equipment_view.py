@@ -1,10 +1,38 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-                             QPushButton, QComboBox, QTableWidget, QTableWidgetItem,
+                             QPushButton, QComboBox, QTableView, QLineEdit,
                              QHeaderView, QMessageBox, QDialog, QFileDialog)
 from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot
-from PyQt5.QtGui import QColor
 
 from .equipment_form import EquipmentForm
+from .library_table_model import LibraryTableModel, LibraryProxyModel, RECORD_ID_ROLE, sort_number
+from models.equipment_templates import get_template_registry
+
+
+def _equipment_background(eq_type):
+    """装備タイプに基づく背景色（軽い視認性向上）"""
+    if '砲' in eq_type:
+        return (240, 240, 255)  # 薄い青
+    elif '魚雷' in eq_type:
+        return (240, 255, 240)  # 薄い緑
+    elif 'ミサイル' in eq_type:
+        return (255, 240, 240)  # 薄い赤
+    elif any(x in eq_type for x in ['水上機', '艦上偵察機', '回転翼機']):
+        return (255, 255, 240)  # 薄い黄
+    return (255, 255, 255)  # 白
+
+
+def _equipment_row(equipment):
+    """装備データを一覧の行（ID, 表示文字列, 並べ替え用の値, 背景色）に変換"""
+    common = equipment.get('common', {})
+    equipment_id = common.get('ID', '')
+    name = common.get('名前', '')
+    year = common.get('開発年', '')
+    country = common.get('開発国', '')
+    weight = common.get('重量', '')
+    display = [equipment_id, name, str(year), country, str(weight)]
+    sort_values = [equipment_id, name, sort_number(year), country, sort_number(weight)]
+    return equipment_id, display, sort_values, _equipment_background(equipment.get('equipment_type', ''))
+
 
 class EquipmentView(QWidget):
     """装備管理ビュー"""
@@ -70,16 +98,35 @@ class EquipmentView(QWidget):
 
         main_layout.addLayout(header_layout)
 
-        # 装備一覧テーブル
-        self.equipment_table = QTableWidget()
-        self.equipment_table.setColumnCount(5)  # ID, 名前, 開発年, 開発国, 重量
-        self.equipment_table.setHorizontalHeaderLabels(["ID", "名称", "開発年", "開発国", "重量(kg)"])
+        # 絞り込み
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("絞り込み:"))
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("ID・名称・開発国などで絞り込み")
+        self.filter_edit.textChanged.connect(self.on_filter_changed)
+        filter_layout.addWidget(self.filter_edit)
+        main_layout.addLayout(filter_layout)
+
+        # 装備一覧テーブル（ページ単位で遅延読み込み）
+        self.equipment_table_model = LibraryTableModel(
+            ["ID", "名称", "開発年", "開発国", "重量(kg)"],
+            self._load_equipment_page, _equipment_row, parent=self
+        )
+        self.equipment_proxy = LibraryProxyModel(self)
+        self.equipment_proxy.setSourceModel(self.equipment_table_model)
+
+        self.equipment_table = QTableView()
+        self.equipment_table.setModel(self.equipment_proxy)
 
         # テーブルの設定
-        self.equipment_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.equipment_table.setSelectionMode(QTableWidget.SingleSelection)
-        self.equipment_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.equipment_table.setSelectionBehavior(QTableView.SelectRows)
+        self.equipment_table.setSelectionMode(QTableView.SingleSelection)
+        self.equipment_table.setEditTriggers(QTableView.NoEditTriggers)
         self.equipment_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)  # 名前列を拡大
+        self.equipment_table.verticalHeader().setDefaultSectionSize(
+            self.equipment_table.fontMetrics().height() + 6)  # 行の高さを固定して描画を軽くする
+        self.equipment_table.horizontalHeader().setSortIndicator(0, Qt.AscendingOrder)
+        self.equipment_table.setSortingEnabled(True)
 
         # ダブルクリックでの選択処理
         self.equipment_table.doubleClicked.connect(self.on_table_double_clicked)
@@ -102,76 +149,59 @@ class EquipmentView(QWidget):
             for key, display_name in sorted(type_mapping.items(), key=lambda x: x[1]):
                 self.type_combo.addItem(display_name, key)
         else:
-            # 従来の方法（モデル直接使用）
-            from models.equipment_model import EquipmentModel
-            equipment_model = EquipmentModel()
-            equipment_types = equipment_model.get_equipment_types()
-
-            # 装備タイプをコンボボックスに追加（従来方式では表示名とキー名が同じ）
-            for eq_type in sorted(equipment_types):
-                self.type_combo.addItem(eq_type, eq_type)
+            # 共有のテンプレートレジストリから取得
+            type_mapping = get_template_registry().type_mapping
+            for key, display_name in sorted(type_mapping.items(), key=lambda x: x[1]):
+                self.type_combo.addItem(display_name, key)
 
-    def load_equipment_list(self):
-        """装備リストの読み込み"""
-        self.equipment_table.setRowCount(0)  # テーブルをクリア
+    def _load_equipment_page(self, after_id, limit):
+        """一覧の1ページ分の装備データを取得"""
+        equipment_type = None if self.type_combo.currentIndex() <= 0 else self.current_type
 
         # コントローラーから装備データを取得
         if self.app_controller:
-            equipment_list = self.app_controller.get_all_equipment(
-                None if self.type_combo.currentIndex() == 0 else self.current_type
-            )
-        else:
-            # 従来の方法（モデル直接使用）
-            from models.equipment_model import EquipmentModel
-            equipment_model = EquipmentModel()
-            equipment_list = equipment_model.get_all_equipment(
-                None if self.type_combo.currentIndex() == 0 else self.current_type
-            )
-
-        # テーブルに追加
-        for row, equipment in enumerate(equipment_list):
-            common = equipment.get('common', {})
-
-            self.equipment_table.insertRow(row)
-
-            # IDセル
-            id_item = QTableWidgetItem(common.get('ID', ''))
-            self.equipment_table.setItem(row, 0, id_item)
-
-            # 名前セル
-            name_item = QTableWidgetItem(common.get('名前', ''))
-            self.equipment_table.setItem(row, 1, name_item)
-
-            # 開発年セル
-            year_item = QTableWidgetItem(str(common.get('開発年', '')))
-            self.equipment_table.setItem(row, 2, year_item)
-
-            # 開発国セル
-            country_item = QTableWidgetItem(common.get('開発国', ''))
-            self.equipment_table.setItem(row, 3, country_item)
-
-            # 重量セル
-            weight_item = QTableWidgetItem(str(common.get('重量', '')))
-            self.equipment_table.setItem(row, 4, weight_item)
-
-            # 装備タイプによって背景色を変える（軽い視認性向上）
-            eq_type = equipment.get('equipment_type', '')
-
-            # 装備タイプに基づいて色分け（例）
-            if '砲' in eq_type:
-                bg_color = QColor(240, 240, 255)  # 薄い青
-            elif '魚雷' in eq_type:
-                bg_color = QColor(240, 255, 240)  # 薄い緑
-            elif 'ミサイル' in eq_type:
-                bg_color = QColor(255, 240, 240)  # 薄い赤
-            elif any(x in eq_type for x in ['水上機', '艦上偵察機', '回転翼機']):
-                bg_color = QColor(255, 255, 240)  # 薄い黄
-            else:
-                bg_color = QColor(255, 255, 255)  # 白
+            return self.app_controller.get_equipment_page(equipment_type, after_id, limit)
 
-            # 背景色を設定
-            for col in range(self.equipment_table.columnCount()):
-                self.equipment_table.item(row, col).setBackground(bg_color)
+        # 従来の方法（モデル直接使用）
+        from models.equipment_model import EquipmentModel
+        if not hasattr(self, '_equipment_model'):
+            self._equipment_model = EquipmentModel()
+        return self._equipment_model.get_equipment_page(equipment_type, after_id, limit)
+
+    def load_equipment_list(self):
+        """装備リストの読み込み（先頭のページのみ読み込み、残りはスクロールに応じて取得）"""
+        self.equipment_table_model.reload()
+        if self.filter_edit.text():
+            self.equipment_proxy.set_filter_text(self.filter_edit.text())
+
+    def on_filter_changed(self, text):
+        """絞り込み文字列変更時の処理"""
+        self.equipment_proxy.set_filter_text(text)
+
+    def show_equipment(self, equipment_id):
+        """指定した装備を一覧で選択する（全体検索からの移動用）"""
+        if self.type_combo.currentIndex() > 0:
+            self.type_combo.setCurrentIndex(0)
+        if not self.equipment_proxy.select_record(self.equipment_table, equipment_id):
+            return False
+        if self.filter_edit.text() and not self.equipment_proxy.filter_text():
+            self.filter_edit.blockSignals(True)
+            self.filter_edit.clear()
+            self.filter_edit.blockSignals(False)
+        return True
+
+    def selected_equipment(self):
+        """
+        選択中の装備のIDと名称を取得
+
+        Returns:
+            tuple: (装備ID, 名称)、未選択の場合は (None, None)
+        """
+        selected_rows = self.equipment_table.selectionModel().selectedRows()
+        if not selected_rows:
+            return None, None
+        index = selected_rows[0]
+        return index.data(RECORD_ID_ROLE), index.sibling(index.row(), 1).data()
 
     def on_type_changed(self, index):
         """装備タイプ変更時の処理"""
@@ -210,15 +240,11 @@ class EquipmentView(QWidget):
     def on_edit_clicked(self):
         """編集ボタンの処理"""
         # 選択中の装備を取得
-        selected_rows = self.equipment_table.selectionModel().selectedRows()
-        if not selected_rows:
+        equipment_id, _ = self.selected_equipment()
+        if not equipment_id:
             QMessageBox.information(self, "情報", "編集する装備を選択してください。")
             return
 
-        # 選択中の装備ID
-        row = selected_rows[0].row()
-        equipment_id = self.equipment_table.item(row, 0).text()
-
         # 装備データを取得
         if self.app_controller:
             equipment_data = self.app_controller.load_equipment(equipment_id)
@@ -265,16 +291,11 @@ class EquipmentView(QWidget):
     def on_delete_clicked(self):
         """削除ボタンの処理"""
         # 選択中の装備を取得
-        selected_rows = self.equipment_table.selectionModel().selectedRows()
-        if not selected_rows:
+        equipment_id, equipment_name = self.selected_equipment()
+        if not equipment_id:
             QMessageBox.information(self, "情報", "削除する装備を選択してください。")
             return
 
-        # 選択中の装備ID
-        row = selected_rows[0].row()
-        equipment_id = self.equipment_table.item(row, 0).text()
-        equipment_name = self.equipment_table.item(row, 1).text()
-
         # 確認ダイアログ
         reply = QMessageBox.question(
             self, "削除確認",
@@ -303,15 +324,11 @@ class EquipmentView(QWidget):
     def on_export_clicked(self):
         """エクスポートボタンの処理"""
         # 選択中の装備を取得
-        selected_rows = self.equipment_table.selectionModel().selectedRows()
-        if not selected_rows:
+        equipment_id, _ = self.selected_equipment()
+        if not equipment_id:
             QMessageBox.information(self, "情報", "エクスポートする装備を選択してください。")
             return
 
-        # 選択中の装備ID
-        row = selected_rows[0].row()
-        equipment_id = self.equipment_table.item(row, 0).text()
-
         # 装備データを取得
         if self.app_controller:
             equipment_data = self.app_controller.load_equipment(equipment_id)
@@ -413,8 +430,9 @@ class EquipmentView(QWidget):
 
     def on_table_double_clicked(self, index):
         """テーブルダブルクリック時の処理"""
-        row = index.row()
-        equipment_id = self.equipment_table.item(row, 0).text()
+        equipment_id = index.sibling(index.row(), 0).data(RECORD_ID_ROLE)
+        if not equipment_id:
+            return
 
         # 選択シグナルを発行
         self.equipment_selected.emit(equipment_id)
@@ -0,0 +1,192 @@
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, QMimeData, QVariant
+
+from models.fleet_model import (NODE_FLEET, NODE_TASK_FORCE, CHANGE_RESET, CHANGE_INSERT, CHANGE_REMOVE,
+                                CHANGE_MOVE, CHANGE_UPDATE)
+
+# ノード（Fleet/TaskForce/Ship）を取り出すためのロール
+NODE_ROLE = Qt.UserRole
+# 編成ツリー内のドラッグ用のMIMEタイプ（移動するノードはビューの選択中の項目から取得する）
+FLEET_NODE_MIME = "application/x-fleet-node"
+
+
+def aggregate_text(aggregate):
+    """集計値の表示文字列（任務部隊・艦隊のツールチップ、国家の合計）"""
+    stats = aggregate.stats
+    text = (f"{aggregate.ship_count}隻 / IC {stats['build_cost_ic']:.1f} / 排水量 {stats['displacement']:.0f}t / "
+            f"攻撃 {aggregate.attack:.1f}（軽砲 {stats['lg_attack']:.1f}, 重砲 {stats['hg_attack']:.1f}, "
+            f"雷撃 {stats['torpedo_attack']:.1f}）/ 対潜攻撃 {stats['sub_attack']:.1f} / "
+            f"対空 {stats['anti_air_attack']:.1f} / 水上索敵 {stats['surface_detection']:.1f} / "
+            f"対潜索敵 {stats['sub_detection']:.1f}")
+    if aggregate.archetype_counts:
+        text += "\n艦種: " + ", ".join(f"{code} {count}隻" for code, count in aggregate.archetype_counts.items())
+    if aggregate.unknown_count:
+        text += f"\n性能不明: {aggregate.unknown_count}隻"
+    return text
+
+
+def node_text(node, is_mod=False):
+    """編成ツリーの表示文字列"""
+    if node.node_type == NODE_FLEET:
+        if is_mod:
+            return f"{node.name} - {node.province_id} - {len(node.task_forces)}TF - {node.ship_count()}隻"
+        return f"艦隊: {node.name} (Province: {node.province_id})"
+    if node.node_type == NODE_TASK_FORCE:
+        if is_mod:
+            return f"{node.name} - {node.province_id} - {len(node.ships)}隻"
+        return f"任務部隊: {node.name} (Province: {node.province_id})"
+    if is_mod:
+        return f"{node.name} - {node.design} - {node.version_name or node.design} - Exp:{node.exp}"
+    text = f"艦艇: {node.name} (Exp: {node.exp:.2f}, Pride: {node.is_pride})"
+    design = node.design
+    if isinstance(design, dict):
+        year = design.get('year', '')
+        year_str = f" ({year})" if year else ""
+        design_name = design.get('design_name', design.get('hull_name', design.get('name', '不明')))
+        ship_type = design.get('ship_type', design.get('hull', '不明'))
+        text += f" - {design_name} - {ship_type}{year_str}"
+    return text
+
+
+class FleetItemModel(QAbstractItemModel):
+    """
+    FleetModel をツリービューに表示するためのモデル
+
+    編成のデータは FleetModel が持ち、このモデルは変更通知を受けて行の追加・削除・移動を
+    ビューに伝えるだけなので、変更のたびにツリー全体を作り直さない。
+    """
+
+    def __init__(self, fleet_model, header="", editable=True, statistics=None, parent=None):
+        """
+        初期化
+
+        Args:
+            fleet_model: 表示する FleetModel
+            header: 列見出し
+            editable: ドラッグ&ドロップでの移動を許可する場合True
+            statistics: ツールチップに集計値を表示する FleetStatistics（省略可）
+            parent: 親オブジェクト
+        """
+        super().__init__(parent)
+        self.fleet_model = fleet_model
+        self.header = header
+        self.editable = editable
+        self.statistics = statistics
+        fleet_model.add_pre_change_listener(self._on_before_change)
+        fleet_model.add_change_listener(self._on_change)
+
+    def detach(self):
+        """FleetModel の変更通知の登録を解除"""
+        self.fleet_model.remove_pre_change_listener(self._on_before_change)
+        self.fleet_model.remove_change_listener(self._on_change)
+
+    # ノードとインデックスの変換
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else None
+
+    def index_for_node(self, node):
+        if node is None:
+            return QModelIndex()
+        return self.createIndex(self.fleet_model.row_of(node), 0, node)
+
+    # QAbstractItemModel
+
+    def index(self, row, column, parent=QModelIndex()):
+        if column != 0:
+            return QModelIndex()
+        children = self.fleet_model.children(self.node(parent))
+        if 0 <= row < len(children):
+            return self.createIndex(row, column, children[row])
+        return QModelIndex()
+
+    def parent(self, index):
+        node = self.node(index)
+        if node is None or node.parent is None:
+            return QModelIndex()
+        return self.index_for_node(node.parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.fleet_model.children(self.node(parent)))
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and section == 0:
+            return self.header
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        node = self.node(index)
+        if node is None:
+            return QVariant()
+        if role == Qt.DisplayRole:
+            return node_text(node, self.fleet_model.is_mod)
+        if role == NODE_ROLE:
+            return node
+        if role == Qt.ToolTipRole and self.statistics is not None:
+            return aggregate_text(self.statistics.node(node))
+        return QVariant()
+
+    def flags(self, index):
+        node = self.node(index)
+        if node is None:
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if self.editable:
+            if node.node_type != NODE_FLEET:
+                flags |= Qt.ItemIsDragEnabled
+            if node.node_type in (NODE_FLEET, NODE_TASK_FORCE):
+                flags |= Qt.ItemIsDropEnabled
+        return flags
+
+    def supportedDragActions(self):
+        return Qt.MoveAction
+
+    def supportedDropActions(self):
+        return Qt.MoveAction | Qt.CopyAction
+
+    def mimeTypes(self):
+        return [FLEET_NODE_MIME]
+
+    def mimeData(self, indexes):
+        mime_data = QMimeData()
+        mime_data.setData(FLEET_NODE_MIME, b"")
+        return mime_data
+
+    # 変更通知
+
+    def _on_before_change(self, change):
+        if change.kind == CHANGE_RESET:
+            self.beginResetModel()
+        elif change.kind == CHANGE_INSERT:
+            self.beginInsertRows(self.index_for_node(change.new_parent), change.new_row,
+                                 change.new_row + len(change.nodes) - 1)
+        elif change.kind == CHANGE_REMOVE:
+            self.beginRemoveRows(self.index_for_node(change.old_parent), change.old_row, change.old_row)
+        elif change.kind == CHANGE_MOVE:
+            self.beginMoveRows(self.index_for_node(change.old_parent), change.old_row, change.old_row,
+                               self.index_for_node(change.new_parent), change.new_row)
+
+    def _on_change(self, change):
+        if change.kind == CHANGE_RESET:
+            self.endResetModel()
+            return
+        if change.kind == CHANGE_INSERT:
+            self.endInsertRows()
+        elif change.kind == CHANGE_REMOVE:
+            self.endRemoveRows()
+        elif change.kind == CHANGE_MOVE:
+            self.endMoveRows()
+        elif change.kind == CHANGE_UPDATE:
+            index = self.index_for_node(change.nodes[0])
+            self.dataChanged.emit(index, index)
+        if self.fleet_model.is_mod:
+            # MOD内編成の表示には隻数が含まれるため、親の表示も更新する
+            for parent in (change.old_parent, change.new_parent):
+                while parent is not None:
+                    index = self.index_for_node(parent)
+                    self.dataChanged.emit(index, index)
+                    parent = parent.parent
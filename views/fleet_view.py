@@ -1,8 +1,8 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-                             QTreeWidget, QTreeWidgetItem, QListWidget,
+                             QTreeWidget, QTreeWidgetItem, QTreeView, QListWidget,
                              QSplitter, QDialog, QLineEdit, QFormLayout,
                              QPushButton, QDoubleSpinBox, QCheckBox, QMessageBox,
-                             QComboBox, QListWidgetItem)
+                             QComboBox, QListWidgetItem, QSpinBox)
 from PyQt5.QtCore import Qt, QMimeData, QByteArray
 from PyQt5.QtGui import QDrag, QIcon, QPixmap, QColor, QPainter, QPen
 import json
@@ -10,6 +10,11 @@ import os
 import logging
 import time
 
+from models.fleet_model import FleetModel, Ship, NODE_FLEET, NODE_TASK_FORCE, CHANGE_RESET
+from models.fleet_stats import FleetStatistics
+from models.ship_name_index import ShipNameIndex
+from views.fleet_item_model import FleetItemModel, NODE_ROLE, FLEET_NODE_MIME, aggregate_text
+
 # PIL のインポートを安全に行う
 try:
     from PIL import Image
@@ -51,6 +56,16 @@ class FleetView(QWidget):
         self.countries = {}  # 国家データを保持
         self.app_controller = parent.app_controller if parent else None
 
+        # 編成データ（編集可能な編成とMOD内編成）。ツリー・港湾一覧・マップは変更通知で更新する
+        self.fleet_model = FleetModel()
+        self.mod_fleet_model = FleetModel(is_mod=True)
+        # 任務部隊・艦隊・国家ごとの集計値（設計の性能表は国家の選択時に取得）
+        self.fleet_statistics = FleetStatistics(self.fleet_model)
+        self.mod_fleet_statistics = FleetStatistics(self.mod_fleet_model)
+        # 艦名リストと使用中の艦名（歴史的編成・編集中の編成の艦名は使わない）
+        self.ship_names = ShipNameIndex(fleet_models=(self.mod_fleet_model, self.fleet_model))
+        self.port_items = {}  # プロビンスID -> (港湾一覧の項目, 港湾レベル)
+
         # ロガーの設定
         self.logger = logging.getLogger('FleetView')
         self.logger.setLevel(logging.DEBUG)
@@ -106,36 +121,38 @@ class FleetView(QWidget):
         formation_layout = QHBoxLayout(formation_widget)
 
         # 左側の編成ツリー（編集可能）
-        self.fleet_tree = QTreeWidget()
-        self.fleet_tree.setHeaderLabels(["編成ツリー"])
+        self.fleet_tree = QTreeView()
+        self.fleet_tree.setModel(FleetItemModel(self.fleet_model, "編成ツリー", editable=True,
+                                                  statistics=self.fleet_statistics, parent=self))
         self.fleet_tree.setDragEnabled(True)
         self.fleet_tree.setAcceptDrops(True)
         self.fleet_tree.setDropIndicatorShown(True)
-        self.fleet_tree.setDragDropMode(QTreeWidget.InternalMove)
+        self.fleet_tree.setDragDropMode(QTreeView.DragDrop)
         self.fleet_tree.keyPressEvent = self.fleet_tree_key_press_event
         self.fleet_tree.setStyleSheet("""
-            QTreeWidget {
+            QTreeView {
                 background-color: #ffffff;
                 border: 1px solid #cccccc;
             }
         """)
 
         # 右側のMOD内編成ツリー（読み取り専用）
-        self.mod_fleet_tree = QTreeWidget()
-        self.mod_fleet_tree.setHeaderLabels(["MOD内編成"])
+        self.mod_fleet_tree = QTreeView()
+        self.mod_fleet_tree.setModel(FleetItemModel(self.mod_fleet_model, "MOD内編成", editable=False,
+                                                      statistics=self.mod_fleet_statistics, parent=self))
         self.mod_fleet_tree.setDragEnabled(False)
         self.mod_fleet_tree.setAcceptDrops(False)
         self.mod_fleet_tree.setEnabled(True)  # 表示は有効
         self.mod_fleet_tree.setStyleSheet("""
-            QTreeWidget {
+            QTreeView {
                 background-color: #f5f5f5;
                 border: 1px solid #cccccc;
                 color: #666666;
             }
-            QTreeWidget::item {
+            QTreeView::item {
                 padding: 2px;
             }
-            QTreeWidget::item:selected {
+            QTreeView::item:selected {
                 background-color: #e0e0e0;
                 color: #000000;
             }
@@ -162,14 +179,26 @@ class FleetView(QWidget):
             }
         """)
 
+        # 編成ツリーの下に国家全体の集計値を表示
+        self.fleet_stats_label = QLabel("")
+        self.fleet_stats_label.setWordWrap(True)
+        fleet_column = QWidget()
+        fleet_column_layout = QVBoxLayout(fleet_column)
+        fleet_column_layout.setContentsMargins(0, 0, 0, 0)
+        fleet_column_layout.addWidget(self.fleet_tree, 1)
+        fleet_column_layout.addWidget(self.fleet_stats_label)
+
         # 編成エリアに追加
-        formation_layout.addWidget(self.fleet_tree, 1)
+        formation_layout.addWidget(fleet_column, 1)
         formation_layout.addWidget(self.mod_fleet_tree, 1)
         formation_layout.addWidget(self.design_list, 1)
         formation_layout.addWidget(self.port_tree, 1)
 
         # 下部のマップエリア
         self.map_widget = MapViewer()
+        if self.app_controller and hasattr(self.map_widget, 'set_cache_budget'):
+            self.map_widget.set_cache_budget(
+                self.app_controller.app_settings.get_setting("map_cache_budget_mb", 256))
 
         # スプリッターに追加（マップの比率を下げる）
         splitter = QSplitter(Qt.Vertical)
@@ -217,6 +246,11 @@ class FleetView(QWidget):
         save_btn.clicked.connect(self.save_fleet_data)
         toolbar_layout.addWidget(save_btn)
 
+        # 編成ファイル出力ボタン
+        export_oob_btn = QPushButton("OOB出力")
+        export_oob_btn.clicked.connect(self.export_naval_oob)
+        toolbar_layout.addWidget(export_oob_btn)
+
         # 艦隊表示切り替えボタン
         self.show_fleet_btn = QPushButton("艦隊表示")
         self.show_fleet_btn.setCheckable(True)
@@ -247,7 +281,8 @@ class FleetView(QWidget):
         self.layout().insertLayout(0, toolbar_layout)
 
     def connect_signals(self):
-        self.fleet_tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+        self.fleet_tree.doubleClicked.connect(self.on_item_double_clicked)
+        self.fleet_model.add_change_listener(self.on_fleet_model_changed)
         self.design_list.itemDoubleClicked.connect(self.on_design_double_clicked)
 
         # ドラッグ&ドロップのシグナル接続
@@ -459,7 +494,7 @@ class FleetView(QWidget):
             self.logger.info(f"国家が変更されました: {tag}")
 
             # 国家が変更されたら艦隊ツリーをクリア
-            self.fleet_tree.clear()
+            self.fleet_model.clear()
             # 設計リストを更新
             self.load_designs()
             # 艦隊データを読み込み
@@ -495,6 +530,7 @@ class FleetView(QWidget):
         try:
             # 港湾ツリーをクリア
             self.port_tree.clear()
+            self.port_items = {}
 
             # 現在のMODを取得
             current_mod = self.app_controller.get_current_mod()
@@ -525,34 +561,6 @@ class FleetView(QWidget):
                             except Exception as e:
                                 self.logger.warning(f"ローカライズファイルの読み込みエラー: {e}")
 
-            # 艦艇が存在する港湾を収集
-            ports_with_ships = set()
-            for i in range(self.fleet_tree.topLevelItemCount()):
-                fleet_item = self.fleet_tree.topLevelItem(i)
-                fleet_data = fleet_item.data(0, Qt.UserRole)
-                if fleet_data and "province_id" in fleet_data:
-                    ports_with_ships.add(fleet_data["province_id"])
-                    # 任務部隊の港湾も追加
-                    for j in range(fleet_item.childCount()):
-                        task_force_item = fleet_item.child(j)
-                        task_force_data = task_force_item.data(0, Qt.UserRole)
-                        if task_force_data and "province_id" in task_force_data:
-                            ports_with_ships.add(task_force_data["province_id"])
-
-            # MOD内の艦艇が存在する港湾も収集
-            if self.show_mod_fleet_btn.isChecked():
-                for i in range(self.mod_fleet_tree.topLevelItemCount()):
-                    fleet_item = self.mod_fleet_tree.topLevelItem(i)
-                    fleet_data = fleet_item.data(0, Qt.UserRole)
-                    if fleet_data and "province_id" in fleet_data:
-                        ports_with_ships.add(fleet_data["province_id"])
-                        # 任務部隊の港湾も追加
-                        for j in range(fleet_item.childCount()):
-                            task_force_item = fleet_item.child(j)
-                            task_force_data = task_force_item.data(0, Qt.UserRole)
-                            if task_force_data and "province_id" in task_force_data:
-                                ports_with_ships.add(task_force_data["province_id"])
-
             # ステートごとに港湾をグループ化
             state_ports = {}
             for prov_id, level in self.map_widget.naval_base_locations.items():
@@ -579,76 +587,80 @@ class FleetView(QWidget):
                     state_item = QTreeWidgetItem(self.port_tree)
                     state_item.setText(0, f"{state_name} ({state_id})")
                     
-                    # 港湾を追加
+                    # 港湾を追加（表示は refresh_port_items で艦艇の有無に応じて設定）
                     for prov_id, level in ports:
                         port_item = QTreeWidgetItem(state_item)
-                        port_name = f"{prov_id}-Lv{level}"
-                        if prov_id in ports_with_ships:
-                            # 艦隊、任務部隊、艦艇の数を計算
-                            fleet_count = 0
-                            task_force_count = 0
-                            ship_count = 0
-                            
-                            # 編集可能な艦隊ツリーからカウント
-                            for i in range(self.fleet_tree.topLevelItemCount()):
-                                fleet_item = self.fleet_tree.topLevelItem(i)
-                                fleet_data = fleet_item.data(0, Qt.UserRole)
-                                if fleet_data and fleet_data.get("province_id") == prov_id:
-                                    fleet_count += 1
-                                    task_force_count += fleet_item.childCount()
-                                    for j in range(fleet_item.childCount()):
-                                        task_force_item = fleet_item.child(j)
-                                        ship_count += task_force_item.childCount()
-                            
-                            # MOD内編成が有効な場合、MOD内の艦隊もカウント
-                            if self.show_mod_fleet_btn.isChecked():
-                                for i in range(self.mod_fleet_tree.topLevelItemCount()):
-                                    fleet_item = self.mod_fleet_tree.topLevelItem(i)
-                                    fleet_data = fleet_item.data(0, Qt.UserRole)
-                                    if fleet_data and fleet_data.get("province_id") == prov_id:
-                                        fleet_count += 1
-                                        task_force_count += fleet_item.childCount()
-                                        for j in range(fleet_item.childCount()):
-                                            task_force_item = fleet_item.child(j)
-                                            ship_count += task_force_item.childCount()
-                            
-                            port_name = f"{prov_id}-Lv{level}-{fleet_count}FLEET-{task_force_count}TF-{ship_count}Ships"
-                            # 港湾規模に応じた色を設定（艦艇が存在する場合は濃く表示）
-                            if level >= 10:
-                                port_color = QColor(255, 0, 0)  # 赤（大規模）
-                            elif level >= 7:
-                                port_color = QColor(255, 255, 0)  # 黄色（中規模）
-                            elif level >= 4:
-                                port_color = QColor(0, 255, 0)  # 緑（小規模）
-                            else:
-                                port_color = QColor(0, 0, 255)  # 青（最小規模）
-                            port_color.setAlpha(255)
-                        else:
-                            port_name = f"{prov_id}-Lv{level}"
-                            # 港湾規模に応じた色を設定（艦艇が存在しない場合は薄く表示）
-                            if level >= 10:
-                                port_color = QColor(255, 0, 0)  # 赤（大規模）
-                            elif level >= 7:
-                                port_color = QColor(255, 255, 0)  # 黄色（中規模）
-                            elif level >= 4:
-                                port_color = QColor(0, 255, 0)  # 緑（小規模）
-                            else:
-                                port_color = QColor(0, 0, 255)  # 青（最小規模）
-                            port_color.setAlpha(100)
-                        
-                        port_item.setText(0, port_name)
-                        port_item.setForeground(0, port_color)
-                        port_item.setData(0, Qt.UserRole, {
-                            "province_id": prov_id,
-                            "level": level,
-                            "has_ships": prov_id in ports_with_ships
-                        })
+                        self.port_items[prov_id] = (port_item, level)
 
+            self.refresh_port_items()
             self.logger.info(f"港湾一覧を更新: {self.current_country}")
 
         except Exception as e:
             self.logger.error(f"港湾一覧の更新中にエラーが発生しました: {e}")
 
+    def refresh_port_items(self, provinces=None):
+        """
+        港湾一覧の項目の表示（艦隊・任務部隊・艦艇の数と色）を更新
+
+        Args:
+            provinces: 更新するプロビンスIDの集合（Noneの場合はすべての港湾）
+        """
+        show_mod = self.show_mod_fleet_btn.isChecked()
+        if provinces is None:
+            provinces = self.port_items.keys()
+        for prov_id in provinces:
+            entry = self.port_items.get(prov_id)
+            if entry is None:
+                continue
+            port_item, level = entry
+            has_ships = self.fleet_model.is_occupied(prov_id) or (show_mod and self.mod_fleet_model.is_occupied(prov_id))
+            if has_ships:
+                fleet_count, task_force_count, ship_count = self.fleet_model.province_counts(prov_id)
+                if show_mod:
+                    mod_counts = self.mod_fleet_model.province_counts(prov_id)
+                    fleet_count += mod_counts[0]
+                    task_force_count += mod_counts[1]
+                    ship_count += mod_counts[2]
+                port_name = f"{prov_id}-Lv{level}-{fleet_count}FLEET-{task_force_count}TF-{ship_count}Ships"
+            else:
+                port_name = f"{prov_id}-Lv{level}"
+
+            # 港湾規模に応じた色を設定（艦艇が存在する場合は濃く、存在しない場合は薄く表示）
+            if level >= 10:
+                port_color = QColor(255, 0, 0)  # 赤（大規模）
+            elif level >= 7:
+                port_color = QColor(255, 255, 0)  # 黄色（中規模）
+            elif level >= 4:
+                port_color = QColor(0, 255, 0)  # 緑（小規模）
+            else:
+                port_color = QColor(0, 0, 255)  # 青（最小規模）
+            port_color.setAlpha(255 if has_ships else 100)
+
+            port_item.setText(0, port_name)
+            port_item.setForeground(0, port_color)
+            port_item.setData(0, Qt.UserRole, {
+                "province_id": prov_id,
+                "level": level,
+                "has_ships": has_ships
+            })
+
+    def update_fleet_stats_label(self):
+        """編成全体の集計値を表示"""
+        total = self.fleet_statistics.total()
+        self.fleet_stats_label.setText(f"合計: {aggregate_text(total)}" if total.ship_count else "")
+
+    def on_fleet_model_changed(self, change):
+        """編成が変更された時の処理（変更されたプロビンスの港湾一覧・マップ表示だけを更新）"""
+        self.update_fleet_stats_label()
+        if change.kind == CHANGE_RESET:
+            # 読み込み時は読み込み元で港湾一覧・マップ全体を更新する
+            return
+        if not change.provinces:
+            return
+        self.refresh_port_items(change.provinces)
+        if self.show_fleet_btn.isChecked():
+            self.update_fleet_display(change.provinces)
+
     def design_list_mouse_move_event(self, event):
         """設計リストのドラッグ開始イベント"""
         if event.buttons() == Qt.LeftButton:
@@ -660,9 +672,14 @@ class FleetView(QWidget):
                 drag.setMimeData(mime_data)
                 drag.exec_(Qt.CopyAction)
 
+    def selected_fleet_node(self):
+        """編成ツリーで選択中のノード（Fleet/TaskForce/Ship、未選択の場合はNone）"""
+        index = self.fleet_tree.currentIndex()
+        return index.data(NODE_ROLE) if index.isValid() else None
+
     def fleet_tree_drag_enter_event(self, event):
         """艦隊ツリーのドラッグ開始イベント"""
-        if event.mimeData().hasFormat("application/x-design"):
+        if event.mimeData().hasFormat("application/x-design") or event.mimeData().hasFormat(FLEET_NODE_MIME):
             event.acceptProposedAction()
 
     def fleet_tree_drag_move_event(self, event):
@@ -671,34 +688,11 @@ class FleetView(QWidget):
             event.acceptProposedAction()
             return
 
-        target_item = self.fleet_tree.itemAt(event.pos())
-        if not target_item:
-            event.ignore()
-            return
+        target = self.fleet_tree.indexAt(event.pos()).data(NODE_ROLE)
+        source = self.selected_fleet_node()
 
-        source_item = self.fleet_tree.currentItem()
-        if not source_item:
-            event.ignore()
-            return
-
-        source_data = source_item.data(0, Qt.UserRole)
-        target_data = target_item.data(0, Qt.UserRole)
-
-        if not source_data or not target_data:
-            event.ignore()
-            return
-
-        # 移動の制限を設定
-        source_type = source_data.get("type")
-        target_type = target_data.get("type")
-
-        # 艦隊には任務部隊のみ追加可能
-        if target_type == "fleet" and source_type != "task_force":
-            event.ignore()
-            return
-
-        # 任務部隊には艦艇のみ追加可能
-        if target_type == "task_force" and source_type != "ship":
+        # 艦隊には任務部隊のみ、任務部隊には艦艇のみ追加可能
+        if not self.fleet_model.can_move(source, target):
             event.ignore()
             return
 
@@ -706,102 +700,54 @@ class FleetView(QWidget):
 
     def fleet_tree_drop_event(self, event):
         """艦隊ツリーのドロップイベント"""
+        target = self.fleet_tree.indexAt(event.pos()).data(NODE_ROLE)
         if event.mimeData().hasFormat("application/x-design"):
             design_name = event.mimeData().data("application/x-design").data().decode()
-            target_item = self.fleet_tree.itemAt(event.pos())
-
-            if target_item:
-                data = target_item.data(0, Qt.UserRole)
-                if data and data.get("type") == "task_force":
-                    # 任務部隊にのみ艦艇を追加可能
-                    dialog = ShipDialog(self)
-                    if dialog.exec_():
-                        name, exp, is_pride = dialog.get_data()
-                        new_item = QTreeWidgetItem(target_item)
-                        new_item.setText(0, f"艦艇: {name} (Exp: {exp:.2f}, Pride: {is_pride})")
-                        new_item.setData(0, Qt.UserRole, {
-                            "type": "ship",
-                            "name": name,
-                            "exp": exp,
-                            "is_pride": is_pride,
-                            "design": design_name
-                        })
-                else:
-                    QMessageBox.warning(self, "警告", "艦艇は任務部隊にのみ追加できます。")
+            if target is not None and target.node_type == NODE_TASK_FORCE:
+                # 設計一覧の選択中の項目から設計データを取得（見つからない場合は設計名のみ）
+                design_item = self.design_list.currentItem()
+                design = design_name
+                if design_item and design_item.text() == design_name and design_item.data(Qt.UserRole):
+                    design = design_item.data(Qt.UserRole)
+                self.add_ship_with_dialog(target, design)
+            else:
+                QMessageBox.warning(self, "警告", "艦艇は任務部隊にのみ追加できます。")
             event.acceptProposedAction()
-        else:
-            # ツリー内の移動処理
-            source_item = self.fleet_tree.currentItem()
-            target_item = self.fleet_tree.itemAt(event.pos())
-
-            if source_item and target_item:
-                source_data = source_item.data(0, Qt.UserRole)
-                target_data = target_item.data(0, Qt.UserRole)
-
-                if source_data and target_data:
-                    source_type = source_data.get("type")
-                    target_type = target_data.get("type")
-
-                    # 移動の制限を確認
-                    if (target_type == "fleet" and source_type == "task_force") or \
-                            (target_type == "task_force" and source_type == "ship"):
-                        # 移動を実行（子要素を含めて）
-                        self.move_tree_item(source_item, target_item)
-                        event.acceptProposedAction()
-                    else:
-                        if target_type == "fleet":
-                            QMessageBox.warning(self, "警告", "艦隊には任務部隊のみ追加できます。")
-                        elif target_type == "task_force":
-                            QMessageBox.warning(self, "警告", "任務部隊には艦艇のみ追加できます。")
-                        event.ignore()
-
-    def move_tree_item(self, source_item, target_item):
-        """ツリーアイテムを移動（子要素を含めて）"""
-        # 一時的なリストに子要素を保存
-        children = []
-        while source_item.childCount() > 0:
-            child = source_item.takeChild(0)
-            children.append(child)
-
-        # 親から移動元を削除
-        parent = source_item.parent()
-        if parent:
-            parent.removeChild(source_item)
-        else:
-            self.fleet_tree.takeTopLevelItem(self.fleet_tree.indexOfTopLevelItem(source_item))
-
-        # 移動先に追加
-        target_item.addChild(source_item)
+            return
 
-        # 子要素を復元
-        for child in children:
-            source_item.addChild(child)
+        # ツリー内の移動処理（子要素を含めて末尾に移動）
+        source = self.selected_fleet_node()
+        if source is None or target is None:
+            event.ignore()
+            return
+        if self.fleet_model.can_move(source, target):
+            self.fleet_model.move(source, target)
+            # 移動元の行はモデルが移動済みのため、ビューに削除させない
+            event.setDropAction(Qt.CopyAction)
+            event.accept()
+        else:
+            if target.node_type == NODE_FLEET:
+                QMessageBox.warning(self, "警告", "艦隊には任務部隊のみ追加できます。")
+            elif target.node_type == NODE_TASK_FORCE:
+                QMessageBox.warning(self, "警告", "任務部隊には艦艇のみ追加できます。")
+            event.ignore()
 
     def fleet_tree_key_press_event(self, event):
         """艦隊ツリーのキーイベント処理"""
         if event.key() == Qt.Key_Backspace:
-            selected_items = self.fleet_tree.selectedItems()
-            if selected_items:
-                item = selected_items[0]
-                data = item.data(0, Qt.UserRole)
-                if data:
-                    item_type = data.get("type")
-                    if item_type in ["fleet", "task_force", "ship"]:
-                        reply = QMessageBox.question(
-                            self,
-                            "確認",
-                            f"{item_type}を削除してもよろしいですか？\n子要素も全て削除されます。",
-                            QMessageBox.Yes | QMessageBox.No,
-                            QMessageBox.No
-                        )
-                        if reply == QMessageBox.Yes:
-                            parent = item.parent()
-                            if parent:
-                                parent.removeChild(item)
-                            else:
-                                self.fleet_tree.takeTopLevelItem(self.fleet_tree.indexOfTopLevelItem(item))
+            node = self.selected_fleet_node()
+            if node is not None:
+                reply = QMessageBox.question(
+                    self,
+                    "確認",
+                    f"{node.node_type}を削除してもよろしいですか？\n子要素も全て削除されます。",
+                    QMessageBox.Yes | QMessageBox.No,
+                    QMessageBox.No
+                )
+                if reply == QMessageBox.Yes:
+                    self.fleet_model.remove(node)
         else:
-            QTreeWidget.keyPressEvent(self.fleet_tree, event)
+            QTreeView.keyPressEvent(self.fleet_tree, event)
 
     def add_fleet(self):
         """艦隊を追加"""
@@ -816,18 +762,17 @@ class FleetView(QWidget):
                         QMessageBox.warning(self, "警告", "艦隊は沿岸部の陸地にのみ配備できます。")
                         return
 
-                item = QTreeWidgetItem(self.fleet_tree)
-                item.setText(0, f"艦隊: {name} (Province: {province_id})")
-                item.setData(0, Qt.UserRole, {"type": "fleet", "name": name, "province_id": province_id})
+                self.fleet_model.add_fleet(name, province_id)
             except ValueError:
                 QMessageBox.warning(self, "警告", "Province IDは数値で入力してください。")
 
     def add_task_force(self):
-        """任務部隊を追加"""
-        selected = self.fleet_tree.currentItem()
-        if not selected:
+        """任務部隊を追加（任務部隊・艦艇を選択中の場合はその艦隊に追加）"""
+        selected = self.selected_fleet_node()
+        if selected is None:
             QMessageBox.warning(self, "警告", "艦隊を選択してください。")
             return
+        fleet = selected.fleet
 
         dialog = TaskForceDialog(self)
         if dialog.exec_():
@@ -840,17 +785,33 @@ class FleetView(QWidget):
                         QMessageBox.warning(self, "警告", "任務部隊は沿岸部の陸地にのみ配備できます。")
                         return
 
-                item = QTreeWidgetItem(selected)
-                item.setText(0, f"任務部隊: {name} (Province: {province_id})")
-                item.setData(0, Qt.UserRole, {"type": "task_force", "name": name, "province_id": province_id})
+                task_force = self.fleet_model.add_task_force(fleet, name, province_id)
+                self.fleet_tree.expand(self.fleet_tree.model().index_for_node(fleet))
+                self.fleet_tree.setCurrentIndex(self.fleet_tree.model().index_for_node(task_force))
             except ValueError:
                 QMessageBox.warning(self, "警告", "Province IDは数値で入力してください。")
 
-    def on_item_double_clicked(self, item, column):
+    def add_ship_with_dialog(self, task_force, design):
+        """艦艇追加ダイアログで入力した艦艇を任務部隊に追加（艦名は艦名リストから未使用のものを提案）"""
+        suggested_name = self.ship_names.allocate_for_design(design)[0]
+        dialog = ShipDialog(self, suggested_name)
+        if not dialog.exec_():
+            self.ship_names.release([suggested_name])
+            return
+        name, exp, is_pride = dialog.get_data()
+        if name != suggested_name:
+            self.ship_names.release([suggested_name])
+        # 2隻目以降は艦名リストから割り当て、まとめて追加する（通知は1回）。艦隊の誇りは1隻目だけにする
+        names = [name] + self.ship_names.allocate_for_design(design, dialog.get_count() - 1)
+        self.fleet_model.add_ships(task_force, [Ship(ship_name, exp, is_pride and i == 0, design)
+                                                for i, ship_name in enumerate(names)])
+        self.fleet_tree.expand(self.fleet_tree.model().index_for_node(task_force))
+
+    def on_item_double_clicked(self, index):
         """ツリーアイテムがダブルクリックされた時の処理"""
-        data = item.data(0, Qt.UserRole)
-        if data and data.get("type") in ["fleet", "task_force"]:
-            QMessageBox.information(self, "情報", f"選択: {data['name']}")
+        node = index.data(NODE_ROLE)
+        if node is not None and node.node_type in (NODE_FLEET, NODE_TASK_FORCE):
+            QMessageBox.information(self, "情報", f"選択: {node.name}")
 
     def on_design_double_clicked(self, item):
         """設計アイテムがダブルクリックされた時の処理"""
@@ -860,37 +821,20 @@ class FleetView(QWidget):
 
             design_data = item.data(Qt.UserRole)
             if design_data:
-                selected = self.fleet_tree.currentItem()
-                if selected:
-                    data = selected.data(0, Qt.UserRole)
-                    if data and data.get("type") == "task_force":
-                        # 艦艇追加ダイアログを表示
-                        dialog = ShipDialog(self)
-                        if dialog.exec_():
-                            name, exp, is_pride = dialog.get_data()
-                            new_item = QTreeWidgetItem(selected)
-                            year = design_data.get('year', '')
-                            year_str = f" ({year})" if year else ""
-                            design_name = design_data.get('design_name',
-                                                          design_data.get('hull_name', design_data.get('name', '不明')))
-                            ship_type = design_data.get('ship_type', design_data.get('hull', '不明'))
-                            new_item.setText(0,
-                                             f"艦艇: {name} (Exp: {exp:.2f}, Pride: {is_pride}) - {design_name} - {ship_type}{year_str}")
-                            new_item.setData(0, Qt.UserRole, {
-                                "type": "ship",
-                                "name": name,
-                                "exp": exp,
-                                "is_pride": is_pride,
-                                "design": design_data
-                            })
-                    else:
-                        QMessageBox.warning(self, "警告", "任務部隊を選択してください。")
+                selected = self.selected_fleet_node()
+                if selected is not None and selected.node_type == NODE_TASK_FORCE:
+                    # 艦艇追加ダイアログを表示
+                    self.add_ship_with_dialog(selected, design_data)
                 else:
                     QMessageBox.warning(self, "警告", "任務部隊を選択してください。")
         except Exception as e:
             QMessageBox.critical(self, "エラー", f"艦艇の追加中にエラーが発生しました：\n{str(e)}")
             self.logger.error(f"艦艇追加エラー: {e}")
 
+    def collect_fleet_data(self):
+        """編成から艦隊データ（fleet -> task_forces -> ships）を作成"""
+        return self.fleet_model.to_dict(self.current_country)
+
     def save_fleet_data(self):
         """艦隊データを保存"""
         if not self.current_country:
@@ -899,49 +843,7 @@ class FleetView(QWidget):
 
         try:
             # 艦隊ツリーからデータを収集
-            fleet_data = {
-                "country": self.current_country,
-                "fleets": []
-            }
-
-            # トップレベルのアイテム（艦隊）を処理
-            for i in range(self.fleet_tree.topLevelItemCount()):
-                fleet_item = self.fleet_tree.topLevelItem(i)
-                fleet_data_item = fleet_item.data(0, Qt.UserRole)
-
-                fleet = {
-                    "name": fleet_data_item["name"],
-                    "province_id": fleet_data_item["province_id"],
-                    "task_forces": []
-                }
-
-                # 任務部隊を処理
-                for j in range(fleet_item.childCount()):
-                    task_force_item = fleet_item.child(j)
-                    task_force_data = task_force_item.data(0, Qt.UserRole)
-
-                    task_force = {
-                        "name": task_force_data["name"],
-                        "province_id": task_force_data["province_id"],
-                        "ships": []
-                    }
-
-                    # 艦艇を処理
-                    for k in range(task_force_item.childCount()):
-                        ship_item = task_force_item.child(k)
-                        ship_data = ship_item.data(0, Qt.UserRole)
-
-                        ship = {
-                            "name": ship_data["name"],
-                            "exp": ship_data["exp"],
-                            "is_pride": ship_data["is_pride"],
-                            "design": ship_data["design"]
-                        }
-                        task_force["ships"].append(ship)
-
-                    fleet["task_forces"].append(task_force)
-
-                fleet_data["fleets"].append(fleet)
+            fleet_data = self.collect_fleet_data()
 
             # コントローラーを通じて保存
             if self.app_controller:
@@ -960,6 +862,44 @@ class FleetView(QWidget):
             QMessageBox.critical(self, "エラー", f"艦隊データの保存中にエラーが発生しました：\n{str(e)}")
             self.logger.error(f"艦隊データ保存エラー: {e}")
 
+    def export_naval_oob(self):
+        """編成ツリーの艦隊を現在のMODの編成ファイル（history/units/TAG_YYYY_naval.txt）に書き出す"""
+        if not self.current_country:
+            QMessageBox.warning(self, "警告", "国家が選択されていません。")
+            return
+        if not self.app_controller:
+            QMessageBox.warning(self, "警告", "アプリケーションコントローラーが設定されていません。")
+            return
+
+        reply = QMessageBox.question(
+            self, "確認",
+            f"{self.current_country}の編成ファイル（history/units/{self.current_country}_YYYY_naval.txt）に編成中の艦隊を書き出します。\n"
+            "MOD内編成の艦隊はそのまま残し、以前に書き出した艦隊だけを置き換えます。\n"
+            "書き換える前の元のファイルは .bak としてバックアップします。よろしいですか？",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+
+        try:
+            result = self.app_controller.export_naval_oob(self.collect_fleet_data())
+            if result is None:
+                QMessageBox.warning(self, "警告", "編成ファイルの書き出しに失敗しました。MODが選択されているか確認してください。")
+                return
+            if result.written:
+                message = f"{result.ship_count}隻の編成を書き出しました。\n" + "\n".join(result.written)
+                if result.backups:
+                    message += "\n\nバックアップ:\n" + "\n".join(result.backups)
+                QMessageBox.information(self, "成功", message)
+            else:
+                QMessageBox.information(self, "情報", "編成ファイルは最新です（変更はありません）。")
+            if result.skipped:
+                QMessageBox.warning(self, "警告", "プロヴィンスIDが数値でないため、次の艦隊・任務部隊は書き出していません。\n"
+                                    + "\n".join(result.skipped))
+        except Exception as e:
+            QMessageBox.critical(self, "エラー", f"編成ファイルの書き出し中にエラーが発生しました：\n{str(e)}")
+            self.logger.error(f"編成ファイル書き出しエラー: {e}")
+
     def load_fleet_data(self):
         """艦隊データを読み込み"""
         if not self.current_country:
@@ -973,7 +913,19 @@ class FleetView(QWidget):
                 return
 
             self.logger.info(f"艦隊データの読み込みを開始: {self.current_country}")
-            
+
+            # 集計用の設計の性能表を取得（データが変更されていなければキャッシュを使う）
+            design_stat_table = self.app_controller.get_design_stat_table()
+            self.fleet_statistics.set_table(design_stat_table, self.current_country)
+            self.mod_fleet_statistics.set_table(design_stat_table, self.current_country)
+            # 艦名リストを取得（使用中の艦名は編成の読み込み時に数え直される）
+            self.ship_names.set_lists(self.app_controller.get_ship_name_lists(), self.current_country)
+
+            # 保存済みの編成を読み込み、MOD内編成をクリア
+            saved_fleet_data = self.app_controller.load_fleet_data(self.current_country) or {}
+            self.fleet_model.load(saved_fleet_data.get("fleets") or [])
+            self.mod_fleet_model.clear()
+
             # 現在のMODを取得
             current_mod = self.app_controller.get_current_mod()
             if not current_mod or "path" not in current_mod:
@@ -998,14 +950,11 @@ class FleetView(QWidget):
                     designs_data.update(parser.parse_designs())
                     self.logger.info(f"設計データを読み込み: {len(designs_data)}件")
 
-            # 艦隊ツリーをクリア
-            self.fleet_tree.clear()
-            self.mod_fleet_tree.clear()
-
             # ファイルパターンに一致するファイルを検索
             import re
             pattern = re.compile(f"{self.current_country}_\\d{{4}}_(?:naval|Naval|Navy|navy)(?:_mtg)?\\.txt$")
             found_files = []
+            mod_fleets = []
 
             for filename in os.listdir(units_path):
                 if pattern.match(filename):
@@ -1027,81 +976,17 @@ class FleetView(QWidget):
                             fleets.sort(key=lambda x: x.get('date', '0000'))
 
                             for fleet in fleets:
-                                # 艦隊アイテムを作成
-                                fleet_item = QTreeWidgetItem(self.mod_fleet_tree)  # MOD内編成ツリーに追加
-                                fleet_name = fleet.get('name', '不明')
-                                # 艦隊名のオーバーライドを確認
-                                if isinstance(fleet_name, dict) and 'override' in fleet_name:
-                                    fleet_name = fleet_name['override']
-                                naval_base = fleet.get('naval_base', '不明')
-                                task_forces = fleet.get('task_force', [])
-                                if isinstance(task_forces, dict):
-                                    task_forces = [task_forces]
-
-                                total_ships = sum(len(tf.get('ship', [])) for tf in task_forces)
-                                fleet_item.setText(0, f"{fleet_name} - {naval_base} - {len(task_forces)}TF - {total_ships}隻")
-                                fleet_item.setData(0, Qt.UserRole, {
-                                    "type": "fleet",
-                                    "name": fleet_name,
-                                    "province_id": naval_base,
-                                    "date": date,
-                                    "file": filename,
-                                    "is_mod": True  # MOD内の編成であることを示すフラグ
-                                })
-                                self.logger.info(f"MOD内艦隊を追加: {fleet_name} (Province: {naval_base})")
-
-                                # 任務部隊を追加
-                                for task_force in task_forces:
-                                    task_force_item = QTreeWidgetItem(fleet_item)
-                                    task_force_name = task_force.get('name', '不明')
-                                    # 任務部隊名のオーバーライドを確認
-                                    if isinstance(task_force_name, dict) and 'override' in task_force_name:
-                                        task_force_name = task_force_name['override']
-                                    location = task_force.get('location', '不明')
-                                    ships = task_force.get('ship', [])
-                                    if isinstance(ships, dict):
-                                        ships = [ships]
-
-                                    task_force_item.setText(0, f"{task_force_name} - {location} - {len(ships)}隻")
-                                    task_force_item.setData(0, Qt.UserRole, {
-                                        "type": "task_force",
-                                        "name": task_force_name,
-                                        "province_id": location,
-                                        "is_mod": True
-                                    })
-                                    self.logger.info(f"MOD内任務部隊を追加: {task_force_name} (Province: {location})")
-
-                                    # 艦艇を追加
-                                    for ship in ships:
-                                        ship_item = QTreeWidgetItem(task_force_item)
-                                        ship_name = ship.get('name', '不明')
-                                        # 艦艇名のオーバーライドを確認
-                                        if isinstance(ship_name, dict) and 'override' in ship_name:
-                                            ship_name = ship_name['override']
-                                        definition = ship.get('definition', '不明')
-                                        exp_factor = ship.get('start_experience_factor', 0.0)
-
-                                        # 設計データから表示名を取得
-                                        version_name = self.get_display_name_from_design(definition, designs_data, self.current_country, ship)
-
-                                        ship_item.setText(0, f"{ship_name} - {definition} - {version_name} - Exp:{exp_factor}")
-                                        ship_item.setData(0, Qt.UserRole, {
-                                            "type": "ship",
-                                            "name": ship_name,
-                                            "exp": exp_factor,
-                                            "is_pride": self.check_pride_in_data(ship),
-                                            "design": definition,
-                                            "is_mod": True
-                                        })
-                                        self.logger.info(f"MOD内艦艇を追加: {ship_name} (設計: {definition})")
-
-                                # 艦隊アイテムを展開
-                                fleet_item.setExpanded(True)
+                                mod_fleets.append(self.mod_fleet_from_oob(fleet, date, filename, designs_data))
 
                     except Exception as e:
                         self.logger.error(f"ファイル {filename} のパース中にエラーが発生しました: {str(e)}")
                         continue
 
+            # MOD内編成を読み込み（艦隊は展開して表示）
+            self.mod_fleet_model.load(mod_fleets)
+            self.mod_fleet_tree.expandToDepth(0)
+            self.logger.info(f"MOD内編成を読み込み: {len(mod_fleets)}艦隊, {self.mod_fleet_model.ship_count()}隻")
+
             self.logger.info(f"艦隊ファイルの検索結果: {len(found_files)}件")
             self.logger.info(f"艦隊データを読み込み完了: {self.current_country}")
             
@@ -1114,6 +999,55 @@ class FleetView(QWidget):
             QMessageBox.critical(self, "エラー", f"艦隊データの読み込み中にエラーが発生しました：\n{str(e)}")
             self.logger.error(f"艦隊データ読み込みエラー: {e}")
 
+    def mod_fleet_from_oob(self, fleet, date, filename, designs_data):
+        """編成ファイルの fleet ブロックをMOD内編成の艦隊データに変換"""
+        fleet_name = fleet.get('name', '不明')
+        # 艦隊名のオーバーライドを確認
+        if isinstance(fleet_name, dict) and 'override' in fleet_name:
+            fleet_name = fleet_name['override']
+        task_forces = fleet.get('task_force', [])
+        if isinstance(task_forces, dict):
+            task_forces = [task_forces]
+
+        fleet_data = {
+            "name": fleet_name,
+            "province_id": fleet.get('naval_base', '不明'),
+            "date": date,
+            "file": filename,
+            "task_forces": []
+        }
+        for task_force in task_forces:
+            task_force_name = task_force.get('name', '不明')
+            # 任務部隊名のオーバーライドを確認
+            if isinstance(task_force_name, dict) and 'override' in task_force_name:
+                task_force_name = task_force_name['override']
+            ships = task_force.get('ship', [])
+            if isinstance(ships, dict):
+                ships = [ships]
+
+            task_force_data = {
+                "name": task_force_name,
+                "province_id": task_force.get('location', '不明'),
+                "ships": []
+            }
+            for ship in ships:
+                ship_name = ship.get('name', '不明')
+                # 艦艇名のオーバーライドを確認
+                if isinstance(ship_name, dict) and 'override' in ship_name:
+                    ship_name = ship_name['override']
+                definition = ship.get('definition', '不明')
+                task_force_data["ships"].append({
+                    "name": ship_name,
+                    "exp": ship.get('start_experience_factor', 0.0),
+                    "is_pride": self.check_pride_in_data(ship),
+                    "design": definition,
+                    # 設計データから表示名を取得
+                    "version_name": self.get_display_name_from_design(definition, designs_data,
+                                                                      self.current_country, ship)
+                })
+            fleet_data["task_forces"].append(task_force_data)
+        return fleet_data
+
     def get_display_name_from_design(self, definition, designs_data, nation_tag, ship_data):
         """設計データから表示名を取得"""
         try:
@@ -1222,11 +1156,13 @@ class FleetView(QWidget):
             # 国家リストを再読み込み
             self.load_countries()
             # 艦隊データをクリア
-            self.fleet_tree.clear()
+            self.fleet_model.clear()
+            self.mod_fleet_model.clear()
             # 設計リストをクリア
             self.design_list.clear()
             # 港湾一覧をクリア
             self.port_tree.clear()
+            self.port_items = {}
             # 現在の国家をリセット
             self.current_country = None
             self.country_combo.setCurrentIndex(-1)
@@ -1251,6 +1187,8 @@ class FleetView(QWidget):
 
     def toggle_mod_fleet_display(self):
         """MOD内の艦隊表示を切り替え"""
+        # 港湾一覧の集計にMOD内編成を含めるかが変わる
+        self.refresh_port_items()
         if self.show_mod_fleet_btn.isChecked():
             self.logger.info("MOD内編成の表示を有効化")
             # 艦隊表示ボタンがオンの場合は艦隊表示を更新
@@ -1262,153 +1200,49 @@ class FleetView(QWidget):
             if self.show_fleet_btn.isChecked():
                 self.update_fleet_display()
 
-    def update_fleet_display(self):
-        """艦隊表示を更新"""
+    def fleet_data_by_province(self, provinces=None):
+        """
+        マップ表示用の港湾 -> 艦隊データのリスト（MOD内編成の表示が有効な場合はMOD内の艦隊も含める）
+
+        Args:
+            provinces: 対象のプロビンスIDの集合（Noneの場合はすべて）
+        """
+        fleet_data_by_province = self.fleet_model.fleets_by_province(provinces)
+        if self.show_mod_fleet_btn.isChecked():
+            for prov_id, fleets in self.mod_fleet_model.fleets_by_province(provinces).items():
+                fleet_data_by_province.setdefault(prov_id, []).extend(fleets)
+        return fleet_data_by_province
+
+    def update_fleet_display(self, provinces=None):
+        """
+        艦隊表示を更新
+
+        Args:
+            provinces: 編成が変更されたプロビンスIDの集合（Noneの場合はマップの艦隊表示全体を設定し直す）
+        """
         if not self.current_country:
             self.logger.warning("国家が選択されていません")
             return
 
         try:
-            # 艦隊データをプロビンスごとに整理
-            fleet_data_by_province = {}
-            self.logger.info("艦隊表示の更新を開始")
-            
-            # 編集可能な艦隊ツリーからデータを収集
-            for i in range(self.fleet_tree.topLevelItemCount()):
-                fleet_item = self.fleet_tree.topLevelItem(i)
-                fleet_data = fleet_item.data(0, Qt.UserRole)
-                
-                if not fleet_data or "province_id" not in fleet_data:
-                    self.logger.warning(f"無効な艦隊データ: {fleet_data}")
-                    continue
-                
-                self.logger.info(f"艦隊データを処理: {fleet_data}")
-                prov_id = fleet_data["province_id"]
-                
-                if prov_id not in fleet_data_by_province:
-                    fleet_data_by_province[prov_id] = []
-                
-                fleet_info = {
-                    "name": fleet_data["name"],
-                    "province_id": prov_id,
-                    "task_forces": []
-                }
-                
-                # 任務部隊を収集
-                for j in range(fleet_item.childCount()):
-                    task_force_item = fleet_item.child(j)
-                    task_force_data = task_force_item.data(0, Qt.UserRole)
-                    
-                    if not task_force_data or "province_id" not in task_force_data:
-                        self.logger.warning(f"無効な任務部隊データ: {task_force_data}")
-                        continue
-                    
-                    self.logger.info(f"任務部隊データを処理: {task_force_data}")
-                    task_force_info = {
-                        "name": task_force_data["name"],
-                        "province_id": task_force_data["province_id"],
-                        "ships": []
-                    }
-                    
-                    # 艦艇を収集
-                    for k in range(task_force_item.childCount()):
-                        ship_item = task_force_item.child(k)
-                        ship_data = ship_item.data(0, Qt.UserRole)
-                        
-                        if not ship_data:
-                            self.logger.warning(f"無効な艦艇データ: {ship_data}")
-                            continue
-                        
-                        self.logger.info(f"艦艇データを処理: {ship_data}")
-                        ship_info = {
-                            "name": ship_data["name"],
-                            "exp": ship_data["exp"],
-                            "is_pride": ship_data["is_pride"],
-                            "design": ship_data["design"]
-                        }
-                        task_force_info["ships"].append(ship_info)
-                    
-                    fleet_info["task_forces"].append(task_force_info)
-                
-                fleet_data_by_province[prov_id].append(fleet_info)
-
-            # MOD内編成が有効な場合、MOD内の艦隊データも収集
-            if self.show_mod_fleet_btn.isChecked():
-                self.logger.info("MOD内編成のデータを収集")
-                for i in range(self.mod_fleet_tree.topLevelItemCount()):
-                    fleet_item = self.mod_fleet_tree.topLevelItem(i)
-                    fleet_data = fleet_item.data(0, Qt.UserRole)
-                    
-                    if not fleet_data or "province_id" not in fleet_data:
-                        self.logger.warning(f"無効なMOD内艦隊データ: {fleet_data}")
-                        continue
-                    
-                    self.logger.info(f"MOD内艦隊データを処理: {fleet_data}")
-                    prov_id = fleet_data["province_id"]
-                    
-                    if prov_id not in fleet_data_by_province:
-                        fleet_data_by_province[prov_id] = []
-                    
-                    fleet_info = {
-                        "name": fleet_data["name"],
-                        "province_id": prov_id,
-                        "task_forces": [],
-                        "is_mod": True  # MOD内の編成であることを示すフラグ
-                    }
-                    
-                    # 任務部隊を収集
-                    for j in range(fleet_item.childCount()):
-                        task_force_item = fleet_item.child(j)
-                        task_force_data = task_force_item.data(0, Qt.UserRole)
-                        
-                        if not task_force_data or "province_id" not in task_force_data:
-                            self.logger.warning(f"無効なMOD内任務部隊データ: {task_force_data}")
-                            continue
-                        
-                        self.logger.info(f"MOD内任務部隊データを処理: {task_force_data}")
-                        task_force_info = {
-                            "name": task_force_data["name"],
-                            "province_id": task_force_data["province_id"],
-                            "ships": [],
-                            "is_mod": True
-                        }
-                        
-                        # 艦艇を収集
-                        for k in range(task_force_item.childCount()):
-                            ship_item = task_force_item.child(k)
-                            ship_data = ship_item.data(0, Qt.UserRole)
-                            
-                            if not ship_data:
-                                self.logger.warning(f"無効なMOD内艦艇データ: {ship_data}")
-                                continue
-                            
-                            self.logger.info(f"MOD内艦艇データを処理: {ship_data}")
-                            ship_info = {
-                                "name": ship_data["name"],
-                                "exp": ship_data["exp"],
-                                "is_pride": ship_data["is_pride"],
-                                "design": ship_data["design"],
-                                "is_mod": True
-                            }
-                            task_force_info["ships"].append(ship_info)
-                        
-                        fleet_info["task_forces"].append(task_force_info)
-                    
-                    fleet_data_by_province[prov_id].append(fleet_info)
-            
-            self.logger.info(f"収集した艦隊データ: {fleet_data_by_province}")
-            
-            # マップに艦隊情報を表示
-            if self.map_widget:
+            if not self.map_widget:
+                self.logger.warning("map_widgetが設定されていません")
+                return
+
+            if provinces is not None and hasattr(self.map_widget, 'update_fleet_provinces'):
+                # 変更されたプロビンスの艦隊だけをマップに反映
+                self.map_widget.update_fleet_provinces(self.fleet_data_by_province(provinces), provinces)
+                return
+
+            fleet_data_by_province = self.fleet_data_by_province()
+            self.logger.info(f"艦隊表示を更新: {len(fleet_data_by_province)}個のプロビンス")
+            if hasattr(self.map_widget, 'set_fleet_data'):
                 self.map_widget.set_fleet_data(
                     fleet_data_by_province,
                     self.current_country,
                     self.show_mod_fleet_btn.isChecked()
                 )
-                self.logger.info("艦隊表示の更新が完了")
-            else:
-                self.logger.warning("map_widgetが設定されていません")
-            
+
         except Exception as e:
             self.logger.error(f"艦隊表示の更新中にエラーが発生しました: {e}")
             QMessageBox.critical(self, "エラー", f"艦隊表示の更新中にエラーが発生しました：\n{str(e)}")
@@ -1444,6 +1278,17 @@ class FleetView(QWidget):
             
             QMessageBox.information(self, "艦隊情報", details)
 
+    def trim_cache(self, ratio=0.5):
+        """メモリ逼迫時にマップの描画済みレイヤーを古い順に破棄する"""
+        if hasattr(self.map_widget, 'trim_cache'):
+            return self.map_widget.trim_cache(ratio)
+        return 0
+
+    def clear_cache(self):
+        """マップの描画済みレイヤーキャッシュをすべて破棄する"""
+        if hasattr(self.map_widget, 'clear_cache'):
+            self.map_widget.clear_cache()
+
 
 # ダイアログクラス群
 class FleetDialog(QDialog):
@@ -1507,9 +1352,10 @@ class TaskForceDialog(QDialog):
 
 
 class ShipDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, name=""):
         super().__init__(parent)
         self.initUI()
+        self.name_edit.setText(name)
 
     def initUI(self):
         self.setWindowTitle("艦艇追加")
@@ -1521,10 +1367,15 @@ class ShipDialog(QDialog):
         self.exp_spin.setSingleStep(0.1)
         self.exp_spin.setValue(0)
         self.pride_check = QCheckBox()
+        # 2隻目以降の艦名は艦名リストから自動で付ける
+        self.count_spin = QSpinBox()
+        self.count_spin.setRange(1, 999)
+        self.count_spin.setValue(1)
 
         layout.addRow("艦名:", self.name_edit)
         layout.addRow("経験値:", self.exp_spin)
         layout.addRow("艦隊の誇り:", self.pride_check)
+        layout.addRow("隻数:", self.count_spin)
 
         buttons = QHBoxLayout()
         ok_button = QPushButton("OK")
@@ -1538,4 +1389,7 @@ class ShipDialog(QDialog):
         layout.addRow(buttons)
 
     def get_data(self):
-        return self.name_edit.text(), self.exp_spin.value(), self.pride_check.isChecked()
\ No newline at end of file
+        return self.name_edit.text(), self.exp_spin.value(), self.pride_check.isChecked()
+
+    def get_count(self):
+        return self.count_spin.value()
\ No newline at end of file
@@ -0,0 +1,105 @@
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+
+from models.library_store import KIND_EQUIPMENT, KIND_HULL, KIND_DESIGN
+from models.search_index import KIND_MOD_VARIANT
+
+# 検索結果に表示する種別名
+KIND_LABELS = {
+    KIND_EQUIPMENT: "装備",
+    KIND_HULL: "船体",
+    KIND_DESIGN: "設計",
+    KIND_MOD_VARIANT: "MOD設計",
+}
+
+
+class GlobalSearchWidget(QWidget):
+    """サイドバーの全体検索ボックス（装備・船体・設計・MODの設計バリアントを名前・IDで検索）"""
+
+    # 検索結果の選択時（種別, レコードID, 詳細情報）
+    result_activated = pyqtSignal(str, str, object)
+
+    def __init__(self, parent=None, app_controller=None, max_results=30, debounce_ms=150, min_query_length=2):
+        super(GlobalSearchWidget, self).__init__(parent)
+        self.app_controller = app_controller
+        self.max_results = max_results
+        # 1文字の検索語はほとんどのレコードに一致して絞り込みにならないため、既定では2文字から検索する
+        self.min_query_length = min_query_length
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("検索（名前・ID）")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.on_text_changed)
+        self.search_edit.returnPressed.connect(self.on_return_pressed)
+        layout.addWidget(self.search_edit)
+
+        self.result_list = QListWidget()
+        self.result_list.setMaximumHeight(220)
+        self.result_list.itemActivated.connect(self.on_item_activated)
+        self.result_list.hide()
+        layout.addWidget(self.result_list)
+
+        # 入力のたびに検索しないよう、入力が止まってから検索する
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(debounce_ms)
+        self._search_timer.timeout.connect(self.run_search)
+
+        # 索引の作成が終わったら、入力中の検索語で検索し直す（作成中の検索は待たずに返るため）
+        if self.app_controller:
+            self.app_controller.search_index_ready.connect(self.on_search_index_ready)
+
+    def on_text_changed(self, text):
+        if len(text.strip()) >= self.min_query_length:
+            self._search_timer.start()
+        else:
+            self._search_timer.stop()
+            self.result_list.clear()
+            self.result_list.hide()
+
+    def run_search(self):
+        """検索を実行して結果を表示"""
+        self.result_list.clear()
+        query = self.search_edit.text().strip()
+        if len(query) < self.min_query_length or not self.app_controller:
+            self.result_list.hide()
+            return
+
+        results = self.app_controller.search_library(query, limit=self.max_results)
+        for result in results:
+            label = KIND_LABELS.get(result.kind, result.kind)
+            country = result.detail.get('country') or ''
+            text = f"[{label}] {result.name}"
+            if country:
+                text += f" ({country})"
+            item = QListWidgetItem(text)
+            item.setToolTip(f"{result.record_id} {result.detail.get('type') or ''}".strip())
+            item.setData(Qt.UserRole, (result.kind, result.record_id, result.detail))
+            self.result_list.addItem(item)
+
+        if not results:
+            building = self.app_controller.is_search_index_building()
+            self.result_list.addItem(QListWidgetItem("索引を作成中..." if building else "該当なし"))
+        self.result_list.show()
+
+    def on_search_index_ready(self):
+        if self.result_list.isVisible() and len(self.search_edit.text().strip()) >= self.min_query_length:
+            self.run_search()
+
+    def on_return_pressed(self):
+        """Enterキーで先頭の結果を開く"""
+        if self._search_timer.isActive():
+            self._search_timer.stop()
+            self.run_search()
+        if self.result_list.count():
+            self.on_item_activated(self.result_list.item(0))
+
+    def on_item_activated(self, item):
+        data = item.data(Qt.UserRole)
+        if data:
+            kind, record_id, detail = data
+            self.result_activated.emit(kind, record_id, detail)
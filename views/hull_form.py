@@ -7,6 +7,7 @@ import os
 import json
 import csv
 from utils.path_utils import get_data_dir
+from models.hull_model import HullModel
 
 class HullForm(QWidget):
     """船体登録フォーム"""
@@ -349,7 +350,6 @@ class HullForm(QWidget):
 
         # 従来の方法（AppControllerがない場合）
         try:
-            import os
             import json
 
             # 保存先ディレクトリの作成
@@ -662,12 +662,10 @@ class HullForm(QWidget):
 
         # IDが未設定の場合は新しいIDを生成
         if not hull_data.get('id') or hull_data.get('id') == '-':
-            base_dir = get_data_dir('hulls')
-            try:
-                next_id = len(os.listdir(base_dir)) + 1
-            except:
-                next_id = 1
-            hull_data['id'] = f"HULL{next_id:03d}"
+            if self.app_controller:
+                hull_data['id'] = self.app_controller.hull_model.get_next_id('HULL')
+            else:
+                hull_data['id'] = HullModel(get_data_dir('hulls')).get_next_id('HULL')
 
         # 数値型フィールドの変換
         numeric_fields = ['weight', 'length', 'width', 'power', 'speed', 'range',
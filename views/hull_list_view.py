@@ -1,13 +1,70 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-                             QPushButton, QTableWidget, QTableWidgetItem,
-                             QHeaderView, QMessageBox, QDialog, QFileDialog)
-from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot
-from PyQt5.QtGui import QColor
+                             QPushButton, QTableView, QLineEdit,
+                             QHeaderView, QMessageBox, QDialog, QFileDialog, QProgressDialog)
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QThread
 import os
 import json
 import csv
 
 from .hull_form import HullForm
+from .library_table_model import LibraryTableModel, LibraryProxyModel, RECORD_ID_ROLE, sort_number
+
+
+def _hull_background(hull_type):
+    """艦種に基づく背景色（軽い視認性向上）"""
+    if 'BB' in hull_type:
+        return (240, 220, 220)  # 薄い赤（戦艦）
+    elif 'CV' in hull_type:
+        return (220, 240, 220)  # 薄い緑（空母）
+    elif 'CA' in hull_type or 'CL' in hull_type:
+        return (220, 220, 240)  # 薄い青（巡洋艦）
+    elif 'DD' in hull_type:
+        return (240, 240, 220)  # 薄い黄（駆逐艦）
+    elif 'SS' in hull_type:
+        return (240, 220, 240)  # 薄い紫（潜水艦）
+    return (255, 255, 255)  # 白（その他）
+
+
+def _hull_row(hull):
+    """船体データを一覧の行（ID, 表示文字列, 並べ替え用の値, 背景色）に変換"""
+    hull_id = hull.get('id', '')
+    name = hull.get('name', '')
+    hull_type = hull.get('type', '')
+    year = hull.get('year', '')
+    country = hull.get('country', '')
+    weight = hull.get('weight', '')
+    speed = hull.get('speed', '')
+    display = [hull_id, name, hull_type, str(year), country, str(weight), str(speed)]
+    sort_values = [hull_id, name, hull_type, sort_number(year), country, sort_number(weight), sort_number(speed)]
+    return hull_id, display, sort_values, _hull_background(hull_type)
+
+
+class HullImportWorker(QThread):
+    """船体CSVインポート用のワーカースレッド"""
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+    def __init__(self, app_controller, file_path, json_dir=None):
+        super().__init__()
+        self.app_controller = app_controller
+        self.file_path = file_path
+        self.json_dir = json_dir
+
+    def run(self):
+        try:
+            result = self.app_controller.import_hulls_from_csv(
+                self.file_path,
+                progress_callback=self.progress.emit,
+                cancel_check=self.isInterruptionRequested,
+                json_dir=self.json_dir
+            )
+            if result is None:
+                self.error.emit("CSVファイルからデータをインポートできませんでした。")
+            else:
+                self.finished.emit(result)
+        except Exception as e:
+            self.error.emit(str(e))
 
 class HullListView(QWidget):
     """船体リスト表示ビュー"""
@@ -71,18 +128,36 @@ class HullListView(QWidget):
 
         main_layout.addLayout(header_layout)
 
-        # 船体一覧テーブル
-        self.hull_table = QTableWidget()
-        self.hull_table.setColumnCount(7)  # ID, 艦級名, 種別, 開発年, 開発国, 排水量, 速力
-        self.hull_table.setHorizontalHeaderLabels(["ID", "艦級名", "種別", "開発年", "開発国", "排水量(t)", "速力(kts)"])
+        # 絞り込み
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("絞り込み:"))
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("ID・艦級名・種別・開発国などで絞り込み")
+        self.filter_edit.textChanged.connect(self.on_filter_changed)
+        filter_layout.addWidget(self.filter_edit)
+        main_layout.addLayout(filter_layout)
+
+        # 船体一覧テーブル（ページ単位で遅延読み込み）
+        self.hull_table_model = LibraryTableModel(
+            ["ID", "艦級名", "種別", "開発年", "開発国", "排水量(t)", "速力(kts)"],
+            self._load_hull_page, _hull_row, parent=self
+        )
+        self.hull_proxy = LibraryProxyModel(self)
+        self.hull_proxy.setSourceModel(self.hull_table_model)
+
+        self.hull_table = QTableView()
+        self.hull_table.setModel(self.hull_proxy)
 
         # テーブルの設定
-        self.hull_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.hull_table.setSelectionMode(QTableWidget.SingleSelection)
-        self.hull_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.hull_table.setSelectionBehavior(QTableView.SelectRows)
+        self.hull_table.setSelectionMode(QTableView.SingleSelection)
+        self.hull_table.setEditTriggers(QTableView.NoEditTriggers)
         self.hull_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)  # 艦級名列を拡大
-        
-        # ソート機能を有効化
+        self.hull_table.verticalHeader().setDefaultSectionSize(
+            self.hull_table.fontMetrics().height() + 6)  # 行の高さを固定して描画を軽くする
+
+        # ソート機能を有効化（ID昇順以外で並べ替える場合は残りの行をすべて読み込む）
+        self.hull_table.horizontalHeader().setSortIndicator(0, Qt.AscendingOrder)
         self.hull_table.setSortingEnabled(True)
 
         # ダブルクリックでの選択処理
@@ -90,80 +165,50 @@ class HullListView(QWidget):
 
         main_layout.addWidget(self.hull_table)
 
-    def load_hull_list(self):
-        """船体リストの読み込み"""
-        # ソート機能を一時的に無効化（データ読み込み中のソートを防止）
-        self.hull_table.setSortingEnabled(False)
-        
-        self.hull_table.setRowCount(0)  # テーブルをクリア
-
+    def _load_hull_page(self, after_id, limit):
+        """一覧の1ページ分の船体データを取得"""
         # コントローラーから船体データを取得
         if self.app_controller:
-            hull_list = self.app_controller.get_all_hulls()
-        else:
-            # 従来の方法（モデル直接使用）
-            from models.hull_model import HullModel
-            hull_model = HullModel()
-            hull_list = hull_model.get_all_hulls()
-
-        # テーブルに追加
-        for row, hull in enumerate(hull_list):
-            self.hull_table.insertRow(row)
-
-            # IDセル
-            id_item = QTableWidgetItem(hull.get('id', ''))
-            self.hull_table.setItem(row, 0, id_item)
-
-            # 艦級名セル
-            name_item = QTableWidgetItem(hull.get('name', ''))
-            self.hull_table.setItem(row, 1, name_item)
-
-            # 種別セル
-            type_item = QTableWidgetItem(hull.get('type', ''))
-            self.hull_table.setItem(row, 2, type_item)
-
-            # 開発年セル
-            year_item = QTableWidgetItem(str(hull.get('year', '')))
-            year_item.setData(Qt.DisplayRole, hull.get('year', 0))  # 数値としてソート可能に
-            self.hull_table.setItem(row, 3, year_item)
-
-            # 開発国セル
-            country_item = QTableWidgetItem(hull.get('country', ''))
-            self.hull_table.setItem(row, 4, country_item)
-
-            # 排水量セル
-            weight_item = QTableWidgetItem(str(hull.get('weight', '')))
-            weight_item.setData(Qt.DisplayRole, hull.get('weight', 0.0))  # 数値としてソート可能に
-            self.hull_table.setItem(row, 5, weight_item)
-
-            # 速力セル
-            speed_item = QTableWidgetItem(str(hull.get('speed', '')))
-            speed_item.setData(Qt.DisplayRole, hull.get('speed', 0.0))  # 数値としてソート可能に
-            self.hull_table.setItem(row, 6, speed_item)
-
-            # 船体タイプによって背景色を変える（軽い視認性向上）
-            hull_type = hull.get('type', '')
-
-            # 艦種に基づいて色分け
-            if 'BB' in hull_type:
-                bg_color = QColor(240, 220, 220)  # 薄い赤（戦艦）
-            elif 'CV' in hull_type:
-                bg_color = QColor(220, 240, 220)  # 薄い緑（空母）
-            elif 'CA' in hull_type or 'CL' in hull_type:
-                bg_color = QColor(220, 220, 240)  # 薄い青（巡洋艦）
-            elif 'DD' in hull_type:
-                bg_color = QColor(240, 240, 220)  # 薄い黄（駆逐艦）
-            elif 'SS' in hull_type:
-                bg_color = QColor(240, 220, 240)  # 薄い紫（潜水艦）
-            else:
-                bg_color = QColor(255, 255, 255)  # 白（その他）
+            return self.app_controller.get_hull_page(after_id, limit)
 
-            # 背景色を設定
-            for col in range(self.hull_table.columnCount()):
-                self.hull_table.item(row, col).setBackground(bg_color)
-        
-        # ソート機能を再度有効化
-        self.hull_table.setSortingEnabled(True)
+        # 従来の方法（モデル直接使用）
+        from models.hull_model import HullModel
+        if not hasattr(self, '_hull_model'):
+            self._hull_model = HullModel()
+        return self._hull_model.get_hull_page(after_id, limit)
+
+    def load_hull_list(self):
+        """船体リストの読み込み（先頭のページのみ読み込み、残りはスクロールに応じて取得）"""
+        self.hull_table_model.reload()
+        if self.filter_edit.text():
+            self.hull_proxy.set_filter_text(self.filter_edit.text())
+
+    def on_filter_changed(self, text):
+        """絞り込み文字列変更時の処理"""
+        self.hull_proxy.set_filter_text(text)
+
+    def show_hull(self, hull_id):
+        """指定した船体を一覧で選択する（全体検索からの移動用）"""
+        if not self.hull_proxy.select_record(self.hull_table, hull_id):
+            return False
+        if self.filter_edit.text() and not self.hull_proxy.filter_text():
+            self.filter_edit.blockSignals(True)
+            self.filter_edit.clear()
+            self.filter_edit.blockSignals(False)
+        return True
+
+    def selected_hull(self):
+        """
+        選択中の船体のIDと艦級名を取得
+
+        Returns:
+            tuple: (船体ID, 艦級名)、未選択の場合は (None, None)
+        """
+        selected_rows = self.hull_table.selectionModel().selectedRows()
+        if not selected_rows:
+            return None, None
+        index = selected_rows[0]
+        return index.data(RECORD_ID_ROLE), index.sibling(index.row(), 1).data()
 
     def on_add_clicked(self):
         """新規追加ボタンの処理"""
@@ -194,15 +239,11 @@ class HullListView(QWidget):
     def on_edit_clicked(self):
         """編集ボタンの処理"""
         # 選択中の船体を取得
-        selected_rows = self.hull_table.selectionModel().selectedRows()
-        if not selected_rows:
+        hull_id, _ = self.selected_hull()
+        if not hull_id:
             QMessageBox.information(self, "情報", "編集する船体を選択してください。")
             return
 
-        # 選択中の船体ID
-        row = selected_rows[0].row()
-        hull_id = self.hull_table.item(row, 0).text()
-
         # 船体データを取得
         if self.app_controller:
             hull_data = self.app_controller.load_hull(hull_id)
@@ -242,16 +283,11 @@ class HullListView(QWidget):
     def on_delete_clicked(self):
         """削除ボタンの処理"""
         # 選択中の船体を取得
-        selected_rows = self.hull_table.selectionModel().selectedRows()
-        if not selected_rows:
+        hull_id, hull_name = self.selected_hull()
+        if not hull_id:
             QMessageBox.information(self, "情報", "削除する船体を選択してください。")
             return
 
-        # 選択中の船体ID
-        row = selected_rows[0].row()
-        hull_id = self.hull_table.item(row, 0).text()
-        hull_name = self.hull_table.item(row, 1).text()
-
         # 確認ダイアログ
         reply = QMessageBox.question(
             self, "削除確認",
@@ -327,7 +363,7 @@ class HullListView(QWidget):
                             os.makedirs(data_dir, exist_ok=True)
 
                             # キャッシュをクリア
-                            hull_model.hull_cache = {}
+                            hull_model.hull_cache.clear()
 
                             QMessageBox.information(self, "全削除完了", "すべての船体データを削除しました。")
                             self.load_hull_list()  # リストを更新
@@ -339,15 +375,11 @@ class HullListView(QWidget):
     def on_export_clicked(self):
         """エクスポートボタンの処理"""
         # 選択中の船体を取得
-        selected_rows = self.hull_table.selectionModel().selectedRows()
-        if not selected_rows:
+        hull_id, _ = self.selected_hull()
+        if not hull_id:
             QMessageBox.information(self, "情報", "エクスポートする船体を選択してください。")
             return
 
-        # 選択中の船体ID
-        row = selected_rows[0].row()
-        hull_id = self.hull_table.item(row, 0).text()
-
         # 船体データを取得
         if self.app_controller:
             hull_data = self.app_controller.load_hull(hull_id)
@@ -382,8 +414,9 @@ class HullListView(QWidget):
 
     def on_table_double_clicked(self, index):
         """テーブルダブルクリック時の処理"""
-        row = index.row()
-        hull_id = self.hull_table.item(row, 0).text()
+        hull_id = index.sibling(index.row(), 0).data(RECORD_ID_ROLE)
+        if not hull_id:
+            return
 
         # 選択シグナルを発行
         self.hull_selected.emit(hull_id)
@@ -391,6 +424,41 @@ class HullListView(QWidget):
         # 編集ダイアログを表示
         self.on_edit_clicked()
 
+    def start_import_worker(self, file_name, json_dir=None):
+        """ワーカースレッドでCSVインポートを開始する"""
+        self.import_progress_dialog = QProgressDialog("船体データをインポート中...", "キャンセル", 0, 100, self)
+        self.import_progress_dialog.setWindowTitle("CSVインポート")
+        self.import_progress_dialog.setWindowModality(Qt.WindowModal)
+        self.import_progress_dialog.setMinimumDuration(0)
+
+        self.import_worker = HullImportWorker(self.app_controller, file_name, json_dir)
+        self.import_worker.progress.connect(self.on_import_progress)
+        self.import_worker.finished.connect(self.on_import_finished)
+        self.import_worker.error.connect(self.on_import_error)
+        self.import_progress_dialog.canceled.connect(self.import_worker.requestInterruption)
+        self.import_worker.start()
+
+    def on_import_progress(self, processed, total):
+        """インポートの進捗を表示"""
+        if total > 0:
+            self.import_progress_dialog.setValue(int(processed * 100 / total))
+        self.import_progress_dialog.setLabelText(f"船体データをインポート中... ({processed}/{total}行)")
+
+    def on_import_finished(self, result):
+        """インポート完了時の処理"""
+        self.import_progress_dialog.reset()
+        if result.imported:
+            self.load_hull_list()  # リストを更新
+        if result.errors or not result.imported:
+            QMessageBox.warning(self, "インポート警告", result.summary())
+        else:
+            QMessageBox.information(self, "インポート完了", result.summary())
+
+    def on_import_error(self, message):
+        """インポート失敗時の処理"""
+        self.import_progress_dialog.reset()
+        QMessageBox.critical(self, "インポートエラー", f"CSVのインポートに失敗しました。\nエラー詳細: {message}")
+
     def on_import_clicked(self):
         """CSVインポートボタンの処理"""
         try:
@@ -426,14 +494,9 @@ class HullListView(QWidget):
 
             # インポート実行
             try:
-                # AppControllerを使用してCSVをインポート
+                # AppControllerを使用してCSVをインポート（UIを止めないようワーカースレッドで実行）
                 if self.app_controller:
-                    imported_hulls = self.app_controller.import_from_csv(file_name, json_export=json_export, json_dir=json_dir)
-                    if imported_hulls:
-                        QMessageBox.information(self, "インポート完了", f"{len(imported_hulls)}件の船体データをインポートしました。")
-                        self.load_hull_list()  # リストを更新
-                    else:
-                        QMessageBox.warning(self, "インポート警告", "CSVファイルからデータをインポートできませんでした。")
+                    self.start_import_worker(file_name, json_dir if json_export else None)
                     return
 
                 # 従来の方法（モデル直接使用）
@@ -0,0 +1,259 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QVariant
+from PyQt5.QtGui import QBrush, QColor
+
+DEFAULT_PAGE_SIZE = 256
+
+# レコードIDと並べ替え用の値を取り出すためのロール
+RECORD_ID_ROLE = Qt.UserRole + 1
+SORT_ROLE = Qt.UserRole + 2
+
+
+def sort_number(value):
+    """数値列の並べ替え用の値（数値でない場合は先頭に並べる）"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('-inf')
+
+
+class LibraryTableModel(QAbstractTableModel):
+    """
+    装備・船体などのライブラリ一覧用の遅延読み込みテーブルモデル
+
+    レコードはID順にページ単位で読み込み（canFetchMore/fetchMore）、スクロールで
+    末尾に近づいたときに次のページを取得する。各行は読み込み時に表示文字列と
+    並べ替え用の値に変換して保持するため、描画のたびにレコードを参照・整形しない。
+    """
+
+    def __init__(self, headers, page_loader, row_builder, page_size=DEFAULT_PAGE_SIZE, parent=None):
+        """
+        初期化
+
+        Args:
+            headers: 列見出しのリスト
+            page_loader: (after_key, limit) を受け取り、(キー順のレコードのリスト, 最後のレコードのキー) を返す関数。
+                キーは次のページの起点としてそのまま after_key に渡す（ストアの並び順のキー）
+            row_builder: レコードを (レコードID, 表示文字列のリスト, 並べ替え用の値のリスト, 背景色のRGBタプル) に変換する関数
+            page_size: 1回に読み込む件数
+        """
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.page_loader = page_loader
+        self.row_builder = row_builder
+        self.page_size = max(1, page_size)
+        self._rows = []
+        self._last_key = None
+        self._exhausted = False
+        self._brushes = {}
+        # 現在の並べ替え（列, 順序）。ID列の昇順は読み込み順と同じ
+        self._sort_key = (0, Qt.AscendingOrder)
+
+    def reload(self, page_loader=None, headers=None):
+        """読み込み済みの行を破棄して先頭から読み込み直す（並べ替え中の場合は全件を読み込んで並べ直す）"""
+        self.beginResetModel()
+        if page_loader is not None:
+            self.page_loader = page_loader
+        if headers is not None:
+            self.headers = list(headers)
+            if self._sort_key[0] >= len(self.headers):
+                self._sort_key = (0, Qt.AscendingOrder)
+        self._rows = []
+        self._last_key = None
+        self._exhausted = False
+        self.endResetModel()
+        if self._sort_key != (0, Qt.AscendingOrder):
+            self.sort(*self._sort_key)
+        elif self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and 0 <= section < len(self.headers):
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return QVariant()
+
+        record_id, display, sort_values, background, _ = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return display[index.column()]
+        if role == SORT_ROLE:
+            return sort_values[index.column()]
+        if role == RECORD_ID_ROLE:
+            return record_id
+        if role == Qt.BackgroundRole and background is not None:
+            return self._brush(background)
+        return QVariant()
+
+    def _brush(self, rgb):
+        brush = self._brushes.get(rgb)
+        if brush is None:
+            brush = self._brushes[rgb] = QBrush(QColor(*rgb))
+        return brush
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+
+        records, last_key = self.page_loader(self._last_key, self.page_size)
+        records = records or []
+        if len(records) < self.page_size:
+            self._exhausted = True
+
+        rows = []
+        for record in records:
+            try:
+                record_id, display, sort_values, background = self.row_builder(record)
+                # 絞り込み用に全列を連結した文字列も作っておく
+                search_text = "\t".join(display).lower()
+                rows.append((record_id, display, sort_values, background, search_text))
+            except Exception as e:
+                print(f"一覧の行の作成中にエラーが発生しました: {e}")
+        if not records:
+            return
+
+        # 次のページは最後のレコードのキーを起点に読み込む（変換に失敗したレコードも飛ばす）。
+        # キーが進まない場合は同じページを繰り返さないよう読み込みを終える
+        if last_key is None or (self._last_key is not None and last_key <= self._last_key):
+            self._exhausted = True
+        else:
+            self._last_key = last_key
+        if rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+
+    def fetch_all(self):
+        """残りのページをすべて読み込む（全件での並べ替え・絞り込み用）"""
+        while self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        保持している並べ替え用の値で行を並べ替える
+
+        ID列の昇順以外は未読み込みの行も対象にするため、先に残りのページをすべて読み込む。
+        """
+        if column < 0 or column >= len(self.headers):
+            return
+        if (column, order) == self._sort_key == (0, Qt.AscendingOrder):
+            return
+        self._sort_key = (column, order)
+        self.fetch_all()
+
+        self.layoutAboutToBeChanged.emit()
+        old_persistent = self.persistentIndexList()
+        old_rows = [index.row() for index in old_persistent]
+        order_map = sorted(range(len(self._rows)), key=lambda row: self._rows[row][2][column],
+                           reverse=(order == Qt.DescendingOrder))
+        self._rows = [self._rows[row] for row in order_map]
+        # 選択状態などを保つため、永続インデックスを新しい行位置に付け替える
+        new_positions = {old_row: new_row for new_row, old_row in enumerate(order_map)}
+        self.changePersistentIndexList(
+            old_persistent,
+            [self.index(new_positions.get(row, row), index.column()) for row, index in zip(old_rows, old_persistent)]
+        )
+        self.layoutChanged.emit()
+
+    def is_fully_loaded(self):
+        return self._exhausted
+
+    def record_id(self, row):
+        """行のレコードIDを取得"""
+        if 0 <= row < len(self._rows):
+            return self._rows[row][0]
+        return None
+
+    def locate(self, record_id):
+        """
+        レコードIDの行番号を取得（未読み込みの場合はそのIDを含むページまで読み込む）
+
+        Returns:
+            int: 行番号（見つからない場合は-1）
+        """
+        if self._sort_key == (0, Qt.AscendingOrder):
+            # ID順に読み込んでいるので、読み込み済みの最後のIDを超えるまで読み進めればよい
+            while self.canFetchMore(QModelIndex()) and (self._last_key is None or self._last_key < record_id):
+                self.fetchMore(QModelIndex())
+        for row, entry in enumerate(self._rows):
+            if entry[0] == record_id:
+                return row
+        return -1
+
+    def search_text(self, row):
+        """絞り込み用の全列を連結した文字列（小文字）を取得"""
+        if 0 <= row < len(self._rows):
+            return self._rows[row][4]
+        return ""
+
+
+class LibraryProxyModel(QSortFilterProxyModel):
+    """
+    LibraryTableModel用の並べ替え・絞り込みモデル
+
+    並べ替えは元のモデルに任せ（行ごとに保持した値をPythonのソートで並べるため、
+    比較のたびにdata()を呼ぶ標準の並べ替えより大幅に速い）、このモデルは元の順序のまま絞り込みだけを行う。
+    絞り込みは未読み込みの行も対象にするため、先に残りのページをすべて読み込む。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._filter_text = ""
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        source = self.sourceModel()
+        if source is not None:
+            source.sort(column, order)
+
+    def set_filter_text(self, text):
+        """全列を対象に文字列で絞り込む（大文字・小文字は区別しない）"""
+        text = (text or "").strip().lower()
+        source = self.sourceModel()
+        if source is not None and text:
+            source.fetch_all()
+        self._filter_text = text
+        self.invalidateFilter()
+
+    def filter_text(self):
+        return self._filter_text
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self._filter_text:
+            return True
+        return self._filter_text in self.sourceModel().search_text(source_row)
+
+    def select_record(self, view, record_id):
+        """
+        レコードIDの行を選択して表示する（絞り込みで隠れている場合は絞り込みを解除）
+
+        Returns:
+            bool: 行が見つかった場合True
+        """
+        source = self.sourceModel()
+        row = source.locate(record_id) if source is not None else -1
+        if row < 0:
+            return False
+        index = self.mapFromSource(source.index(row, 0))
+        if not index.isValid():
+            self.set_filter_text("")
+            index = self.mapFromSource(source.index(row, 0))
+        view.selectRow(index.row())
+        view.scrollTo(index)
+        return True
+
+    def record_id(self, proxy_index):
+        """プロキシ上のインデックスからレコードIDを取得"""
+        if not proxy_index.isValid():
+            return None
+        return self.data(proxy_index, RECORD_ID_ROLE)
@@ -0,0 +1,264 @@
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QPushButton, QComboBox,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QDoubleSpinBox, QGroupBox, QMessageBox)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+
+from models.loadout_optimizer import OBJECTIVE_MAX, OBJECTIVE_MIN, CONSTRAINT_MIN, CONSTRAINT_MAX
+
+# 制約の入力行数
+CONSTRAINT_ROWS = 4
+NO_SELECTION = "(なし)"
+
+
+def _format_value(value):
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+
+class LoadoutOptimizationWorker(QThread):
+    """装備構成の最適化用のワーカースレッド（探索自体はプロセスプールで行う）"""
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+    def __init__(self, app_controller, hull_data, slot_categories, objectives, constraints, time_limit,
+                 fixed_equipment_ids=()):
+        super().__init__()
+        self.app_controller = app_controller
+        self.hull_data = hull_data
+        self.slot_categories = slot_categories
+        self.fixed_equipment_ids = fixed_equipment_ids
+        self.objectives = objectives
+        self.constraints = constraints
+        self.time_limit = time_limit
+
+    def run(self):
+        try:
+            result = self.app_controller.optimize_loadout(
+                self.hull_data, self.slot_categories, self.objectives, self.constraints,
+                time_limit=self.time_limit, fixed_equipment_ids=self.fixed_equipment_ids
+            )
+            if result is None:
+                self.error.emit("装備構成の最適化に失敗しました。")
+            else:
+                self.finished.emit(result)
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class LoadoutOptimizerDialog(QDialog):
+    """
+    目的・制約を指定して、スロットごとに許可されたカテゴリーの装備から最適な組み合わせを探すダイアログ
+
+    見つかった組み合わせ（目的のパレートフロンティア）を一覧表示し、選んだものを設計に適用する。
+    """
+
+    def __init__(self, parent=None, app_controller=None, hull_data=None, slot_categories=None,
+                 stat_names=None, stat_descriptions=None, fixed_equipment_ids=None):
+        super(LoadoutOptimizerDialog, self).__init__(parent)
+        self.app_controller = app_controller
+        self.hull_data = hull_data or {}
+        self.slot_categories = slot_categories or {}
+        # 探索対象外のスロットに搭載済みの装備（性能値の計算に含める）
+        self.fixed_equipment_ids = list(fixed_equipment_ids or [])
+        self.stat_names = list(stat_names or [])
+        self.stat_descriptions = stat_descriptions or {}
+        self.worker = None
+        self.result = None
+        self.result_columns = []  # 結果に表示する性能値（探索開始時の目的・制約）
+        self.selected_loadout = None
+        self.setWindowTitle("装備構成の最適化")
+        self.resize(900, 600)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(
+            f"船体: {self.hull_data.get('name', '')} / 対象スロット: {', '.join(self.slot_categories)}"
+        ))
+
+        # 目的
+        objective_group = QGroupBox("目的")
+        objective_layout = QFormLayout()
+        self.objective_combos = []
+        for i in range(2):
+            row_layout = QHBoxLayout()
+            stat_combo = self._create_stat_combo(allow_empty=(i > 0))
+            sense_combo = QComboBox()
+            sense_combo.addItem("最大化", OBJECTIVE_MAX)
+            sense_combo.addItem("最小化", OBJECTIVE_MIN)
+            row_layout.addWidget(stat_combo)
+            row_layout.addWidget(sense_combo)
+            objective_layout.addRow(f"目的{i + 1}:", row_layout)
+            self.objective_combos.append((stat_combo, sense_combo))
+        if 'anti_air_attack' in self.stat_names:
+            self.objective_combos[0][0].setCurrentIndex(self.stat_names.index('anti_air_attack'))
+        objective_group.setLayout(objective_layout)
+        layout.addWidget(objective_group)
+
+        # 制約
+        constraint_group = QGroupBox("制約")
+        constraint_layout = QVBoxLayout()
+        self.constraint_rows = []
+        for _ in range(CONSTRAINT_ROWS):
+            row_layout = QHBoxLayout()
+            stat_combo = self._create_stat_combo(allow_empty=True)
+            op_combo = QComboBox()
+            op_combo.addItem("≥", CONSTRAINT_MIN)
+            op_combo.addItem("≤", CONSTRAINT_MAX)
+            value_spin = QDoubleSpinBox()
+            value_spin.setRange(-1e9, 1e9)
+            value_spin.setDecimals(2)
+            row_layout.addWidget(stat_combo)
+            row_layout.addWidget(op_combo)
+            row_layout.addWidget(value_spin)
+            constraint_layout.addLayout(row_layout)
+            self.constraint_rows.append((stat_combo, op_combo, value_spin))
+        constraint_group.setLayout(constraint_layout)
+        layout.addWidget(constraint_group)
+
+        # 実行
+        run_layout = QHBoxLayout()
+        run_layout.addWidget(QLabel("探索時間の上限(秒):"))
+        self.time_limit_spin = QDoubleSpinBox()
+        self.time_limit_spin.setRange(1, 600)
+        self.time_limit_spin.setValue(30)
+        run_layout.addWidget(self.time_limit_spin)
+        self.run_button = QPushButton("探索開始")
+        self.run_button.clicked.connect(self.run_optimization)
+        run_layout.addWidget(self.run_button)
+        run_layout.addStretch()
+        layout.addLayout(run_layout)
+
+        # 結果
+        self.result_table = QTableWidget()
+        self.result_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.result_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.result_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.result_table.verticalHeader().setVisible(False)
+        self.result_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.result_table.itemDoubleClicked.connect(self.apply_selected)
+        layout.addWidget(self.result_table)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        apply_button = QPushButton("適用")
+        apply_button.clicked.connect(self.apply_selected)
+        button_layout.addWidget(apply_button)
+        cancel_button = QPushButton("キャンセル")
+        cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(cancel_button)
+        layout.addLayout(button_layout)
+
+    def _create_stat_combo(self, allow_empty=False):
+        combo = QComboBox()
+        for name in self.stat_names:
+            description = self.stat_descriptions.get(name)
+            combo.addItem(f"{description} ({name})" if description else name, name)
+        if allow_empty:
+            combo.insertItem(0, NO_SELECTION, None)
+            combo.setCurrentIndex(0)
+        return combo
+
+    def objectives(self):
+        """入力された目的のリスト [(性能名, 'max' or 'min'), ...]"""
+        objectives = []
+        for stat_combo, sense_combo in self.objective_combos:
+            name = stat_combo.currentData()
+            if name and name not in [objective[0] for objective in objectives]:
+                objectives.append((name, sense_combo.currentData()))
+        return objectives
+
+    def constraints(self):
+        """入力された制約のリスト [(性能名, '>=' or '<=', 値), ...]"""
+        constraints = []
+        for stat_combo, op_combo, value_spin in self.constraint_rows:
+            name = stat_combo.currentData()
+            if name:
+                constraints.append((name, op_combo.currentData(), value_spin.value()))
+        return constraints
+
+    def run_optimization(self):
+        """ワーカースレッドで最適化を開始"""
+        if not self.app_controller or self.worker is not None:
+            return
+        objectives = self.objectives()
+        if not objectives:
+            QMessageBox.warning(self, "警告", "目的を指定してください。")
+            return
+
+        constraints = self.constraints()
+        self.result_columns = []
+        for name in [objective[0] for objective in objectives] + [constraint[0] for constraint in constraints]:
+            if name not in self.result_columns:
+                self.result_columns.append(name)
+
+        self.run_button.setEnabled(False)
+        self.status_label.setText("探索中...")
+        self.worker = LoadoutOptimizationWorker(self.app_controller, self.hull_data, self.slot_categories,
+                                                objectives, constraints, self.time_limit_spin.value(),
+                                                self.fixed_equipment_ids)
+        self.worker.finished.connect(self.on_optimization_finished)
+        self.worker.error.connect(self.on_optimization_error)
+        self.worker.start()
+
+    def _finish_worker(self):
+        if self.worker is not None:
+            self.worker.wait()
+            self.worker = None
+        self.run_button.setEnabled(True)
+
+    def on_optimization_finished(self, result):
+        self._finish_worker()
+        self.result = result
+        self.show_result()
+
+    def on_optimization_error(self, message):
+        self._finish_worker()
+        self.status_label.setText("")
+        QMessageBox.critical(self, "エラー", message)
+
+    def show_result(self):
+        """見つかった組み合わせを一覧に表示（目的・制約の性能値と、スロットごとの装備ID）"""
+        result = self.result
+        columns = self.result_columns
+        slot_ids = list(self.slot_categories)
+        headers = ["No."] + [self.stat_descriptions.get(name) or name for name in columns] + slot_ids
+
+        self.result_table.clear()
+        self.result_table.setColumnCount(len(headers))
+        self.result_table.setHorizontalHeaderLabels(headers)
+        self.result_table.setRowCount(len(result.loadouts))
+        for row, loadout in enumerate(result.loadouts):
+            values = [str(row + 1)] + [_format_value(loadout.stats.get(name, 0.0)) for name in columns]
+            values += [loadout.equipment_ids.get(slot_id, '') for slot_id in slot_ids]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if 0 < col <= len(columns):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.result_table.setItem(row, col, item)
+        self.result_table.resizeColumnsToContents()
+        if result.loadouts:
+            self.result_table.selectRow(0)
+
+        reduced = sum(total - kept for total, kept in result.candidate_counts.values())
+        status = (f"{len(result.loadouts)}件の組み合わせが見つかりました"
+                  f"（探索ノード {result.nodes:,}, {result.elapsed:.2f}秒, 優越される候補 {reduced}件を除外）")
+        if not result.complete:
+            status += " ※時間・ノード数の上限で探索を打ち切ったため、最適でない可能性があります"
+        self.status_label.setText(status if result.loadouts else "制約を満たす組み合わせが見つかりませんでした。")
+
+    def apply_selected(self, *args):
+        """選択した組み合わせを設計に適用して閉じる"""
+        if self.result is None or not self.result.loadouts:
+            return
+        row = self.result_table.currentRow()
+        if row < 0:
+            QMessageBox.information(self, "情報", "適用する組み合わせを選択してください。")
+            return
+        self.selected_loadout = self.result.loadouts[row]
+        self.accept()
+
+    def reject(self):
+        if self.worker is not None:
+            QMessageBox.information(self, "情報", "探索中です。完了するまでお待ちください。")
+            return
+        super(LoadoutOptimizerDialog, self).reject()
@@ -21,6 +21,7 @@ from views.fleet_view import FleetView
 from views.settings_view import SettingsView
 from views.nation_view import NationView
 from views.nation_details_view import NationDetailsView
+from views.global_search_widget import GlobalSearchWidget
 
 class MenuLoadingWorker(QThread):
     """メニュー読み込み用のワーカースレッド"""
@@ -115,6 +116,7 @@ class NavalDesignSystem(QMainWindow):
         self._memory_critical_threshold = 800  # MB
         self._last_cleanup_time = 0
         self._cleanup_interval = 60  # 秒
+        self._cache_trim_ratio = 0.5  # 警告レベル時にキャッシュを残す比率
         
         # ロガーの設定
         self.logger = logging.getLogger('NavalDesignSystem')
@@ -209,6 +211,11 @@ class NavalDesignSystem(QMainWindow):
         title_label.setAlignment(Qt.AlignCenter)
         sidebar_layout.addWidget(title_label)
 
+        # 全体検索
+        self.global_search = GlobalSearchWidget(sidebar_widget, self.app_controller)
+        self.global_search.result_activated.connect(self.open_search_result)
+        sidebar_layout.addWidget(self.global_search)
+
         # メニューリスト
         self.menu_list = QListWidget()
         self.menu_list.addItems([
@@ -391,10 +398,12 @@ class NavalDesignSystem(QMainWindow):
     def cleanup_resources(self):
         """不要なリソースの解放"""
         try:
-            # キャッシュのクリア
+            # キャッシュの削減（LRUキャッシュを持つビューは古いものから破棄）
             if hasattr(self, 'views'):
                 for view in self.views.values():
-                    if hasattr(view, 'clear_cache'):
+                    if hasattr(view, 'trim_cache'):
+                        view.trim_cache(self._cache_trim_ratio)
+                    elif hasattr(view, 'clear_cache'):
                         view.clear_cache()
             
             # 画像キャッシュのクリア
@@ -533,6 +542,30 @@ class NavalDesignSystem(QMainWindow):
             if 0 <= index < len(menu_texts):
                 self.statusBar().showMessage(f"{menu_texts[index]}ページを表示しています")
 
+    def open_search_result(self, kind, record_id, detail):
+        """全体検索の結果を対応するビューで開く"""
+        try:
+            if kind == "equipment":
+                self.show_view("equipment")
+                if not self.views["equipment"].show_equipment(record_id):
+                    self.statusBar().showMessage(f"装備 '{record_id}' が一覧に見つかりません")
+            elif kind == "hull":
+                self.show_view("hull_list")
+                if not self.views["hull_list"].show_hull(record_id):
+                    self.statusBar().showMessage(f"船体 '{record_id}' が一覧に見つかりません")
+            elif kind == "design":
+                design_data = self.app_controller.load_design(record_id) if self.app_controller else None
+                if design_data:
+                    self.views["design"].load_design_data(design_data)
+                    self.show_view("design")
+            elif kind == "mod_variant":
+                country = (detail or {}).get('country')
+                if country:
+                    self.views["nation_details"].load_nation_data(country)
+                    self.show_view("nation_details")
+        except Exception as e:
+            self.logger.error(f"検索結果を開けませんでした: {kind}/{record_id} - {e}")
+
     def closeEvent(self, event: QCloseEvent):
         """ウィンドウが閉じられる時の処理"""
         try: